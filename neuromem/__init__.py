@@ -17,6 +17,7 @@ except ImportError:
     SentenceTransformerEmbedding = None
 from neuromem.services.graph_memory import GraphMemoryService
 from neuromem.services.reflection import ReflectionService
+from neuromem.sharding import ShardRouter
 from neuromem.storage.base import ObjectStorage
 from neuromem.storage.s3 import S3Storage
 
@@ -24,6 +25,7 @@ __all__ = [
     "ExtractionStrategy",
     "NeuroMemory",
     "Database",
+    "ShardRouter",
     "EmbeddingProvider",
     "LLMProvider",
     "SiliconFlowEmbedding",
@@ -8,7 +8,7 @@ import time
 from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Optional
 
 from neuromem.db import Database
 from neuromem.providers.embedding import EmbeddingProvider
@@ -17,6 +17,20 @@ from neuromem.storage.base import ObjectStorage
 
 logger = logging.getLogger(__name__)
 
+# Graph triples considered for the recall coverage boost (highest confidence first)
+_GRAPH_BOOST_MAX_TRIPLES = 50
+
+# Digest LLM calls in flight per digest() run
+_DIGEST_CONCURRENCY = 3
+
+# Optional recall stages, selected with recall(include=...):
+#   profile   - profile_view() -> user_profile / active_traits
+#   context   - query context inference for the context boost
+#   graph     - graph triple search, coverage boost and graph_context
+#   related   - 1-hop Zettelkasten expansion of related_memories
+#   reinforce - recall-as-reinforcement of traits in the results
+RECALL_PARTS = frozenset({"profile", "context", "graph", "related", "reinforce"})
+
 
 # -- Instrumented provider proxies (for on_llm_call / on_embedding_call) --
 
@@ -175,6 +189,8 @@ class ConversationsFacade:
         _graph_enabled: bool = False,
         _get_on_extraction=None,
         _user_tasks: dict[str, list[asyncio.Task]] | None = None,
+        _entity_index=None,
+        _context_centroids=None,
     ):
         self._db = db
         self._on_message_added = _on_message_added
@@ -186,6 +202,8 @@ class ConversationsFacade:
         self._graph_enabled = _graph_enabled
         self._get_on_extraction = _get_on_extraction
         self._user_tasks = _user_tasks
+        self._entity_index = _entity_index
+        self._context_centroids = _context_centroids
 
     def _track_task(self, user_id: str, task: asyncio.Task) -> None:
         """Register a background task under user_id for cancellation support."""
@@ -287,6 +305,8 @@ class ConversationsFacade:
                 self._embedding,
                 self._llm,
                 graph_enabled=self._graph_enabled,
+                entity_index=self._entity_index,
+                context_centroids=self._context_centroids,
             )
             await extraction_svc.extract_from_messages(user_id, messages)
 
@@ -352,6 +372,8 @@ class ConversationsFacade:
                 self._embedding,
                 self._llm,
                 graph_enabled=self._graph_enabled,
+                entity_index=self._entity_index,
+                context_centroids=self._context_centroids,
             )
             result = await extraction_svc.extract_from_messages(user_id, messages)
 
@@ -444,6 +466,12 @@ class NeuroMemory:
         on_llm_call: Callable[[dict], Any] | None = None,
         on_embedding_call: Callable[[dict], Any] | None = None,
         encryption=None,
+        reinforcement_flush_interval: float = 5.0,
+        access_flush_interval: float = 5.0,
+        access_sample_rate: float = 1.0,
+        profile_cache_size: int = 1024,
+        fts_tokenizer: str = "simple",
+        partitions: int = 0,
     ):
         """
         Args:
@@ -460,12 +488,36 @@ class NeuroMemory:
             on_embedding_call: Optional callback invoked after each internal embedding call.
                 Receives a dict with keys: text_count, duration_ms, model, success.
                 Can be sync or async.
+            reinforcement_flush_interval: Seconds between bulk writes of
+                recall-as-reinforcement hits. Traits returned by recall() are
+                counted in memory and reinforced in one UPDATE per interval
+                (and on close()).
+            access_flush_interval: Seconds between batched writes of
+                access_count / last_accessed_at for memories returned by
+                searches; cold_memories() may lag by at most this long.
+            access_sample_rate: Fraction of searches whose hits are counted
+                (each weighted by 1 / rate). 1.0 records every access.
+            profile_cache_size: Users whose assembled profile_view() is kept
+                in process, revalidated against the stored version on each
+                read. 0 disables the cache.
+            fts_tokenizer: Tokenizer of the stored full-text column used for
+                keyword search when pg_search is unavailable: "simple", or
+                "cjk" to also index Chinese/Japanese/Korean character
+                bigrams. Changing it regenerates the column on init().
+            partitions: Hash-partition memories and conversations by user_id
+                into this many partitions (each with its own vector index).
+                init() converts existing unpartitioned tables; 0 keeps them
+                unpartitioned. To spread users over separate databases, see
+                neuromem.ShardRouter.
         """
         # Set embedding dimensions before any model import
         import neuromem.models as _models
         _models._embedding_dims = embedding.dims
 
-        self._db = Database(database_url, pool_size=pool_size, echo=echo)
+        self._db = Database(
+            database_url, pool_size=pool_size, echo=echo,
+            fts_tokenizer=fts_tokenizer, partitions=partitions,
+        )
         self._encryption = encryption
         if encryption:
             self._db.setup_encryption(encryption)
@@ -487,14 +539,33 @@ class NeuroMemory:
         self._active_sessions: set[tuple[str, str]] = set()
         self._digest_counts: dict[str, int] = {}      # user_id -> count for reflection_interval
         self._user_tasks: dict[str, list[asyncio.Task]] = {}  # per-user background tasks (cancel/await on close)
+        self._scheduler = None  # ReflectionScheduler, see reflection_scheduler()
+
+        # Recall-as-reinforcement hits, written in bulk
+        from neuromem.services.trait_engine import ReinforcementBuffer
+        self._reinforcements = ReinforcementBuffer(self._db, flush_interval=reinforcement_flush_interval)
+
+        # Access tracking for search hits, written in batches off the read path
+        from neuromem.services.search import AccessTracker
+        self._access_tracker = AccessTracker(
+            self._db, flush_interval=access_flush_interval, sample_rate=access_sample_rate,
+        )
+
+        # Materialized profile views, cached per user and checked by version
+        from neuromem.services.profile_view import ProfileCache
+        self._profile_cache = ProfileCache(max_users=profile_cache_size) if profile_cache_size > 0 else None
 
         # Embedding cache for query deduplication (reduces API calls)
         self._embedding_cache: OrderedDict[str, list[float]] = OrderedDict()
         self._embedding_cache_max_size = 100  # True LRU
 
-        # Context inference service (lazy prototype initialization)
+        # Context inference service (lazy prototype initialization, persisted per model)
         from neuromem.services.context import ContextService
-        self._context_service = ContextService(self._embedding)
+        self._context_service = ContextService(self._embedding, self._db)
+
+        # Canonical graph-entity embeddings for alias resolution
+        from neuromem.services.graph_memory import EntityIndex
+        self._entity_index = EntityIndex()
 
         # Set up callbacks if extraction is configured and LLM is available
         _has_extraction = bool(extraction and llm)
@@ -519,6 +590,8 @@ class NeuroMemory:
             _graph_enabled=graph_enabled,
             _get_on_extraction=lambda: self._on_extraction,
             _user_tasks=self._user_tasks,
+            _entity_index=self._entity_index,
+            _context_centroids=self._context_service.centroids,
         )
         self.graph = GraphFacade(self._db)
 
@@ -648,15 +721,19 @@ class NeuroMemory:
         logger.info("cancel_user_tasks[%s]: cancelled %d tasks", user_id, cancelled)
         return cancelled
 
-    async def init(self, schema: str | None = None) -> None:
+    async def init(self, schema: str | None = None, warmup: bool = False) -> None:
         """Initialize database tables and optional storage.
 
         Args:
             schema: Target schema for table creation (multi-tenant use).
+            warmup: Load (or compute and store) the context prototypes now
+                instead of on the first recall.
         """
         await self._db.init(schema=schema)
         if self._storage:
             await self._storage.init()
+        if warmup:
+            await self._context_service.ensure_prototypes()
 
     async def close(self) -> None:
         """Close database connections. Triggers extraction if on_shutdown is set."""
@@ -672,6 +749,9 @@ class NeuroMemory:
         self._active_sessions.clear()
         self._msg_counts.clear()
 
+        if self._scheduler is not None:
+            await self._scheduler.stop()
+
         # Await all pending background tasks before closing DB
         all_tasks = [t for tasks in self._user_tasks.values() for t in tasks if not t.done()]
         if all_tasks:
@@ -679,8 +759,19 @@ class NeuroMemory:
             await asyncio.gather(*all_tasks, return_exceptions=True)
         self._user_tasks.clear()
 
+        # Bounded final flush of buffered recall reinforcements and access counts
+        await self._reinforcements.close()
+        await self._access_tracker.close()
         await self._db.close()
 
+    async def flush_reinforcements(self) -> int:
+        """Write buffered recall-as-reinforcement hits now.
+
+        Returns:
+            Number of traits updated.
+        """
+        return await self._reinforcements.flush()
+
     async def __aenter__(self) -> "NeuroMemory":
         await self.init()
         return self
@@ -724,16 +815,11 @@ class NeuroMemory:
         self._embedding_cache.clear()
         logger.info("Embedding cache cleared")
 
-    def _decrypt_content(self, content: str) -> str:
-        """Decrypt content if encryption is enabled and value is encrypted."""
+    def _decrypt_contents(self, contents: list[str]) -> list[str]:
+        """Decrypt contents if encryption is enabled; each distinct DEK is unwrapped once."""
         if not self._encryption:
-            return content
-        from neuromem.db import _is_encrypted
-        if not _is_encrypted(content):
-            return content
-        import json
-        envelope = json.loads(content)
-        return self._encryption.decrypt(envelope)
+            return contents
+        return self._encryption.decrypt_many(contents)
 
     # -- Auto-extraction internals --
 
@@ -792,7 +878,12 @@ class NeuroMemory:
                 "Auto-digest triggered for user=%s (interval=%d)",
                 user_id, self._reflection_interval,
             )
-            await self.digest(user_id, background=True)
+            if self._scheduler is not None:
+                await self._scheduler.enqueue(user_id, trigger_type="interval", run_digest=True)
+            else:
+                await self.digest(user_id, background=True)
+            if self._graph_enabled:
+                await self.analyze_graph(user_id, background=True)
 
     async def _do_extraction(self, user_id: str, session_id: str) -> None:
         """Extract memories from unprocessed messages in a session."""
@@ -862,7 +953,10 @@ class NeuroMemory:
         from neuromem.services.search import SearchService
 
         async with self._db.session() as session:
-            svc = SearchService(session, self._embedding, self._db.pg_search_available, encryption=self._encryption)
+            svc = SearchService(
+                session, self._embedding, self._db.pg_search_available,
+                encryption=self._encryption, access_tracker=self._access_tracker,
+            )
             record = await svc.add_memory(user_id, content, memory_type, metadata)
 
             # Conflict detection for fact-type memories
@@ -939,6 +1033,8 @@ class NeuroMemory:
             svc = MemoryExtractionService(
                 session, self._embedding, self._llm,
                 graph_enabled=self._graph_enabled,
+                entity_index=self._entity_index,
+                context_centroids=self._context_service.centroids,
             )
             result = await svc.extract_from_messages(user_id, messages)
             # Mark messages as extracted so they won't be re-processed
@@ -1013,6 +1109,7 @@ class NeuroMemory:
         include_conversations: bool = False,
         as_of: datetime | None = None,
         current_emotion: dict | None = None,
+        include: Iterable[str] | None = None,
     ) -> dict:
         """Hybrid recall: memories + graph, merged and deduplicated.
 
@@ -1034,6 +1131,12 @@ class NeuroMemory:
             as_of: Time-travel query — recall memories valid at this point
                 in time. When None (default), only returns currently valid
                 memories. Must be a timezone-aware datetime.
+            include: Optional stages to run, a subset of RECALL_PARTS
+                ("profile", "context", "graph", "related", "reinforce").
+                None (default) runs all of them. Skipped stages issue no
+                queries; their result keys keep their shape but are empty
+                (inferred_context None). ``include=()`` is the cheapest
+                recall: one hybrid search, see recall_fast().
 
         Returns:
             {
@@ -1044,8 +1147,14 @@ class NeuroMemory:
             }
         """
         from neuromem.services.search import DEFAULT_DECAY_RATE
+        from neuromem.services.multi_pattern import MultiPatternMatcher
         from neuromem.services.temporal import TemporalExtractor
 
+        parts = RECALL_PARTS if include is None else frozenset(include)
+        unknown = parts - RECALL_PARTS
+        if unknown:
+            raise ValueError(f"Unknown recall parts: {sorted(unknown)}; expected a subset of {sorted(RECALL_PARTS)}")
+
         # Compute query embedding once, reuse for all parallel searches
         query_embedding = await self._cached_embed(query)
 
@@ -1057,12 +1166,16 @@ class NeuroMemory:
         _decay = decay_rate or DEFAULT_DECAY_RATE
 
         # Infer context from query (zero extra latency - reuses query_embedding)
-        await self._context_service.ensure_prototypes()
-        inferred_context, context_confidence = self._context_service.infer_context(
-            query_embedding, query_text=query
-        )
+        inferred_context: str | None = None
+        context_confidence = 0.0
+        if "context" in parts:
+            await self._context_service.ensure_prototypes()
+            await self._context_service.ensure_user_centroids(user_id)
+            inferred_context, context_confidence = self._context_service.infer_context(
+                query_embedding, query_text=query, user_id=user_id,
+            )
 
-        # Parallel fetch: memories + profile (+ conversations + graph if enabled)
+        # Parallel fetch: memories (+ profile + conversations + graph if enabled)
         coros = [
             self._fetch_vector_memories(
                 user_id, query, limit, query_embedding, _event_after, _event_before, _decay,
@@ -1074,26 +1187,33 @@ class NeuroMemory:
                 query_context=inferred_context,
                 context_confidence=context_confidence,
             ),
-            self.profile_view(user_id),
         ]
+        profile_idx: int | None = None
         conv_idx: int | None = None
         graph_idx: int | None = None
+        if "profile" in parts:
+            profile_idx = len(coros)
+            coros.append(self.profile_view(user_id))
         if include_conversations:
             conv_idx = len(coros)
             coros.append(self._search_conversations(user_id, query, limit, query_embedding=query_embedding))
-        if self._graph_enabled:
+        if self._graph_enabled and "graph" in parts:
             graph_idx = len(coros)
             coros.append(self._fetch_graph_memories(user_id, query, limit, as_of=as_of))
 
         results = await asyncio.gather(*coros, return_exceptions=True)
 
         vector_results: list[dict] = results[0] if not isinstance(results[0], Exception) else []
-        user_profile: dict = results[1] if not isinstance(results[1], Exception) else {"facts": {}, "traits": [], "recent_mood": None}
+        user_profile: dict = (
+            results[profile_idx]
+            if profile_idx is not None and not isinstance(results[profile_idx], Exception)
+            else {"facts": {}, "traits": [], "recent_mood": None}
+        )
         conversation_results: list[dict] = (
             results[conv_idx] if conv_idx is not None and not isinstance(results[conv_idx], Exception) else []
         )
         graph_results: list[dict] = []
-        if self._graph_enabled and graph_idx is not None:
+        if graph_idx is not None:
             raw = results[graph_idx]
             if isinstance(raw, Exception):
                 logger.warning(f"Graph search failed: {raw}")
@@ -1104,12 +1224,28 @@ class NeuroMemory:
             if isinstance(r, Exception):
                 logger.warning("recall fetch[%d] failed: %s", i, r)
 
-        # Build graph triples for coverage boost
-        graph_triples = [
-            (t.get("subject", "").lower(), t.get("relation", ""), t.get("object", "").lower())
-            for t in graph_results
-            if t.get("subject") and t.get("object")
-        ]
+        # Build graph triples for coverage boost: top-T by confidence, with one
+        # multi-pattern matcher over all subjects/objects so each result is
+        # scanned once instead of once per triple
+        boost_triples = sorted(
+            (t for t in graph_results if t.get("subject") and t.get("object")),
+            key=lambda t: float(t.get("confidence", 0.5)),
+            reverse=True,
+        )[:_GRAPH_BOOST_MAX_TRIPLES]
+        term_ids: dict[str, int] = {}
+        triple_terms: list[tuple[int, int]] = []  # (subject term, object term)
+        term_triples: list[list[int]] = []  # term -> triples mentioning it
+        for t_idx, t in enumerate(boost_triples):
+            ids = []
+            for term in (t["subject"].lower(), t["object"].lower()):
+                if term not in term_ids:
+                    term_ids[term] = len(term_ids)
+                    term_triples.append([])
+                ids.append(term_ids[term])
+                if t_idx not in term_triples[ids[-1]]:
+                    term_triples[ids[-1]].append(t_idx)
+            triple_terms.append((ids[0], ids[1]))
+        boost_matcher = MultiPatternMatcher(term_ids) if boost_triples else None
 
         # Deduplicate by content
         seen_contents: set[str] = set()
@@ -1153,12 +1289,13 @@ class NeuroMemory:
                         entry["content"] = f"{content}. {sentiment_str}"
 
                 # Graph triple coverage boost (additive)
-                if graph_triples:
+                if boost_matcher is not None:
                     boost = 0.0
-                    content_lower = content.lower()
-                    for subj, _rel, obj in graph_triples:
-                        subj_in = subj in content_lower
-                        obj_in = obj in content_lower
+                    present = boost_matcher.find(content.lower())
+                    hit_triples = {i for term in present for i in term_triples[term]}
+                    for subj_id, obj_id in (triple_terms[i] for i in sorted(hit_triples)):
+                        subj_in = subj_id in present
+                        obj_in = obj_id in present
                         if subj_in and obj_in:
                             boost += 0.10
                         elif subj_in or obj_in:
@@ -1173,7 +1310,7 @@ class NeuroMemory:
         # Zettelkasten: 1-hop related memory expansion
         related_ids_to_fetch: list[str] = []
         existing_ids = {r.get("id") for r in merged if r.get("id")}
-        for r in list(merged):
+        for r in (list(merged) if "related" in parts else []):
             related = (r.get("metadata") or {}).get("related_memories", [])
             for link in related[:3]:
                 linked_id = link.get("id")
@@ -1224,8 +1361,8 @@ class NeuroMemory:
                     merged.append(entry)
 
         # Graph triples participate in unified ranking
-        # Scale confidence by 0.85 to preserve ranking differentiation
-        # while keeping graph_fact scores below top vector results
+        # Scale confidence by 0.80-0.85 (by node importance) to preserve ranking
+        # differentiation while keeping graph_fact scores below top vector results
         for triple in graph_results:
             subj = triple.get("subject", "")
             rel = triple.get("relation", "")
@@ -1234,7 +1371,8 @@ class NeuroMemory:
             if triple_content not in seen_contents:
                 seen_contents.add(triple_content)
                 confidence = float(triple.get("confidence", 0.5))
-                base_score = confidence * 0.85
+                importance = float(triple.get("importance", 1.0))
+                base_score = confidence * (0.80 + 0.05 * importance)
                 merged.append({
                     "content": triple_content,
                     "score": round(base_score, 4),
@@ -1252,30 +1390,13 @@ class NeuroMemory:
             if r.get("subject") and r.get("relation") and r.get("object")
         ]
 
-        # Recall-as-reinforcement: async micro-reinforce traits hit by recall
+        # Recall-as-reinforcement: buffered micro-reinforcement of traits hit by recall
         trait_ids_in_results = [
             r["id"] for r in vector_results
             if r.get("memory_type") == "trait" and r.get("id")
-        ]
-        if trait_ids_in_results and self._embedding:
-            async def _reinforce_recalled_traits():
-                try:
-                    from neuromem.services.trait_engine import TraitEngine
-                    async with self._db.session() as sess:
-                        engine = TraitEngine(sess, self._embedding)
-                        for tid in trait_ids_in_results:
-                            await engine.reinforce_trait(
-                                trait_id=str(tid),
-                                evidence_ids=[],
-                                quality_grade="D",
-                                cycle_id="recall_reinforcement",
-                            )
-                        await sess.commit()
-                except Exception as e:
-                    logger.warning("recall-as-reinforcement failed: %s", e)
-
-            task = asyncio.create_task(_reinforce_recalled_traits())
-            self._track_user_task(user_id, task)
+        ] if "reinforce" in parts else []
+        if trait_ids_in_results:
+            self._reinforcements.add(trait_ids_in_results)
 
         # Extract active traits (established+) from user_profile
         active_traits = [
@@ -1295,6 +1416,23 @@ class NeuroMemory:
             "context_confidence": context_confidence,
         }
 
+    async def recall_fast(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 10,
+        **kwargs: Any,
+    ) -> list[dict]:
+        """Top-k memories only: recall(include=()) returning just "merged".
+
+        Runs the hybrid memory search and nothing else — no profile, context
+        inference, graph, related-memory expansion or trait reinforcement.
+        Filter arguments (memory_type, created_after, event_after, as_of, ...)
+        are passed through to recall().
+        """
+        result = await self.recall(user_id, query, limit=limit, include=(), **kwargs)
+        return result["merged"]
+
     async def _search_conversations(
         self,
         user_id: str,
@@ -1344,12 +1482,13 @@ class NeuroMemory:
 
             result = await session.execute(sql, {"user_id": user_id, "limit": limit, "query_vec": vector_str})
             rows = result.fetchall()
+            contents = self._decrypt_contents([row.content for row in rows])
 
             conversations = []
-            for row in rows:
+            for row, content in zip(rows, contents):
                 conversations.append({
                     "id": str(row.id),
-                    "content": self._decrypt_content(row.content),
+                    "content": content,
                     "role": row.role,
                     "session_id": row.session_id,
                     "created_at": row.created_at,
@@ -1400,7 +1539,10 @@ class NeuroMemory:
         # User explicitly specified memory_type → single search
         if memory_type:
             async with self._db.session() as session:
-                svc = SearchService(session, self._embedding, self._db.pg_search_available, encryption=self._encryption)
+                svc = SearchService(
+                    session, self._embedding, self._db.pg_search_available,
+                    encryption=self._encryption, access_tracker=self._access_tracker,
+                )
                 return await svc.scored_search(
                     user_id, query, limit,
                     memory_type=memory_type,
@@ -1413,7 +1555,10 @@ class NeuroMemory:
             # Two sub-searches in parallel using separate sessions
             async def _episodic():
                 async with self._db.session() as s:
-                    svc = SearchService(s, self._embedding, self._db.pg_search_available, encryption=self._encryption)
+                    svc = SearchService(
+                        s, self._embedding, self._db.pg_search_available,
+                        encryption=self._encryption, access_tracker=self._access_tracker,
+                    )
                     return await svc.scored_search(
                         user_id, query, limit,
                         memory_type="episodic",
@@ -1424,7 +1569,10 @@ class NeuroMemory:
 
             async def _facts():
                 async with self._db.session() as s:
-                    svc = SearchService(s, self._embedding, self._db.pg_search_available, encryption=self._encryption)
+                    svc = SearchService(
+                        s, self._embedding, self._db.pg_search_available,
+                        encryption=self._encryption, access_tracker=self._access_tracker,
+                    )
                     return await svc.scored_search(
                         user_id, query, limit,
                         exclude_types=["episodic"],
@@ -1441,20 +1589,24 @@ class NeuroMemory:
             return merged[:limit]
         else:
             async with self._db.session() as session:
-                svc = SearchService(session, self._embedding, self._db.pg_search_available, encryption=self._encryption)
+                svc = SearchService(
+                    session, self._embedding, self._db.pg_search_available,
+                    encryption=self._encryption, access_tracker=self._access_tracker,
+                )
                 return await svc.scored_search(
                     user_id, query, limit,
                     **common_kwargs,
                 )
 
-    async def profile_view(self, user_id: str) -> dict:
+    async def profile_view(self, user_id: str, refresh: bool = False) -> dict:
         """获取用户画像视图。
 
-        从 fact + trait + 近期 episodic emotion metadata 实时组装用户画像。
-        每次调用实时查询，不缓存。
+        读取 profile_views 中物化的画像（一次主键查询）：fact 由写入路径增量合并，
+        trait 与情绪在变更或超过 MAX_AGE 后重建。进程内缓存按 version 校验。
 
         Args:
             user_id: 用户 ID
+            refresh: 忽略物化结果，全部重新组装
 
         Returns:
             {
@@ -1465,136 +1617,23 @@ class NeuroMemory:
                 "recent_mood": {valence_avg, arousal_avg, sample_count, period} | None,
             }
         """
-        from sqlalchemy import text as sql_text
-
-        async def _fetch_facts() -> dict:
-            """从 memories 表查询 fact 类型记忆，按 category 分组取最新。"""
-            async with self._db.session() as session:
-                result = await session.execute(
-                    sql_text(
-                        "SELECT content, metadata->>'category' AS category, created_at "
-                        "FROM memories "
-                        "WHERE user_id = :uid AND memory_type = 'fact' "
-                        "AND valid_until IS NULL "
-                        "ORDER BY created_at DESC"
-                    ),
-                    {"uid": user_id},
-                )
-                rows = result.fetchall()
+        from neuromem.services.profile_view import ProfileViewService
 
-            # 按 category 分组
-            # 单值 category（identity, occupation, location）取最新一条
-            # 列表 category（hobby, skill, relationship, work, personal, values 等）取最新若干条
-            single_categories = {"identity", "occupation", "location"}
-            facts: dict = {}
-            list_seen: dict[str, set] = {}
-
-            for row in rows:
-                cat = row.category or "general"
-                content = row.content
-
-                if cat in single_categories:
-                    if cat not in facts:
-                        facts[cat] = content
-                else:
-                    if cat not in facts:
-                        facts[cat] = []
-                        list_seen[cat] = set()
-                    content_lower = content.lower()
-                    if content_lower not in list_seen.get(cat, set()):
-                        list_seen.setdefault(cat, set()).add(content_lower)
-                        facts[cat].append(content)
-
-            return facts
-
-        async def _fetch_traits() -> list[dict]:
-            """从 memories 表查询活跃 trait（emerging 及以上阶段）。"""
-            async with self._db.session() as session:
-                result = await session.execute(
-                    sql_text(
-                        "SELECT content, trait_subtype, trait_stage, trait_confidence, trait_context, "
-                        "trait_reinforcement_count, trait_first_observed, trait_last_reinforced, trait_contradiction_count "
-                        "FROM memories "
-                        "WHERE user_id = :uid AND memory_type = 'trait' "
-                        "AND trait_stage NOT IN ('trend', 'dissolved') "
-                        "ORDER BY trait_confidence DESC NULLS LAST "
-                        "LIMIT 30"
-                    ),
-                    {"uid": user_id},
-                )
-                return [
-                    {
-                        "content": r.content,
-                        "subtype": r.trait_subtype,
-                        "stage": r.trait_stage,
-                        "confidence": float(r.trait_confidence) if r.trait_confidence else 0.0,
-                        "context": r.trait_context,
-                        "reinforcement_count": r.trait_reinforcement_count or 0,
-                        "first_observed": r.trait_first_observed.isoformat() if r.trait_first_observed else None,
-                        "last_reinforced": r.trait_last_reinforced.isoformat() if r.trait_last_reinforced else None,
-                        "contradiction_count": r.trait_contradiction_count or 0,
-                    }
-                    for r in result.fetchall()
-                ]
-
-        async def _fetch_recent_mood() -> dict | None:
-            """从近期 episodic 记忆的 emotion metadata 实时聚合情绪状态。"""
+        cache = self._profile_cache
+        try:
             async with self._db.session() as session:
-                result = await session.execute(
-                    sql_text(
-                        "SELECT "
-                        "  AVG((metadata->'emotion'->>'valence')::float) AS valence_avg, "
-                        "  AVG((metadata->'emotion'->>'arousal')::float) AS arousal_avg, "
-                        "  COUNT(*) AS sample_count "
-                        "FROM memories "
-                        "WHERE user_id = :uid "
-                        "  AND memory_type = 'episodic' "
-                        "  AND metadata->'emotion' IS NOT NULL "
-                        "  AND (metadata->'emotion'->>'valence') IS NOT NULL "
-                        "  AND (metadata->'emotion'->>'valence') ~ '^-?[0-9]*\\.?[0-9]+$' "
-                        "  AND ((metadata->'emotion'->>'arousal') IS NULL "
-                        "       OR (metadata->'emotion'->>'arousal') ~ '^-?[0-9]*\\.?[0-9]+$') "
-                        "  AND created_at > NOW() - INTERVAL '14 days'"
-                    ),
-                    {"uid": user_id},
+                view, version = await ProfileViewService(session).load(
+                    user_id,
+                    cached=cache.get(user_id) if cache is not None else None,
+                    refresh=refresh,
                 )
-                row = result.first()
-
-            if not row or not row.sample_count or row.sample_count == 0:
-                return None
-
-            return {
-                "valence_avg": round(float(row.valence_avg), 3) if row.valence_avg is not None else 0.0,
-                "arousal_avg": round(float(row.arousal_avg), 3) if row.arousal_avg is not None else 0.0,
-                "sample_count": row.sample_count,
-                "period": "last_14_days",
-            }
-
-        try:
-            facts, traits, mood = await asyncio.gather(
-                _fetch_facts(),
-                _fetch_traits(),
-                _fetch_recent_mood(),
-                return_exceptions=True,
-            )
-            if isinstance(facts, Exception):
-                logger.warning("profile_view facts query failed: %s", facts)
-                facts = {}
-            if isinstance(traits, Exception):
-                logger.warning("profile_view traits query failed: %s", traits)
-                traits = []
-            if isinstance(mood, Exception):
-                logger.warning("profile_view mood query failed: %s", mood)
-                mood = None
-
-            return {
-                "facts": facts,
-                "traits": traits,
-                "recent_mood": mood,
-            }
         except Exception as e:
             logger.warning("profile_view failed: %s", e)
             return {"facts": {}, "traits": [], "recent_mood": None}
+        # Cache only after the rebuilt row is committed
+        if cache is not None and version is not None:
+            cache.put(user_id, version, view)
+        return view
 
     async def _fetch_graph_memories(
         self, user_id: str, query: str, limit: int,
@@ -1608,7 +1647,8 @@ class NeuroMemory:
         async with self._db.session() as session:
             result = await session.execute(
                 sql_text(
-                    "SELECT DISTINCT node_id FROM graph_nodes "
+                    "SELECT DISTINCT COALESCE(properties->>'canonical_id', node_id) AS node_id "
+                    "FROM graph_nodes "
                     "WHERE user_id = :uid "
                     "  AND node_id != 'user' "
                     "  AND length(node_id) > 1 "
@@ -1616,6 +1656,7 @@ class NeuroMemory:
                 ),
                 {"uid": user_id, "ql": query_lower},
             )
+            # Aliases collapse onto their canonical node
             matched_entities = [row.node_id for row in result.fetchall()]
 
         matched_entities.append(user_id)
@@ -1626,12 +1667,20 @@ class NeuroMemory:
             seen_triples: set[str] = set()
             graph_results: list[dict] = []
             for entity in matched_entities:
-                for f in await graph_svc.find_entity_facts(user_id, entity, limit, as_of=as_of):
+                for f in await graph_svc.find_entity_facts(
+                    user_id, entity, limit, as_of=as_of, resolve_aliases=False,
+                ):
                     key = f"{f.get('subject')}|{f.get('relation')}|{f.get('object')}"
                     if key not in seen_triples:
                         seen_triples.add(key)
                         graph_results.append(f)
-        return graph_results
+
+        # Rank by precomputed node importance (see analyze_graph) and prune
+        graph_results.sort(
+            key=lambda f: float(f.get("confidence", 0.5)) * float(f.get("importance", 1.0)),
+            reverse=True,
+        )
+        return graph_results[:limit]
 
     async def _check_memory_conflict(
         self, session, user_id: str, content: str, new_record,
@@ -1644,6 +1693,8 @@ class NeuroMemory:
         from datetime import timezone
         from sqlalchemy import text as sql_text
 
+        from neuromem.services.profile_view import ProfileViewService
+
         try:
             query_vector = await self._embedding.embed(content)
             vector_str = f"[{','.join(str(float(v)) for v in query_vector)}]"
@@ -1689,6 +1740,7 @@ class NeuroMemory:
                     sql_text("UPDATE memories SET version = :ver WHERE id = :id"),
                     {"ver": max_version, "id": new_record.id},
                 )
+                await ProfileViewService(session).invalidate(user_id, traits=False)
         except Exception as e:
             logger.warning("Memory conflict check failed: %s", e)
 
@@ -1697,12 +1749,17 @@ class NeuroMemory:
         user_id: str,
         batch_size: int = 50,
         background: bool = False,
+        concurrency: int = _DIGEST_CONCURRENCY,
+        max_batches: int | None = None,
     ) -> dict | None:
         """Generate traits from un-digested memories.
 
-        Uses a watermark (``completed_at`` on ReflectionCycle) to only
-        process memories that haven't been analyzed yet.  Internally paginates
-        through the new memories in batches so the LLM context stays bounded.
+        Streams memories in ``(created_at, id)`` order with a keyset cursor
+        persisted on ReflectionCycle (``completed_at`` + ``cursor_id``), so
+        only memories that haven't been analyzed yet are processed.  Batches
+        are sent to the LLM through a bounded pipeline and committed in
+        order; the cursor advances with each batch's traits in the same
+        transaction, so an interrupted run resumes where it stopped.
 
         First call: processes all memories.  Subsequent calls: only new ones.
 
@@ -1711,6 +1768,9 @@ class NeuroMemory:
             batch_size: Number of memories per LLM call.
             background: If True, run in background via asyncio.create_task()
                         and return immediately with None.
+            concurrency: Max LLM calls in flight at once.
+            max_batches: Stop after this many batches (None = drain all);
+                         the next call continues from the cursor.
 
         Returns:
             Result dict when background=False; None when background=True.
@@ -1718,49 +1778,155 @@ class NeuroMemory:
         if background:
             async def _safe_digest():
                 try:
-                    await self._digest_impl(user_id, batch_size)
+                    await self._digest_impl(user_id, batch_size, concurrency, max_batches)
                 except Exception as e:
                     logger.error("Background digest failed: user=%s error=%s", user_id, e)
             task = asyncio.create_task(_safe_digest())
             self._track_user_task(user_id, task)
             return None
-        return await self._digest_impl(user_id, batch_size)
+        return await self._digest_impl(user_id, batch_size, concurrency, max_batches)
+
+    async def compact_graph(
+        self,
+        user_id: str,
+        threshold: float | None = None,
+        background: bool = False,
+    ) -> dict | None:
+        """Merge duplicate graph entities (e.g. "Google" / "Google Inc.").
+
+        Clusters same-type entity nodes by name-embedding similarity, keeps
+        the best-connected node of each cluster and rewires the others' edges
+        onto it. Merged nodes stay as aliases so later lookups still resolve.
+
+        Args:
+            user_id: The user whose graph to compact.
+            threshold: Cosine similarity for merging (default 0.92).
+            background: If True, run via asyncio.create_task() and return None.
+
+        Returns:
+            Stats dict when background=False; None when background=True.
+        """
+        if background:
+            async def _safe_compact():
+                try:
+                    await self.compact_graph(user_id, threshold)
+                except Exception as e:
+                    logger.error("Background graph compaction failed: user=%s error=%s", user_id, e)
+            task = asyncio.create_task(_safe_compact())
+            self._track_user_task(user_id, task)
+            return None
+
+        from neuromem.services.graph_memory import GraphMemoryService
+        async with self._db.session() as session:
+            graph_svc = GraphMemoryService(
+                session, self._embedding, entity_index=self._entity_index,
+            )
+            return await graph_svc.compact_entities(user_id, threshold)
+
+    async def analyze_graph(
+        self,
+        user_id: str,
+        force: bool = False,
+        background: bool = False,
+    ) -> dict | None:
+        """Precompute per-node graph analytics used to rank graph recall.
+
+        Computes degree, personalized PageRank centred on the user node and
+        connected-component ids over the user's active edges. Skipped when
+        no edge changed since the last run unless ``force`` is set.
+
+        Args:
+            user_id: The user whose graph to analyse.
+            force: Recompute even if the stored stats are fresh.
+            background: If True, run via asyncio.create_task() and return None.
+
+        Returns:
+            Stats dict when background=False; None when background=True.
+        """
+        if background:
+            async def _safe_analyze():
+                try:
+                    await self.analyze_graph(user_id, force)
+                except Exception as e:
+                    logger.error("Background graph analytics failed: user=%s error=%s", user_id, e)
+            task = asyncio.create_task(_safe_analyze())
+            self._track_user_task(user_id, task)
+            return None
+
+        from neuromem.services.graph_analytics import GraphAnalyticsService
+        async with self._db.session() as session:
+            return await GraphAnalyticsService(session).refresh(user_id, force=force)
 
     async def _digest_impl(
         self,
         user_id: str,
-        batch_size: int = 30,
+        batch_size: int = 50,
+        concurrency: int = _DIGEST_CONCURRENCY,
+        max_batches: int | None = None,
     ) -> dict:
         """Internal implementation of digest()."""
-        from neuromem.services.reflection import ReflectionService
+        import uuid as _uuid
+        from collections import deque
+
+        from neuromem.services.profile_view import ProfileViewService
+        from neuromem.services.reflection import ReflectionService, select_novel_traits
+        from neuromem.services.reflection_state import ReflectionStateService
         from sqlalchemy import text as sql_text
 
-        # --- Read watermark ---
-        watermark = None
+        concurrency = max(1, concurrency)
+
+        # --- Read cursor (completed_at, cursor_id) of the last completed cycle ---
+        cursor_ts = None
+        cursor_id = None
         async with self._db.session() as session:
             row = (await session.execute(
                 sql_text(
-                    "SELECT completed_at FROM reflection_cycles "
+                    "SELECT completed_at, cursor_id FROM reflection_cycles "
                     "WHERE user_id = :uid AND status = 'completed' "
-                    "ORDER BY completed_at DESC LIMIT 1"
+                    "ORDER BY completed_at DESC, cursor_id DESC NULLS LAST LIMIT 1"
                 ),
                 {"uid": user_id},
             )).first()
             if row and row.completed_at:
-                watermark = row.completed_at
+                cursor_ts, cursor_id = row.completed_at, row.cursor_id
 
-        # --- Count un-reflected memories (cheap) ---
-        async with self._db.session() as session:
+        async def _fetch_batch(after_ts, after_id) -> list[dict]:
             where = "user_id = :uid AND memory_type != 'trait'"
-            params: dict = {"uid": user_id}
-            if watermark:
+            params: dict = {"uid": user_id, "lim": batch_size}
+            if after_ts is not None and after_id is not None:
+                where += " AND (created_at, id) > (:wm, :wid)"
+                params.update(wm=after_ts, wid=after_id)
+            elif after_ts is not None:
+                # Legacy watermark rows carry no id: everything at that
+                # timestamp was already digested
                 where += " AND created_at > :wm"
-                params["wm"] = watermark
-            cnt = (await session.execute(
-                sql_text(f"SELECT COUNT(*) FROM memories WHERE {where}"), params,
-            )).scalar() or 0
+                params["wm"] = after_ts
+            async with self._db.session() as session:
+                result = await session.execute(
+                    sql_text(f"""
+                        SELECT id, content, memory_type, metadata, created_at
+                        FROM memories WHERE {where}
+                        ORDER BY created_at ASC, id ASC
+                        LIMIT :lim
+                    """),
+                    params,
+                )
+                rows = result.fetchall()
+            contents = self._decrypt_contents([r.content for r in rows])
+            return [
+                {
+                    "id": str(r.id),
+                    "content": content,
+                    "memory_type": r.memory_type,
+                    "metadata": r.metadata,
+                    "created_at": r.created_at,
+                    "_row_id": r.id,
+                }
+                for r, content in zip(rows, contents)
+            ]
 
-        if cnt == 0:
+        first_batch = await _fetch_batch(cursor_ts, cursor_id)
+        if not first_batch:
             return {
                 "memories_analyzed": 0,
                 "traits_generated": 0,
@@ -1768,7 +1934,6 @@ class NeuroMemory:
             }
 
         # --- Seed existing traits for dedup ---
-        existing_traits: list[dict] = []
         async with self._db.session() as session:
             result = await session.execute(
                 sql_text("""
@@ -1778,88 +1943,122 @@ class NeuroMemory:
                 """),
                 {"uid": user_id},
             )
-            existing_traits = [
-                {"content": self._decrypt_content(r.content), "metadata": r.metadata}
-                for r in result.fetchall()
-            ]
+            rows = result.fetchall()
+        existing_traits: list[dict] = [
+            {"content": content, "metadata": r.metadata}
+            for r, content in zip(rows, self._decrypt_contents([r.content for r in rows]))
+        ]
 
-        # --- Paginate through un-reflected memories ---
+        async def _propose(batch: list[dict], known: list[dict]):
+            # LLM + embedding only; the session is never used for I/O
+            async with self._db.session() as session:
+                svc = ReflectionService(session, self._embedding, self._llm)
+                items = await svc.propose_traits(batch, known or None)
+            usage = svc.token_usage
+            if not items:
+                return [], [], usage
+            try:
+                vectors = await self._embedding.embed_batch([i["content"] for i in items])
+            except Exception as e:
+                logger.error("Failed to embed digest traits: %s", e)
+                return [], [], usage
+            return items, vectors, usage
+
+        # --- Pipeline: up to `concurrency` LLM calls in flight, committed in order ---
+        pending: deque = deque()
+        next_batch: list[dict] | None = first_batch
+        fetch_after = (cursor_ts, cursor_id)
+        exhausted = False
+        started = 0
+        accepted_vectors: list = []
+        seen_contents = {t["content"] for t in existing_traits}
         all_traits: list[dict] = []
         total_analyzed = 0
-        offset = 0
-        max_created_at = watermark  # track new watermark
-        max_batches = 10  # cap to prevent runaway loops
-        batch_count = 0
+        cycle_id = _uuid.uuid4()
+        cycle_written = False
+        prompt_tokens = completion_tokens = 0
 
-        while batch_count < max_batches:
-            batch: list[dict] = []
-            async with self._db.session() as session:
-                where = "user_id = :uid AND memory_type != 'trait'"
-                params = {"uid": user_id, "lim": batch_size, "off": offset}
-                if watermark:
-                    where += " AND created_at > :wm"
-                    params["wm"] = watermark
-                result = await session.execute(
-                    sql_text(f"""
-                        SELECT id, content, memory_type, metadata, created_at
-                        FROM memories WHERE {where}
-                        ORDER BY created_at ASC
-                        LIMIT :lim OFFSET :off
-                    """),
-                    params,
-                )
-                for row in result.fetchall():
-                    batch.append({
-                        "id": str(row.id),
-                        "content": self._decrypt_content(row.content),
-                        "memory_type": row.memory_type,
-                        "metadata": row.metadata,
-                        "created_at": row.created_at,
-                    })
-                    if max_created_at is None or row.created_at > max_created_at:
-                        max_created_at = row.created_at
-
-            if not batch:
-                break
-
-            total_analyzed += len(batch)
-
-            async with self._db.session() as session:
-                svc = ReflectionService(session, self._embedding, self._llm)
-                batch_result = await svc.digest(
-                    user_id, batch, existing_traits or None,
+        try:
+            while True:
+                while (
+                    not exhausted and len(pending) < concurrency
+                    and (max_batches is None or started < max_batches)
+                ):
+                    batch = next_batch
+                    next_batch = None
+                    if batch is None:
+                        batch = await _fetch_batch(*fetch_after)
+                    if not batch:
+                        exhausted = True
+                        break
+                    fetch_after = (batch[-1]["created_at"], batch[-1]["_row_id"])
+                    if len(batch) < batch_size:
+                        exhausted = True
+                    # Each call sees the traits committed before it was launched
+                    task = asyncio.create_task(_propose(batch, list(existing_traits)))
+                    pending.append((batch, task))
+                    started += 1
+
+                if not pending:
+                    break
+                batch, task = pending.popleft()
+                items, vectors, usage = await task
+                prompt_tokens += usage["prompt_tokens"]
+                completion_tokens += usage["completion_tokens"]
+
+                # Calls launched together could not see each other's output
+                fresh = [i for i, item in enumerate(items) if item["content"] not in seen_contents]
+                keep = select_novel_traits(
+                    [items[i] for i in fresh], [vectors[i] for i in fresh], accepted_vectors,
                 )
+                batch_traits = [items[fresh[i]] for i in keep]
+                batch_vectors = [vectors[fresh[i]] for i in keep]
 
-            batch_traits = batch_result.get("traits", [])
-            all_traits.extend(batch_traits)
-            for item in batch_traits:
-                existing_traits.append({
-                    "content": item.get("content", ""),
-                    "metadata": {"category": item.get("category", "pattern")},
-                })
-
-            logger.info(
-                "Reflect[%s] batch offset=%d: analyzed=%d traits=%d (total=%d/%d)",
-                user_id, offset, len(batch), len(batch_traits), len(all_traits), cnt,
-            )
-
-            batch_count += 1
-            if len(batch) < batch_size:
-                break
-            offset += batch_size
+                # Store traits and advance the cursor atomically
+                last = batch[-1]
+                total_analyzed += len(batch)
+                async with self._db.session() as session:
+                    svc = ReflectionService(session, self._embedding, self._llm)
+                    await svc.store_traits(user_id, batch_traits, batch_vectors)
+                    params = {
+                        "cid": cycle_id, "uid": user_id, "ts": last["created_at"],
+                        "mid": last["_row_id"], "count": total_analyzed,
+                        "created": len(all_traits) + len(batch_traits),
+                        "ptok": prompt_tokens, "ctok": completion_tokens,
+                    }
+                    if cycle_written:
+                        await session.execute(sql_text(
+                            "UPDATE reflection_cycles SET completed_at = :ts, cursor_id = :mid, "
+                            "memories_scanned = :count, traits_created = :created, "
+                            "prompt_tokens = :ptok, completion_tokens = :ctok WHERE id = :cid"
+                        ), params)
+                    else:
+                        await session.execute(sql_text(
+                            "INSERT INTO reflection_cycles "
+                            "(id, user_id, trigger_type, status, completed_at, cursor_id, "
+                            "memories_scanned, traits_created, prompt_tokens, completion_tokens) "
+                            "VALUES (:cid, :uid, 'digest', 'completed', :ts, :mid, :count, :created, "
+                            ":ptok, :ctok)"
+                        ), params)
+                    await ReflectionStateService(session).refresh(user_id)
+                    await ProfileViewService(session).invalidate(user_id, facts=False)
+                cycle_written = True
+
+                all_traits.extend(batch_traits)
+                seen_contents.update(t["content"] for t in batch_traits)
+                for item in batch_traits:
+                    existing_traits.append({
+                        "content": item.get("content", ""),
+                        "metadata": {"category": item.get("category", "pattern")},
+                    })
 
-        # --- Advance watermark ---
-        if max_created_at is not None:
-            async with self._db.session() as session:
-                await session.execute(
-                    sql_text(
-                        "INSERT INTO reflection_cycles "
-                        "(id, user_id, trigger_type, status, completed_at, memories_scanned) "
-                        "VALUES (gen_random_uuid(), :uid, 'digest', 'completed', :ts, :count)"
-                    ),
-                    {"uid": user_id, "ts": max_created_at, "count": total_analyzed},
+                logger.info(
+                    "Digest[%s] batch: analyzed=%d traits=%d (total analyzed=%d traits=%d)",
+                    user_id, len(batch), len(batch_traits), total_analyzed, len(all_traits),
                 )
-                await session.commit()
+        finally:
+            for _, task in pending:
+                task.cancel()
 
         return {
             "memories_analyzed": total_analyzed,
@@ -1884,6 +2083,56 @@ class NeuroMemory:
             should, _, _ = await svc.should_reflect(user_id)
             return should
 
+    def reflection_scheduler(
+        self,
+        concurrency: int = 4,
+        tokens_per_minute: int | None = None,
+        poll_interval: float = 30.0,
+        **kwargs,
+    ):
+        """Create the cross-user reflection scheduler for this instance.
+
+        Once created, reflection_interval triggers are queued on it instead
+        of starting a background digest directly. Call ``await
+        scheduler.start()`` to run it in the background (stopped by close()),
+        or ``run_once()`` from an external cron.
+
+        Args:
+            concurrency: Maximum reflections running at once.
+            tokens_per_minute: Global estimated LLM token budget (None = unlimited).
+            poll_interval: Seconds between scans for newly due users.
+            **kwargs: Passed to ReflectionScheduler (lease, max_attempts, ...).
+
+        Returns:
+            ReflectionScheduler
+        """
+        from neuromem.services.reflection_scheduler import ReflectionScheduler
+
+        self._scheduler = ReflectionScheduler(
+            self._db,
+            reflect=self._scheduled_reflect,
+            digest=self.digest,
+            concurrency=concurrency,
+            tokens_per_minute=tokens_per_minute,
+            poll_interval=poll_interval,
+            **kwargs,
+        )
+        return self._scheduler
+
+    async def users_due_for_reflection(self, limit: int = 100) -> list[dict]:
+        """List users whose reflection trigger fires, most urgent first.
+
+        Reads the per-user counters maintained on write, so it is cheap
+        enough to poll from a scheduler across all tenants.
+
+        Returns:
+            [{"user_id", "trigger_type", "trigger_value"}, ...]
+        """
+        from neuromem.services.reflection_state import ReflectionStateService
+
+        async with self._db.session() as session:
+            return await ReflectionStateService(session).due_users(limit=limit)
+
     async def reflect(
         self,
         user_id: str,
@@ -1914,6 +2163,34 @@ class NeuroMemory:
             svc = ReflectionService(session, self._embedding, self._llm)
             return await svc.reflect(user_id, force=force, session_ended=session_ended)
 
+    async def _scheduled_reflect(self, user_id: str) -> dict:
+        """reflect() for the scheduler: a failed LLM call fails the job, so it is retried."""
+        from neuromem.services.reflection import ReflectionService
+
+        async with self._db.session() as session:
+            svc = ReflectionService(session, self._embedding, self._llm)
+            return await svc.reflect(user_id, fail_on_llm_error=True)
+
+    async def maintain_traits(self, user_id: str | None = None) -> dict:
+        """Run trait lifecycle maintenance (trend expiry/promotion, time decay).
+
+        Each step is a single set-based UPDATE, so the cost is one round
+        trip per step regardless of trait count. With ``user_id=None`` all
+        users are maintained in one pass — meant to be called periodically
+        (e.g. from a scheduler) without running a reflection per user.
+
+        Returns:
+            {"expired": N, "promoted": N, "dissolved": N}
+        """
+        from neuromem.services.profile_view import ProfileViewService
+        from neuromem.services.trait_engine import TraitEngine
+
+        async with self._db.session() as session:
+            result = await TraitEngine(session, self._embedding).maintain(user_id)
+            if any(result.values()):
+                await ProfileViewService(session).invalidate(user_id, facts=False)
+            return result
+
     async def get_user_traits(
         self,
         user_id: str,
@@ -1934,6 +2211,8 @@ class NeuroMemory:
         """
         from sqlalchemy import text as sql_text
 
+        from neuromem.services.trait_engine import trait_confidence_sql, trait_stage_sql
+
         stage_order = {
             "trend": 5, "candidate": 4, "emerging": 3,
             "established": 2, "core": 1,
@@ -1951,6 +2230,7 @@ class NeuroMemory:
             for i, s in enumerate(allowed_stages):
                 params[f"stage_{i}"] = s
 
+            # Decay only demotes, so prefiltering on the stored stage is safe
             where = f"user_id = :uid AND memory_type = 'trait' AND trait_stage IN ({stage_placeholders})"
 
             if subtype:
@@ -1962,11 +2242,16 @@ class NeuroMemory:
                 params["context"] = context
 
             sql = sql_text(f"""
-                SELECT id, content, trait_subtype, trait_stage, trait_confidence,
-                       trait_context, trait_reinforcement_count, trait_contradiction_count,
-                       trait_first_observed, trait_last_reinforced, created_at
-                FROM memories
-                WHERE {where}
+                SELECT * FROM (
+                    SELECT id, content, trait_subtype,
+                           {trait_stage_sql()} AS trait_stage,
+                           {trait_confidence_sql()} AS trait_confidence,
+                           trait_context, trait_reinforcement_count, trait_contradiction_count,
+                           trait_first_observed, trait_last_reinforced, created_at
+                    FROM memories
+                    WHERE {where}
+                ) t
+                WHERE trait_stage IN ({stage_placeholders})
                 ORDER BY
                     CASE trait_stage
                         WHEN 'core' THEN 1
@@ -2013,11 +2298,14 @@ class NeuroMemory:
         """
         from sqlalchemy import text as sql_text
 
+        from neuromem.services.trait_engine import trait_confidence_sql, trait_stage_sql
+
         async with self._db.session() as session:
             # Verify trait ownership
             trait_row = (await session.execute(
                 sql_text(
-                    "SELECT id, content, trait_subtype, trait_stage, trait_confidence, "
+                    f"SELECT id, content, trait_subtype, {trait_stage_sql()} AS trait_stage, "
+                    f"{trait_confidence_sql()} AS trait_confidence, "
                     "trait_context, trait_reinforcement_count, trait_contradiction_count "
                     "FROM memories "
                     "WHERE id = :tid AND user_id = :uid AND memory_type = 'trait'"
@@ -2145,6 +2433,8 @@ class NeuroMemory:
         from datetime import timezone
         from sqlalchemy import text as sql_text
 
+        from neuromem.services.profile_view import ProfileViewService
+
         rolled_back = 0
         reactivated = 0
 
@@ -2203,6 +2493,7 @@ class NeuroMemory:
                 """),
                 {"uid": user_id, "to_time": to_time, "now": now.isoformat()},
             )
+            await ProfileViewService(session).invalidate(user_id)
 
             await session.commit()
 
@@ -2232,11 +2523,15 @@ class NeuroMemory:
             ("memories", "user_id"),
             ("graph_edges", "user_id"),
             ("graph_nodes", "user_id"),
+            ("graph_node_stats", "user_id"),
             ("conversations", "user_id"),
             ("conversation_sessions", "user_id"),
             ("key_values", "scope_id"),
             ("reflection_cycles", "user_id"),
             ("documents", "user_id"),
+            ("profile_views", "user_id"),
+            ("reflection_state", "user_id"),
+            ("reflection_queue", "user_id"),
         ]
 
         deleted: dict[str, int] = {}
@@ -2248,6 +2543,10 @@ class NeuroMemory:
                 )
                 deleted[table] = result.rowcount
             await session.commit()
+        self._entity_index.invalidate(user_id)
+        self._context_service.centroids.invalidate(user_id)
+        if self._profile_cache is not None:
+            self._profile_cache.invalidate(user_id)
 
         logger.info("delete_user_data[%s]: %s (cancelled %d tasks)", user_id, deleted, tasks_cancelled)
         return {"deleted": deleted, "tasks_cancelled": tasks_cancelled}
@@ -2469,6 +2768,8 @@ class NeuroMemory:
         """
         from sqlalchemy import text as sql_text
 
+        # Include accesses still buffered by the tracker
+        await self._access_tracker.flush()
         async with self._db.session() as session:
             rows = (await session.execute(
                 sql_text("""
@@ -12,15 +12,64 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 logger = logging.getLogger(__name__)
 
 
+# Marker of values sealed by EncryptionService.encrypt_value
+ENCRYPTED_PREFIX = "nmenc1:"
+# json.dumps() of a legacy EncryptionService.encrypt() envelope
+_LEGACY_ENVELOPE_PREFIX = '{"encrypted_dek"'
+
+
 def _is_encrypted(value) -> bool:
-    """Check if a string value is an encrypted envelope (JSON with encrypted_dek)."""
-    if not isinstance(value, str):
-        return False
-    try:
-        obj = json.loads(value)
-        return isinstance(obj, dict) and "encrypted_dek" in obj
-    except (json.JSONDecodeError, TypeError):
-        return False
+    """Check if a string value is encrypted (prefix check, no parsing)."""
+    return isinstance(value, str) and (
+        value.startswith(ENCRYPTED_PREFIX) or value.startswith(_LEGACY_ENVELOPE_PREFIX)
+    )
+
+
+# Tokenizers of memories.content_tsv (keyword search without pg_search):
+#   simple - to_tsvector('simple'): whitespace/punctuation words, all terms required
+#   cjk    - also indexes character bigrams of CJK runs (which 'simple' keeps
+#            as one token) and matches any query term, ranked by ts_rank_cd
+FTS_TOKENIZERS = ("simple", "cjk")
+
+_CJK_RUN = "[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]{2,}"
+
+# Text with the bigrams of its CJK runs appended. Declared IMMUTABLE so the
+# generated column may use it.
+_CJK_BIGRAMS_FN = f"""
+    CREATE OR REPLACE FUNCTION neuromem_cjk_bigrams(t text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+        SELECT concat_ws(' ', t, (
+            SELECT string_agg(substr(m.run[1], i, 2), ' ')
+            FROM regexp_matches(t, '{_CJK_RUN}', 'g') AS m(run),
+                 generate_series(1, char_length(m.run[1]) - 1) AS i
+        ))
+    $fn$
+"""
+
+# Ciphertext is not tokenized: encrypted rows keep a NULL content_tsv (their
+# keyword search goes through blind_tokens). Mirrored by Memory.content_tsv.
+_FTS_ENCRYPTED = f"content LIKE '{ENCRYPTED_PREFIX}%' OR content LIKE '{_LEGACY_ENVELOPE_PREFIX}%'"
+_FTS_DOCUMENT = {
+    "simple": f"CASE WHEN {_FTS_ENCRYPTED} THEN NULL ELSE to_tsvector('simple', content) END",
+    "cjk": f"CASE WHEN {_FTS_ENCRYPTED} THEN NULL ELSE to_tsvector('simple', neuromem_cjk_bigrams(content)) END",
+}
+
+# Query side of content_tsv, matching the column's tokenizer
+_FTS_QUERY_FN = {
+    "simple": "SELECT plainto_tsquery('simple', q)",
+    "cjk": (
+        "SELECT to_tsquery('simple', string_agg(quote_literal(l), ' | ')) "
+        "FROM unnest(tsvector_to_array(to_tsvector('simple', neuromem_cjk_bigrams(q)))) AS l"
+    ),
+}
+
+# key_values row that exists while memories' typed scoring columns still
+# need copying from metadata; its value holds the backfill's keyset cursor
+_SCORING_BACKFILL = {"ns": "neuromem", "scope": "_schema", "key": "scoring_backfill"}
+
+
+# Tables hash-partitioned by user_id when Database(partitions=N > 0)
+PARTITIONED_TABLES = ("memories", "conversations")
 
 
 class Database:
@@ -28,7 +77,20 @@ class Database:
 
     pg_search_available: bool = False
 
-    def __init__(self, url: str, pool_size: int = 10, echo: bool = False):
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 10,
+        echo: bool = False,
+        fts_tokenizer: str = "simple",
+        partitions: int = 0,
+    ):
+        if fts_tokenizer not in FTS_TOKENIZERS:
+            raise ValueError(f"fts_tokenizer must be one of {FTS_TOKENIZERS}, got {fts_tokenizer!r}")
+        if partitions < 0:
+            raise ValueError(f"partitions must be >= 0, got {partitions}")
+        self.fts_tokenizer = fts_tokenizer
+        self.partitions = partitions
         self.engine = create_async_engine(url, pool_size=pool_size, echo=echo)
         self.session_factory = async_sessionmaker(
             self.engine,
@@ -69,7 +131,11 @@ class Database:
         import neuromem.models.trait_evidence  # noqa: F401
         import neuromem.models.memory_history  # noqa: F401
         import neuromem.models.reflection_cycle  # noqa: F401
+        import neuromem.models.reflection_state  # noqa: F401
+        import neuromem.models.reflection_queue  # noqa: F401
         import neuromem.models.memory_source  # noqa: F401
+        import neuromem.models.context_prototype  # noqa: F401
+        import neuromem.models.profile_view  # noqa: F401
 
         # Fix vector column dimensions: __declare_last__ runs at import time
         # with the default 1024, but _embedding_dims may have been updated
@@ -96,8 +162,11 @@ class Database:
                     table.schema = None
 
     async def _run_init(self, schema: str | None) -> None:
+        import neuromem.models as _models
         from neuromem.models.base import Base
 
+        dims = _models._embedding_dims
+
         async with self.engine.begin() as conn:
             # Step 1: Create extension
             await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
@@ -136,6 +205,10 @@ class Database:
             await conn.run_sync(Base.metadata.create_all)
 
             # Step 4: ADD COLUMN IF NOT EXISTS (idempotent column additions)
+            backfill_scoring = (await conn.execute(text(
+                "SELECT 1 FROM information_schema.columns WHERE table_schema = current_schema() "
+                "AND table_name = 'memories' AND column_name = 'temporality'"
+            ))).first() is None
             migration_columns = [
                 # Bi-temporal timeline
                 "ALTER TABLE memories ADD COLUMN IF NOT EXISTS valid_at TIMESTAMPTZ",
@@ -163,6 +236,13 @@ class Database:
                 "ALTER TABLE memories ADD COLUMN IF NOT EXISTS object_entity_id UUID",
                 # Conversation provenance
                 "ALTER TABLE memories ADD COLUMN IF NOT EXISTS source_episode_ids UUID[]",
+                # Blind keyword index (encrypted deployments)
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS blind_tokens BIGINT[]",
+                # Typed scoring fields (copies of metadata keys, see Memory._sync_scoring_columns)
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS event_time TIMESTAMPTZ",
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS emotion_valence REAL",
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS emotion_arousal REAL",
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS temporality VARCHAR(20)",
                 # Legacy migration compat
                 "ALTER TABLE memories ADD COLUMN IF NOT EXISTS valid_from TIMESTAMPTZ",
                 "ALTER TABLE memories ADD COLUMN IF NOT EXISTS valid_until TIMESTAMPTZ",
@@ -172,6 +252,15 @@ class Database:
             for col_sql in migration_columns:
                 await conn.execute(text(col_sql))
 
+            # Step 4a: the typed scoring columns were just added; mark their
+            # backfill from metadata as pending (run after this transaction)
+            if backfill_scoring:
+                await conn.execute(text(
+                    "INSERT INTO key_values (id, namespace, scope_id, key, value) "
+                    "VALUES (gen_random_uuid(), :ns, :scope, :key, '{\"last_id\": null}') "
+                    "ON CONFLICT (namespace, scope_id, key) DO NOTHING"
+                ), _SCORING_BACKFILL)
+
             # Step 4b: Data backfill BEFORE constraint (idempotent)
             # Must convert legacy types before adding CHECK constraint
             # general -> fact
@@ -270,6 +359,9 @@ class Database:
                 # valid_at index
                 """CREATE INDEX IF NOT EXISTS ix_mem_user_valid_at
                    ON memories (user_id, valid_at, invalid_at)""",
+                # Blind keyword index
+                """CREATE INDEX IF NOT EXISTS idx_mem_blind_tokens
+                   ON memories USING gin (blind_tokens) WHERE blind_tokens IS NOT NULL""",
             ]
             for idx_sql in index_sqls:
                 await conn.execute(text(idx_sql))
@@ -308,6 +400,94 @@ class Database:
                 "ON conversations (user_id, extraction_status)"
             ))
 
+            # v0.10.1: graph node embeddings for entity resolution (idempotent)
+            await conn.execute(text(
+                f"ALTER TABLE graph_nodes ADD COLUMN IF NOT EXISTS embedding halfvec({dims})"
+            ))
+
+            # v0.10.1: direction-aware graph edge indexes (active edges partial);
+            # ix_graph_edges_target_typed supersedes ix_graph_edges_target
+            for idx_sql in [
+                """CREATE INDEX IF NOT EXISTS ix_graph_edges_target_typed
+                   ON graph_edges (user_id, target_id, target_type)
+                   INCLUDE (source_type, source_id, edge_type)""",
+                """CREATE INDEX IF NOT EXISTS ix_graph_edges_active_source
+                   ON graph_edges (user_id, source_id, source_type, edge_type)
+                   INCLUDE (target_type, target_id)
+                   WHERE (properties->>'valid_until') IS NULL""",
+                """CREATE INDEX IF NOT EXISTS ix_graph_edges_active_target
+                   ON graph_edges (user_id, target_id, target_type)
+                   INCLUDE (source_type, source_id, edge_type)
+                   WHERE (properties->>'valid_until') IS NULL""",
+                "DROP INDEX IF EXISTS ix_graph_edges_target",
+            ]:
+                await conn.execute(text(idx_sql))
+
+            # v0.10.1: lazy trait decay — confidence is stored with its anchor
+            # time and readers evaluate the closed form. Existing values were
+            # kept current by eager decay, so they are anchored at migration time.
+            for col_sql in [
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS trait_confidence_at TIMESTAMPTZ",
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS trait_dissolve_at TIMESTAMPTZ",
+            ]:
+                await conn.execute(text(col_sql))
+            from neuromem.services.trait_engine import trait_dissolve_at_sql
+            await conn.execute(text(
+                "UPDATE memories SET trait_confidence_at = now() "
+                "WHERE memory_type = 'trait' AND trait_confidence IS NOT NULL "
+                "AND trait_confidence_at IS NULL AND trait_dissolve_at IS NULL"
+            ))
+            await conn.execute(text(
+                f"UPDATE memories SET trait_dissolve_at = {trait_dissolve_at_sql()} "
+                "WHERE memory_type = 'trait' AND trait_confidence IS NOT NULL "
+                "AND trait_dissolve_at IS NULL"
+            ))
+            await conn.execute(text(
+                """CREATE INDEX IF NOT EXISTS idx_trait_dissolve_at
+                   ON memories (trait_dissolve_at)
+                   WHERE memory_type = 'trait' AND trait_stage NOT IN ('dissolved', 'trend')"""
+            ))
+
+            # v0.10.1: digest keyset cursor on (created_at, id)
+            await conn.execute(text(
+                "ALTER TABLE reflection_cycles ADD COLUMN IF NOT EXISTS cursor_id UUID"
+            ))
+            # Estimated LLM token usage per reflection cycle
+            for col in ("prompt_tokens", "completion_tokens"):
+                await conn.execute(text(
+                    f"ALTER TABLE reflection_cycles ADD COLUMN IF NOT EXISTS {col} INTEGER DEFAULT 0"
+                ))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_mem_user_created "
+                "ON memories (user_id, created_at, id)"
+            ))
+
+            # v0.10.1: per-user reflection trigger counters; seed every user
+            # once when the table is new (later users are seeded lazily)
+            await conn.execute(text(
+                "INSERT INTO reflection_state "
+                "(user_id, watermark, accumulated_importance, new_memory_count) "
+                "SELECT m.user_id, w.wm, "
+                "  COALESCE(SUM(COALESCE((m.metadata->>'importance')::float, m.importance)) "
+                "    FILTER (WHERE w.wm IS NULL OR m.created_at > w.wm), 0), "
+                "  COUNT(*) FILTER (WHERE w.wm IS NULL OR m.created_at > w.wm) "
+                "FROM memories m "
+                "LEFT JOIN (SELECT user_id, MAX(completed_at) AS wm FROM reflection_cycles "
+                "           WHERE status = 'completed' GROUP BY user_id) w ON w.user_id = m.user_id "
+                "WHERE m.memory_type IN ('fact', 'episodic') "
+                "  AND NOT EXISTS (SELECT 1 FROM reflection_state) "
+                "GROUP BY m.user_id, w.wm "
+                "ON CONFLICT (user_id) DO NOTHING"
+            ))
+
+            if self.partitions:
+                await self._partition_tables(conn)
+
+        # Copy the scoring fields out of metadata (later writes set them directly)
+        await self._backfill_scoring_columns()
+
+        await self._init_fts()
+
         # Try to enable pg_search (graceful degradation)
         try:
             async with self.engine.begin() as conn:
@@ -319,60 +499,227 @@ class Database:
             logger.info("pg_search not available, using tsvector fallback: %s", e)
 
         # Create BM25 index if pg_search is available
-        # ParadeDB limits one BM25 index per table; check existence first
+        # ParadeDB limits one BM25 index per table; check existence first.
+        # A partitioned memories table gets one per partition.
         if self.pg_search_available:
             try:
                 async with self.engine.begin() as conn:
-                    result = await conn.execute(text(
-                        "SELECT 1 FROM pg_indexes"
-                        " WHERE indexname = 'idx_memories_bm25'"
-                        " AND schemaname = current_schema()"
-                    ))
-                    if result.first() is None:
-                        await conn.execute(text("""
-                            CREATE INDEX idx_memories_bm25
-                            ON memories
-                            USING bm25 (id, content)
-                            WITH (key_field='id')
-                        """))
-                        logger.info("BM25 index created on memories")
-                    else:
-                        logger.debug("BM25 index already exists, skipping creation")
+                    partitions = (await conn.execute(text(
+                        "SELECT inhrelid::regclass::text FROM pg_inherits "
+                        "WHERE inhparent = to_regclass('memories') ORDER BY 1"
+                    ))).scalars().all()
+                    for table in partitions or ["memories"]:
+                        index = "idx_memories_bm25" if table == "memories" else f"idx_{table}_bm25"
+                        result = await conn.execute(text(
+                            "SELECT 1 FROM pg_indexes"
+                            " WHERE indexname = :name"
+                            " AND schemaname = current_schema()"
+                        ), {"name": index})
+                        if result.first() is None:
+                            await conn.execute(text(f"""
+                                CREATE INDEX {index}
+                                ON {table}
+                                USING bm25 (id, content)
+                                WITH (key_field='id')
+                            """))
+                            logger.info("BM25 index created on %s", table)
+                        else:
+                            logger.debug("BM25 index already exists on %s, skipping creation", table)
             except Exception as e:
                 logger.warning("Failed to create BM25 index: %s", e)
 
+    async def _backfill_scoring_columns(self, batch_size: int = 1000) -> None:
+        """Fill the typed scoring columns of existing memories from metadata.
+
+        Runs while the ``_SCORING_BACKFILL`` marker row exists: it is written
+        with the columns and holds the keyset cursor (id), which each batch
+        advances in its own transaction, so an interrupted backfill resumes
+        on the next init. The marker is deleted when the last batch is done.
+        Values are parsed in Python exactly as Memory does on write, so a
+        malformed event_time or number leaves the column NULL.
+        """
+        from neuromem.models.memory import _scoring_columns
+
+        updated = 0
+        while True:
+            async with self.engine.begin() as conn:
+                marker = (await conn.execute(text(
+                    "SELECT value FROM key_values "
+                    "WHERE namespace = :ns AND scope_id = :scope AND key = :key FOR UPDATE"
+                ), _SCORING_BACKFILL)).scalar()
+                if marker is None:
+                    break
+                last_id = marker.get("last_id")
+                rows = (await conn.execute(text(
+                    "SELECT id, metadata FROM memories "
+                    "WHERE metadata ?| array['event_time', 'emotion', 'temporality', 'importance']"
+                    + (" AND id > CAST(:last AS uuid)" if last_id is not None else "")
+                    + " ORDER BY id LIMIT :lim"
+                ), {"last": last_id, "lim": batch_size})).fetchall()
+                if not rows:
+                    await conn.execute(text(
+                        "DELETE FROM key_values WHERE namespace = :ns AND scope_id = :scope AND key = :key"
+                    ), _SCORING_BACKFILL)
+                    break
+                await conn.execute(text(
+                    "UPDATE memories SET event_time = :event_time, "
+                    "  emotion_valence = :emotion_valence, emotion_arousal = :emotion_arousal, "
+                    "  temporality = :temporality, "
+                    "  importance = COALESCE(CAST(:importance AS real), importance) "
+                    "WHERE id = :id"
+                ), [{"id": row.id, **_scoring_columns(row.metadata)} for row in rows])
+                await conn.execute(text(
+                    "UPDATE key_values SET value = CAST(:value AS jsonb), updated_at = now() "
+                    "WHERE namespace = :ns AND scope_id = :scope AND key = :key"
+                ), {**_SCORING_BACKFILL, "value": json.dumps({"last_id": str(rows[-1].id)})})
+                updated += len(rows)
+        if updated:
+            logger.info("Backfilled scoring columns of %d memories", updated)
+
+    async def _partition_tables(self, conn) -> None:
+        """Hash-partition memories and conversations by user_id.
+
+        An unpartitioned table is converted in place: rows are copied into a
+        partitioned table of the same shape (partitions ``<table>_p0`` ..
+        ``_p{N-1}``) and its indexes are recreated on the parent, which
+        builds them per partition; bm25 indexes are left to the pg_search
+        step, which creates one per partition. Searches filtered on user_id
+        then scan a single partition's HNSW index. As PostgreSQL requires, the primary key
+        becomes (id, user_id) and foreign keys into the table are dropped.
+        A table that is already partitioned is left as it is.
+        """
+        for table in PARTITIONED_TABLES:
+            relkind, count = (await conn.execute(text(
+                "SELECT c.relkind::text, (SELECT COUNT(*) FROM pg_inherits i WHERE i.inhparent = c.oid) "
+                "FROM pg_class c WHERE c.oid = to_regclass(:t)"
+            ), {"t": table})).one()
+            if relkind == "p":
+                if count != self.partitions:
+                    logger.warning(
+                        "%s already has %d partitions (requested %d); repartitioning is not automatic",
+                        table, count, self.partitions,
+                    )
+                continue
+
+            # pg_search allows no bm25 index on the parent; init creates one per partition
+            indexes = (await conn.execute(text(
+                "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+                "AND tablename = :t AND indexname <> :pkey AND indexdef NOT ILIKE '%USING bm25%'"
+            ), {"t": table, "pkey": f"{table}_pkey"})).scalars().all()
+            columns = ", ".join((await conn.execute(text(
+                "SELECT quote_ident(column_name) FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :t AND is_generated = 'NEVER' "
+                "ORDER BY ordinal_position"
+            ), {"t": table})).scalars().all())
+            foreign_keys = (await conn.execute(text(
+                "SELECT conrelid::regclass::text, quote_ident(conname) FROM pg_constraint "
+                "WHERE contype = 'f' AND confrelid = to_regclass(:t)"
+            ), {"t": table})).all()
+            for owner, name in foreign_keys:
+                await conn.execute(text(f"ALTER TABLE {owner} DROP CONSTRAINT {name}"))
+
+            old = f"{table}_unpartitioned"
+            await conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+            await conn.execute(text(
+                f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                "INCLUDING GENERATED INCLUDING STORAGE) PARTITION BY HASH (user_id)"
+            ))
+            for i in range(self.partitions):
+                await conn.execute(text(
+                    f"CREATE TABLE {table}_p{i} PARTITION OF {table} "
+                    f"FOR VALUES WITH (MODULUS {self.partitions}, REMAINDER {i})"
+                ))
+            await conn.execute(text(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}"))
+            await conn.execute(text(f"DROP TABLE {old}"))
+            await conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, user_id)"))
+            for indexdef in indexes:
+                await conn.execute(text(indexdef))
+            logger.info("Partitioned %s by user_id into %d partitions", table, self.partitions)
+
+        await conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_memories_hnsw
+            ON memories USING hnsw (embedding halfvec_cosine_ops)
+            WITH (m = 16, ef_construction = 64)
+        """))
+
+
+    async def _init_fts(self) -> None:
+        """Stored content_tsv column + GIN index for the tsvector BM25 fallback.
+
+        The column is generated with the configured tokenizer and is NULL for
+        encrypted content; switching tokenizers regenerates it (a table
+        rewrite). neuromem_tsquery() is the
+        matching query parser, so searches don't need to know the tokenizer.
+        """
+        document = _FTS_DOCUMENT[self.fts_tokenizer]
+        async with self.engine.begin() as conn:
+            await conn.execute(text(_CJK_BIGRAMS_FN))
+            await conn.execute(text(
+                "CREATE OR REPLACE FUNCTION neuromem_tsquery(q text) RETURNS tsquery "
+                f"LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$ {_FTS_QUERY_FN[self.fts_tokenizer]} $fn$"
+            ))
+            current = (await conn.execute(text(
+                "SELECT generation_expression FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = 'memories' "
+                "AND column_name = 'content_tsv'"
+            ))).scalar()
+            if current is not None and (
+                ("neuromem_cjk_bigrams" in current) != (self.fts_tokenizer == "cjk")
+                or ENCRYPTED_PREFIX not in current  # from before ciphertext was skipped
+            ):
+                await conn.execute(text("ALTER TABLE memories DROP COLUMN content_tsv"))
+                logger.info("Regenerating memories.content_tsv with the %s tokenizer", self.fts_tokenizer)
+            await conn.execute(text(
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+                f"GENERATED ALWAYS AS ({document}) STORED"
+            ))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_memories_content_tsv ON memories USING gin (content_tsv)"
+            ))
 
     def setup_encryption(self, enc_service) -> None:
         """Register SQLAlchemy event hooks for transparent content encryption.
 
-        Encrypts Memory.content and Conversation.content on flush,
-        restores plaintext on Python objects after flush,
-        and decrypts on load from DB.
+        Encrypts Memory.content and Conversation.content on flush (and fills
+        Memory.blind_tokens for keyword search), restores plaintext on Python
+        objects after flush, and decrypts on load from DB.
         """
+        from sqlalchemy.orm import Session
+        from sqlalchemy.orm.attributes import set_committed_value
+
         from neuromem.models.conversation import Conversation
         from neuromem.models.memory import Memory
 
         encrypted_models = {Memory, Conversation}
 
-        @event.listens_for(self.session_factory, "before_flush")
+        # Flush events are only available on the sync Session behind
+        # AsyncSession, so give this factory its own Session class to hook
+        class _EncryptedSession(Session):
+            pass
+
+        self.session_factory.configure(sync_session_class=_EncryptedSession)
+
+        @event.listens_for(_EncryptedSession, "before_flush")
         def _before_flush(session, flush_context, instances):
             for obj in list(session.new) + list(session.dirty):
                 if type(obj) not in encrypted_models:
                     continue
                 content = getattr(obj, "content", None)
                 if content and isinstance(content, str) and not _is_encrypted(content):
-                    envelope = enc_service.encrypt(content)
                     obj._plaintext_cache = content
-                    obj.content = json.dumps(envelope)
+                    obj.content = enc_service.encrypt_value(content, obj.user_id)
+                    if isinstance(obj, Memory):
+                        obj.blind_tokens = enc_service.blind_tokens(content, obj.user_id)
 
-        @event.listens_for(self.session_factory, "after_flush")
+        @event.listens_for(_EncryptedSession, "after_flush")
         def _after_flush(session, flush_context):
             for obj in list(session.new) + list(session.identity_map.values()):
                 if type(obj) not in encrypted_models:
                     continue
                 cached = getattr(obj, "_plaintext_cache", None)
                 if cached is not None:
-                    obj.content = cached
+                    # Committed value: restoring plaintext must not schedule another UPDATE
+                    set_committed_value(obj, "content", cached)
                     del obj._plaintext_cache
 
         for model_cls in encrypted_models:
@@ -381,8 +728,7 @@ class Database:
                 content = getattr(target, "content", None)
                 if content and isinstance(content, str) and _is_encrypted(content):
                     try:
-                        envelope = json.loads(content)
-                        target.content = enc_service.decrypt(envelope)
+                        target.content = enc_service.decrypt_value(content)
                     except Exception as e:
                         logger.warning("Failed to decrypt %s content: %s", type(target).__name__, e)
 
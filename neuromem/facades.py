@@ -145,3 +145,90 @@ class GraphFacade:
         async with self._db.session() as session:
             svc = GraphService(session)
             return await svc.find_path(source_type, source_id, target_type, target_id, max_depth, user_id)
+
+    async def explain_hot_queries(self, user_id: str, node_type=None, node_id: str | None = None, disable_seqscan: bool = False) -> list[dict]:
+        """EXPLAIN the hot graph queries for a user; entries with seq_scan=True lack an index."""
+        from neuromem.models.graph import NodeType
+        from neuromem.services.graph import GraphService
+        async with self._db.session() as session:
+            svc = GraphService(session)
+            return await svc.explain_hot_queries(user_id, node_type or NodeType.USER, node_id, disable_seqscan)
+
+    async def export_graph(self, user_id: str, path: str, batch_size: int = 50_000) -> dict:
+        """Export a user's graph to a directory of columnar NPZ batches.
+
+        Resumable: re-running with the same ``path`` continues after the last
+        batch recorded in ``manifest.json``.
+
+        Returns:
+            The manifest dict (row/batch counts per kind).
+        """
+        from pathlib import Path
+
+        from neuromem.services import graph_transfer as gt
+
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        manifest_path = out / gt.MANIFEST_NAME
+        manifest = gt.read_json(manifest_path) or gt.new_manifest(user_id)
+        if manifest["user_id"] != user_id:
+            raise ValueError(f"{path} holds an export of user {manifest['user_id']!r}")
+        if manifest["version"] != gt.FORMAT_VERSION:
+            raise ValueError(f"{path} holds a version {manifest['version']} export; export to a new directory")
+
+        for kind in ("nodes", "edges"):
+            state = manifest[kind]
+            while not state["done"]:
+                async with self._db.session() as session:
+                    arrays, last_id = await gt.GraphTransferService(session).export_batch(
+                        user_id, kind, state["after"], batch_size,
+                    )
+                if arrays is None:
+                    state["done"] = True
+                else:
+                    gt.write_batch(out, kind, state["batches"], arrays)
+                    state["batches"] += 1
+                    state["rows"] += len(arrays["id"])
+                    state["after"] = last_id
+                gt.write_json(manifest_path, manifest)
+        return manifest
+
+    async def import_graph(self, path: str, user_id: str | None = None) -> dict:
+        """Import a graph exported by :meth:`export_graph` using COPY.
+
+        Args:
+            path: Export directory.
+            user_id: Target user (defaults to the exported user). Importing
+                into another user assigns deterministic new row ids and
+                renames the User node.
+
+        Resumable: progress is kept in ``import-<user_id>.json`` next to the
+        manifest, one committed batch at a time.
+
+        Returns:
+            {"nodes": inserted, "edges": inserted, "batches": {...}}
+        """
+        from pathlib import Path
+
+        from neuromem.services import graph_transfer as gt
+
+        src = Path(path)
+        manifest = gt.read_json(src / gt.MANIFEST_NAME)
+        if manifest is None or not (manifest["nodes"]["done"] and manifest["edges"]["done"]):
+            raise ValueError(f"{path} does not contain a complete graph export")
+        target = user_id or manifest["user_id"]
+
+        state_path = src / f"import-{target}.json"
+        state = gt.read_json(state_path) or {"nodes": 0, "edges": 0}
+        inserted = {"nodes": 0, "edges": 0}
+        for kind in ("nodes", "edges"):
+            for index in range(state[kind], manifest[kind]["batches"]):
+                arrays = gt.read_batch(src, kind, index)
+                async with self._db.session() as session:
+                    inserted[kind] += await gt.GraphTransferService(session).import_batch(
+                        target, kind, arrays, source_user_id=manifest["user_id"],
+                        version=manifest.get("version", 1),
+                    )
+                state[kind] = index + 1
+                gt.write_json(state_path, state)
+        return {**inserted, "batches": state}
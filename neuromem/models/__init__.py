@@ -9,13 +9,17 @@ _embedding_dims: int = 1024
 from neuromem.models.base import Base, TimestampMixin
 from neuromem.models.conversation import Conversation, ConversationSession
 from neuromem.models.document import Document
-from neuromem.models.graph import EdgeType, GraphEdge, GraphNode, NodeType
+from neuromem.models.graph import EdgeType, GraphEdge, GraphNode, GraphNodeStats, NodeType
 from neuromem.models.kv import KeyValue
 from neuromem.models.memory import Memory, Embedding
 from neuromem.models.trait_evidence import TraitEvidence
 from neuromem.models.memory_history import MemoryHistory
 from neuromem.models.reflection_cycle import ReflectionCycle
+from neuromem.models.reflection_queue import ReflectionQueueEntry
+from neuromem.models.reflection_state import ReflectionState
 from neuromem.models.memory_source import MemorySource
+from neuromem.models.context_prototype import ContextPrototype
+from neuromem.models.profile_view import ProfileView
 
 __all__ = [
     "Base",
@@ -25,13 +29,18 @@ __all__ = [
     "TraitEvidence",
     "MemoryHistory",
     "ReflectionCycle",
+    "ReflectionState",
+    "ReflectionQueueEntry",
     "MemorySource",
+    "ContextPrototype",
+    "ProfileView",
     "KeyValue",
     "Conversation",
     "ConversationSession",
     "Document",
     "GraphNode",
     "GraphEdge",
+    "GraphNodeStats",
     "NodeType",
     "EdgeType",
 ]
@@ -0,0 +1,31 @@
+"""Context prototype model - persisted context prototype matrices."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from neuromem.models.base import Base
+
+
+class ContextPrototype(Base):
+    """Mean prototype vectors per context for one embedding model.
+
+    ``matrix`` holds a row-major float32 array of shape (len(labels), dims).
+    ``sentences_hash`` identifies the prototype sentence set it was built
+    from, so editing the sentences invalidates stored rows.
+    """
+
+    __tablename__ = "context_prototypes"
+
+    model: Mapped[str] = mapped_column(String(255), primary_key=True)
+    dims: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sentences_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    labels: Mapped[list] = mapped_column(JSONB, nullable=False)
+    matrix: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -3,10 +3,12 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Index, String, Text
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import Float, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
+import neuromem.models as _models
 from neuromem.models.base import Base, TimestampMixin
 
 
@@ -62,6 +64,11 @@ class GraphNode(Base, TimestampMixin):
     node_type: Mapped[str] = mapped_column(String(50), nullable=False)
     node_id: Mapped[str] = mapped_column(String(255), nullable=False)
     properties: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    # Display-name embedding for entity resolution. Only canonical nodes carry
+    # one; alias nodes point at their canonical node via properties.canonical_id.
+    embedding: Mapped[list | None] = mapped_column(
+        HALFVEC(_models._embedding_dims), nullable=True
+    )
 
     __table_args__ = (
         # 修复：唯一索引必须包含 user_id，否则不同用户无法创建相同的节点
@@ -69,6 +76,11 @@ class GraphNode(Base, TimestampMixin):
         Index("ix_graph_nodes_lookup", "user_id", "node_type", "node_id", unique=True),
     )
 
+    @classmethod
+    def __declare_last__(cls):
+        """Set vector dimension from runtime config after all models declared."""
+        cls.__table__.c.embedding.type = HALFVEC(_models._embedding_dims)
+
 
 class GraphEdge(Base, TimestampMixin):
     """Graph edge table."""
@@ -95,6 +107,49 @@ class GraphEdge(Base, TimestampMixin):
             "edge_type",
             "target_type", "target_id",
         ),
-        # 反向查询索引：find_entity_facts 用 target_id 查找入向边
-        Index("ix_graph_edges_target", "user_id", "target_id"),
+        # 反向查询索引：find_entity_facts / find_path 用 target_id (+target_type) 查找入向边
+        Index(
+            "ix_graph_edges_target_typed",
+            "user_id", "target_id", "target_type",
+            postgresql_include=["source_type", "source_id", "edge_type"],
+        ),
+        # Active-edge partial indexes: most reads filter valid_until IS NULL
+        Index(
+            "ix_graph_edges_active_source",
+            "user_id", "source_id", "source_type", "edge_type",
+            postgresql_include=["target_type", "target_id"],
+            postgresql_where=text("(properties->>'valid_until') IS NULL"),
+        ),
+        Index(
+            "ix_graph_edges_active_target",
+            "user_id", "target_id", "target_type",
+            postgresql_include=["source_type", "source_id", "edge_type"],
+            postgresql_where=text("(properties->>'valid_until') IS NULL"),
+        ),
+    )
+
+
+class GraphNodeStats(Base, TimestampMixin):
+    """Precomputed per-node graph analytics (maintained by GraphAnalyticsService).
+
+    ``importance`` is the personalized PageRank centred on the user node,
+    scaled so the most central node of the user's graph is 1.0. ``component``
+    is the node_id of the first node (by type, id) in its connected component.
+    """
+
+    __tablename__ = "graph_node_stats"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    user_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    node_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    node_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    degree: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    pagerank: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    importance: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    component: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    __table_args__ = (
+        Index("ix_graph_node_stats_lookup", "user_id", "node_type", "node_id", unique=True),
     )
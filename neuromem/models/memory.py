@@ -3,17 +3,61 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 from pgvector.sqlalchemy import HALFVEC
-from sqlalchemy import CheckConstraint, DateTime, Float, Index, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, CheckConstraint, Computed, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 import neuromem.models as _models
 from neuromem.models.base import Base, TimestampMixin
 
 
+def _as_float(value) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _as_datetime(value) -> datetime | None:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _scoring_columns(metadata) -> dict:
+    """Typed scoring columns parsed from metadata; unparseable values are None.
+
+    An ``importance`` of None means "keep the current value".
+    """
+    meta = metadata if isinstance(metadata, dict) else {}
+    emotion = meta.get("emotion")
+    if not isinstance(emotion, dict):
+        emotion = {}
+    temporality = meta.get("temporality")
+    importance = _as_float(meta.get("importance"))
+    return {
+        "event_time": _as_datetime(meta.get("event_time")),
+        "emotion_valence": _as_float(emotion.get("valence")),
+        "emotion_arousal": _as_float(emotion.get("arousal")),
+        "temporality": temporality[:20] if isinstance(temporality, str) else None,
+        "importance": importance / 10.0 if importance is not None else None,
+    }
+
+
 class Memory(Base, TimestampMixin):
     __tablename__ = "memories"
 
@@ -67,6 +111,11 @@ class Memory(Base, TimestampMixin):
     trait_subtype: Mapped[str | None] = mapped_column(String(20), nullable=True)
     trait_stage: Mapped[str | None] = mapped_column(String(20), nullable=True)
     trait_confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Decay is lazy: trait_confidence is the value at trait_confidence_at
+    # (fallback trait_last_reinforced / created_at); trait_dissolve_at is when
+    # the decayed value drops below the dissolve threshold
+    trait_confidence_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    trait_dissolve_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     trait_context: Mapped[str | None] = mapped_column(String(20), nullable=True)
     trait_parent_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
     trait_reinforcement_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
@@ -84,14 +133,47 @@ class Memory(Base, TimestampMixin):
     # Conversation provenance
     source_episode_ids: Mapped[list | None] = mapped_column(ARRAY(UUID(as_uuid=True)), nullable=True)
 
+    # Blind keyword index of encrypted content (keyed term hashes, see EncryptionService)
+    blind_tokens: Mapped[list | None] = mapped_column(ARRAY(BigInteger), nullable=True)
+
+    # Typed copies of the metadata fields read by scored_search, kept in
+    # step with metadata_ by _sync_scoring_columns (metadata importance, on
+    # its 1-10 scale, likewise lands in the importance column as 0-1)
+    event_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    emotion_valence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    emotion_arousal: Mapped[float | None] = mapped_column(Float, nullable=True)
+    temporality: Mapped[str | None] = mapped_column(String(20), nullable=True)
+
+    # Keyword search without pg_search; Database._init_fts regenerates it for
+    # the configured tokenizer. NULL for encrypted content. Deferred: never
+    # needed on loaded objects.
+    content_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "CASE WHEN content LIKE 'nmenc1:%' OR content LIKE '{\"encrypted_dek\"%' THEN NULL "
+            "ELSE to_tsvector('simple', content) END",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     __table_args__ = (
         CheckConstraint("memory_type IN ('fact', 'episodic', 'trait', 'document')", name="chk_memory_type"),
         Index("ix_mem_user", "user_id"),
         Index("ix_mem_user_ts", "user_id", "extracted_timestamp"),
         Index("ix_mem_type_user", "user_id", "memory_type"),
         Index("ix_mem_user_valid", "user_id", "valid_from", "valid_until"),
+        Index("ix_mem_user_created", "user_id", "created_at", "id"),
+        Index("idx_memories_content_tsv", "content_tsv", postgresql_using="gin"),
     )
 
+    @validates("metadata_")
+    def _sync_scoring_columns(self, key, metadata):
+        for column, value in _scoring_columns(metadata).items():
+            if column != "importance" or value is not None:
+                setattr(self, column, value)
+        return metadata
+
     @classmethod
     def __declare_last__(cls):
         """Set vector dimension from runtime config after all models declared."""
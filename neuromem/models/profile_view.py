@@ -0,0 +1,38 @@
+"""Profile view model - materialized per-user profile sections."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from neuromem.models.base import Base
+
+
+class ProfileView(Base):
+    """Assembled profile sections for one user, read with a primary-key lookup.
+
+    ``facts`` holds the newest active facts per category, ``traits`` the
+    rendered top traits and ``mood`` running emotion sums. Memory writers
+    bump ``version`` on every change and set the ``*_stale`` flags when a
+    section can't be patched in place.
+    """
+
+    __tablename__ = "profile_views"
+
+    user_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    facts: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    traits: Mapped[list] = mapped_column(JSONB, nullable=False, server_default="[]")
+    mood: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    facts_stale: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
+    traits_stale: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="1")
+    # When traits and mood (both clock-dependent) were last rebuilt
+    built_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
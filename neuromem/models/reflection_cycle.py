@@ -25,6 +25,9 @@ class ReflectionCycle(Base):
     traits_created: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     traits_updated: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     traits_dissolved: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Estimated LLM tokens spent by the cycle
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     started_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -35,6 +38,10 @@ class ReflectionCycle(Base):
         String(20), default="running", server_default="'running'"
     )
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Digest keyset cursor: id of the last memory processed at completed_at
+    cursor_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
 
     __table_args__ = (
         Index("idx_reflection_user", "user_id", "started_at"),
@@ -0,0 +1,40 @@
+"""Reflection queue model - persisted work queue of the reflection scheduler."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Float, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from neuromem.models.base import Base
+
+
+class ReflectionQueueEntry(Base):
+    """One pending (or leased) reflection job per user."""
+
+    __tablename__ = "reflection_queue"
+
+    user_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    trigger_type: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    trigger_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Run digest() before reflect() (set by the reflection_interval trigger)
+    run_digest: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    estimated_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # pending | running
+    status: Mapped[str] = mapped_column(String(20), default="pending", server_default="pending")
+    # Enqueued again while running: return to the queue instead of finishing
+    requeue: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    enqueued_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    leased_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("idx_reflection_queue_ready", "status", "available_at"),
+    )
@@ -0,0 +1,33 @@
+"""Reflection state model - per-user counters for cheap trigger checks."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from neuromem.models.base import Base
+
+
+class ReflectionState(Base):
+    """Running totals since the user's last completed reflection.
+
+    ``watermark`` mirrors the latest completed ReflectionCycle; the counters
+    cover fact/episodic memories created after it and are bumped by memory
+    writers in their own transaction.
+    """
+
+    __tablename__ = "reflection_state"
+
+    user_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    watermark: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    accumulated_importance: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    new_memory_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index("idx_reflection_state_watermark", "watermark"),
+    )
@@ -2,10 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
 import math
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
 
 from neuromem.providers.embedding import EmbeddingProvider
+from neuromem.services.multi_pattern import MultiPatternMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -160,6 +168,14 @@ CONTEXT_KEYWORDS: dict[str, set[str]] = {
 }
 
 
+# Keyword fallback: one matcher over all (lowercased) keywords, pattern
+# index -> context
+_KEYWORD_CONTEXTS: list[str] = [ctx for ctx, kws in CONTEXT_KEYWORDS.items() for _ in kws]
+_KEYWORD_MATCHER = MultiPatternMatcher(
+    kw.lower() for kws in CONTEXT_KEYWORDS.values() for kw in kws
+)
+
+
 def cosine_similarity(a: list[float], b: list[float]) -> float:
     """Compute cosine similarity between two vectors (pure Python)."""
     dot = sum(x * y for x, y in zip(a, b))
@@ -170,83 +186,289 @@ def cosine_similarity(a: list[float], b: list[float]) -> float:
     return dot / (norm_a * norm_b)
 
 
+@dataclass
+class _UserCentroids:
+    """Running mean embedding and memory count per context for one user."""
+
+    means: dict[str, np.ndarray]
+    counts: dict[str, int]
+    # Blended prototype matrix and row norms, rebuilt after updates
+    blended: tuple[np.ndarray, np.ndarray] | None = None
+
+
+class ContextCentroids:
+    """Per-user in-process cache of context centroids.
+
+    A user's centroid for a context is the mean embedding of their
+    fact/episodic memories with that trait_context. Entries are seeded with
+    one AVG() query on first use and then kept current by ``update`` as
+    extraction stores new memories, so no extra embedding calls are made.
+    """
+
+    def __init__(self, labels: list[str] | None = None, max_users: int = 1024):
+        self._labels = set(labels or CONTEXT_PROTOTYPE_SENTENCES)
+        self._max_users = max_users
+        self._entries: OrderedDict[str, _UserCentroids] = OrderedDict()
+
+    def get(self, user_id: str) -> _UserCentroids | None:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+        return entry
+
+    async def load(self, db, user_id: str) -> _UserCentroids:
+        """Return the user's centroids, seeding them from the DB on first use."""
+        entry = self.get(user_id)
+        if entry is not None:
+            return entry
+        from sqlalchemy import func, select
+
+        from neuromem.models.memory import Memory
+
+        rows = (await db.execute(
+            select(
+                Memory.trait_context,
+                func.avg(Memory.embedding, type_=Memory.embedding.type).label("mean"),
+                func.count().label("n"),
+            ).where(
+                Memory.user_id == user_id,
+                Memory.memory_type.in_(("fact", "episodic")),
+                Memory.trait_context.in_(sorted(self._labels)),
+                Memory.embedding.is_not(None),
+            ).group_by(Memory.trait_context)
+        )).fetchall()
+        entry = _UserCentroids(
+            means={r.trait_context: np.asarray(r.mean, dtype=np.float64) for r in rows},
+            counts={r.trait_context: int(r.n) for r in rows},
+        )
+        self._entries[user_id] = entry
+        while len(self._entries) > self._max_users:
+            self._entries.popitem(last=False)
+        return entry
+
+    def update(self, user_id: str, memories: list) -> None:
+        """Fold newly stored memories into a cached entry (no-op if not cached).
+
+        Uncached users are seeded from the DB later, which already includes
+        these memories.
+        """
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        changed = False
+        for memory in memories:
+            ctx = getattr(memory, "trait_context", None)
+            if ctx not in self._labels or memory.embedding is None:
+                continue
+            vec = np.asarray(memory.embedding, dtype=np.float64)
+            n = entry.counts.get(ctx, 0) + 1
+            mean = entry.means.get(ctx)
+            entry.means[ctx] = vec if mean is None else mean + (vec - mean) / n
+            entry.counts[ctx] = n
+            changed = True
+        if changed:
+            entry.blended = None
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+
+def _embedding_model_key(embedding: EmbeddingProvider) -> str | None:
+    """Stable identity of an embedding provider's model, or None if unknown.
+
+    Unwraps proxies (``_inner``) and reads the provider's model name.
+    """
+    while hasattr(embedding, "_inner"):
+        embedding = embedding._inner
+    for attr in ("model", "_model_name", "_model"):
+        name = getattr(embedding, attr, None)
+        if isinstance(name, str) and name:
+            return f"{type(embedding).__name__}:{name}"
+    return None
+
+
+def _sentences_hash() -> str:
+    payload = json.dumps(CONTEXT_PROTOTYPE_SENTENCES, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class ContextService:
     """Context inference service - infer user context from query embedding.
 
-    Pure computation service, no database access. Prototype vectors are
-    lazily loaded and cached in memory.
+    Prototype vectors are kept as one float32 matrix (one row per context)
+    with precomputed norms, so inference is a single matrix-vector product.
+    They are computed lazily from CONTEXT_PROTOTYPE_SENTENCES, or loaded
+    from the context_prototypes table when ``db`` is given and the provider
+    reports a model name; freshly computed prototypes are stored there for
+    other workers.
     """
 
     MARGIN_THRESHOLD = 0.03
     MAX_CONTEXT_BOOST = 0.15
     GENERAL_CONTEXT_BOOST = 0.10
     CONFIDENCE_NORMALIZER = 0.15
+    # A user centroid with n memories gets blend weight n / (n + prior)
+    CENTROID_PRIOR = 10
+    MIN_CENTROID_COUNT = 3
 
-    def __init__(self, embedding: EmbeddingProvider):
+    def __init__(self, embedding: EmbeddingProvider, db=None):
         self._embedding = embedding
-        self._prototypes: dict[str, list[float]] | None = None
-        self._prototype_norms: dict[str, float] | None = None
+        self._db = db
+        self._labels: list[str] = []
+        self._matrix: np.ndarray | None = None
+        self._norms: np.ndarray | None = None
+        self._lock = asyncio.Lock()
+        self.centroids = ContextCentroids()
+
+    async def ensure_user_centroids(self, user_id: str) -> None:
+        """Seed the user's context centroids from the DB if not cached."""
+        if self._db is None or self.centroids.get(user_id) is not None:
+            return
+        try:
+            async with self._db.session() as session:
+                await self.centroids.load(session, user_id)
+        except Exception as e:
+            logger.warning("Failed to load context centroids for %s: %s", user_id, e)
+
+    def _blended_prototypes(self, entry: _UserCentroids) -> tuple[np.ndarray, np.ndarray]:
+        """Global prototypes mixed row-wise with the user's unit centroids."""
+        if entry.blended is not None and entry.blended[0].shape == self._matrix.shape:
+            return entry.blended
+        global_unit = np.divide(
+            self._matrix, self._norms[:, None],
+            out=np.zeros_like(self._matrix), where=self._norms[:, None] > 0,
+        )
+        user_unit = np.zeros_like(global_unit)
+        weights = np.zeros(len(self._labels), dtype=np.float32)
+        for i, ctx in enumerate(self._labels):
+            n = entry.counts.get(ctx, 0)
+            mean = entry.means.get(ctx)
+            if n < self.MIN_CENTROID_COUNT or mean is None or mean.shape[0] != self._matrix.shape[1]:
+                continue
+            norm = np.linalg.norm(mean)
+            if norm > 0:
+                user_unit[i] = mean / norm
+                weights[i] = n / (n + self.CENTROID_PRIOR)
+        matrix = (1 - weights)[:, None] * global_unit + weights[:, None] * user_unit
+        entry.blended = (matrix, np.linalg.norm(matrix, axis=1))
+        return entry.blended
+
+    def set_prototypes(self, prototypes: dict[str, list[float]]) -> None:
+        """Install prototype vectors (context -> mean embedding)."""
+        self._labels = list(prototypes)
+        if not prototypes:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+        else:
+            self._matrix = np.asarray(list(prototypes.values()), dtype=np.float32)
+        self._norms = np.linalg.norm(self._matrix, axis=1) if self._matrix.size else np.zeros(0, dtype=np.float32)
 
     async def ensure_prototypes(self) -> None:
         """Lazily initialize prototype vectors. Skips if already cached."""
-        if self._prototypes is not None:
+        if self._matrix is not None:
             return
+        async with self._lock:
+            if self._matrix is not None:
+                return
+            model = _embedding_model_key(self._embedding) if self._db is not None else None
+            if model is not None and await self._load_prototypes(model):
+                return
+            try:
+                await self._compute_prototypes()
+            except Exception as e:
+                logger.warning("Failed to initialize context prototypes: %s", e)
+                self.set_prototypes({})
+                return
+            if model is not None:
+                await self._save_prototypes(model)
+
+    async def _compute_prototypes(self) -> None:
+        labels = list(CONTEXT_PROTOTYPE_SENTENCES)
+        all_sentences = [s for ctx in labels for s in CONTEXT_PROTOTYPE_SENTENCES[ctx]]
+        embeddings = np.asarray(await self._embedding.embed_batch(all_sentences), dtype=np.float32)
+
+        rows = []
+        offset = 0
+        for ctx in labels:
+            count = len(CONTEXT_PROTOTYPE_SENTENCES[ctx])
+            rows.append(embeddings[offset:offset + count].mean(axis=0))
+            offset += count
+        self._labels = labels
+        self._matrix = np.vstack(rows).astype(np.float32)
+        self._norms = np.linalg.norm(self._matrix, axis=1)
+        logger.info(
+            "Context prototypes initialized: %d contexts, %d dims",
+            len(labels), self._matrix.shape[1],
+        )
+
+    async def _load_prototypes(self, model: str) -> bool:
+        from neuromem.models.context_prototype import ContextPrototype
 
         try:
-            all_sentences: list[str] = []
-            context_ranges: dict[str, tuple[int, int]] = {}
-            offset = 0
-            for ctx, sentences in CONTEXT_PROTOTYPE_SENTENCES.items():
-                context_ranges[ctx] = (offset, offset + len(sentences))
-                all_sentences.extend(sentences)
-                offset += len(sentences)
-
-            embeddings = await self._embedding.embed_batch(all_sentences)
-
-            self._prototypes = {}
-            self._prototype_norms = {}
-            dims = len(embeddings[0]) if embeddings else 0
-            for ctx, (start, end) in context_ranges.items():
-                ctx_embeddings = embeddings[start:end]
-                mean_vec = [
-                    sum(e[d] for e in ctx_embeddings) / len(ctx_embeddings)
-                    for d in range(dims)
-                ]
-                self._prototypes[ctx] = mean_vec
-                self._prototype_norms[ctx] = math.sqrt(sum(x * x for x in mean_vec))
-
-            logger.info(
-                "Context prototypes initialized: %d contexts, %d dims",
-                len(self._prototypes), dims,
-            )
+            async with self._db.session() as session:
+                row = await session.get(ContextPrototype, (model, self._embedding.dims))
         except Exception as e:
-            logger.warning("Failed to initialize context prototypes: %s", e)
-            self._prototypes = {}
-            self._prototype_norms = {}
+            logger.warning("Failed to load stored context prototypes: %s", e)
+            return False
+        if row is None or row.sentences_hash != _sentences_hash():
+            return False
+        matrix = np.frombuffer(row.matrix, dtype=np.float32)
+        self._labels = list(row.labels)
+        self._matrix = matrix.reshape(len(self._labels), row.dims)
+        self._norms = np.linalg.norm(self._matrix, axis=1)
+        logger.info("Context prototypes loaded for %s (%d dims)", model, row.dims)
+        return True
+
+    async def _save_prototypes(self, model: str) -> None:
+        from sqlalchemy import text
+
+        try:
+            async with self._db.session() as session:
+                await session.execute(
+                    text(
+                        "INSERT INTO context_prototypes (model, dims, sentences_hash, labels, matrix) "
+                        "VALUES (:model, :dims, :hash, CAST(:labels AS jsonb), :matrix) "
+                        "ON CONFLICT (model, dims) DO UPDATE SET "
+                        "  sentences_hash = EXCLUDED.sentences_hash, labels = EXCLUDED.labels, "
+                        "  matrix = EXCLUDED.matrix, created_at = now()"
+                    ),
+                    {
+                        "model": model,
+                        "dims": int(self._matrix.shape[1]),
+                        "hash": _sentences_hash(),
+                        "labels": json.dumps(self._labels),
+                        "matrix": self._matrix.tobytes(),
+                    },
+                )
+        except Exception as e:
+            logger.warning("Failed to store context prototypes: %s", e)
 
     def infer_context(
-        self, query_embedding: list[float], query_text: str = ""
+        self, query_embedding: list[float], query_text: str = "", user_id: str | None = None,
     ) -> tuple[str, float]:
         """Infer the most likely context from a query embedding.
 
+        With ``user_id``, the global prototypes are blended with the user's
+        cached context centroids (see ensure_user_centroids).
+
         Returns:
             (context_label, confidence) where confidence=0 means general/unknown.
         """
-        if not self._prototypes:
+        if self._matrix is None or not self._labels:
             return ("general", 0.0)
 
-        query_norm = math.sqrt(sum(x * x for x in query_embedding))
-        if query_norm == 0:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if query_norm == 0 or query.shape[0] != self._matrix.shape[1]:
             return ("general", 0.0)
 
-        similarities: dict[str, float] = {}
-        for ctx, proto in self._prototypes.items():
-            proto_norm = self._prototype_norms.get(ctx, 0.0)
-            if proto_norm == 0:
-                similarities[ctx] = 0.0
-                continue
-            dot = sum(q * p for q, p in zip(query_embedding, proto))
-            similarities[ctx] = dot / (query_norm * proto_norm)
+        matrix, norms = self._matrix, self._norms
+        entry = self.centroids.get(user_id) if user_id else None
+        if entry is not None and entry.counts:
+            matrix, norms = self._blended_prototypes(entry)
+
+        denom = norms * query_norm
+        scores = np.divide(matrix @ query, denom, out=np.zeros_like(denom), where=denom > 0)
+        similarities = dict(zip(self._labels, scores.tolist()))
 
         sorted_items = sorted(similarities.items(), key=lambda x: x[1], reverse=True)
         best_ctx, best_score = sorted_items[0]
@@ -267,12 +489,11 @@ class ContextService:
         if not query_text:
             return None
 
-        query_lower = query_text.lower()
-        scores: dict[str, int] = {}
-        for ctx, keywords in CONTEXT_KEYWORDS.items():
-            count = sum(1 for kw in keywords if kw.lower() in query_lower)
-            if count > 0:
-                scores[ctx] = count
+        counts: dict[str, int] = {}
+        for idx in _KEYWORD_MATCHER.find(query_text.lower()):
+            ctx = _KEYWORD_CONTEXTS[idx]
+            counts[ctx] = counts.get(ctx, 0) + 1
+        scores = {ctx: counts[ctx] for ctx in CONTEXT_KEYWORDS if ctx in counts}
 
         if not scores:
             return None
@@ -289,6 +510,7 @@ class ContextService:
 
     def clear_prototypes(self) -> None:
         """Clear prototype vector cache."""
-        self._prototypes = None
-        self._prototype_norms = None
+        self._labels = []
+        self._matrix = None
+        self._norms = None
         logger.info("Context prototypes cache cleared")
@@ -1,18 +1,66 @@
 """Client-side envelope encryption for memory data.
 
 Uses AES-256-GCM for data encryption and RSA-2048-OAEP for key wrapping.
-Each encrypt() call generates a fresh AES key and nonce, ensuring
-that the same plaintext produces different ciphertext every time.
+
+Stored values use a two-level key hierarchy (``encrypt_value``): each user
+gets a data encryption key (DEK) that is RSA-wrapped once per epoch
+(``dek_ttl``) and cached, and every value is sealed with AES-GCM under it
+with a fresh nonce. The token carries the wrapped DEK, so decryption needs
+one RSA unwrap per distinct DEK, cached by its wrapped form:
+
+    nmenc1:<base64 wrapped DEK>:<base64 nonce + ciphertext>
+
+``encrypt``/``decrypt`` keep the original one-DEK-per-value JSON envelope;
+``decrypt_value`` reads both formats and ``rewrap`` converts old envelopes.
+
+Keyword search over encrypted memories uses a blind index (``blind_tokens``):
+content terms (words, CJK bigrams) are hashed with a keyed HMAC that mixes in
+the user id, so the database can match query terms without seeing them.
 """
 from __future__ import annotations
 
 import base64
+import hashlib
+import hmac
+import json
+import logging
 import os
+import re
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from neuromem.db import ENCRYPTED_PREFIX, _is_encrypted
+
+logger = logging.getLogger(__name__)
+
+_OAEP = padding.OAEP(
+    mgf=padding.MGF1(hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None,
+)
+
+# Kana, CJK ideographs and Hangul are indexed as character bigrams (no spaces
+# between words); other word characters as whole lowercased words
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_TERM = re.compile(f"[{_CJK}]+|[^\\W{_CJK}]+")
+_CJK_RUN = re.compile(f"[{_CJK}]")
+
+
+def index_terms(text: str) -> set[str]:
+    """Terms of a text as the blind index sees them."""
+    terms: set[str] = set()
+    for run in _TERM.findall(text.lower()):
+        if _CJK_RUN.match(run) and len(run) > 1:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.add(run)
+    return terms
 
 
 class EncryptionService:
@@ -23,13 +71,43 @@ class EncryptionService:
         public_key_path: str | None = None,
         private_key_path: str | None = None,
         passphrase: bytes | None = None,
+        dek_ttl: float = 3600.0,
+        key_cache_size: int = 1024,
+        index_key: bytes | None = None,
     ):
+        """
+        Args:
+            dek_ttl: Seconds a user's DEK is used for new values before a new
+                one is generated (and wrapped); also how long an unwrapped
+                DEK stays in the decryption cache.
+            key_cache_size: Max unwrapped DEKs kept for decryption, and max
+                users whose current DEK is kept for encryption.
+            index_key: HMAC key of the blind keyword index. Defaults to a key
+                derived from the private key; without either, memories are
+                not indexed and encrypted search is vector-only. Writers and
+                readers must use the same key.
+        """
         self._public_key = None
         self._private_key = None
+        self._dek_ttl = dek_ttl
+        self._key_cache_size = key_cache_size
+        # user_id -> (DEK, base64 wrapped DEK, expiry) for new values, LRU order
+        self._write_keys: OrderedDict[str | None, tuple[bytes, str, float]] = OrderedDict()
+        # base64 wrapped DEK -> (AESGCM, expiry), LRU order
+        self._read_keys: OrderedDict[str, tuple[AESGCM, float]] = OrderedDict()
         if public_key_path:
             self._public_key = self._load_public_key(public_key_path)
         if private_key_path:
             self._private_key = self._load_private_key(private_key_path, passphrase)
+        if index_key is None and self._private_key is not None:
+            index_key = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None, info=b"neuromem blind index",
+            ).derive(self._private_key.private_bytes(
+                serialization.Encoding.DER,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ))
+        self._index_key = index_key
 
     @staticmethod
     def generate_keypair(
@@ -93,14 +171,7 @@ class EncryptionService:
         ciphertext = AESGCM(dek).encrypt(nonce, data, None)
 
         # Wrap DEK with RSA-OAEP
-        encrypted_dek = self._public_key.encrypt(
-            dek,
-            padding.OAEP(
-                mgf=padding.MGF1(hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None,
-            ),
-        )
+        encrypted_dek = self._public_key.encrypt(dek, _OAEP)
 
         return {
             "encrypted_dek": base64.b64encode(encrypted_dek).decode(),
@@ -125,14 +196,7 @@ class EncryptionService:
             raise ValueError("Private key not loaded")
 
         # Unwrap DEK with RSA private key
-        dek = self._private_key.decrypt(
-            base64.b64decode(envelope["encrypted_dek"]),
-            padding.OAEP(
-                mgf=padding.MGF1(hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None,
-            ),
-        )
+        dek = self._private_key.decrypt(base64.b64decode(envelope["encrypted_dek"]), _OAEP)
 
         # Decrypt data with AES-256-GCM
         plaintext = AESGCM(dek).decrypt(
@@ -143,6 +207,106 @@ class EncryptionService:
 
         return plaintext.decode("utf-8")
 
+    def encrypt_value(self, plaintext: str, user_id: str | None = None) -> str:
+        """Seal a string under the user's current DEK.
+
+        Only AES-GCM runs per value; RSA wrapping happens once per user and
+        epoch. Returns an ``nmenc1:`` token suitable for a text column.
+        """
+        if not self._public_key:
+            raise ValueError("Public key not loaded")
+        now = time.monotonic()
+        entry = self._write_keys.get(user_id)
+        if entry is None or entry[2] <= now:
+            self._prune_write_keys(now)
+            dek = os.urandom(32)
+            wrapped = base64.b64encode(self._public_key.encrypt(dek, _OAEP)).decode()
+            entry = (dek, wrapped, now + self._dek_ttl)
+            self._write_keys[user_id] = entry
+            self._remember(wrapped, AESGCM(dek), now)
+        self._write_keys.move_to_end(user_id)
+        dek, wrapped, _ = entry
+        nonce = os.urandom(12)
+        sealed = nonce + AESGCM(dek).encrypt(nonce, plaintext.encode("utf-8"), None)
+        return f"{ENCRYPTED_PREFIX}{wrapped}:{base64.b64encode(sealed).decode()}"
+
+    def decrypt_value(self, value: str) -> str:
+        """Decrypt a stored value; plaintext passes through unchanged.
+
+        Accepts ``nmenc1:`` tokens and legacy JSON envelopes.
+        """
+        if not _is_encrypted(value):
+            return value
+        if not value.startswith(ENCRYPTED_PREFIX):
+            return self.decrypt(json.loads(value))
+        wrapped, _, sealed = value[len(ENCRYPTED_PREFIX):].partition(":")
+        data = base64.b64decode(sealed)
+        return self._unwrap(wrapped).decrypt(data[:12], data[12:], None).decode("utf-8")
+
+    def decrypt_many(self, values: list[str]) -> list[str]:
+        """Decrypt a result set, unwrapping each distinct DEK once.
+
+        Values that fail to decrypt are returned unchanged (as the row-level
+        hooks do) so one bad row doesn't lose the whole batch.
+        """
+        out = []
+        for value in values:
+            try:
+                out.append(self.decrypt_value(value))
+            except Exception as e:
+                logger.warning("Failed to decrypt content: %s", e)
+                out.append(value)
+        return out
+
+    def rewrap(self, value: str, user_id: str | None = None) -> str:
+        """Re-encrypt a stored value (any format) under the user's current DEK."""
+        return self.encrypt_value(self.decrypt_value(value), user_id)
+
+    @property
+    def blind_index_enabled(self) -> bool:
+        return self._index_key is not None
+
+    def blind_tokens(self, text: str, user_id: str | None = None) -> list[int] | None:
+        """Keyed hashes of the text's index terms, as sorted signed 64-bit ints.
+
+        None when no index key is available.
+        """
+        if self._index_key is None:
+            return None
+        prefix = f"{user_id or ''}\x00"
+        return sorted({
+            int.from_bytes(
+                hmac.new(self._index_key, (prefix + term).encode("utf-8"), hashlib.sha256).digest()[:8],
+                "big", signed=True,
+            )
+            for term in index_terms(text)
+        })
+
+    def _unwrap(self, wrapped: str) -> AESGCM:
+        now = time.monotonic()
+        entry = self._read_keys.get(wrapped)
+        if entry is not None and entry[1] > now:
+            self._read_keys.move_to_end(wrapped)
+            return entry[0]
+        if not self._private_key:
+            raise ValueError("Private key not loaded")
+        cipher = AESGCM(self._private_key.decrypt(base64.b64decode(wrapped), _OAEP))
+        self._remember(wrapped, cipher, now)
+        return cipher
+
+    def _prune_write_keys(self, now: float) -> None:
+        """Drop expired DEKs and make room for one more, least recently used first."""
+        for user_id in [u for u, (_, _, expiry) in self._write_keys.items() if expiry <= now]:
+            del self._write_keys[user_id]
+        while self._write_keys and len(self._write_keys) >= self._key_cache_size:
+            self._write_keys.popitem(last=False)
+
+    def _remember(self, wrapped: str, cipher: AESGCM, now: float) -> None:
+        self._read_keys[wrapped] = (cipher, now + self._dek_ttl)
+        self._read_keys.move_to_end(wrapped)
+        while len(self._read_keys) > self._key_cache_size:
+            self._read_keys.popitem(last=False)
+
     @staticmethod
     def _load_public_key(path: str):
         return serialization.load_pem_public_key(Path(path).read_bytes())
@@ -0,0 +1,71 @@
+"""Base class for in-memory buffers written back by periodic bulk flushes."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlushBuffer:
+    """Collect entries in ``_pending`` and write them in one batch per interval.
+
+    Subclasses add to ``_pending`` and call ``_schedule()``; ``_write``
+    persists one drained batch. A flush runs every ``flush_interval``
+    seconds, or immediately once ``max_pending`` keys are waiting. Writes
+    are best effort: a failed flush is logged and its batch is dropped.
+    """
+
+    # Used in log messages, e.g. "access tracking flush failed".
+    _label = "buffer"
+
+    def __init__(self, db, flush_interval: float = 5.0, max_pending: int = 1000):
+        self._db = db
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._pending: dict = {}
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Distinct keys waiting for the next flush."""
+        return len(self._pending)
+
+    def _schedule(self) -> None:
+        if len(self._pending) >= self._max_pending:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._pending and (self._timer is None or self._timer.done()):
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        await self.flush()
+
+    async def _write(self, pending: dict) -> int:
+        raise NotImplementedError
+
+    async def flush(self) -> int:
+        """Write everything buffered now. Returns the number of rows updated."""
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                return await self._write(pending)
+            except Exception as e:
+                logger.warning("%s flush failed (%d entries): %s", self._label, len(pending), e)
+                return 0
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop the timer and flush what is buffered, waiting at most ``timeout`` seconds."""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        try:
+            await asyncio.wait_for(asyncio.gather(*self._flushes, self.flush()), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s flush timed out on close", self._label)
@@ -5,11 +5,54 @@ from __future__ import annotations
 import uuid
 from typing import Any, Optional
 
-from sqlalchemy import delete, or_, select
+from sqlalchemy import delete, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from neuromem.models.graph import EdgeType, GraphEdge, GraphNode, NodeType
 
+_ACTIVE = "(properties->>'valid_until') IS NULL"
+
+# Canonical hot-path graph queries checked by explain_hot_queries().
+# Each must be answerable by an index; a Seq Scan means a missing index.
+HOT_GRAPH_QUERIES: dict[str, str] = {
+    # find_entity_facts (UNION ALL branches)
+    "entity_facts_outgoing": (
+        f"SELECT * FROM graph_edges WHERE user_id = :uid AND source_id = :nid AND {_ACTIVE}"
+    ),
+    "entity_facts_incoming": (
+        f"SELECT * FROM graph_edges WHERE user_id = :uid AND target_id = :nid AND {_ACTIVE}"
+    ),
+    # GraphMemoryService._resolve_conflict / _invalidate_existing_edges
+    "triple_conflict_check": (
+        "SELECT * FROM graph_edges WHERE user_id = :uid AND source_type = :ntype "
+        f"AND source_id = :nid AND edge_type = :etype AND {_ACTIVE}"
+    ),
+    # find_path BFS expansion
+    "path_outgoing": (
+        "SELECT * FROM graph_edges WHERE user_id = :uid AND source_type = :ntype AND source_id = :nid"
+    ),
+    "path_incoming": (
+        "SELECT * FROM graph_edges WHERE user_id = :uid AND target_type = :ntype AND target_id = :nid"
+    ),
+    # GraphAnalyticsService edge load (index-only candidate)
+    "active_edge_list": (
+        "SELECT source_type, source_id, target_type, target_id FROM graph_edges "
+        f"WHERE user_id = :uid AND {_ACTIVE}"
+    ),
+    # store_triples node lookup
+    "node_lookup": (
+        "SELECT node_type, node_id FROM graph_nodes WHERE user_id = :uid AND node_id = :nid"
+    ),
+}
+
+
+def _walk_plan(plan: dict) -> list[dict]:
+    """Flatten an EXPLAIN (FORMAT JSON) plan tree."""
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(_walk_plan(child))
+    return nodes
+
 
 class GraphService:
     """Service for managing graph data with relational tables."""
@@ -406,3 +449,59 @@ class GraphService:
 
         await self.db.delete(edge)
         await self.db.flush()
+
+    async def explain_hot_queries(
+        self,
+        user_id: Optional[str] = None,
+        node_type: NodeType = NodeType.USER,
+        node_id: Optional[str] = None,
+        disable_seqscan: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Run EXPLAIN on the canonical graph queries and flag sequential scans.
+
+        Args:
+            node_type / node_id: Sample node to plan with (default: the user node).
+            disable_seqscan: Plan with ``enable_seqscan = off`` to check whether
+                an index *can* serve each query even on tables small enough
+                that the planner would rather scan them.
+
+        Returns:
+            One dict per query: name, seq_scan (bool), scans (list of
+            "<node type> [on <relation>] [using <index>]"), total_cost, plan.
+        """
+        effective_user_id = self._effective_user_id(user_id)
+        params = {
+            "uid": effective_user_id,
+            "ntype": node_type.value,
+            "nid": node_id or effective_user_id,
+            "etype": EdgeType.WORKS_AT.value,
+        }
+        if disable_seqscan:
+            await self.db.execute(text("SET LOCAL enable_seqscan = off"))
+
+        report: list[dict[str, Any]] = []
+        try:
+            for name, sql in HOT_GRAPH_QUERIES.items():
+                used = {k: v for k, v in params.items() if f":{k}" in sql}
+                plan = (await self.db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), used)).scalar()
+                root = plan[0]["Plan"]
+                # Heap/seq scans carry "Relation Name"; bitmap index scans only "Index Name"
+                scans = [
+                    n for n in _walk_plan(root) if "Relation Name" in n or "Index Name" in n
+                ]
+                report.append({
+                    "name": name,
+                    "seq_scan": any(n["Node Type"] == "Seq Scan" for n in scans),
+                    "scans": [
+                        n["Node Type"]
+                        + (f" on {n['Relation Name']}" if n.get("Relation Name") else "")
+                        + (f" using {n['Index Name']}" if n.get("Index Name") else "")
+                        for n in scans
+                    ],
+                    "total_cost": root.get("Total Cost"),
+                    "plan": root,
+                })
+        finally:
+            if disable_seqscan:
+                await self.db.execute(text("RESET enable_seqscan"))
+        return report
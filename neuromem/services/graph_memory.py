@@ -3,19 +3,32 @@
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import or_, select, text
+import numpy as np
+from sqlalchemy import and_, func, or_, select, text, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from neuromem.models.graph import EdgeType, GraphEdge, GraphNode, NodeType
+from neuromem.models.graph import EdgeType, GraphEdge, GraphNode, GraphNodeStats, NodeType
+
+if TYPE_CHECKING:
+    from neuromem.providers.embedding import EmbeddingProvider
 
 logger = logging.getLogger(__name__)
 
 # Minimum confidence to store a triple — filters low-confidence LLM extractions
 _MIN_TRIPLE_CONFIDENCE: float = 0.6
 
+# Cosine similarity at which a new entity name is treated as an alias of an
+# existing node of the same type (e.g. "Google Inc." -> "google")
+_ENTITY_RESOLUTION_THRESHOLD: float = 0.92
+
+# Row block size for pairwise similarity during compaction (bounds memory)
+_COMPACTION_BLOCK: int = 1024
+
 # Mapping from LLM-extracted type strings to NodeType enums
 # NOTE: "concept" is intentionally absent — concept-type objects are filtered at storage time
 _NODE_TYPE_MAP: dict[str, NodeType] = {
@@ -76,6 +89,112 @@ def _resolve_edge_type(relation: str) -> EdgeType:
     return _EDGE_TYPE_MAP.get(relation.lower(), EdgeType.CUSTOM)
 
 
+def _normalize_rows(vectors: Any) -> np.ndarray:
+    """Return an L2-normalized float32 matrix (zero rows stay zero)."""
+    mat = np.asarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _values_clause(rows: list[tuple], prefix: str) -> tuple[str, dict[str, Any]]:
+    """Build a bound ``VALUES (...), (...)`` clause for bulk UPDATE ... FROM."""
+    parts: list[str] = []
+    params: dict[str, Any] = {}
+    for i, row in enumerate(rows):
+        names = []
+        for j, value in enumerate(row):
+            key = f"{prefix}{i}_{j}"
+            params[key] = value
+            names.append(f":{key}")
+        parts.append(f"({', '.join(names)})")
+    return ", ".join(parts), params
+
+
+@dataclass
+class _EntityMatrix:
+    """Canonical node embeddings of one user, rows L2-normalized."""
+
+    node_types: list[str] = field(default_factory=list)
+    node_ids: list[str] = field(default_factory=list)
+    matrix: np.ndarray | None = None
+    # Number of embedded nodes in the DB when loaded — cheap staleness check
+    signature: int = 0
+
+
+class EntityIndex:
+    """Per-user in-process cache of canonical graph node embeddings.
+
+    Entity resolution compares every new entity name against all canonical
+    nodes of the same type; caching the normalized matrix turns that into a
+    single matrix product per batch instead of one vector query per name.
+    Entries are validated against the number of embedded nodes in the DB, so
+    writes from other processes cause a reload on next use.
+    """
+
+    def __init__(self, max_users: int = 256):
+        self._max_users = max_users
+        self._entries: OrderedDict[str, _EntityMatrix] = OrderedDict()
+
+    async def load(self, db: AsyncSession, user_id: str) -> _EntityMatrix:
+        """Return the user's matrix, reloading it if the DB has changed."""
+        signature = (await db.execute(
+            select(func.count()).select_from(GraphNode).where(
+                GraphNode.user_id == user_id,
+                GraphNode.embedding.is_not(None),
+            )
+        )).scalar() or 0
+
+        entry = self._entries.get(user_id)
+        if entry is not None and entry.signature == signature:
+            self._entries.move_to_end(user_id)
+            return entry
+
+        result = await db.execute(
+            select(GraphNode.node_type, GraphNode.node_id, GraphNode.embedding).where(
+                GraphNode.user_id == user_id,
+                GraphNode.embedding.is_not(None),
+            )
+        )
+        rows = result.fetchall()
+        entry = _EntityMatrix(
+            node_types=[r.node_type for r in rows],
+            node_ids=[r.node_id for r in rows],
+            matrix=_normalize_rows([r.embedding.to_numpy() for r in rows]) if rows else None,
+            signature=len(rows),
+        )
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_users:
+            self._entries.popitem(last=False)
+        return entry
+
+    def append(
+        self,
+        user_id: str,
+        node_types: list[str],
+        node_ids: list[str],
+        vectors: np.ndarray,
+    ) -> None:
+        """Add freshly created canonical nodes (rows already normalized)."""
+        entry = self._entries.get(user_id)
+        if entry is None or not node_ids:
+            return
+        entry.node_types.extend(node_types)
+        entry.node_ids.extend(node_ids)
+        entry.matrix = vectors if entry.matrix is None else np.vstack([entry.matrix, vectors])
+        entry.signature += len(node_ids)
+
+    def invalidate(self, user_id: str | None = None) -> None:
+        """Drop cached matrices for one user, or all users."""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+
 class GraphMemoryService:
     """Service for storing LLM-extracted triples into the graph.
 
@@ -84,10 +203,22 @@ class GraphMemoryService:
     - Heuristic conflict resolution for edges
     - Temporal model with valid_from/valid_until
     - Entity fact queries
+    - Embedding-based entity resolution (when an embedding provider is given)
     """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        embedding: EmbeddingProvider | None = None,
+        entity_index: EntityIndex | None = None,
+        resolution_threshold: float = _ENTITY_RESOLUTION_THRESHOLD,
+    ):
         self.db = db
+        self._embedding = embedding
+        self._entity_index = entity_index or EntityIndex(max_users=1)
+        self._resolution_threshold = resolution_threshold
+        # (node_type, node_id) -> canonical node_id, filled by _ensure_nodes_batch
+        self._canonical: dict[tuple[str, str], str] = {}
 
     async def store_triples(self, user_id: str, triples: list[dict[str, Any]]) -> int:
         """Store a batch of triples into the graph.
@@ -138,6 +269,9 @@ class GraphMemoryService:
 
         count = 0
         for triple, stype, sid, otype, oid, etype, relation in parsed:
+            # Edges always attach to the canonical node of an alias
+            sid = self._canonical.get((stype.value, sid), sid)
+            oid = self._canonical.get((otype.value, oid), oid)
             try:
                 stored = await self._store_single_triple(
                     user_id, triple, stype, sid, otype, oid, etype, relation,
@@ -155,7 +289,13 @@ class GraphMemoryService:
         user_id: str,
         needed_nodes: set[tuple[NodeType, str, str]],
     ) -> None:
-        """Batch get-or-create nodes (1 DB query instead of 2N individual checks)."""
+        """Batch get-or-create nodes (1 DB query instead of 2N individual checks).
+
+        Existing alias nodes resolve to their canonical id. When an embedding
+        provider is configured, new names are embedded in one batch and matched
+        against canonical nodes of the same type; close matches are stored as
+        alias nodes instead of new entities.
+        """
         if not needed_nodes:
             return
 
@@ -170,25 +310,111 @@ class GraphMemoryService:
         # Single query for all needed node IDs
         node_id_set = {nid for _, nid, _ in to_check}
         result = await self.db.execute(
-            select(GraphNode.node_type, GraphNode.node_id).where(
+            select(
+                GraphNode.node_type,
+                GraphNode.node_id,
+                GraphNode.properties["canonical_id"].astext.label("canonical_id"),
+            ).where(
                 GraphNode.user_id == user_id,
                 GraphNode.node_id.in_(node_id_set),
             )
         )
-        existing = {(row.node_type, row.node_id) for row in result.fetchall()}
+        existing: set[tuple[str, str]] = set()
+        for row in result.fetchall():
+            existing.add((row.node_type, row.node_id))
+            if row.canonical_id:
+                self._canonical[(row.node_type, row.node_id)] = row.canonical_id
+
+        missing = sorted(
+            (nt, nid, name) for nt, nid, name in to_check
+            if (nt.value, nid) not in existing
+        )
+        resolvable = [
+            (nt, nid, name) for nt, nid, name in missing if nt != NodeType.USER
+        ]
+        resolved = await self._resolve_new_entities(user_id, resolvable)
 
         # Insert only missing nodes
-        for node_type, node_id, name in to_check:
-            if (node_type.value, node_id) not in existing:
-                self.db.add(GraphNode(
-                    user_id=user_id,
-                    node_type=node_type.value,
-                    node_id=node_id,
-                    properties={"name": name},
-                ))
-                logger.debug("添加节点到 session: %s:%s", node_type.value, node_id)
+        for node_type, node_id, name in missing:
+            canonical, vector = resolved.get((node_type.value, node_id), (None, None))
+            properties: dict[str, Any] = {"name": name}
+            if canonical is not None:
+                properties["canonical_id"] = canonical
+                self._canonical[(node_type.value, node_id)] = canonical
+            self.db.add(GraphNode(
+                user_id=user_id,
+                node_type=node_type.value,
+                node_id=node_id,
+                properties=properties,
+                embedding=vector,
+            ))
+            logger.debug("添加节点到 session: %s:%s", node_type.value, node_id)
+        for node_type, node_id, _ in to_check:
             self._created_nodes.add((user_id, node_type.value, node_id))
 
+    async def _resolve_new_entities(
+        self,
+        user_id: str,
+        candidates: list[tuple[NodeType, str, str]],
+    ) -> dict[tuple[str, str], tuple[str | None, list[float] | None]]:
+        """Match new entity names against canonical nodes of the same type.
+
+        Returns (node_type, node_id) -> (canonical_id, None) for aliases and
+        (None, embedding) for new canonical nodes. Names earlier in the batch
+        can be canonical for later ones. Without an embedding provider, or if
+        embedding fails, returns an empty dict (plain get-or-create).
+        """
+        if not candidates or self._embedding is None:
+            return {}
+        try:
+            raw = await self._embedding.embed_batch([name for _, _, name in candidates])
+            entry = await self._entity_index.load(self.db, user_id)
+        except Exception as e:
+            logger.warning("Entity resolution skipped for %s: %s", user_id, e)
+            return {}
+
+        queries = _normalize_rows(raw)
+        cand_types = np.array([nt.value for nt, _, _ in candidates])
+        threshold = self._resolution_threshold
+
+        # Top-1 against cached canonical nodes, restricted to the same type
+        if entry.matrix is not None and entry.matrix.shape[1] == queries.shape[1]:
+            known = queries @ entry.matrix.T
+            known[cand_types[:, None] != np.array(entry.node_types)[None, :]] = -1.0
+            known_best = known.argmax(axis=1)
+            known_score = known[np.arange(len(candidates)), known_best]
+        else:
+            known_best = np.zeros(len(candidates), dtype=np.int64)
+            known_score = np.full(len(candidates), -1.0, dtype=np.float32)
+
+        # Within-batch duplicates: only earlier canonical rows may absorb later ones
+        within = queries @ queries.T
+        within[cand_types[:, None] != cand_types[None, :]] = -1.0
+        within[np.triu_indices(len(candidates))] = -1.0
+
+        resolved: dict[tuple[str, str], tuple[str | None, list[float] | None]] = {}
+        is_canonical = np.zeros(len(candidates), dtype=bool)
+        for i, (node_type, node_id, _) in enumerate(candidates):
+            batch_scores = np.where(is_canonical, within[i], -1.0)
+            j = int(batch_scores.argmax()) if i else 0
+            batch_score = float(batch_scores[j]) if i else -1.0
+            if float(known_score[i]) >= threshold and float(known_score[i]) >= batch_score:
+                resolved[(node_type.value, node_id)] = (entry.node_ids[known_best[i]], None)
+            elif batch_score >= threshold:
+                # Earlier batch row is canonical: reuse its id
+                resolved[(node_type.value, node_id)] = (candidates[j][1], None)
+            else:
+                is_canonical[i] = True
+                resolved[(node_type.value, node_id)] = (None, [float(v) for v in raw[i]])
+
+        self._entity_index.append(
+            user_id,
+            cand_types[is_canonical].tolist(),
+            [candidates[i][1] for i in np.flatnonzero(is_canonical)],
+            queries[is_canonical],
+        )
+        return resolved
+
     async def _store_single_triple(
         self,
         user_id: str,
@@ -331,14 +557,27 @@ class GraphMemoryService:
         entity_name: str,
         limit: int = 20,
         as_of: datetime | None = None,
+        resolve_aliases: bool = True,
     ) -> list[dict[str, Any]]:
         """Find all active facts related to an entity.
 
         Searches both outgoing and incoming edges for the entity node.
         Only returns edges where valid_until is None (active), or
         edges valid at the as_of time point for time-travel queries.
+        Alias names are followed to their canonical node unless
+        ``resolve_aliases`` is False (caller already passes canonical ids).
         """
         node_id = _normalize_node_id(entity_name)
+        if resolve_aliases:
+            canonical = (await self.db.execute(
+                select(GraphNode.properties["canonical_id"].astext).where(
+                    GraphNode.user_id == user_id,
+                    GraphNode.node_id == node_id,
+                    GraphNode.properties.has_key("canonical_id"),
+                ).limit(1)
+            )).scalar()
+            if canonical:
+                node_id = canonical
 
         # Time-travel filter on graph edge properties
         if as_of is not None:
@@ -349,34 +588,52 @@ class GraphMemoryService:
         else:
             time_filter = text("(properties->>'valid_until') IS NULL")
 
-        # Single query covers both outgoing and incoming edges
-        query = select(GraphEdge).where(
+        # Outgoing and incoming edges as UNION ALL of two index scans (an OR
+        # across source_id/target_id cannot use either index); the incoming
+        # branch skips self-loops already returned by the outgoing one
+        outgoing = select(GraphEdge).where(
             GraphEdge.user_id == user_id,
-            or_(GraphEdge.source_id == node_id, GraphEdge.target_id == node_id),
+            GraphEdge.source_id == node_id,
             time_filter,
         ).limit(limit)
-        if as_of is not None:
-            query = query.params(as_of=as_of)
-        result = await self.db.execute(query)
+        incoming = select(GraphEdge).where(
+            GraphEdge.user_id == user_id,
+            GraphEdge.target_id == node_id,
+            GraphEdge.source_id != node_id,
+            time_filter,
+        ).limit(limit)
+        query = select(GraphEdge).from_statement(union_all(outgoing, incoming).limit(limit))
+        params = {"as_of": as_of} if as_of is not None else {}
+        result = await self.db.execute(query, params)
         edges = result.scalars().all()
 
         if not edges:
             return []
 
         # Batch-fetch node display names to replace raw IDs (e.g. UUIDs for user nodes)
+        # together with precomputed importance (see GraphAnalyticsService)
         all_node_ids = {e.source_id for e in edges} | {e.target_id for e in edges}
         node_result = await self.db.execute(
-            select(GraphNode.node_id, GraphNode.properties).where(
+            select(GraphNode.node_id, GraphNode.properties, GraphNodeStats.importance)
+            .outerjoin(GraphNodeStats, and_(
+                GraphNodeStats.user_id == GraphNode.user_id,
+                GraphNodeStats.node_type == GraphNode.node_type,
+                GraphNodeStats.node_id == GraphNode.node_id,
+            ))
+            .where(
                 GraphNode.user_id == user_id,
                 GraphNode.node_id.in_(all_node_ids),
             )
         )
         node_name_map: dict[str, str] = {}
+        importance_map: dict[str, float] = {}
         for row in node_result.fetchall():
             props = row.properties or {}
             name = props.get("name")
             if name:
                 node_name_map[row.node_id] = name
+            if row.importance is not None:
+                importance_map[row.node_id] = row.importance
 
         results: list[dict[str, Any]] = []
         for edge in edges:
@@ -398,6 +655,176 @@ class GraphMemoryService:
                 "content": props.get("content", ""),
                 "confidence": props.get("confidence", 1.0),
                 "valid_from": props.get("valid_from"),
+                # A fact is as important as its least central endpoint;
+                # nodes not yet analysed count as fully important
+                "importance": min(
+                    importance_map.get(edge.source_id, 1.0),
+                    importance_map.get(edge.target_id, 1.0),
+                ),
             })
 
         return results
+
+    async def compact_entities(
+        self,
+        user_id: str,
+        threshold: float | None = None,
+    ) -> dict[str, int]:
+        """Merge duplicate canonical entities and rewire their edges in bulk.
+
+        Backfills missing node embeddings with one ``embed_batch`` call,
+        clusters same-type nodes whose cosine similarity reaches ``threshold``
+        (union-find over blocked pairwise products), keeps the highest-degree
+        node of each cluster as canonical and turns the rest into aliases.
+
+        Returns:
+            {"embedded": N, "merged": N, "edges_rewired": N, "edges_deduped": N}
+        """
+        stats = {"embedded": 0, "merged": 0, "edges_rewired": 0, "edges_deduped": 0}
+        if self._embedding is None:
+            raise ValueError("compact_entities requires an embedding provider")
+        threshold = self._resolution_threshold if threshold is None else threshold
+
+        result = await self.db.execute(
+            select(
+                GraphNode.id, GraphNode.node_type, GraphNode.node_id,
+                GraphNode.properties, GraphNode.embedding,
+            ).where(
+                GraphNode.user_id == user_id,
+                GraphNode.node_type != NodeType.USER.value,
+                or_(
+                    GraphNode.properties.is_(None),
+                    ~GraphNode.properties.has_key("canonical_id"),
+                ),
+            ).order_by(GraphNode.node_type, GraphNode.node_id)
+        )
+        nodes = result.fetchall()
+        if len(nodes) < 2:
+            return stats
+
+        # 1. Backfill embeddings for nodes stored before resolution existed
+        vectors: list[Any] = [n.embedding.to_numpy() if n.embedding is not None else None for n in nodes]
+        todo = [i for i, v in enumerate(vectors) if v is None]
+        if todo:
+            names = [(nodes[i].properties or {}).get("name") or nodes[i].node_id for i in todo]
+            embedded = await self._embedding.embed_batch(names)
+            for i, vec in zip(todo, embedded):
+                vectors[i] = vec
+            await self.db.execute(
+                text("UPDATE graph_nodes SET embedding = CAST(:vec AS halfvec) WHERE id = :id"),
+                [
+                    {"id": nodes[i].id, "vec": f"[{','.join(str(float(x)) for x in vec)}]"}
+                    for i, vec in zip(todo, embedded)
+                ],
+            )
+            stats["embedded"] = len(todo)
+
+        matrix = _normalize_rows(vectors)
+        types = np.array([n.node_type for n in nodes])
+
+        # 2. Union-find over same-type pairs above threshold
+        parent = list(range(len(nodes)))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for node_type in np.unique(types):
+            idx = np.flatnonzero(types == node_type)
+            sub = matrix[idx]
+            for start in range(0, len(idx), _COMPACTION_BLOCK):
+                block = sub[start:start + _COMPACTION_BLOCK] @ sub.T
+                rows, cols = np.nonzero(block >= threshold)
+                for r, c in zip(rows + start, cols):
+                    if r < c:
+                        a, b = find(int(idx[r])), find(int(idx[c]))
+                        if a != b:
+                            parent[b] = a
+
+        clusters: dict[int, list[int]] = {}
+        for i in range(len(nodes)):
+            clusters.setdefault(find(i), []).append(i)
+        clusters = {k: v for k, v in clusters.items() if len(v) > 1}
+        if not clusters:
+            self._entity_index.invalidate(user_id)
+            return stats
+
+        # 3. Highest-degree member becomes canonical (ties: smallest node_id)
+        degree_rows = await self.db.execute(
+            text(
+                "SELECT node_id, count(*) AS degree FROM ("
+                "  SELECT source_id AS node_id FROM graph_edges WHERE user_id = :uid"
+                "  UNION ALL"
+                "  SELECT target_id FROM graph_edges WHERE user_id = :uid"
+                ") e GROUP BY node_id"
+            ),
+            {"uid": user_id},
+        )
+        degree = {row.node_id: row.degree for row in degree_rows.fetchall()}
+
+        remap: list[tuple[str, str, str]] = []  # (node_type, old_id, canonical_id)
+        for members in clusters.values():
+            members.sort(key=lambda i: (-degree.get(nodes[i].node_id, 0), nodes[i].node_id))
+            keep = nodes[members[0]].node_id
+            remap.extend((nodes[i].node_type, nodes[i].node_id, keep) for i in members[1:])
+        stats["merged"] = len(remap)
+
+        values, params = _values_clause(remap, "m")
+        params["uid"] = user_id
+
+        # 4. Rewire edges on both ends, then retarget nodes and older aliases
+        for end in ("source", "target"):
+            res = await self.db.execute(
+                text(
+                    f"UPDATE graph_edges e SET {end}_id = v.new_id, updated_at = now() "
+                    f"FROM (VALUES {values}) AS v(node_type, old_id, new_id) "
+                    f"WHERE e.user_id = :uid AND e.{end}_type = v.node_type "
+                    f"AND e.{end}_id = v.old_id"
+                ),
+                params,
+            )
+            stats["edges_rewired"] += res.rowcount
+        await self.db.execute(
+            text(
+                "UPDATE graph_nodes n SET embedding = NULL, "
+                "properties = COALESCE(n.properties, '{}'::jsonb) "
+                "  || jsonb_build_object('canonical_id', v.new_id) "
+                f"FROM (VALUES {values}) AS v(node_type, old_id, new_id) "
+                "WHERE n.user_id = :uid AND n.node_type = v.node_type "
+                "AND (n.node_id = v.old_id OR n.properties->>'canonical_id' = v.old_id)"
+            ),
+            params,
+        )
+
+        # 5. Drop self-loops and duplicate active edges created by the merge
+        canonical_ids = sorted({new_id for _, _, new_id in remap})
+        res = await self.db.execute(
+            text(
+                "DELETE FROM graph_edges WHERE user_id = :uid "
+                "AND source_type = target_type AND source_id = target_id "
+                "AND source_id = ANY(:ids)"
+            ),
+            {"uid": user_id, "ids": canonical_ids},
+        )
+        stats["edges_deduped"] += res.rowcount
+        res = await self.db.execute(
+            text(
+                "DELETE FROM graph_edges e USING graph_edges d "
+                "WHERE e.user_id = :uid AND d.user_id = :uid "
+                "AND (e.source_id = ANY(:ids) OR e.target_id = ANY(:ids)) "
+                "AND e.source_type = d.source_type AND e.source_id = d.source_id "
+                "AND e.edge_type = d.edge_type "
+                "AND e.target_type = d.target_type AND e.target_id = d.target_id "
+                "AND (e.properties->>'valid_until') IS NULL "
+                "AND (d.properties->>'valid_until') IS NULL "
+                "AND (e.created_at, e.id) > (d.created_at, d.id)"
+            ),
+            {"uid": user_id, "ids": canonical_ids},
+        )
+        stats["edges_deduped"] += res.rowcount
+
+        self._entity_index.invalidate(user_id)
+        logger.info("compact_entities[%s]: %s", user_id, stats)
+        return stats
@@ -0,0 +1,302 @@
+"""Graph transfer service - columnar (NPZ) bulk export/import of a user's graph.
+
+An export is a directory holding ``manifest.json`` plus numbered batch files
+(``nodes-000000.npz``, ``edges-000000.npz``, ...). Each batch stores columns
+as numpy arrays: strings are interned into a per-batch dictionary (node ids,
+node/edge types) or packed as UTF-8 bytes + offsets (JSON properties), ids as
+16-byte UUIDs, timestamps as epoch microseconds and node embeddings as
+float16. Files are written with ``allow_pickle=False``.
+
+Both directions are resumable: the export manifest records the keyset cursor
+after every batch, and imports record the last committed batch in
+``import-<user_id>.json``. Imported rows keep their ids (or get deterministic
+ones when importing into another user) and are inserted with
+``ON CONFLICT DO NOTHING``, so replaying a batch after a crash is harmless.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from neuromem.models.graph import NodeType
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+_NODE_COLUMNS = ["id", "user_id", "node_type", "node_id", "properties", "embedding", "created_at", "updated_at"]
+_EDGE_COLUMNS = [
+    "id", "user_id", "source_type", "source_id", "edge_type",
+    "target_type", "target_id", "properties", "created_at", "updated_at",
+]
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Timestamp of None. Version 1 used -1 and read every negative value as None,
+# which lost pre-1970 timestamps.
+_NULL_MICROS = int(np.iinfo(np.int64).min)
+
+
+# -- Column encoding helpers --
+
+def pack_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Pack strings as one UTF-8 byte buffer plus int64 end offsets."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def unpack_strings(data: np.ndarray, offsets: np.ndarray) -> list[str]:
+    """Inverse of pack_strings."""
+    raw = data.tobytes()
+    starts = np.concatenate([[0], offsets[:-1]]) if len(offsets) else offsets
+    return [raw[s:e].decode("utf-8") for s, e in zip(starts.tolist(), offsets.tolist())]
+
+
+def intern(values: list[str]) -> tuple[np.ndarray, list[str]]:
+    """Dictionary-encode strings: (int32 codes, dictionary in first-seen order)."""
+    lookup: dict[str, int] = {}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), np.int32, len(values))
+    return codes, list(lookup)
+
+
+def _put_strings(arrays: dict[str, np.ndarray], name: str, values: list[str]) -> None:
+    arrays[f"{name}_data"], arrays[f"{name}_offsets"] = pack_strings(values)
+
+
+def _get_strings(arrays: Any, name: str) -> list[str]:
+    return unpack_strings(arrays[f"{name}_data"], arrays[f"{name}_offsets"])
+
+
+def _to_micros(ts: datetime | None) -> int:
+    return _NULL_MICROS if ts is None else (ts - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value: int, version: int = FORMAT_VERSION) -> datetime | None:
+    if value == _NULL_MICROS or (version < 2 and value < 0):
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+# -- Manifest / file helpers --
+
+def batch_path(path: Path, kind: str, index: int) -> Path:
+    return path / f"{kind}-{index:06d}.npz"
+
+
+def read_json(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_json(path: Path, data: dict) -> None:
+    """Atomically replace a JSON state file."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def new_manifest(user_id: str) -> dict:
+    return {
+        "format": "neuromem-graph-npz",
+        "version": FORMAT_VERSION,
+        "user_id": user_id,
+        "nodes": {"batches": 0, "rows": 0, "after": None, "done": False},
+        "edges": {"batches": 0, "rows": 0, "after": None, "done": False},
+    }
+
+
+def write_batch(path: Path, kind: str, index: int, arrays: dict[str, np.ndarray]) -> None:
+    """Write one batch file atomically (tmp + rename)."""
+    target = batch_path(path, kind, index)
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, target)
+
+
+def read_batch(path: Path, kind: str, index: int) -> dict[str, np.ndarray]:
+    with np.load(batch_path(path, kind, index), allow_pickle=False) as npz:
+        return {k: npz[k] for k in npz.files}
+
+
+class GraphTransferService:
+    """Reads/writes one batch of a user's graph in columnar form."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def export_batch(
+        self,
+        user_id: str,
+        kind: str,
+        after: str | None,
+        limit: int,
+    ) -> tuple[dict[str, np.ndarray] | None, str | None]:
+        """Fetch the next ``limit`` rows (keyset on id) as column arrays.
+
+        Returns:
+            (arrays, last_id), or (None, None) when no rows remain.
+        """
+        if kind == "nodes":
+            columns = "id, node_type, node_id, properties::text AS properties, embedding::text AS embedding, created_at, updated_at"
+            table = "graph_nodes"
+        elif kind == "edges":
+            columns = (
+                "id, source_type, source_id, edge_type, target_type, target_id, "
+                "properties::text AS properties, created_at, updated_at"
+            )
+            table = "graph_edges"
+        else:
+            raise ValueError(f"Unknown graph batch kind: {kind}")
+
+        rows = (await self.db.execute(
+            text(
+                f"SELECT {columns} FROM {table} "
+                "WHERE user_id = :uid AND (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid)) "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"uid": user_id, "after": after, "limit": limit},
+        )).fetchall()
+        if not rows:
+            return None, None
+
+        arrays: dict[str, np.ndarray] = {
+            "id": np.array([list(r.id.bytes) for r in rows], dtype=np.uint8),
+            "created_at": np.array([_to_micros(r.created_at) for r in rows], dtype=np.int64),
+            "updated_at": np.array([_to_micros(r.updated_at) for r in rows], dtype=np.int64),
+        }
+        _put_strings(arrays, "properties", [r.properties or "null" for r in rows])
+
+        if kind == "nodes":
+            arrays["node_type"], type_dict = intern([r.node_type for r in rows])
+            _put_strings(arrays, "type_dict", type_dict)
+            _put_strings(arrays, "node_id", [r.node_id for r in rows])
+            has_embedding = np.array([r.embedding is not None for r in rows])
+            if has_embedding.any():
+                dims = len(json.loads(next(r.embedding for r in rows if r.embedding is not None)))
+                matrix = np.zeros((len(rows), dims), dtype=np.float16)
+                for i, r in enumerate(rows):
+                    if r.embedding is not None:
+                        matrix[i] = json.loads(r.embedding)
+                arrays["embedding"] = matrix
+                arrays["has_embedding"] = has_embedding
+        else:
+            type_codes, type_dict = intern([r.source_type for r in rows] + [r.target_type for r in rows])
+            arrays["source_type"], arrays["target_type"] = np.split(type_codes, 2)
+            _put_strings(arrays, "type_dict", type_dict)
+            node_codes, node_dict = intern([r.source_id for r in rows] + [r.target_id for r in rows])
+            arrays["source_id"], arrays["target_id"] = np.split(node_codes, 2)
+            _put_strings(arrays, "node_dict", node_dict)
+            arrays["edge_type"], edge_dict = intern([r.edge_type for r in rows])
+            _put_strings(arrays, "edge_type_dict", edge_dict)
+
+        return arrays, str(rows[-1].id)
+
+    async def import_batch(
+        self,
+        user_id: str,
+        kind: str,
+        arrays: dict[str, np.ndarray],
+        source_user_id: str | None = None,
+        version: int = FORMAT_VERSION,
+    ) -> int:
+        """COPY one batch into a staging table and merge it into the graph.
+
+        Args:
+            source_user_id: Exported user when importing into a different
+                user: row ids are derived from (user_id, original id) and the
+                User node (whose node_id is the user id) is renamed.
+            version: Format version of the export the batch comes from.
+
+        Returns:
+            Number of rows inserted (rows already present are skipped).
+        """
+        ids = [uuid.UUID(bytes=bytes(b)) for b in arrays["id"]]
+        remap = source_user_id is not None and source_user_id != user_id
+        if remap:
+            ids = [uuid.uuid5(old, user_id) for old in ids]
+
+        def rename(node_type: str, node_id: str) -> str:
+            if remap and node_type == NodeType.USER.value and node_id == source_user_id:
+                return user_id
+            return node_id
+        created = [_from_micros(v, version) for v in arrays["created_at"].tolist()]
+        updated = [_from_micros(v, version) for v in arrays["updated_at"].tolist()]
+        properties = _get_strings(arrays, "properties")
+        types = _get_strings(arrays, "type_dict")
+
+        if kind == "nodes":
+            node_types = [types[c] for c in arrays["node_type"].tolist()]
+            node_ids = [rename(t, n) for t, n in zip(node_types, _get_strings(arrays, "node_id"))]
+            embeddings: list[str | None] = [None] * len(ids)
+            if "embedding" in arrays:
+                for i in np.flatnonzero(arrays["has_embedding"]):
+                    embeddings[i] = "[" + ",".join(map(str, arrays["embedding"][i].astype(np.float32).tolist())) + "]"
+            records = list(zip(
+                ids, [user_id] * len(ids), node_types, node_ids,
+                properties, embeddings, created, updated,
+            ))
+            table, columns = "graph_nodes", _NODE_COLUMNS
+            staging_ddl = (
+                "id uuid, user_id text, node_type text, node_id text, "
+                "properties text, embedding text, created_at timestamptz, updated_at timestamptz"
+            )
+            select_list = (
+                "id, user_id, node_type, node_id, NULLIF(properties, 'null')::jsonb, "
+                "embedding::halfvec, created_at, updated_at"
+            )
+        elif kind == "edges":
+            node_dict = _get_strings(arrays, "node_dict")
+            edge_dict = _get_strings(arrays, "edge_type_dict")
+            source_types = [types[c] for c in arrays["source_type"].tolist()]
+            target_types = [types[c] for c in arrays["target_type"].tolist()]
+            records = list(zip(
+                ids, [user_id] * len(ids),
+                source_types,
+                [rename(t, node_dict[c]) for t, c in zip(source_types, arrays["source_id"].tolist())],
+                [edge_dict[c] for c in arrays["edge_type"].tolist()],
+                target_types,
+                [rename(t, node_dict[c]) for t, c in zip(target_types, arrays["target_id"].tolist())],
+                properties, created, updated,
+            ))
+            table, columns = "graph_edges", _EDGE_COLUMNS
+            staging_ddl = (
+                "id uuid, user_id text, source_type text, source_id text, edge_type text, "
+                "target_type text, target_id text, properties text, "
+                "created_at timestamptz, updated_at timestamptz"
+            )
+            select_list = (
+                "id, user_id, source_type, source_id, edge_type, target_type, target_id, "
+                "NULLIF(properties, 'null')::jsonb, created_at, updated_at"
+            )
+        else:
+            raise ValueError(f"Unknown graph batch kind: {kind}")
+
+        staging = f"_nm_import_{kind}"
+        await self.db.execute(text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ({staging_ddl}) ON COMMIT DELETE ROWS"
+        ))
+        await self.db.execute(text(f"TRUNCATE {staging}"))
+
+        conn = await self.db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(staging, records=records, columns=columns)
+
+        result = await self.db.execute(text(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {select_list} FROM {staging} ON CONFLICT DO NOTHING"
+        ))
+        return result.rowcount
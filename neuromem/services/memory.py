@@ -13,6 +13,7 @@ from sqlalchemy.types import Date
 
 from neuromem.models.memory import Memory
 from neuromem.providers.embedding import EmbeddingProvider
+from neuromem.services.profile_view import ProfileViewService
 
 logger = logging.getLogger(__name__)
 
@@ -295,6 +296,7 @@ class MemoryService:
             )
 
         await self.db.flush()
+        await ProfileViewService(self.db).invalidate(user_id)
         return memory
 
     async def delete_all_memories(
@@ -316,6 +318,7 @@ class MemoryService:
         stmt = delete(Memory).where(and_(*conditions))
         result = await self.db.execute(stmt)
         await self.db.flush()
+        await ProfileViewService(self.db).invalidate(user_id)
         return result.rowcount
 
     async def delete_memory(
@@ -351,4 +354,5 @@ class MemoryService:
 
         await self.db.delete(memory)
         await self.db.flush()
+        await ProfileViewService(self.db).invalidate(user_id)
         return True
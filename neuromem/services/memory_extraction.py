@@ -16,6 +16,8 @@ from neuromem.models.memory import Memory
 from neuromem.providers.embedding import EmbeddingProvider
 from neuromem.providers.llm import LLMProvider
 from neuromem.services.kv import KVService
+from neuromem.services.profile_view import ProfileViewService
+from neuromem.services.reflection_state import ReflectionStateService
 from neuromem.services.temporal import TemporalExtractor
 
 logger = logging.getLogger(__name__)
@@ -39,11 +41,15 @@ class MemoryExtractionService:
         embedding: EmbeddingProvider,
         llm: LLMProvider,
         graph_enabled: bool = False,
+        entity_index=None,
+        context_centroids=None,
     ):
         self.db = db
         self._embedding = embedding
         self._llm = llm
         self._graph_enabled = graph_enabled
+        self._entity_index = entity_index
+        self._context_centroids = context_centroids
         self._temporal = TemporalExtractor()
 
     async def extract_from_messages(
@@ -132,16 +138,21 @@ class MemoryExtractionService:
         episodes_count = 0
         triples_count = 0
         errors: list[str] = []
+        stored: list[Memory] = []
 
         if valid_facts and fact_vectors:
             try:
-                facts_count = await self._store_facts(user_id, valid_facts, ref_time, pre_vectors=fact_vectors)
+                facts_count = await self._store_facts(
+                    user_id, valid_facts, ref_time, pre_vectors=fact_vectors, stored=stored,
+                )
             except Exception as e:
                 errors.append(f"store facts: {e}")
 
         if valid_episodes and episode_vectors:
             try:
-                episodes_count = await self._store_episodes(user_id, valid_episodes, ref_time, pre_vectors=episode_vectors)
+                episodes_count = await self._store_episodes(
+                    user_id, valid_episodes, ref_time, pre_vectors=episode_vectors, stored=stored,
+                )
             except Exception as e:
                 errors.append(f"store episodes: {e}")
 
@@ -154,6 +165,11 @@ class MemoryExtractionService:
         total_count = facts_count + episodes_count + triples_count
         if total_count > 0:
             await self.db.flush()
+            # Reflection trigger counters move with the memories they count
+            await ReflectionStateService(self.db).record_memories(user_id, stored)
+            await ProfileViewService(self.db).record_memories(user_id, stored)
+            if self._context_centroids is not None:
+                self._context_centroids.update(user_id, stored)
             logger.info(f"Flushed memories (facts={facts_count}, "
                        f"episodes={episodes_count}, triples={triples_count})")
 
@@ -691,6 +707,7 @@ Return format (JSON only, no other content):
         facts: list[dict],
         ref_time: datetime | None = None,
         pre_vectors: list | None = None,
+        stored: list[Memory] | None = None,
     ) -> int:
         # Filter valid facts (caller may have already filtered, but guard anyway)
         valid_facts = [f for f in facts if f.get("content")]
@@ -776,6 +793,7 @@ Return format (JSON only, no other content):
                             ),
                             {"now": now_ts, "new_hash": content_hash, "old_id": old_id},
                         )
+                        await ProfileViewService(self.db).invalidate(user_id, traits=False)
                         logger.info(
                             "UPDATE - superseding fact %s (sim=%.3f): '%s' → '%s'",
                             old_id, sim, similar_row.content[:50], content[:50],
@@ -834,6 +852,8 @@ Return format (JSON only, no other content):
                     trait_context=context,
                 )
                 self.db.add(embedding_obj)
+                if stored is not None:
+                    stored.append(embedding_obj)
                 count += 1
             except Exception as e:
                 logger.error("Failed to store fact: %s", e, exc_info=True)
@@ -846,6 +866,7 @@ Return format (JSON only, no other content):
         episodes: list[dict],
         ref_time: datetime | None = None,
         pre_vectors: list | None = None,
+        stored: list[Memory] | None = None,
     ) -> int:
         # Filter valid episodes (caller may have already filtered, but guard anyway)
         valid_episodes = [e for e in episodes if e.get("content")]
@@ -956,6 +977,8 @@ Return format (JSON only, no other content):
                     trait_context=context,
                 )
                 self.db.add(embedding_obj)
+                if stored is not None:
+                    stored.append(embedding_obj)
                 count += 1
             except Exception as e:
                 logger.error("Failed to store episode: %s", e, exc_info=True)
@@ -972,7 +995,9 @@ Return format (JSON only, no other content):
             return 0
         try:
             from neuromem.services.graph_memory import GraphMemoryService
-            graph_svc = GraphMemoryService(self.db)
+            graph_svc = GraphMemoryService(
+                self.db, self._embedding, entity_index=self._entity_index,
+            )
             return await graph_svc.store_triples(user_id, triples)
         except Exception as e:
             logger.error("Failed to store triples: %s", e)
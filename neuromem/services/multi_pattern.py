@@ -0,0 +1,64 @@
+"""Multi-pattern substring matcher (Aho-Corasick) for hot-path keyword checks."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+
+
+class MultiPatternMatcher:
+    """Find which of many patterns occur in a text with a single scan.
+
+    Equivalent to ``{i for i, p in enumerate(patterns) if p in text}``
+    (overlapping and nested matches included) but costs O(len(text) + hits)
+    instead of one substring search per pattern. Empty patterns never match.
+    Matching is case-sensitive; lowercase both sides for case-insensitive use.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: list[str] = list(patterns)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+
+        for idx, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(idx)
+
+        # BFS to build failure links; outputs inherit from the failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set[int]:
+        """Return indices of all patterns that occur in ``text``."""
+        found: set[int] = set()
+        if len(self._goto) == 1:
+            return found
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
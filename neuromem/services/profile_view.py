@@ -0,0 +1,357 @@
+"""Profile view service - materialized per-user profile.
+
+profile_view used to assemble the profile from scratch on every call: every
+active fact (grouped in Python), the top traits and a 14-day emotion
+aggregate. ProfileViewService keeps the assembled sections in one
+``profile_views`` row per user:
+
+- facts: memory writers merge new facts in, in the same transaction as the
+  insert. Supersession, edits and deletes mark the section stale.
+- mood: writers add new episodes to running sums.
+- traits: marked stale by trait writers.
+
+Traits and mood also depend on the clock (confidence decay, the 14-day
+window), so both are rebuilt once the row is older than ``MAX_AGE``. Stale
+sections are rebuilt on read. Every change bumps ``version``. A rebuild is
+written back only if the version it started from is still current, and the
+in-process ProfileCache uses the same version to validate its entries.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from neuromem.models.memory import Memory
+
+logger = logging.getLogger(__name__)
+
+# Rebuild clock-dependent sections (traits, mood) at least this often
+MAX_AGE = timedelta(hours=1)
+MOOD_WINDOW = timedelta(days=14)
+MAX_TRAITS = 30
+
+# Categories that hold one value (the newest); all others list every
+# distinct value, newest first
+SINGLE_CATEGORIES = frozenset({"identity", "occupation", "location"})
+
+_MOOD_FILTER = "memory_type = 'episodic' AND emotion_valence IS NOT NULL"
+_MOOD_SUMS = (
+    "SELECT COUNT(*) AS n, "
+    "  COALESCE(SUM(emotion_valence), 0) AS valence_sum, "
+    "  COALESCE(SUM(emotion_arousal), 0) AS arousal_sum, "
+    "  COUNT(emotion_arousal) AS arousal_n "
+    "FROM memories WHERE user_id = :uid AND "
+)
+
+def _group_facts(rows: list[tuple[str, str, str]]) -> dict[str, list[list[str]]]:
+    """Group ``(category, content, created_at)`` rows, newest first.
+
+    Stored form: ``{category: [[content, created_at], ...]}`` with one entry
+    for single-value categories and case-insensitively distinct contents
+    otherwise.
+    """
+    rows = sorted(rows, key=lambda r: r[2], reverse=True)
+    facts: dict[str, list[list[str]]] = {}
+    seen: dict[str, set[str]] = {}
+    for category, content, created_at in rows:
+        category = category or "general"
+        entries = facts.setdefault(category, [])
+        if category in SINGLE_CATEGORIES:
+            if not entries:
+                entries.append([content, created_at])
+            continue
+        key = content.lower()
+        if key not in seen.setdefault(category, set()):
+            seen[category].add(key)
+            entries.append([content, created_at])
+    return facts
+
+
+def _render(facts: dict, traits: list, mood: dict) -> dict:
+    rendered: dict = {}
+    for category, entries in facts.items():
+        if category in SINGLE_CATEGORIES:
+            rendered[category] = entries[0][0]
+        else:
+            rendered[category] = [content for content, _ in entries]
+
+    recent_mood = None
+    if mood.get("n"):
+        n, arousal_n = mood["n"], mood.get("arousal_n", 0)
+        recent_mood = {
+            "valence_avg": round(mood["valence_sum"] / n, 3),
+            "arousal_avg": round(mood["arousal_sum"] / arousal_n, 3) if arousal_n else 0.0,
+            "sample_count": n,
+            "period": "last_14_days",
+        }
+    return {"facts": rendered, "traits": [dict(t) for t in traits], "recent_mood": recent_mood}
+
+
+def _copy_view(view: dict) -> dict:
+    """Copy deep enough that callers can't mutate a cached view."""
+    facts = {k: list(v) if isinstance(v, list) else v for k, v in view["facts"].items()}
+    mood = dict(view["recent_mood"]) if view["recent_mood"] else None
+    return {"facts": facts, "traits": [dict(t) for t in view["traits"]], "recent_mood": mood}
+
+
+def _iso(ts: datetime) -> str:
+    ts = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+class ProfileCache:
+    """In-process LRU of rendered profiles keyed by user, tagged with version."""
+
+    def __init__(self, max_users: int = 1024):
+        self.max_users = max_users
+        self._entries: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+
+    def get(self, user_id: str) -> tuple[int, dict] | None:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+        return entry
+
+    def put(self, user_id: str, version: int, view: dict) -> None:
+        self._entries[user_id] = (version, _copy_view(view))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+
+class ProfileViewService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # -- Reads --
+
+    async def load(
+        self,
+        user_id: str,
+        cached: tuple[int, dict] | None = None,
+        refresh: bool = False,
+    ) -> tuple[dict, int | None]:
+        """Profile for the user, rebuilding stale sections.
+
+        Args:
+            cached: ``(version, view)`` from a ProfileCache; returned as-is
+                when the stored row still has that version and is fresh.
+            refresh: Rebuild every section regardless of flags.
+
+        Returns:
+            ``(view, version)``. ``version`` is None when the view could not
+            be stored (a writer got there first), so it shouldn't be cached.
+        """
+        now = datetime.now(timezone.utc)
+        if cached is not None and not refresh:
+            head = (await self.db.execute(
+                text(
+                    "SELECT version, facts_stale, traits_stale, built_at "
+                    "FROM profile_views WHERE user_id = :uid"
+                ),
+                {"uid": user_id},
+            )).first()
+            if (
+                head is not None and head.version == cached[0]
+                and not head.facts_stale and not head.traits_stale
+                and now - head.built_at < MAX_AGE
+            ):
+                return _copy_view(cached[1]), head.version
+
+        row = (await self.db.execute(
+            text(
+                "SELECT facts, traits, mood, facts_stale, traits_stale, version, built_at "
+                "FROM profile_views WHERE user_id = :uid"
+            ),
+            {"uid": user_id},
+        )).first()
+
+        if row is None:
+            facts = await self._build_facts(user_id)
+            traits = await self._build_traits(user_id)
+            mood = await self._build_mood(user_id)
+            inserted = await self.db.execute(
+                text(
+                    "INSERT INTO profile_views (user_id, facts, traits, mood, version, built_at, updated_at) "
+                    "VALUES (:uid, CAST(:facts AS jsonb), CAST(:traits AS jsonb), CAST(:mood AS jsonb), "
+                    "        1, :now, :now) "
+                    "ON CONFLICT (user_id) DO NOTHING"
+                ),
+                {
+                    "uid": user_id, "facts": json.dumps(facts), "traits": json.dumps(traits),
+                    "mood": json.dumps(mood), "now": now,
+                },
+            )
+            return _render(facts, traits, mood), 1 if inserted.rowcount else None
+
+        facts, traits, mood = row.facts, row.traits, row.mood
+        rebuild_facts = refresh or row.facts_stale
+        rebuild_clocked = refresh or row.traits_stale or now - row.built_at >= MAX_AGE
+        if not rebuild_facts and not rebuild_clocked:
+            return _render(facts, traits, mood), row.version
+
+        if rebuild_facts:
+            facts = await self._build_facts(user_id)
+        if rebuild_clocked:
+            traits = await self._build_traits(user_id)
+            mood = await self._build_mood(user_id)
+        stored = await self.db.execute(
+            text(
+                "UPDATE profile_views SET facts = CAST(:facts AS jsonb), traits = CAST(:traits AS jsonb), "
+                "  mood = CAST(:mood AS jsonb), facts_stale = false, traits_stale = false, "
+                "  built_at = CASE WHEN :clocked THEN :now ELSE built_at END, "
+                "  version = version + 1, updated_at = :now "
+                "WHERE user_id = :uid AND version = :seen"
+            ),
+            {
+                "uid": user_id, "facts": json.dumps(facts), "traits": json.dumps(traits),
+                "mood": json.dumps(mood), "clocked": rebuild_clocked, "now": now, "seen": row.version,
+            },
+        )
+        return _render(facts, traits, mood), row.version + 1 if stored.rowcount else None
+
+    async def _build_facts(self, user_id: str) -> dict:
+        rows = (await self.db.execute(
+            text(
+                "SELECT content, metadata->>'category' AS category, created_at "
+                "FROM memories "
+                "WHERE user_id = :uid AND memory_type = 'fact' AND valid_until IS NULL"
+            ),
+            {"uid": user_id},
+        )).fetchall()
+        return _group_facts([(r.category, r.content, _iso(r.created_at)) for r in rows])
+
+    async def _build_traits(self, user_id: str) -> list[dict]:
+        """Active traits (emerging and above), highest current confidence first."""
+        from neuromem.services.trait_engine import trait_confidence_sql, trait_stage_sql
+
+        result = await self.db.execute(
+            text(
+                "SELECT * FROM ("
+                "  SELECT content, trait_subtype, trait_context, trait_reinforcement_count, "
+                "  trait_first_observed, trait_last_reinforced, trait_contradiction_count, "
+                f" {trait_stage_sql()} AS trait_stage, {trait_confidence_sql()} AS trait_confidence "
+                "  FROM memories "
+                "  WHERE user_id = :uid AND memory_type = 'trait' "
+                "  AND trait_stage NOT IN ('trend', 'dissolved')"
+                ") t WHERE trait_stage != 'dissolved' "
+                "ORDER BY trait_confidence DESC NULLS LAST "
+                "LIMIT :lim"
+            ),
+            {"uid": user_id, "lim": MAX_TRAITS},
+        )
+        return [
+            {
+                "content": r.content,
+                "subtype": r.trait_subtype,
+                "stage": r.trait_stage,
+                "confidence": float(r.trait_confidence) if r.trait_confidence else 0.0,
+                "context": r.trait_context,
+                "reinforcement_count": r.trait_reinforcement_count or 0,
+                "first_observed": r.trait_first_observed.isoformat() if r.trait_first_observed else None,
+                "last_reinforced": r.trait_last_reinforced.isoformat() if r.trait_last_reinforced else None,
+                "contradiction_count": r.trait_contradiction_count or 0,
+            }
+            for r in result.fetchall()
+        ]
+
+    async def _build_mood(self, user_id: str) -> dict:
+        row = (await self.db.execute(
+            text(_MOOD_SUMS + _MOOD_FILTER + " AND created_at > NOW() - CAST(:window AS interval)"),
+            {"uid": user_id, "window": MOOD_WINDOW},
+        )).first()
+        return {
+            "n": row.n, "valence_sum": row.valence_sum,
+            "arousal_sum": row.arousal_sum, "arousal_n": row.arousal_n,
+        }
+
+    # -- Writes (called inside the writer's transaction) --
+
+    async def record_memories(self, user_id: str, memories: list[Memory]) -> None:
+        """Merge newly inserted (and flushed) memories into the user's row.
+
+        Users without a row are built in full on their first read.
+        """
+        if not memories:
+            return
+        row = (await self.db.execute(
+            text("SELECT facts, mood, facts_stale FROM profile_views WHERE user_id = :uid FOR UPDATE"),
+            {"uid": user_id},
+        )).first()
+        if row is None:
+            return
+
+        fact_ids = [m.id for m in memories if m.memory_type == "fact"]
+        episode_ids = [m.id for m in memories if m.memory_type == "episodic"]
+        traits_changed = any(m.memory_type == "trait" for m in memories)
+        facts, mood = row.facts, row.mood
+
+        if fact_ids and not row.facts_stale:
+            new_rows = (await self.db.execute(
+                text(
+                    "SELECT content, metadata->>'category' AS category, created_at FROM memories "
+                    "WHERE id = ANY(CAST(:ids AS uuid[])) AND valid_until IS NULL"
+                ),
+                {"ids": fact_ids},
+            )).fetchall()
+            existing = [
+                (category, content, created_at)
+                for category, entries in facts.items()
+                for content, created_at in entries
+            ]
+            facts = _group_facts(existing + [(r.category, r.content, _iso(r.created_at)) for r in new_rows])
+
+        if episode_ids and mood:
+            delta = (await self.db.execute(
+                text(_MOOD_SUMS + _MOOD_FILTER + " AND id = ANY(CAST(:ids AS uuid[]))"),
+                {"uid": user_id, "ids": episode_ids},
+            )).first()
+            if delta.n:
+                mood = {
+                    "n": mood["n"] + delta.n,
+                    "valence_sum": mood["valence_sum"] + delta.valence_sum,
+                    "arousal_sum": mood["arousal_sum"] + delta.arousal_sum,
+                    "arousal_n": mood["arousal_n"] + delta.arousal_n,
+                }
+
+        await self.db.execute(
+            text(
+                "UPDATE profile_views SET facts = CAST(:facts AS jsonb), mood = CAST(:mood AS jsonb), "
+                "  traits_stale = traits_stale OR :traits, version = version + 1, updated_at = now() "
+                "WHERE user_id = :uid"
+            ),
+            {"uid": user_id, "facts": json.dumps(facts), "mood": json.dumps(mood), "traits": traits_changed},
+        )
+
+    async def invalidate(
+        self,
+        user_ids: str | list[str] | None,
+        facts: bool = True,
+        traits: bool = True,
+    ) -> None:
+        """Mark sections stale for the given users (``None``: every user)."""
+        if isinstance(user_ids, str):
+            user_ids = [user_ids]
+        if user_ids is not None and not user_ids:
+            return
+        where = "" if user_ids is None else "WHERE user_id = ANY(CAST(:uids AS varchar[]))"
+        await self.db.execute(
+            text(
+                "UPDATE profile_views SET facts_stale = facts_stale OR :facts, "
+                "  traits_stale = traits_stale OR :traits, version = version + 1, updated_at = now() "
+                + where
+            ),
+            {"uids": list(set(user_ids or ())), "facts": facts, "traits": traits},
+        )
+
+    async def delete(self, user_id: str) -> None:
+        await self.db.execute(text("DELETE FROM profile_views WHERE user_id = :uid"), {"uid": user_id})
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import uuid as _uuid
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Optional
 
+import numpy as np
 from sqlalchemy import text as sql_text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -15,11 +17,131 @@ from neuromem.models.memory import Memory
 from neuromem.models.reflection_cycle import ReflectionCycle
 from neuromem.providers.embedding import EmbeddingProvider
 from neuromem.providers.llm import LLMProvider
+from neuromem.services.profile_view import ProfileViewService
+from neuromem.services.reflection_state import (
+    IMPORTANCE_THRESHOLD,
+    MIN_REFLECTION_GAP,
+    SCHEDULED_INTERVAL,
+    ReflectionStateService,
+)
 from neuromem.services.sensitive_filter import is_sensitive_trait  # noqa: F401
-from neuromem.services.trait_engine import TraitEngine
+from neuromem.services.trait_engine import TraitEngine, trait_confidence_sql, trait_stage_sql
 
 logger = logging.getLogger(__name__)
 
+# Digest traits below this LLM-rated importance are dropped
+_MIN_TRAIT_IMPORTANCE = 7
+
+# Cosine similarity above which two trait texts count as duplicates
+# (same threshold TraitEngine uses against stored traits)
+TRAIT_DUPLICATE_SIMILARITY = 0.95
+
+# Reflection prompt budget (estimated tokens, see count_prompt_tokens):
+# new memories and the most relevant existing traits each get a hard cap
+_MEMORY_TOKEN_BUDGET = 6000
+_TRAIT_TOKEN_BUDGET = 1500
+_MAX_PROMPT_TRAITS = 30
+_MAX_MEMORY_CHARS = 500
+
+
+def count_prompt_tokens(text: str) -> int:
+    """Approximate LLM token count without a tokenizer.
+
+    CJK characters count as one token each, other text as one token per
+    four characters.
+    """
+    cjk = sum(1 for ch in text if "\u3000" <= ch <= "\u9fff" or "\uac00" <= ch <= "\ud7af" or "\uff00" <= ch <= "\uffef")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class TokenCountingLLM(LLMProvider):
+    """LLM proxy that accumulates estimated prompt/completion tokens."""
+
+    def __init__(self, inner: LLMProvider):
+        self._inner = inner
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        if hasattr(inner, "model"):
+            self.model = inner.model
+
+    async def chat(self, messages, temperature=0.1, max_tokens=2048) -> str:
+        self.prompt_tokens += sum(count_prompt_tokens(str(m.get("content", ""))) for m in messages)
+        result = await self._inner.chat(messages, temperature, max_tokens)
+        self.completion_tokens += count_prompt_tokens(result or "")
+        return result
+
+
+def _compact_json(item: dict) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+
+
+def _memory_line(memory: dict) -> str:
+    """A memory as one prompt line, content cut at _MAX_MEMORY_CHARS."""
+    return _compact_json({
+        "id": memory["id"],
+        "content": memory["content"][:_MAX_MEMORY_CHARS],
+        "memory_type": memory["memory_type"],
+    })
+
+
+def _memory_batch(memories: list[dict]) -> list[dict]:
+    """Oldest memories (of ``memories``, oldest first) that fit _MEMORY_TOKEN_BUDGET.
+
+    The batch ends between two created_at values, since the next cycle
+    resumes after the last one; a first created_at group that alone exceeds
+    the budget is taken whole.
+    """
+    used = 0
+    end = 0
+    for i, memory in enumerate(memories):
+        used += count_prompt_tokens(_memory_line(memory))
+        if used > _MEMORY_TOKEN_BUDGET:
+            break
+        if i + 1 == len(memories) or memories[i + 1]["created_at"] != memory["created_at"]:
+            end = i + 1
+    else:
+        return memories
+    if end == 0:
+        first = memories[0]["created_at"]
+        end = next((i for i, m in enumerate(memories) if m["created_at"] != first), len(memories))
+    return memories[:end]
+
+
+def match_created_trait(
+    created: list[tuple[str, np.ndarray, Memory]],
+    content: str,
+    vector: list[float],
+) -> Memory | None:
+    """Find a trait created earlier in the same cycle that duplicates ``content``.
+
+    ``created`` holds (content_hash, unit vector, trait) entries; a match is
+    the same hash or cosine similarity above TRAIT_DUPLICATE_SIMILARITY.
+    """
+    if not created:
+        return None
+    content_hash = hashlib.md5(content.encode()).hexdigest()
+    for known_hash, _, trait in created:
+        if known_hash == content_hash:
+            return trait
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    if norm == 0.0:
+        return None
+    sims = np.stack([unit for _, unit, _ in created]) @ (vec / norm)
+    best = int(np.argmax(sims))
+    return created[best][2] if sims[best] > TRAIT_DUPLICATE_SIMILARITY else None
+
+
+def remember_created_trait(
+    created: list[tuple[str, np.ndarray, Memory]],
+    trait: Memory,
+    vector: list[float],
+) -> None:
+    """Record a newly created trait for match_created_trait()."""
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    created.append((trait.content_hash, vec / norm if norm else vec, trait))
+
 
 REFLECTION_PROMPT_TEMPLATE = """## 已有特质
 {existing_traits_json}
@@ -134,6 +256,32 @@ REFLECTION_PROMPT_TEMPLATE = """## 已有特质
 ```"""
 
 
+def select_novel_traits(
+    items: list[dict],
+    vectors: list[list[float]],
+    accepted: list[np.ndarray],
+    threshold: float = TRAIT_DUPLICATE_SIMILARITY,
+) -> list[int]:
+    """Indices of traits that are not near-duplicates of ``accepted``.
+
+    ``accepted`` holds unit-norm vectors of traits kept so far; vectors of
+    the returned items are appended to it, so later calls (and later items
+    of the same call) are checked against them too.
+    """
+    keep: list[int] = []
+    for i, vector in enumerate(vectors):
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        if norm > 0:
+            v = v / norm
+        if accepted and float(np.max(np.stack(accepted) @ v)) > threshold:
+            logger.debug("Skipping duplicate digest trait: %s", items[i].get("content", "")[:60])
+            continue
+        accepted.append(v)
+        keep.append(i)
+    return keep
+
+
 class ReflectionService:
     """9-step reflection engine with trait lifecycle management.
 
@@ -148,9 +296,14 @@ class ReflectionService:
     ):
         self.db = db
         self._embedding = embedding
-        self._llm = llm
+        self._llm = TokenCountingLLM(llm)
         self._trait_engine = TraitEngine(db, embedding)
 
+    @property
+    def token_usage(self) -> dict:
+        """Estimated LLM tokens used by this service so far."""
+        return {"prompt_tokens": self._llm.prompt_tokens, "completion_tokens": self._llm.completion_tokens}
+
     async def _get_watermark(self, user_id: str) -> datetime | None:
         """Get the last completed reflection timestamp for a user."""
         result = await self.db.execute(
@@ -170,63 +323,30 @@ class ReflectionService:
         Returns:
             (should_trigger, trigger_type, trigger_value)
         """
-        last_reflected = await self._get_watermark(user_id)
+        state = await ReflectionStateService(self.db).get_or_refresh(user_id)
+        last_reflected = state.watermark
 
         if last_reflected is None:
-            # Check if user has any memories at all
-            mem_result = await self.db.execute(
-                sql_text(
-                    "SELECT COUNT(*) FROM memories "
-                    "WHERE user_id = :uid AND memory_type IN ('fact', 'episodic')"
-                ),
-                {"uid": user_id},
-            )
-            mem_count = mem_result.scalar() or 0
-            if mem_count == 0:
+            # First reflection: only once the user has any memories at all
+            if state.new_memory_count == 0:
                 return (False, None, None)
             return (True, "first_time", None)
 
         now = datetime.now(timezone.utc)
 
         # Idempotency check: if last reflected within 60s, skip
-        if (now - last_reflected).total_seconds() < 60:
+        if now - last_reflected < MIN_REFLECTION_GAP:
             return (False, None, None)
 
-        # Check importance accumulation
-        # Use metadata importance as override when available (extraction sets it there),
-        # fall back to the ORM importance column
-        result = await self.db.execute(
-            sql_text(
-                "SELECT COALESCE(SUM(COALESCE((metadata->>'importance')::float, importance)), 0) AS total "
-                "FROM memories "
-                "WHERE user_id = :uid "
-                "AND memory_type IN ('fact', 'episodic') "
-                "AND created_at > :watermark"
-            ),
-            {"uid": user_id, "watermark": last_reflected},
-        )
-        accumulated = float(result.scalar() or 0)
-        if accumulated >= 30:
+        # Check importance accumulation (metadata importance overrides the column)
+        accumulated = float(state.accumulated_importance or 0)
+        if accumulated >= IMPORTANCE_THRESHOLD:
             return (True, "importance_accumulated", accumulated)
 
         # Check 24h scheduled trigger
-        if (now - last_reflected) >= timedelta(hours=24):
+        if (now - last_reflected) >= SCHEDULED_INTERVAL:
             return (True, "scheduled", None)
 
-        # Check if there are any new memories at all
-        result = await self.db.execute(
-            sql_text(
-                "SELECT COUNT(*) FROM memories "
-                "WHERE user_id = :uid "
-                "AND memory_type IN ('fact', 'episodic') "
-                "AND created_at > :watermark"
-            ),
-            {"uid": user_id, "watermark": last_reflected},
-        )
-        new_count = result.scalar() or 0
-        if new_count == 0:
-            return (False, None, None)
-
         return (False, None, None)
 
     async def reflect(
@@ -234,6 +354,7 @@ class ReflectionService:
         user_id: str,
         force: bool = False,
         session_ended: bool = False,
+        fail_on_llm_error: bool = False,
     ) -> dict:
         """Execute 9-step reflection pipeline.
 
@@ -241,6 +362,10 @@ class ReflectionService:
             user_id: User ID.
             force: Skip trigger check if True.
             session_ended: Mark as session-end trigger.
+            fail_on_llm_error: If the main LLM call fails, fail the cycle
+                (watermark unchanged, result has "error") instead of
+                completing it with decay only. Used by the scheduler so the
+                job is retried.
 
         Returns:
             Result dict with triggered, trigger_type, and stats.
@@ -283,17 +408,28 @@ class ReflectionService:
         cycle_id = str(cycle.id)
 
         # Step 2: Run reflection steps
+        prompt_tokens_before = self._llm.prompt_tokens
+        completion_tokens_before = self._llm.completion_tokens
         try:
-            stats = await self._run_reflection_steps(user_id, trigger_type, trigger_value, cycle_id, watermark)
+            stats = await self._run_reflection_steps(
+                user_id, trigger_type, trigger_value, cycle_id, watermark,
+                fail_on_llm_error=fail_on_llm_error,
+            )
+            # Memories left over the budget are after this cycle's watermark
+            resume_after = stats.pop("resume_after", None)
 
             # Update cycle record
             cycle.status = "completed"
-            cycle.completed_at = datetime.now(timezone.utc)
+            cycle.completed_at = resume_after or datetime.now(timezone.utc)
             cycle.memories_scanned = stats["memories_scanned"]
             cycle.traits_created = stats["traits_created"]
             cycle.traits_updated = stats["traits_updated"]
             cycle.traits_dissolved = stats["traits_dissolved"]
+            cycle.prompt_tokens = self._llm.prompt_tokens - prompt_tokens_before
+            cycle.completion_tokens = self._llm.completion_tokens - completion_tokens_before
             await self.db.flush()
+            await ReflectionStateService(self.db).refresh(user_id)
+            await ProfileViewService(self.db).invalidate(user_id, facts=False)
 
             return {
                 "triggered": True,
@@ -330,12 +466,22 @@ class ReflectionService:
         trigger_value: float | None,
         cycle_id: str,
         watermark: datetime | None = ...,
+        fail_on_llm_error: bool = False,
     ) -> dict:
         """Core 9-step reflection pipeline."""
         stats = {"memories_scanned": 0, "traits_created": 0, "traits_updated": 0, "traits_dissolved": 0}
 
-        # Step 1: Scan new memories (reuse watermark to avoid redundant query)
+        # Step 1: Scan new memories (reuse watermark to avoid redundant query),
+        # as many as fit the prompt budget; the rest wait for the next cycle
         new_memories = await self._scan_new_memories(user_id, watermark)
+        batch = _memory_batch(new_memories)
+        if len(batch) < len(new_memories):
+            logger.info(
+                "Reflection over memory budget: %d of %d memories this cycle, rest in the next",
+                len(batch), len(new_memories),
+            )
+            stats["resume_after"] = datetime.fromisoformat(batch[-1]["created_at"])
+            new_memories = batch
         stats["memories_scanned"] = len(new_memories)
 
         # Step 3 (before LLM): trend expiry/promotion (pure code)
@@ -353,40 +499,71 @@ class ReflectionService:
             return stats
 
         # Step 2: LLM main call
-        existing_traits = await self._load_existing_traits(user_id)
+        existing_traits, omitted_traits = await self._load_existing_traits(user_id, new_memories)
 
         use_two_stage = trigger_type in ("importance_accumulated",)
         if use_two_stage:
-            llm_result = await self._two_stage_reflect(user_id, new_memories, existing_traits)
+            llm_result = await self._two_stage_reflect(user_id, new_memories, existing_traits, omitted_traits)
         else:
-            llm_result = await self._call_reflection_llm(new_memories, existing_traits)
+            llm_result = await self._call_reflection_llm(new_memories, existing_traits, omitted_traits)
 
         if llm_result is None:
+            if fail_on_llm_error:
+                raise RuntimeError("Reflection LLM call failed")
             # LLM failed -> only apply decay, don't update watermark
             dissolved = await self._trait_engine.apply_decay(user_id)
             stats["traits_dissolved"] += dissolved
             return stats
 
         # Step 4: Process new_trends + new_behaviors
+        trends = []
         for trend in llm_result.get("new_trends", []):
             if is_sensitive_trait(trend.get("content", "")):
                 logger.info("Skipping sensitive trend: %s", trend["content"][:60])
                 continue
-            await self._trait_engine.create_trend(
+            trends.append(trend)
+        behaviors = []
+        for behavior in llm_result.get("new_behaviors", []):
+            if is_sensitive_trait(behavior.get("content", "")):
+                logger.info("Skipping sensitive behavior: %s", behavior["content"][:60])
+                continue
+            behaviors.append(behavior)
+        upgrades = []
+        for upgrade in llm_result.get("upgrades", []):
+            from_ids = [tid for tid in upgrade.get("from_trait_ids", []) if self._is_valid_uuid(tid)]
+            if not from_ids:
+                logger.warning("Skipping upgrade with no valid from_trait_ids")
+                continue
+            upgrades.append((from_ids, upgrade))
+
+        # Embed every new trait text in one call and look up all their
+        # near-duplicates among stored traits in one query
+        new_contents = [t["content"] for t in trends] + [b["content"] for b in behaviors]
+        texts = new_contents + [u["new_content"] for _, u in upgrades]
+        vectors = await self._embedding.embed_batch(texts) if texts else []
+        similar = await self._trait_engine.find_similar_traits(
+            user_id, new_contents, vectors[:len(new_contents)],
+        )
+        created: list[tuple[str, np.ndarray, Memory]] = []
+
+        for i, trend in enumerate(trends):
+            prefetched = (match_created_trait(created, trend["content"], vectors[i]) or similar[i], vectors[i])
+            trait = await self._trait_engine.create_trend(
                 user_id=user_id,
                 content=trend["content"],
                 evidence_ids=trend.get("evidence_ids", []),
                 window_days=trend.get("window_days", 30),
                 context=trend.get("context", "general"),
                 cycle_id=cycle_id,
+                prefetched=prefetched,
             )
+            if trait is not None and prefetched[0] is None:
+                remember_created_trait(created, trait, vectors[i])
             stats["traits_created"] += 1
 
-        for behavior in llm_result.get("new_behaviors", []):
-            if is_sensitive_trait(behavior.get("content", "")):
-                logger.info("Skipping sensitive behavior: %s", behavior["content"][:60])
-                continue
-            await self._trait_engine.create_behavior(
+        for j, behavior in enumerate(behaviors, start=len(trends)):
+            prefetched = (match_created_trait(created, behavior["content"], vectors[j]) or similar[j], vectors[j])
+            trait = await self._trait_engine.create_behavior(
                 user_id=user_id,
                 content=behavior["content"],
                 evidence_ids=behavior.get("evidence_ids", []),
@@ -394,7 +571,10 @@ class ReflectionService:
                 context=behavior.get("context", "general"),
                 cycle_id=cycle_id,
                 behavior_kind=behavior.get("behavior_kind", "pattern"),
+                prefetched=prefetched,
             )
+            if trait is not None and prefetched[0] is None:
+                remember_created_trait(created, trait, vectors[j])
             stats["traits_created"] += 1
 
         # Step 5: Process reinforcements
@@ -413,23 +593,21 @@ class ReflectionService:
             stats["traits_updated"] += 1
 
         # Step 6: Process upgrades
-        for upgrade in llm_result.get("upgrades", []):
-            from_ids = upgrade.get("from_trait_ids", [])
-            from_ids = [tid for tid in from_ids if self._is_valid_uuid(tid)]
-            if not from_ids:
-                logger.warning("Skipping upgrade with no valid from_trait_ids")
-                continue
+        for k, (from_ids, upgrade) in enumerate(upgrades, start=len(new_contents)):
             result = await self._trait_engine.try_upgrade(
                 from_trait_ids=from_ids,
                 new_content=upgrade["new_content"],
                 new_subtype=upgrade["new_subtype"],
                 reasoning=upgrade.get("reasoning", ""),
                 cycle_id=cycle_id,
+                embedding_vector=vectors[k],
             )
             if result:
                 stats["traits_created"] += 1
 
-        # Step 7: Process contradictions + possible special reflection
+        # Step 7: Process contradictions, then run the special reflections
+        # they trigger with concurrent LLM calls
+        to_resolve: list[str] = []
         for contradiction in llm_result.get("contradictions", []):
             trait_id = contradiction.get("trait_id", "")
             if not self._is_valid_uuid(trait_id):
@@ -441,12 +619,14 @@ class ReflectionService:
                 cycle_id=cycle_id,
                 user_id=user_id,
             )
-            if result.get("needs_special_reflection"):
-                resolved = await self._trait_engine.resolve_contradiction(
-                    trait_id=contradiction["trait_id"],
-                    llm=self._llm,
-                    cycle_id=cycle_id,
-                )
+            if result.get("needs_special_reflection") and trait_id not in to_resolve:
+                to_resolve.append(trait_id)
+
+        if to_resolve:
+            resolved_all = await self._trait_engine.resolve_contradictions(
+                to_resolve, llm=self._llm, cycle_id=cycle_id,
+            )
+            for resolved in resolved_all:
                 if resolved.get("action") == "dissolve":
                     stats["traits_dissolved"] += 1
                 else:
@@ -508,11 +688,10 @@ class ReflectionService:
         """Mark prospective facts as historical when their event_time has passed."""
         result = await self.db.execute(
             sql_text(
-                "UPDATE memories SET metadata = jsonb_set(metadata, '{temporality}', '\"historical\"') "
+                "UPDATE memories SET temporality = 'historical', "
+                "metadata = jsonb_set(metadata, '{temporality}', '\"historical\"') "
                 "WHERE user_id = :uid AND memory_type = 'fact' "
-                "AND metadata->>'temporality' = 'prospective' "
-                "AND (metadata->>'event_time') IS NOT NULL "
-                "AND (metadata->>'event_time')::timestamp < NOW() "
+                "AND temporality = 'prospective' AND event_time < NOW() "
                 "RETURNING id"
             ),
             {"uid": user_id},
@@ -573,37 +752,72 @@ class ReflectionService:
             for r in rows
         ]
 
-    async def _load_existing_traits(self, user_id: str) -> list[dict]:
-        """Load existing active traits for LLM context."""
+    async def _load_existing_traits(
+        self,
+        user_id: str,
+        new_memories: list[dict] | None = None,
+    ) -> tuple[list[dict], dict[str, int]]:
+        """Load the active traits most relevant to the new memories for LLM context.
+
+        Traits are ranked by their best cosine similarity to any new memory
+        (then by confidence) and kept while they fit _TRAIT_TOKEN_BUDGET.
+
+        Returns:
+            (traits, omitted) where omitted counts the active traits left out
+            per context, for a one-line summary in the prompt.
+        """
+        memory_ids = [m["id"] for m in (new_memories or []) if self._is_valid_uuid(str(m.get("id", "")))]
         result = await self.db.execute(
             sql_text(
-                "SELECT id, content, trait_stage, trait_subtype, trait_confidence, trait_context "
-                "FROM memories "
-                "WHERE user_id = :uid AND memory_type = 'trait' "
-                "AND trait_stage NOT IN ('dissolved') "
-                "ORDER BY trait_confidence DESC NULLS LAST LIMIT 50"
+                "SELECT * FROM ("
+                f"  SELECT id, content, {trait_stage_sql('t.')} AS trait_stage, trait_subtype, "
+                f"  {trait_confidence_sql('t.')} AS trait_confidence, trait_context, "
+                "  (SELECT MAX(1 - (t.embedding <=> m.embedding)) FROM memories m "
+                "   WHERE m.id = ANY(CAST(:mids AS uuid[]))) AS relevance "
+                "  FROM memories t "
+                "  WHERE t.user_id = :uid AND t.memory_type = 'trait' "
+                "  AND t.trait_stage NOT IN ('dissolved')"
+                ") t WHERE trait_stage != 'dissolved' "
+                "ORDER BY relevance DESC NULLS LAST, trait_confidence DESC NULLS LAST LIMIT :lim"
             ),
-            {"uid": user_id},
+            {"uid": user_id, "mids": memory_ids, "lim": _MAX_PROMPT_TRAITS},
         )
-        rows = result.fetchall()
-
-        return [
-            {
+        traits: list[dict] = []
+        used = 0
+        for r in result.fetchall():
+            trait = {
                 "id": str(r.id),
                 "content": r.content,
                 "stage": r.trait_stage,
                 "subtype": r.trait_subtype,
-                "confidence": float(r.trait_confidence) if r.trait_confidence else 0.0,
+                "confidence": round(float(r.trait_confidence), 2) if r.trait_confidence else 0.0,
                 "context": r.trait_context,
             }
-            for r in rows
-        ]
+            cost = count_prompt_tokens(_compact_json(trait))
+            if used + cost > _TRAIT_TOKEN_BUDGET:
+                break
+            traits.append(trait)
+            used += cost
+
+        totals = await self.db.execute(
+            sql_text(
+                "SELECT COALESCE(trait_context, 'general') AS context, COUNT(*) AS n FROM memories "
+                "WHERE user_id = :uid AND memory_type = 'trait' AND trait_stage != 'dissolved' "
+                f"AND {trait_stage_sql()} != 'dissolved' GROUP BY 1"
+            ),
+            {"uid": user_id},
+        )
+        omitted = {r.context: r.n for r in totals.fetchall()}
+        for trait in traits:
+            omitted[trait["context"] or "general"] = omitted.get(trait["context"] or "general", 0) - 1
+        return traits, {k: v for k, v in omitted.items() if v > 0}
 
     async def _two_stage_reflect(
         self,
         user_id: str,
         new_memories: list[dict],
         existing_traits: list[dict],
+        omitted_traits: dict[str, int] | None = None,
     ) -> dict | None:
         """Two-stage reflection: generate questions, retrieve evidence, then analyze."""
         # Stage 1: Generate questions
@@ -628,23 +842,19 @@ class ReflectionService:
             questions = self._parse_questions(q_result)
         except Exception as e:
             logger.warning("Two-stage reflection stage 1 failed: %s, falling back to single-stage", e)
-            return await self._call_reflection_llm(new_memories, existing_traits)
+            return await self._call_reflection_llm(new_memories, existing_traits, omitted_traits)
 
         if not questions:
-            return await self._call_reflection_llm(new_memories, existing_traits)
+            return await self._call_reflection_llm(new_memories, existing_traits, omitted_traits)
 
-        # Stage 2: Retrieve evidence for each question (parallel)
-        import asyncio
+        # Stage 2: Retrieve evidence for all questions (one embed_batch + one query)
         from neuromem.services.search import SearchService
         search_svc = SearchService(self.db, self._embedding)
-
-        async def _search_question(q: str) -> list[dict]:
-            try:
-                return await search_svc.scored_search(user_id=user_id, query=q, limit=3)
-            except Exception:
-                return []
-
-        all_hits = await asyncio.gather(*[_search_question(q) for q in questions[:5]])
+        try:
+            all_hits = await search_svc.scored_search_many(user_id=user_id, queries=questions[:5], limit=3)
+        except Exception as e:
+            logger.warning("Two-stage reflection evidence retrieval failed: %s", e)
+            all_hits = []
         evidence: list[dict] = []
         seen_ids: set[str] = set()
         for hits in all_hits:
@@ -659,7 +869,7 @@ class ReflectionService:
             for e in evidence[:10]
         ]
 
-        return await self._call_reflection_llm(enriched_memories, existing_traits)
+        return await self._call_reflection_llm(enriched_memories, existing_traits, omitted_traits)
 
     def _parse_questions(self, result_text: str) -> list[str]:
         """Parse question generation result."""
@@ -684,9 +894,10 @@ class ReflectionService:
         self,
         new_memories: list[dict],
         existing_traits: list[dict],
+        omitted_traits: dict[str, int] | None = None,
     ) -> dict | None:
         """Call LLM for main reflection analysis. Returns None on failure."""
-        prompt = self._build_reflection_prompt(new_memories, existing_traits)
+        prompt = self._build_reflection_prompt(new_memories, existing_traits, omitted_traits)
         try:
             result_text = await self._llm.chat(
                 messages=[
@@ -705,14 +916,32 @@ class ReflectionService:
         self,
         new_memories: list[dict],
         existing_traits: list[dict],
+        omitted_traits: dict[str, int] | None = None,
     ) -> str:
-        """Build the main reflection prompt."""
-        existing_json = json.dumps(existing_traits, ensure_ascii=False, indent=2) if existing_traits else "[]"
-        memories_json = json.dumps(
-            [{"id": m["id"], "content": m["content"], "memory_type": m["memory_type"]} for m in new_memories],
-            ensure_ascii=False,
-            indent=2,
-        )
+        """Build the main reflection prompt within the token budget.
+
+        Items are rendered as compact one-line JSON, memory contents cut at
+        _MAX_MEMORY_CHARS. New memories come pre-sized by _memory_batch and
+        are all included; retrieved evidence (two-stage reflection) only
+        fills what is left of _MEMORY_TOKEN_BUDGET.
+        """
+        trait_lines = [_compact_json(t) for t in existing_traits]
+        existing_json = "[\n" + ",\n".join(trait_lines) + "\n]" if trait_lines else "[]"
+        if omitted_traits:
+            counts = ", ".join(f"{ctx} {n}" for ctx, n in sorted(omitted_traits.items()))
+            existing_json += f"\n（另有 {sum(omitted_traits.values())} 条相关度较低的已有特质未列出：{counts}）"
+
+        memory_lines = []
+        used = 0
+        for memory in new_memories:
+            line = _memory_line(memory)
+            cost = count_prompt_tokens(line)
+            if memory["memory_type"] == "evidence" and used + cost > _MEMORY_TOKEN_BUDGET:
+                continue
+            memory_lines.append(line)
+            used += cost
+        memories_json = "[\n" + ",\n".join(memory_lines) + "\n]" if memory_lines else "[]"
+
         return REFLECTION_PROMPT_TEMPLATE.format(
             existing_traits_json=existing_json,
             new_memories_json=memories_json,
@@ -770,6 +999,20 @@ class ReflectionService:
         existing_traits: Optional[list[dict]] = None,
     ) -> list[dict]:
         """Generate pattern and summary traits (legacy digest behavior)."""
+        items = await self.propose_traits(recent_memories, existing_traits)
+        if not items:
+            return []
+        return await self.store_traits(user_id, items)
+
+    async def propose_traits(
+        self,
+        recent_memories: list[dict],
+        existing_traits: Optional[list[dict]] = None,
+    ) -> list[dict]:
+        """Ask the LLM for pattern/summary traits without touching the DB.
+
+        Returns only items with a valid category and importance >= 7.
+        """
         prompt = self._build_trait_prompt(recent_memories, existing_traits)
 
         try:
@@ -783,8 +1026,6 @@ class ReflectionService:
             logger.error("Trait generation LLM call failed: %s", e, exc_info=True)
             return []
 
-        # Filter valid traits first
-        _MIN_TRAIT_IMPORTANCE = 7
         valid_traits = []
         for trait_item in traits:
             content = trait_item.get("content")
@@ -796,21 +1037,31 @@ class ReflectionService:
                 logger.debug("Skipping low-importance trait (importance=%d): %s", importance, content[:60])
                 continue
             valid_traits.append(trait_item)
+        return valid_traits
 
-        if not valid_traits:
-            return []
+    async def store_traits(
+        self,
+        user_id: str,
+        items: list[dict],
+        vectors: Optional[list[list[float]]] = None,
+    ) -> list[dict]:
+        """Store proposed traits as trait(trend) rows.
 
-        # Embed all traits in batch
-        contents = [item["content"] for item in valid_traits]
-        try:
-            vectors = await self._embedding.embed_batch(contents)
-        except Exception as e:
-            logger.error("Failed to embed traits batch: %s", e)
+        Args:
+            vectors: Precomputed embeddings aligned with ``items``; embedded
+                in one batch call when omitted.
+        """
+        if not items:
             return []
+        if vectors is None:
+            try:
+                vectors = await self._embedding.embed_batch([item["content"] for item in items])
+            except Exception as e:
+                logger.error("Failed to embed traits batch: %s", e)
+                return []
 
-        stored = []
-        for trait_item, vector in zip(valid_traits, vectors):
-            embedding_obj = Memory(
+        for trait_item, vector in zip(items, vectors):
+            self.db.add(Memory(
                 user_id=user_id,
                 content=trait_item["content"],
                 embedding=vector,
@@ -821,14 +1072,9 @@ class ReflectionService:
                     "source_ids": trait_item.get("source_ids", []),
                     "importance": int(trait_item.get("importance", 8)),
                 },
-            )
-            self.db.add(embedding_obj)
-            stored.append(trait_item)
-
-        if stored:
-            await self.db.flush()
-
-        return stored
+            ))
+        await self.db.flush()
+        return list(items)
 
     def _build_trait_prompt(
         self,
@@ -846,10 +1092,17 @@ class ReflectionService:
 
         existing_text = ""
         if existing_traits:
-            recent = existing_traits[-20:]
-            existing_lines = [f"- {ins.get('content', '')}" for ins in recent]
+            # Most recent first, within the trait token budget
+            existing_lines = []
+            used = 0
+            for ins in reversed(existing_traits[-20:]):
+                line = f"- {ins.get('content', '')}"
+                used += count_prompt_tokens(line)
+                if used > _TRAIT_TOKEN_BUDGET:
+                    break
+                existing_lines.insert(0, line)
             existing_text = f"""
-已有洞察（共 {len(existing_traits)} 条，显示最近 {len(recent)} 条）：
+已有洞察（共 {len(existing_traits)} 条，显示最近 {len(existing_lines)} 条）：
 {chr(10).join(existing_lines)}
 
 ⚠️ 严格去重规则：
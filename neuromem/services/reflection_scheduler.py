@@ -0,0 +1,360 @@
+"""Reflection scheduler - runs reflections across users under a global budget.
+
+Due users are discovered from the ``reflection_state`` counters and queued in
+the ``reflection_queue`` table, one entry per user. Workers claim the oldest
+ready entries with ``FOR UPDATE SKIP LOCKED`` and a lease, so the queue
+survives restarts and several processes can share it: a crashed worker's
+entries become claimable again once their lease expires.
+
+Fairness comes from the queue shape: a user holds at most one entry and runs
+at most one job at a time, and entries are served oldest-first, so a busy
+tenant re-enters at the back of the queue after each job. Globally, at most
+``concurrency`` jobs run at once and an optional token bucket limits the
+estimated LLM tokens started per minute.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import text
+
+from neuromem.services.reflection_state import ReflectionStateService
+
+logger = logging.getLogger(__name__)
+
+# Token estimate for one job: fixed prompt overhead + per new memory
+_BASE_TOKENS = 1500
+_TOKENS_PER_MEMORY = 60
+_MAX_ESTIMATED_MEMORIES = 200
+
+
+def estimate_tokens(new_memory_count: int) -> int:
+    """Rough LLM token cost of reflecting over ``new_memory_count`` memories."""
+    return _BASE_TOKENS + _TOKENS_PER_MEMORY * min(max(new_memory_count, 0), _MAX_ESTIMATED_MEMORIES)
+
+
+class TokenBucket:
+    """Tokens-per-minute limiter; capacity is one minute of budget.
+
+    A request larger than the capacity is admitted once the bucket is full,
+    so oversized jobs are delayed rather than blocked forever.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(tokens_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until ``tokens`` (capped at capacity) are available, then take them."""
+        need = min(float(tokens), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < need:
+                await asyncio.sleep((need - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= need
+
+
+class ReflectionScheduler:
+    """Schedules reflect()/digest() jobs for all users from a persisted queue.
+
+    Args:
+        db: Database whose ``session()`` is used for queue operations.
+        reflect: ``async (user_id) -> dict`` running one reflection. A
+            result with an ``"error"`` key counts as a failed job.
+        digest: ``async (user_id) -> dict`` for entries enqueued with
+            ``run_digest=True``.
+        concurrency: Maximum jobs running at once in this process.
+        tokens_per_minute: Estimated LLM tokens started per minute
+            (None = unlimited).
+        poll_interval: Seconds between scans for newly due users.
+        lease: How long a claimed entry stays reserved for this worker.
+        max_attempts: Failed jobs are retried with backoff up to this many
+            attempts, then dropped.
+    """
+
+    def __init__(
+        self,
+        db,
+        reflect: Callable[[str], Awaitable[Any]],
+        digest: Callable[[str], Awaitable[Any]] | None = None,
+        concurrency: int = 4,
+        tokens_per_minute: int | None = None,
+        poll_interval: float = 30.0,
+        lease: timedelta = timedelta(minutes=15),
+        max_attempts: int = 3,
+        retry_backoff: timedelta = timedelta(seconds=60),
+    ):
+        self._db = db
+        self._reflect = reflect
+        self._digest = digest
+        self._concurrency = max(1, concurrency)
+        self._bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._poll_interval = poll_interval
+        self._lease = lease
+        self._max_attempts = max(1, max_attempts)
+        self._retry_backoff = retry_backoff
+
+        self._in_flight: set[asyncio.Task] = set()
+        self._loop_task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._last_scan = 0.0
+        self._completed = 0
+        self._failed = 0
+        self._tokens_started = 0
+
+    # -- Queue operations --
+
+    async def enqueue(
+        self,
+        user_id: str,
+        trigger_type: str | None = None,
+        trigger_value: float | None = None,
+        run_digest: bool = False,
+        estimated_tokens: int | None = None,
+    ) -> None:
+        """Queue a job for the user (merged into an existing entry).
+
+        An entry keeps its place in the queue when enqueued again; if its
+        job is already running, it is queued once more when that job ends.
+        """
+        async with self._db.session() as session:
+            if estimated_tokens is None:
+                state = await ReflectionStateService(session).get(user_id)
+                estimated_tokens = estimate_tokens(state.new_memory_count if state else 0)
+            await session.execute(
+                text(
+                    "INSERT INTO reflection_queue "
+                    "(user_id, trigger_type, trigger_value, run_digest, estimated_tokens) "
+                    "VALUES (:uid, :ttype, :tvalue, :digest, :tokens) "
+                    "ON CONFLICT (user_id) DO UPDATE SET "
+                    "  trigger_type = COALESCE(EXCLUDED.trigger_type, reflection_queue.trigger_type), "
+                    "  trigger_value = COALESCE(EXCLUDED.trigger_value, reflection_queue.trigger_value), "
+                    "  run_digest = reflection_queue.run_digest OR EXCLUDED.run_digest, "
+                    "  estimated_tokens = GREATEST(reflection_queue.estimated_tokens, EXCLUDED.estimated_tokens), "
+                    "  requeue = reflection_queue.requeue OR reflection_queue.status = 'running'"
+                ),
+                {
+                    "uid": user_id, "ttype": trigger_type, "tvalue": trigger_value,
+                    "digest": run_digest, "tokens": estimated_tokens,
+                },
+            )
+        self._wakeup.set()
+
+    async def enqueue_due(self, limit: int = 1000) -> int:
+        """Queue every user whose reflection trigger fires and who is not queued.
+
+        Returns:
+            Number of users added to the queue.
+        """
+        async with self._db.session() as session:
+            due = await ReflectionStateService(session).due_users(limit=limit)
+            if not due:
+                return 0
+            result = await session.execute(
+                text(
+                    "INSERT INTO reflection_queue "
+                    "(user_id, trigger_type, trigger_value, estimated_tokens) "
+                    "SELECT d.user_id, d.trigger_type, d.trigger_value, d.tokens "
+                    "FROM unnest(CAST(:uids AS text[]), CAST(:ttypes AS text[]), "
+                    "            CAST(:tvalues AS float8[]), CAST(:tokens AS int[])) "
+                    "  AS d(user_id, trigger_type, trigger_value, tokens) "
+                    "ON CONFLICT (user_id) DO NOTHING"
+                ),
+                {
+                    "uids": [d["user_id"] for d in due],
+                    "ttypes": [d["trigger_type"] for d in due],
+                    "tvalues": [d["trigger_value"] for d in due],
+                    "tokens": [estimate_tokens(d["new_memory_count"]) for d in due],
+                },
+            )
+            return result.rowcount
+
+    async def _claim(self, limit: int) -> list[dict]:
+        """Lease up to ``limit`` ready entries, oldest first."""
+        async with self._db.session() as session:
+            rows = (await session.execute(
+                text(
+                    "UPDATE reflection_queue q SET status = 'running', attempts = q.attempts + 1, "
+                    "  leased_until = now() + CAST(:lease AS interval) "
+                    "FROM (SELECT user_id FROM reflection_queue "
+                    "      WHERE (status = 'pending' AND available_at <= now()) "
+                    "         OR (status = 'running' AND leased_until < now()) "
+                    "      ORDER BY available_at, enqueued_at "
+                    "      LIMIT :lim FOR UPDATE SKIP LOCKED) c "
+                    "WHERE q.user_id = c.user_id "
+                    "RETURNING q.user_id, q.trigger_type, q.run_digest, q.estimated_tokens, "
+                    "  q.attempts, q.available_at"
+                ),
+                {"lease": self._lease, "lim": limit},
+            )).fetchall()
+        return [dict(r._mapping) for r in sorted(rows, key=lambda r: r.available_at)]
+
+    async def _finish(self, user_id: str) -> None:
+        """Drop a completed entry, or send it to the back if re-enqueued meanwhile."""
+        async with self._db.session() as session:
+            await session.execute(
+                text(
+                    "UPDATE reflection_queue SET status = 'pending', requeue = false, "
+                    "  attempts = 0, leased_until = NULL, last_error = NULL, "
+                    "  enqueued_at = now(), available_at = now() "
+                    "WHERE user_id = :uid AND requeue"
+                ),
+                {"uid": user_id},
+            )
+            await session.execute(
+                text("DELETE FROM reflection_queue WHERE user_id = :uid AND status = 'running'"),
+                {"uid": user_id},
+            )
+
+    async def _fail(self, entry: dict, error: Exception) -> None:
+        """Retry with exponential backoff, or drop after max_attempts."""
+        async with self._db.session() as session:
+            if entry["attempts"] >= self._max_attempts:
+                await session.execute(
+                    text("DELETE FROM reflection_queue WHERE user_id = :uid"),
+                    {"uid": entry["user_id"]},
+                )
+                return
+            backoff = self._retry_backoff * (2 ** (entry["attempts"] - 1))
+            await session.execute(
+                text(
+                    "UPDATE reflection_queue SET status = 'pending', leased_until = NULL, "
+                    "  available_at = now() + CAST(:backoff AS interval), last_error = :err "
+                    "WHERE user_id = :uid"
+                ),
+                {"uid": entry["user_id"], "backoff": backoff, "err": str(error)[:500]},
+            )
+
+    # -- Execution --
+
+    async def _execute(self, entry: dict) -> None:
+        user_id = entry["user_id"]
+        try:
+            if self._bucket is not None:
+                await self._bucket.acquire(entry["estimated_tokens"])
+            self._tokens_started += entry["estimated_tokens"]
+            if entry["run_digest"] and self._digest is not None:
+                await self._digest(user_id)
+            result = await self._reflect(user_id)
+            if isinstance(result, dict) and result.get("error"):
+                raise RuntimeError(result["error"])
+        except asyncio.CancelledError:
+            # Leave the lease to expire so another worker picks the job up
+            raise
+        except Exception as e:
+            self._failed += 1
+            logger.error("Scheduled reflection failed: user=%s attempt=%d error=%s",
+                         user_id, entry["attempts"], e, exc_info=True)
+            await self._fail(entry, e)
+        else:
+            self._completed += 1
+            await self._finish(user_id)
+
+    async def run_once(self) -> int:
+        """One scheduling pass: queue due users, then run up to ``concurrency`` jobs.
+
+        Returns:
+            Number of jobs run.
+        """
+        await self.enqueue_due()
+        entries = await self._claim(self._concurrency)
+        await asyncio.gather(*(self._execute(e) for e in entries))
+        return len(entries)
+
+    async def start(self) -> None:
+        """Start the background scheduling loop."""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self, wait: bool = True) -> None:
+        """Stop the loop; wait for (or cancel) jobs in flight."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        if self._in_flight:
+            if not wait:
+                for task in self._in_flight:
+                    task.cancel()
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                now = time.monotonic()
+                if now - self._last_scan >= self._poll_interval:
+                    self._last_scan = now
+                    await self.enqueue_due()
+                free = self._concurrency - len(self._in_flight)
+                if free > 0:
+                    for entry in await self._claim(free):
+                        task = asyncio.create_task(self._execute(entry))
+                        self._in_flight.add(task)
+                        task.add_done_callback(self._on_done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Reflection scheduler pass failed: %s", e, exc_info=True)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        self._wakeup.set()
+
+    # -- Metrics --
+
+    async def metrics(self) -> dict:
+        """Backlog and throughput metrics.
+
+        Returns:
+            {"pending", "ready", "running", "backlog_tokens",
+             "oldest_wait_seconds", "in_flight", "completed", "failed",
+             "tokens_started", "tokens_available"}
+        """
+        async with self._db.session() as session:
+            row = (await session.execute(text(
+                "SELECT "
+                "  COUNT(*) FILTER (WHERE status = 'pending') AS pending, "
+                "  COUNT(*) FILTER (WHERE status = 'pending' AND available_at <= now()) AS ready, "
+                "  COUNT(*) FILTER (WHERE status = 'running') AS running, "
+                "  COALESCE(SUM(estimated_tokens) FILTER (WHERE status = 'pending'), 0) AS backlog_tokens, "
+                "  COALESCE(EXTRACT(EPOCH FROM now() - MIN(enqueued_at) "
+                "    FILTER (WHERE status = 'pending')), 0) AS oldest_wait "
+                "FROM reflection_queue"
+            ))).one()
+        return {
+            "pending": row.pending,
+            "ready": row.ready,
+            "running": row.running,
+            "backlog_tokens": int(row.backlog_tokens),
+            "oldest_wait_seconds": round(float(row.oldest_wait), 3),
+            "in_flight": len(self._in_flight),
+            "completed": self._completed,
+            "failed": self._failed,
+            "tokens_started": self._tokens_started,
+            "tokens_available": round(self._bucket.available) if self._bucket else None,
+        }
@@ -0,0 +1,160 @@
+"""Reflection state service - per-user trigger counters.
+
+Trigger checks used to re-aggregate every memory created since the last
+reflection. ReflectionState keeps those aggregates as running totals:
+memory writers bump them in the same transaction as the insert, and a
+completed reflection (or digest batch) recomputes them from scratch against
+the new watermark. Rows are created lazily by ``refresh`` on a user's first
+write or trigger check.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from neuromem.models.memory import Memory
+from neuromem.models.reflection_state import ReflectionState
+
+logger = logging.getLogger(__name__)
+
+# Accumulated importance since the watermark that triggers a reflection
+IMPORTANCE_THRESHOLD = 30.0
+# Reflect at least this often when the user has a watermark
+SCHEDULED_INTERVAL = timedelta(hours=24)
+# Never re-trigger within this window after a completed reflection
+MIN_REFLECTION_GAP = timedelta(seconds=60)
+
+# Memory types that count towards reflection triggers
+COUNTED_TYPES = ("fact", "episodic")
+
+_IMPORTANCE_SQL = "COALESCE((metadata->>'importance')::float, importance)"
+
+
+def memory_importance(memory: Memory) -> float:
+    """Importance of a memory as the trigger counters see it.
+
+    Metadata importance (set by extraction) overrides the column, matching
+    ``_IMPORTANCE_SQL``.
+    """
+    column = memory.importance if memory.importance is not None else 0.5
+    value = (memory.metadata_ or {}).get("importance")
+    try:
+        return float(value) if value is not None else float(column)
+    except (TypeError, ValueError):
+        return float(column)
+
+
+class ReflectionStateService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, user_id: str) -> ReflectionState | None:
+        """Primary-key lookup of a user's state row."""
+        return (await self.db.execute(
+            select(ReflectionState).where(ReflectionState.user_id == user_id)
+            .execution_options(populate_existing=True),
+        )).scalar_one_or_none()
+
+    async def get_or_refresh(self, user_id: str) -> ReflectionState:
+        """State row for the user, computing it on first use."""
+        state = await self.get(user_id)
+        if state is None:
+            state = await self.refresh(user_id)
+        return state
+
+    async def refresh(self, user_id: str) -> ReflectionState:
+        """Recompute watermark and counters from reflection_cycles + memories.
+
+        Called after a reflection/digest completes (in its transaction) and to
+        seed users that have no state row yet.
+        """
+        await self.db.execute(
+            text(
+                "INSERT INTO reflection_state "
+                "(user_id, watermark, accumulated_importance, new_memory_count, updated_at) "
+                f"SELECT :uid, w.wm, COALESCE(SUM({_IMPORTANCE_SQL}), 0), COUNT(m.id), now() "
+                "FROM (SELECT MAX(completed_at) AS wm FROM reflection_cycles "
+                "      WHERE user_id = :uid AND status = 'completed') w "
+                "LEFT JOIN memories m ON m.user_id = :uid "
+                "  AND m.memory_type IN ('fact', 'episodic') "
+                "  AND (w.wm IS NULL OR m.created_at > w.wm) "
+                "GROUP BY w.wm "
+                "ON CONFLICT (user_id) DO UPDATE SET "
+                "  watermark = EXCLUDED.watermark, "
+                "  accumulated_importance = EXCLUDED.accumulated_importance, "
+                "  new_memory_count = EXCLUDED.new_memory_count, "
+                "  updated_at = EXCLUDED.updated_at"
+            ),
+            {"uid": user_id},
+        )
+        return await self.get(user_id)
+
+    async def record_memories(self, user_id: str, memories: list[Memory]) -> None:
+        """Add newly inserted (and flushed) memories to the user's counters.
+
+        A user without a row is seeded by ``refresh``, which counts these
+        memories itself.
+        """
+        counted = [m for m in memories if m.memory_type in COUNTED_TYPES]
+        if not counted:
+            return
+        result = await self.db.execute(
+            text(
+                "UPDATE reflection_state SET "
+                "  accumulated_importance = accumulated_importance + :imp, "
+                "  new_memory_count = new_memory_count + :n, "
+                "  updated_at = now() "
+                "WHERE user_id = :uid"
+            ),
+            {"uid": user_id, "imp": sum(memory_importance(m) for m in counted), "n": len(counted)},
+        )
+        if result.rowcount == 0:
+            await self.refresh(user_id)
+
+    async def due_users(
+        self,
+        limit: int = 100,
+        importance_threshold: float = IMPORTANCE_THRESHOLD,
+        interval: timedelta = SCHEDULED_INTERVAL,
+    ) -> list[dict]:
+        """Users whose reflection trigger currently fires, most urgent first.
+
+        Mirrors ReflectionService.should_reflect over all state rows, except
+        that the scheduled trigger also needs new memories: an idle tenant
+        would only get a no-op reflection for its share of the LLM budget.
+
+        Returns:
+            [{"user_id", "trigger_type", "trigger_value", "new_memory_count"}, ...]
+        """
+        rows = (await self.db.execute(
+            text(
+                "SELECT user_id, "
+                "  CASE WHEN watermark IS NULL THEN 'first_time' "
+                "       WHEN accumulated_importance >= :thr THEN 'importance_accumulated' "
+                "       ELSE 'scheduled' END AS trigger_type, "
+                "  accumulated_importance, new_memory_count "
+                "FROM reflection_state "
+                "WHERE (watermark IS NULL AND new_memory_count > 0) "
+                "   OR (watermark <= now() - CAST(:gap AS interval) "
+                "       AND (accumulated_importance >= :thr "
+                "            OR (watermark <= now() - CAST(:interval AS interval) AND new_memory_count > 0))) "
+                "ORDER BY watermark IS NOT NULL, accumulated_importance DESC, watermark "
+                "LIMIT :lim"
+            ),
+            {"thr": importance_threshold, "gap": MIN_REFLECTION_GAP, "interval": interval, "lim": limit},
+        )).fetchall()
+        return [
+            {
+                "user_id": r.user_id,
+                "trigger_type": r.trigger_type,
+                "trigger_value": (
+                    float(r.accumulated_importance) if r.trigger_type == "importance_accumulated" else None
+                ),
+                "new_memory_count": r.new_memory_count,
+            }
+            for r in rows
+        ]
@@ -2,17 +2,21 @@
 
 from __future__ import annotations
 
-import json
 import logging
-from datetime import datetime
+import math
+import random
+from datetime import datetime, timezone
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from neuromem.db import _is_encrypted
 from neuromem.models.memory import Memory
 from neuromem.providers.embedding import EmbeddingProvider
 from neuromem.services.context import ContextService
+from neuromem.services.flush_buffer import PeriodicFlushBuffer
+from neuromem.services.profile_view import ProfileViewService
+from neuromem.services.reflection_state import ReflectionStateService
+from neuromem.services.trait_engine import trait_confidence_sql, trait_stage_sql
 
 logger = logging.getLogger(__name__)
 
@@ -38,12 +42,91 @@ def _sanitize_bm25_query(query: str) -> str:
     return " ".join(sanitized.split())
 
 
+def _stochastic_round(value: float) -> int:
+    """Round down or up with probability equal to the fraction, so E[result] == value."""
+    whole = math.floor(value)
+    return whole + (random.random() < value - whole)
+
+
+class AccessTracker(PeriodicFlushBuffer):
+    """Accumulate access_count / last_accessed_at updates off the read path.
+
+    ``record`` only counts ids in memory; a background flush writes all
+    accumulated increments every ``flush_interval`` seconds with one
+    ``UPDATE ... FROM (VALUES ...)`` per chunk, so readers of the columns
+    (e.g. cold_memories) lag by at most one interval. With ``sample_rate``
+    below 1, only that fraction of accesses is recorded, each weighted by
+    ``1 / sample_rate``. Weights accumulate as floats and each total is
+    rounded stochastically at flush, so counts stay unbiased for any rate.
+    """
+
+    _CHUNK = 500
+    _label = "access tracking"
+
+    def __init__(self, db, flush_interval: float = 5.0, sample_rate: float = 1.0, max_pending: int = 5000):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        super().__init__(db, flush_interval, max_pending)
+        self._sample_rate = sample_rate
+        # memory id -> [user_id, increment, last access]
+        self._pending: dict[str, list] = {}
+
+    def record(self, user_id: str, ids: list[str]) -> None:
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            return
+        weight = 1 / self._sample_rate
+        now = datetime.now(timezone.utc)
+        for id_ in ids:
+            entry = self._pending.get(str(id_))
+            if entry is None:
+                self._pending[str(id_)] = [user_id, weight, now]
+            else:
+                entry[1] += weight
+                entry[2] = now
+        self._schedule()
+
+    async def _write(self, pending: dict[str, list]) -> int:
+        items = list(pending.items())
+        updated = 0
+        async with self._db.session() as session:
+            for start in range(0, len(items), self._CHUNK):
+                chunk = items[start:start + self._CHUNK]
+                values = ", ".join(
+                    f"(CAST(:id_{i} AS uuid), CAST(:uid_{i} AS varchar), "
+                    f"CAST(:n_{i} AS int), CAST(:ts_{i} AS timestamptz))"
+                    for i in range(len(chunk))
+                )
+                params = {}
+                for i, (id_, (uid, n, ts)) in enumerate(chunk):
+                    params.update({
+                        f"id_{i}": id_, f"uid_{i}": uid, f"n_{i}": _stochastic_round(n), f"ts_{i}": ts,
+                    })
+                result = await session.execute(text(
+                    "UPDATE memories m SET "
+                    "  access_count = m.access_count + v.n, "
+                    "  last_accessed_at = GREATEST(m.last_accessed_at, v.ts) "
+                    f"FROM (VALUES {values}) AS v(id, user_id, n, ts) "
+                    "WHERE m.id = v.id AND m.user_id = v.user_id"
+                ), params)
+                updated += result.rowcount
+        return updated
+
+
 class SearchService:
-    def __init__(self, db: AsyncSession, embedding: EmbeddingProvider, pg_search_available: bool = False, encryption=None):
+    def __init__(
+        self,
+        db: AsyncSession,
+        embedding: EmbeddingProvider,
+        pg_search_available: bool = False,
+        encryption=None,
+        access_tracker: AccessTracker | None = None,
+    ):
         self.db = db
         self._embedding = embedding
         self._pg_search = pg_search_available if not encryption else False
         self._encryption = encryption
+        # Without a tracker, access tracking is written in the search's own transaction
+        self._access_tracker = access_tracker
 
     async def add_memory(
         self,
@@ -86,6 +169,8 @@ class SearchService:
         )
         self.db.add(record)
         await self.db.flush()
+        await ReflectionStateService(self.db).record_memories(user_id, [record])
+        await ProfileViewService(self.db).record_memories(user_id, [record])
         return record
 
     async def _prepare_query_vector(
@@ -157,8 +242,41 @@ class SearchService:
 
         return filters
 
-    def _build_bm25_cte(self, filters: str, candidate_limit: int) -> str:
-        """Build BM25 CTE SQL fragment (pg_search or tsvector fallback)."""
+    def _build_bm25_cte(
+        self,
+        filters: str,
+        candidate_limit: int,
+        *,
+        query_text: str = ":query_text",
+        query_tokens: str = ":query_tokens",
+    ) -> str:
+        """Build BM25 CTE SQL fragment (pg_search, blind index or tsvector fallback).
+
+        ``query_text`` and ``query_tokens`` are the SQL expressions the
+        fragment reads the query from: bind parameters by default, or columns
+        of an outer row when evaluated per query (see scored_search_many).
+        """
+        if self._encryption:
+            # Content is ciphertext: match keyed term hashes instead. Score is
+            # the fraction of query terms present (no corpus statistics exist
+            # over hashes); an empty token array matches nothing.
+            return f"""
+            bm25_ranked AS (
+                SELECT id, bm25_score,
+                       ROW_NUMBER() OVER (ORDER BY bm25_score DESC) AS bm25_rank
+                FROM (
+                    SELECT id,
+                           cardinality(ARRAY(
+                               SELECT unnest(blind_tokens)
+                               INTERSECT SELECT unnest(CAST({query_tokens} AS bigint[]))
+                           ))::float / GREATEST(cardinality(CAST({query_tokens} AS bigint[])), 1) AS bm25_score
+                    FROM memories
+                    WHERE {filters}
+                      AND blind_tokens && CAST({query_tokens} AS bigint[])
+                ) matched
+                ORDER BY bm25_score DESC
+                LIMIT {candidate_limit}
+            )"""
         if self._pg_search:
             return f"""
             bm25_ranked AS (
@@ -167,20 +285,20 @@ class SearchService:
                        ROW_NUMBER() OVER (ORDER BY paradedb.score(id) DESC) AS bm25_rank
                 FROM memories
                 WHERE {filters}
-                  AND id @@@ paradedb.parse(:query_text)
+                  AND id @@@ paradedb.parse({query_text})
                 ORDER BY bm25_score DESC
                 LIMIT {candidate_limit}
             )"""
+        # Stored, GIN-indexed content_tsv; neuromem_tsquery() parses the query
+        # with the column's tokenizer (see Database._init_fts)
         return f"""
             bm25_ranked AS (
                 SELECT id,
-                       ts_rank_cd(to_tsvector('simple', content), plainto_tsquery('simple', :query_text)) AS bm25_score,
-                       ROW_NUMBER() OVER (
-                           ORDER BY ts_rank_cd(to_tsvector('simple', content), plainto_tsquery('simple', :query_text)) DESC
-                       ) AS bm25_rank
-                FROM memories
+                       ts_rank_cd(content_tsv, tq.q) AS bm25_score,
+                       ROW_NUMBER() OVER (ORDER BY ts_rank_cd(content_tsv, tq.q) DESC) AS bm25_rank
+                FROM memories, (SELECT neuromem_tsquery({query_text}) AS q) tq
                 WHERE {filters}
-                  AND to_tsvector('simple', content) @@ plainto_tsquery('simple', :query_text)
+                  AND content_tsv @@ tq.q
                 ORDER BY bm25_score DESC
                 LIMIT {candidate_limit}
             )"""
@@ -210,7 +328,10 @@ class SearchService:
         _, vector_str = await self._prepare_query_vector(query, query_embedding)
 
         bm25_query = _sanitize_bm25_query(query) if self._pg_search else query
-        params: dict = {"limit": limit, "query_text": bm25_query, "query_vec": vector_str}
+        params: dict = {
+            "limit": limit, "query_text": bm25_query, "query_vec": vector_str,
+            "query_tokens": self._query_tokens(user_id, query),
+        }
 
         filters = self._build_base_filters(
             params, user_id=user_id, memory_type=memory_type,
@@ -248,11 +369,12 @@ class SearchService:
 
         result = await self.db.execute(sql, params)
         rows = result.fetchall()
+        contents = self._decrypt_all([row.content for row in rows])
 
         results = [
             {
                 "id": str(row.id),
-                "content": self._maybe_decrypt(row.content),
+                "content": content,
                 "memory_type": row.memory_type,
                 "metadata": row.metadata,
                 "created_at": row.created_at,
@@ -261,7 +383,7 @@ class SearchService:
                 "vector_score": round(float(row.vector_score), 4),
                 "bm25_score": round(float(row.bm25_score), 4),
             }
-            for row in rows
+            for row, content in zip(rows, contents)
         ]
 
         # Update access tracking asynchronously
@@ -270,16 +392,16 @@ class SearchService:
 
         return results
 
-    def _maybe_decrypt(self, content: str) -> str:
-        """Decrypt content if encryption is enabled and value is encrypted."""
-        if not self._encryption or not _is_encrypted(content):
-            return content
-        try:
-            envelope = json.loads(content)
-            return self._encryption.decrypt(envelope)
-        except Exception as e:
-            logger.warning("Failed to decrypt search result content: %s", e)
-            return content
+    def _query_tokens(self, user_id: str, query: str) -> list[int]:
+        """Blind-index hashes of the query (empty without encryption or index key)."""
+        tokens = self._encryption.blind_tokens(query, user_id) if self._encryption else None
+        return tokens or []
+
+    def _decrypt_all(self, contents: list[str]) -> list[str]:
+        """Decrypt a result set's contents when encryption is enabled."""
+        if not self._encryption:
+            return contents
+        return self._encryption.decrypt_many(contents)
 
     async def scored_search(
         self,
@@ -317,7 +439,117 @@ class SearchService:
         _, vector_str = await self._prepare_query_vector(query, query_embedding)
 
         bm25_query = _sanitize_bm25_query(query) if self._pg_search else query
-        params: dict = {"limit": limit, "decay_rate": decay_rate, "query_text": bm25_query, "query_vec": vector_str}
+        sql, params = self._build_scored_sql(
+            user_id=user_id, limit=limit, memory_type=memory_type, decay_rate=decay_rate,
+            event_after=event_after, event_before=event_before, exclude_types=exclude_types,
+            as_of=as_of, created_after=created_after, created_before=created_before,
+            current_emotion=current_emotion, query_context=query_context,
+            context_confidence=context_confidence,
+        )
+        params.update(query_text=bm25_query, query_vec=vector_str, query_tokens=self._query_tokens(user_id, query))
+
+        result = await self.db.execute(text(sql), params)
+        rows = result.fetchall()
+        contents = self._decrypt_all([row.content for row in rows])
+        results = [self._scored_row(row, content) for row, content in zip(rows, contents)]
+
+        # Update access tracking
+        if results:
+            await self._update_access_tracking(user_id, [r["id"] for r in results])
+
+        return results
+
+    async def scored_search_many(
+        self,
+        user_id: str,
+        queries: list[str],
+        limit: int = 5,
+        query_embeddings: list[list[float]] | None = None,
+        **kwargs,
+    ) -> list[list[dict]]:
+        """Run scored_search for several queries in one batch.
+
+        Queries are embedded with a single embed_batch call (unless
+        ``query_embeddings`` is given) and scored by one SQL statement that
+        evaluates the scored_search query per input row via CROSS JOIN
+        LATERAL. Accepts the same filter keyword arguments as scored_search.
+
+        Returns:
+            One hit list per query, in input order, each ranked and limited
+            exactly as scored_search would return it.
+        """
+        if not queries:
+            return []
+        if query_embeddings is None:
+            query_embeddings = await self._embedding.embed_batch(queries)
+        vector_strs = [
+            (await self._prepare_query_vector(q, emb))[1]
+            for q, emb in zip(queries, query_embeddings)
+        ]
+        bm25_queries = [_sanitize_bm25_query(q) if self._pg_search else q for q in queries]
+
+        per_query, params = self._build_scored_sql(
+            user_id=user_id, limit=limit,
+            query_vec="q.query_vec", query_text="q.query_text", query_tokens="q.query_tokens",
+            **kwargs,
+        )
+        params.update(
+            query_texts=bm25_queries,
+            query_vecs=vector_strs,
+            # bigint[] literals: unnest() cannot take a ragged 2-D array
+            query_token_lists=["{" + ",".join(map(str, self._query_tokens(user_id, q))) + "}" for q in queries],
+        )
+
+        result = await self.db.execute(
+            text(
+                "SELECT q.idx, s.* FROM unnest("
+                "  CAST(:query_texts AS text[]), CAST(:query_vecs AS text[]), CAST(:query_token_lists AS text[])"
+                ") WITH ORDINALITY AS q(query_text, query_vec, query_tokens, idx) "
+                f"CROSS JOIN LATERAL ({per_query}) s "
+                "ORDER BY q.idx, s.score DESC"
+            ),
+            params,
+        )
+        hits: list[list[dict]] = [[] for _ in queries]
+        rows = result.fetchall()
+        contents = self._decrypt_all([row.content for row in rows])
+        for row, content in zip(rows, contents):
+            hits[row.idx - 1].append(self._scored_row(row, content))
+
+        # Update access tracking once for the union of all hits
+        ids = list(dict.fromkeys(h["id"] for per in hits for h in per))
+        if ids:
+            await self._update_access_tracking(user_id, ids)
+
+        return hits
+
+    def _build_scored_sql(
+        self,
+        *,
+        user_id: str,
+        limit: int,
+        memory_type: str | None = None,
+        decay_rate: float = DEFAULT_DECAY_RATE,
+        event_after: datetime | None = None,
+        event_before: datetime | None = None,
+        exclude_types: list[str] | None = None,
+        as_of: datetime | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        current_emotion: dict | None = None,
+        query_context: str | None = None,
+        context_confidence: float = 0.0,
+        query_vec: str = ":query_vec",
+        query_text: str = ":query_text",
+        query_tokens: str = ":query_tokens",
+    ) -> tuple[str, dict]:
+        """Build the scored_search SQL and its params.
+
+        ``query_vec``, ``query_text`` and ``query_tokens`` are the SQL
+        expressions the statement reads the query from. They default to bind
+        parameters, which the caller adds to the returned params.
+        """
+        params: dict = {"limit": limit, "decay_rate": decay_rate}
 
         filters = self._build_base_filters(
             params, user_id=user_id, memory_type=memory_type,
@@ -326,8 +558,13 @@ class SearchService:
             as_of=as_of, exclude_types=exclude_types,
         )
 
-        # Exclude inactive trait stages from search results
-        filters += " AND NOT (memory_type = 'trait' AND trait_stage IN ('trend', 'candidate', 'dissolved'))"
+        # Exclude inactive trait stages from search results. Stored stage and
+        # dissolve time prefilter cheaply; traits that decayed into candidate
+        # are dropped after ranking, where the decay is computed once per row.
+        filters += (
+            " AND NOT (memory_type = 'trait' AND (trait_stage IN ('trend', 'candidate', 'dissolved')"
+            " OR COALESCE(trait_dissolve_at <= NOW(), false)))"
+        )
 
         # Emotion matching bonus SQL fragment
         if current_emotion and isinstance(current_emotion, dict):
@@ -335,8 +572,8 @@ class SearchService:
             q_arousal = float(current_emotion.get("arousal", 0))
             emotion_bonus_sql = (
                 f"0.10 * GREATEST(0, 1.0 - SQRT("
-                f"  POWER(COALESCE((metadata->'emotion'->>'valence')::float, 0) - {q_valence}, 2)"
-                f"  + POWER(COALESCE((metadata->'emotion'->>'arousal')::float, 0) - {q_arousal}, 2)"
+                f"  POWER(COALESCE(emotion_valence, 0) - {q_valence}, 2)"
+                f"  + POWER(COALESCE(emotion_arousal, 0) - {q_arousal}, 2)"
                 f") / 2.83)"
             )
         else:
@@ -363,18 +600,21 @@ class SearchService:
             context_bonus_sql = "0"
 
         candidate_limit = limit * 2 if self._pg_search else limit * 4
-        bm25_cte = self._build_bm25_cte(filters, candidate_limit) + ","
+        bm25_cte = self._build_bm25_cte(
+            filters, candidate_limit, query_text=query_text, query_tokens=query_tokens,
+        ) + ","
 
-        sql = text(
-            f"""
+        sql = f"""
             WITH vector_ranked AS (
                 SELECT id, content, memory_type, metadata, created_at, extracted_timestamp,
-                       access_count, last_accessed_at, trait_stage, trait_context,
-                       1 - (embedding <=> CAST(:query_vec AS vector)) AS vector_score,
-                       ROW_NUMBER() OVER (ORDER BY embedding <=> CAST(:query_vec AS vector)) AS vector_rank
+                       access_count, last_accessed_at, trait_stage, trait_confidence, trait_context,
+                       {trait_confidence_sql()} AS decayed_confidence,
+                       event_time, emotion_valence, emotion_arousal, temporality, importance AS importance_value,
+                       1 - (embedding <=> CAST({query_vec} AS vector)) AS vector_score,
+                       ROW_NUMBER() OVER (ORDER BY embedding <=> CAST({query_vec} AS vector)) AS vector_rank
                 FROM memories
                 WHERE {filters}
-                ORDER BY embedding <=> CAST(:query_vec AS vector)
+                ORDER BY embedding <=> CAST({query_vec} AS vector)
                 LIMIT {candidate_limit}
             ),
             {bm25_cte}
@@ -386,42 +626,45 @@ class SearchService:
                        + COALESCE(1.0 / ({RRF_K} + b.bm25_rank), 0) AS rrf_score
                 FROM vector_ranked v
                 LEFT JOIN bm25_ranked b ON v.id = b.id
+            ),
+            bonuses AS MATERIALIZED (
+                SELECT hybrid.*,
+                       {trait_stage_sql(confidence="decayed_confidence")} AS current_stage,
+                       -- recency_bonus: 0~0.15
+                       0.15 * EXP(
+                           -EXTRACT(EPOCH FROM (NOW() - COALESCE(event_time, created_at)))
+                           / (:decay_rate * (1 + COALESCE(emotion_arousal, 0) * 0.5))
+                       ) AS recency,
+                       -- importance_bonus: 0~0.15
+                       0.15 * COALESCE(importance_value, 0.5) AS importance,
+                       -- emotion_match_bonus: 0~0.10
+                       {emotion_bonus_sql} AS emotion_match,
+                       -- context_match_bonus: 0~0.10
+                       {context_bonus_sql} AS context_match,
+                       CASE
+                           WHEN temporality = 'prospective' AND event_time < NOW() THEN 0.5
+                           ELSE 1.0
+                       END AS prospective_penalty
+                FROM hybrid
             )
             SELECT id, content, memory_type, metadata, created_at, extracted_timestamp,
-                   access_count, last_accessed_at, trait_stage, trait_context,
+                   access_count, last_accessed_at, current_stage AS trait_stage, trait_context,
                    vector_score AS relevance,
                    bm25_score,
                    rrf_score,
-                   -- recency_bonus: 0~0.15
-                   0.15 * EXP(
-                       -EXTRACT(EPOCH FROM (NOW() - COALESCE((metadata->>'event_time')::timestamp, created_at)))
-                       / (:decay_rate * (1 + COALESCE((metadata->'emotion'->>'arousal')::float, 0) * 0.5))
-                   ) AS recency,
-                   -- importance_bonus: 0~0.15
-                   0.15 * COALESCE((metadata->>'importance')::float / 10.0, 0.5) AS importance,
-                   -- emotion_match_bonus: 0~0.10
-                   {emotion_bonus_sql} AS emotion_match,
-                   -- context_match_bonus: 0~0.10
-                   {context_bonus_sql} AS context_match,
+                   recency,
+                   importance,
+                   emotion_match,
+                   context_match,
                    -- final score: prospective_penalty × base_relevance × (1 + recency + importance + trait_boost + emotion_match)
-                   CASE
-                       WHEN metadata->>'temporality' = 'prospective'
-                            AND (metadata->>'event_time') IS NOT NULL
-                            AND (metadata->>'event_time')::timestamp < NOW()
-                       THEN 0.5
-                       ELSE 1.0
-                   END
-                   *
-                   LEAST(vector_score + CASE WHEN bm25_score > 0 THEN 0.05 ELSE 0 END, 1.0)
+                   prospective_penalty
+                   * LEAST(vector_score + CASE WHEN bm25_score > 0 THEN 0.05 ELSE 0 END, 1.0)
                    * (1.0
-                      + 0.15 * EXP(
-                          -EXTRACT(EPOCH FROM (NOW() - COALESCE((metadata->>'event_time')::timestamp, created_at)))
-                          / (:decay_rate * (1 + COALESCE((metadata->'emotion'->>'arousal')::float, 0) * 0.5))
-                      )
-                      + 0.15 * COALESCE((metadata->>'importance')::float / 10.0, 0.5)
+                      + recency
+                      + importance
                       + CASE
                           WHEN memory_type = 'trait' THEN
-                              CASE trait_stage
+                              CASE current_stage
                                   WHEN 'core'        THEN 0.25
                                   WHEN 'established' THEN 0.15
                                   WHEN 'emerging'    THEN 0.05
@@ -429,48 +672,42 @@ class SearchService:
                               END
                           ELSE 0
                         END
-                      + {emotion_bonus_sql}
-                      + {context_bonus_sql}
+                      + emotion_match
+                      + context_match
                    ) AS score
-            FROM hybrid
+            FROM bonuses
+            WHERE NOT (memory_type = 'trait' AND current_stage IN ('candidate', 'dissolved'))
             ORDER BY score DESC
             LIMIT :limit
         """
-        )
-
-        result = await self.db.execute(sql, params)
-        rows = result.fetchall()
-
-        results = [
-            {
-                "id": str(row.id),
-                "content": self._maybe_decrypt(row.content),
-                "memory_type": row.memory_type,
-                "metadata": row.metadata,
-                "created_at": row.created_at,
-                "extracted_timestamp": row.extracted_timestamp,
-                "relevance": round(float(row.relevance), 4),
-                "bm25_score": round(float(row.bm25_score), 4),
-                "rrf_score": round(float(row.rrf_score), 4),
-                "recency": round(float(row.recency), 4),
-                "importance": round(float(row.importance), 4),
-                "emotion_match": round(float(row.emotion_match), 4),
-                "context_match": round(float(row.context_match), 4),
-                "score": round(float(row.score), 4),
-            }
-            for row in rows
-        ]
-
-        # Update access tracking
-        if results:
-            await self._update_access_tracking(user_id, [r["id"] for r in results])
-
-        return results
+        return sql, params
+
+    def _scored_row(self, row, content: str) -> dict:
+        """Convert one scored_search result row (with decrypted content) to its dict form."""
+        return {
+            "id": str(row.id),
+            "content": content,
+            "memory_type": row.memory_type,
+            "metadata": row.metadata,
+            "created_at": row.created_at,
+            "extracted_timestamp": row.extracted_timestamp,
+            "relevance": round(float(row.relevance), 4),
+            "bm25_score": round(float(row.bm25_score), 4),
+            "rrf_score": round(float(row.rrf_score), 4),
+            "recency": round(float(row.recency), 4),
+            "importance": round(float(row.importance), 4),
+            "emotion_match": round(float(row.emotion_match), 4),
+            "context_match": round(float(row.context_match), 4),
+            "score": round(float(row.score), 4),
+        }
 
     async def _update_access_tracking(self, user_id: str, ids: list[str]) -> None:
         """Update access_count and last_accessed_at for retrieved memories."""
         if not ids:
             return
+        if self._access_tracker is not None:
+            self._access_tracker.record(user_id, ids)
+            return
         try:
             placeholders = ", ".join(f":id_{i}" for i in range(len(ids)))
             params = {f"id_{i}": id_ for i, id_ in enumerate(ids)}
@@ -4,10 +4,81 @@ from __future__ import annotations
 
 import re
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Callable
 
 logger = logging.getLogger(__name__)
 
+# Characters whose case-insensitive match is not mirrored by str.lower()
+# (e.g. "ſ" matches "s" under IGNORECASE); texts containing them try every
+# rule.
+_CASE_FOLD_TRAPS = re.compile("[\u0130\u0131\u017f\u212a]")
+_DIGIT = re.compile(r"\d")
+
+_MONTH_PREFIXES = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_SEASON_WORDS = ("spring", "summer", "fall", "autumn", "winter")
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """One time expression: a pattern and the handler that interprets it.
+
+    ``handler(extractor, match, text, ref)`` returns a result, or None to let
+    lower-priority rules try. ``lowered`` rules are matched against
+    ``text.lower().strip()``.
+
+    ``requires`` and ``digit`` describe every possible match: it contains at
+    least one of the ``requires`` literals (lowercase for case-insensitive
+    rules) and, with ``digit``, a decimal digit. Rules whose requirements
+    the text fails are never searched.
+    """
+
+    pattern: re.Pattern
+    handler: Callable
+    requires: tuple[str, ...] = ()
+    digit: bool = False
+    lowered: bool = False
+
+
+class _RuleSet:
+    """An ordered rule list indexed by required literal.
+
+    ``candidates`` checks each distinct literal once against the lowercased
+    text and keeps the rules that can still match, in priority order, so most
+    texts search only a handful of patterns. Literals of case-sensitive rules
+    (CJK, punctuation) are unchanged by ``str.lower()``.
+    """
+
+    def __init__(self, rules: list[_Rule]):
+        self.rules = rules
+        self._always = frozenset(i for i, rule in enumerate(rules) if not rule.requires)
+        self._by_literal: dict[str, tuple[int, ...]] = {}
+        for i, rule in enumerate(rules):
+            for literal in rule.requires:
+                self._by_literal[literal] = self._by_literal.get(literal, ()) + (i,)
+
+    def candidates(self, text: str) -> list[_Rule]:
+        if _CASE_FOLD_TRAPS.search(text):
+            return self.rules
+        folded = text.lower()
+        hits = self._always.union(*[
+            indexes for literal, indexes in self._by_literal.items() if literal in folded
+        ])
+        rules = [self.rules[i] for i in sorted(hits)]
+        if any(rule.digit for rule in rules) and not _DIGIT.search(text):
+            rules = [rule for rule in rules if not rule.digit]
+        return rules
+
+
+def _relative_word(func: Callable) -> Callable:
+    """Handler for a fixed relative word ("yesterday", "昨天"): start of that day."""
+
+    def handler(extractor, m, text, ref):
+        return func(ref).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    return handler
+
 
 class TemporalExtractor:
     """Extract timestamps from text using regex-based rules.
@@ -155,6 +226,10 @@ class TemporalExtractor:
         "七": 7, "八": 8, "九": 9, "十": 10, "十一": 11, "十二": 12,
     }
 
+    # Rule lists, built on first use
+    _RANGE_RULES: _RuleSet | None = None
+    _EXTRACT_RULES: _RuleSet | None = None
+
     def extract_time_range(
         self, query: str, reference_time: datetime | None = None
     ) -> tuple[datetime | None, datetime | None]:
@@ -172,155 +247,8 @@ class TemporalExtractor:
         if ref.tzinfo is None:
             ref = ref.replace(tzinfo=timezone.utc)
 
-        # --- Chinese time ranges (checked before English to avoid false matches) ---
-
-        def _day_range(base: datetime) -> tuple[datetime, datetime]:
-            """Return [start-of-day, start-of-next-day) for a given date."""
-            start = base.replace(hour=0, minute=0, second=0, microsecond=0)
-            return start, start + timedelta(days=1)
-
-        # 后天/大后天 (checked before 前天 to avoid prefix clash)
-        if self._ZH_RANGE_DAY_AFTER_TOMORROW.search(query):
-            return _day_range(ref + timedelta(days=2))
-
-        # 明天
-        if self._ZH_RANGE_TOMORROW.search(query):
-            return _day_range(ref + timedelta(days=1))
-
-        # 前天/大前天 (checked before 昨天)
-        if self._ZH_RANGE_DAY_BEFORE_YESTERDAY.search(query):
-            return _day_range(ref - timedelta(days=2))
-
-        # 昨天
-        if self._ZH_RANGE_YESTERDAY.search(query):
-            return _day_range(ref - timedelta(days=1))
-
-        # 最近/近期 → last 30 days
-        if self._ZH_RANGE_RECENT.search(query):
-            return ref - timedelta(days=30), ref
-
-        # 今天/今日 → today
-        if self._ZH_RANGE_TODAY.search(query):
-            start = ref.replace(hour=0, minute=0, second=0, microsecond=0)
-            return start, ref
-
-        # 这周/本周 → Monday of this week to now
-        if self._ZH_RANGE_THIS_WEEK.search(query):
-            start = (ref - timedelta(days=ref.weekday())).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            return start, ref
-
-        # 上周 → last full week (Mon–Sun)
-        if self._ZH_RANGE_LAST_WEEK.search(query):
-            this_monday = (ref - timedelta(days=ref.weekday())).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            start = this_monday - timedelta(weeks=1)
-            end = this_monday
-            return start, end
-
-        # 这个月/本月 → first day of this month to now
-        if self._ZH_RANGE_THIS_MONTH.search(query):
-            start = ref.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            return start, ref
-
-        # 上个月 → last full month
-        if self._ZH_RANGE_LAST_MONTH.search(query):
-            first_this = ref.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            month = first_this.month - 1 or 12
-            year = first_this.year if first_this.month > 1 else first_this.year - 1
-            start = first_this.replace(year=year, month=month)
-            return start, first_this
-
-        # 今年 → this year so far
-        if self._ZH_RANGE_THIS_YEAR.search(query):
-            start = ref.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            return start, ref
-
-        # 去年 → full last year
-        if self._ZH_RANGE_LAST_YEAR.search(query):
-            start = ref.replace(year=ref.year - 1, month=1, day=1,
-                                hour=0, minute=0, second=0, microsecond=0)
-            end = ref.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            return start, end
-
-        # YYYY年 → that year
-        m = self._ZH_RANGE_YEAR_NUM.search(query)
-        if m:
-            year = int(m.group(1))
-            if 1900 <= year <= 2100:
-                start = datetime(year, 1, 1, tzinfo=ref.tzinfo)
-                end = datetime(year + 1, 1, 1, tzinfo=ref.tzinfo)
-                return start, end
-
-        # X月 (数字) → that month in current year, e.g. "5月发生了什么"
-        m = self._ZH_RANGE_MONTH_NUM.search(query)
-        if m:
-            month = int(m.group(1))
-            if 1 <= month <= 12:
-                year = ref.year
-                start = datetime(year, month, 1, tzinfo=ref.tzinfo)
-                end = datetime(year, month + 1, 1, tzinfo=ref.tzinfo) if month < 12 \
-                    else datetime(year + 1, 1, 1, tzinfo=ref.tzinfo)
-                return start, end
-
-        # 一月/二月/… → that month in current year
-        m = self._ZH_RANGE_MONTH_CN.search(query)
-        if m:
-            month = self._ZH_CN_MONTH_MAP.get(m.group(1))
-            if month:
-                year = ref.year
-                start = datetime(year, month, 1, tzinfo=ref.tzinfo)
-                end = datetime(year, month + 1, 1, tzinfo=ref.tzinfo) if month < 12 \
-                    else datetime(year + 1, 1, 1, tzinfo=ref.tzinfo)
-                return start, end
-
-        # --- English time ranges ---
-
-        # Try "in/during Month [Year]"
-        m = self._MONTH_RANGE_RE.search(query)
-        if m:
-            month_str = m.group(1).rstrip('.').lower()
-            month = self._EN_MONTH_MAP.get(month_str)
-            if month:
-                year = int(m.group(2)) if m.group(2) else ref.year
-                start = datetime(year, month, 1, tzinfo=ref.tzinfo)
-                if month == 12:
-                    end = datetime(year + 1, 1, 1, tzinfo=ref.tzinfo)
-                else:
-                    end = datetime(year, month + 1, 1, tzinfo=ref.tzinfo)
-                return start, end
-
-        # Try "in/during [the] season [year]"
-        m = self._SEASON_RANGE_RE.search(query)
-        if m:
-            season = m.group(1).lower()
-            season_months = {
-                "spring": (3, 6), "summer": (6, 9),
-                "fall": (9, 12), "autumn": (9, 12), "winter": (12, 3),
-            }
-            start_m, end_m = season_months.get(season, (None, None))
-            if start_m is not None:
-                year = int(m.group(2)) if m.group(2) else ref.year
-                if season == "winter":
-                    start = datetime(year, 12, 1, tzinfo=ref.tzinfo)
-                    end = datetime(year + 1, 3, 1, tzinfo=ref.tzinfo)
-                else:
-                    start = datetime(year, start_m, 1, tzinfo=ref.tzinfo)
-                    end = datetime(year, end_m, 1, tzinfo=ref.tzinfo)
-                return start, end
-
-        # Try "in/during Year"
-        m = self._YEAR_RANGE_RE.search(query)
-        if m:
-            year = int(m.group(1))
-            if 1900 <= year <= 2100:
-                start = datetime(year, 1, 1, tzinfo=ref.tzinfo)
-                end = datetime(year + 1, 1, 1, tzinfo=ref.tzinfo)
-                return start, end
-
-        return None, None
+        result = self._evaluate(self._range_rules().candidates(query), query, ref)
+        return result if result is not None else (None, None)
 
     def extract(self, text: str, reference_time: datetime | None = None) -> datetime | None:
         """Extract a timestamp from text.
@@ -341,233 +269,313 @@ class TemporalExtractor:
         if ref.tzinfo is None:
             ref = ref.replace(tzinfo=timezone.utc)
 
-        # Try each pattern in priority order
-        for extractor in [
-            self._try_iso_full,
-            self._try_iso_date,
-            self._try_en_absolute,
-            self._try_zh_full,
-            self._try_zh_partial,
-            self._try_en_season,
-            self._try_zh_season,
-            self._try_en_quarter,
-            self._try_zh_quarter,
-            self._try_en_relative,
-            self._try_zh_relative,
-        ]:
-            result = extractor(text, ref)
-            if result is not None:
-                return result
+        return self._evaluate(self._extract_rules().candidates(text), text, ref)
 
+    def _evaluate(self, rules: list[_Rule], text: str, ref: datetime):
+        """Apply the first rule (in priority order) that matches and accepts."""
+        lowered = None
+        for rule in rules:
+            if rule.lowered:
+                if lowered is None:
+                    lowered = text.lower().strip()
+                m = rule.pattern.search(lowered)
+            else:
+                m = rule.pattern.search(text)
+            if m:
+                result = rule.handler(self, m, text, ref)
+                if result is not None:
+                    return result
         return None
 
-    def _try_iso_full(self, text: str, ref: datetime) -> datetime | None:
-        m = self._ISO_FULL.search(text)
-        if m:
-            try:
-                dt = datetime.fromisoformat(f"{m.group(1)}T{m.group(2)}")
-                return dt.replace(tzinfo=ref.tzinfo)
-            except ValueError:
-                return None
-        return None
+    @classmethod
+    def _range_rules(cls) -> _RuleSet:
+        if cls._RANGE_RULES is None:
+            cls._RANGE_RULES = _RuleSet(cls._build_range_rules())
+        return cls._RANGE_RULES
 
-    def _try_iso_date(self, text: str, ref: datetime) -> datetime | None:
-        m = self._ISO_DATE.search(text)
-        if m:
-            try:
-                dt = datetime.fromisoformat(m.group(1))
-                return dt.replace(tzinfo=ref.tzinfo)
-            except ValueError:
-                return None
-        return None
+    @classmethod
+    def _extract_rules(cls) -> _RuleSet:
+        if cls._EXTRACT_RULES is None:
+            cls._EXTRACT_RULES = _RuleSet(cls._build_extract_rules())
+        return cls._EXTRACT_RULES
 
-    def _try_en_absolute(self, text: str, ref: datetime) -> datetime | None:
-        # Try "May 7, 2023" pattern
-        m = self._EN_ABS_MDY.search(text)
-        if m:
-            month_str = m.group(0).split()[0].rstrip('.').lower()
-            month = self._EN_MONTH_MAP.get(month_str)
-            if month:
-                try:
-                    day = int(m.group(1))
-                    year = int(m.group(2))
-                    return datetime(year, month, day, tzinfo=ref.tzinfo)
-                except ValueError:
-                    pass
-
-        # Try "7 May 2023" pattern
-        m = self._EN_ABS_DMY.search(text)
-        if m:
-            month = self._EN_MONTH_MAP.get(m.group(2).lower())
-            if month:
-                try:
-                    day = int(m.group(1))
-                    year = int(m.group(3))
-                    return datetime(year, month, day, tzinfo=ref.tzinfo)
-                except ValueError:
-                    pass
+    @classmethod
+    def _build_range_rules(cls) -> list[_Rule]:
+        """Query time-range rules in priority order (Chinese before English)."""
 
-        return None
+        def _midnight(dt: datetime) -> datetime:
+            return dt.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    def _try_zh_full(self, text: str, ref: datetime) -> datetime | None:
-        m = self._ZH_FULL.search(text)
-        if m:
-            try:
-                return datetime(
-                    int(m.group(1)), int(m.group(2)), int(m.group(3)),
-                    tzinfo=ref.tzinfo,
-                )
-            except ValueError:
-                return None
-        return None
+        def _day_range(base: datetime) -> tuple[datetime, datetime]:
+            """Return [start-of-day, start-of-next-day) for a given date."""
+            start = _midnight(base)
+            return start, start + timedelta(days=1)
 
-    def _try_zh_partial(self, text: str, ref: datetime) -> datetime | None:
-        m = self._ZH_PARTIAL.search(text)
-        if m:
-            try:
-                return datetime(
-                    ref.year, int(m.group(1)), int(m.group(2)),
-                    tzinfo=ref.tzinfo,
-                )
-            except ValueError:
-                return None
-        return None
+        def _month_range(year: int, month: int, tz) -> tuple[datetime, datetime]:
+            start = datetime(year, month, 1, tzinfo=tz)
+            end = datetime(year, month + 1, 1, tzinfo=tz) if month < 12 \
+                else datetime(year + 1, 1, 1, tzinfo=tz)
+            return start, end
 
-    def _try_en_relative(self, text: str, ref: datetime) -> datetime | None:
-        text_lower = text.lower().strip()
+        def _year_range(m, q, ref):
+            year = int(m.group(1))
+            if 1900 <= year <= 2100:
+                return datetime(year, 1, 1, tzinfo=ref.tzinfo), datetime(year + 1, 1, 1, tzinfo=ref.tzinfo)
+            return None
 
-        # Check word-based relative
-        for word, func in self._EN_REL_WORDS.items():
-            if word in text_lower:
-                return func(ref).replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
+        def _this_week(m, q, ref):
+            return _midnight(ref - timedelta(days=ref.weekday())), ref
 
-        # X days/weeks/months/years ago
-        m = self._EN_REL_AGO.search(text_lower)
-        if m:
-            n = int(m.group(1))
-            unit = m.group(2).lower()
-            return self._subtract_unit(ref, n, unit)
+        def _last_week(m, q, ref):
+            this_monday = _midnight(ref - timedelta(days=ref.weekday()))
+            return this_monday - timedelta(weeks=1), this_monday
 
-        # last week/month/year/monday...
-        m = self._EN_REL_LAST.search(text_lower)
-        if m:
-            unit = m.group(1).lower()
-            if unit == "week":
-                return self._subtract_unit(ref, 1, "week")
-            elif unit == "month":
-                return self._subtract_unit(ref, 1, "month")
-            elif unit == "year":
-                return self._subtract_unit(ref, 1, "year")
-            elif unit in self._WEEKDAY_MAP:
-                target_wd = self._WEEKDAY_MAP[unit]
-                current_wd = ref.weekday()
-                days_back = (current_wd - target_wd) % 7
-                if days_back == 0:
-                    days_back = 7
-                # "last Monday" = the Monday in the previous week
-                days_back += 7
-                result = ref - timedelta(days=days_back)
-                return result.replace(hour=0, minute=0, second=0, microsecond=0)
+        def _last_month(m, q, ref):
+            first_this = _midnight(ref.replace(day=1))
+            month = first_this.month - 1 or 12
+            year = first_this.year if first_this.month > 1 else first_this.year - 1
+            return first_this.replace(year=year, month=month), first_this
 
-        return None
+        def _last_year(m, q, ref):
+            start = _midnight(ref.replace(year=ref.year - 1, month=1, day=1))
+            return start, _midnight(ref.replace(month=1, day=1))
 
-    def _try_zh_relative(self, text: str, ref: datetime) -> datetime | None:
-        # Check word-based relative
-        for word, func in self._ZH_REL_WORDS.items():
-            if word in text:
-                return func(ref).replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-
-        # X天前
-        m = self._ZH_REL_AGO.search(text)
-        if m:
-            return self._subtract_unit(ref, int(m.group(1)), "day")
-
-        # X周前 / X个星期前
-        m = self._ZH_REL_WEEK_AGO.search(text)
-        if m:
-            return self._subtract_unit(ref, int(m.group(1)), "week")
-
-        # X个月前
-        m = self._ZH_REL_MONTH_AGO.search(text)
-        if m:
-            return self._subtract_unit(ref, int(m.group(1)), "month")
-
-        # X年前
-        m = self._ZH_REL_YEAR_AGO.search(text)
-        if m:
-            return self._subtract_unit(ref, int(m.group(1)), "year")
-
-        # 上周
-        if self._ZH_REL_LAST_WEEK.search(text):
-            return self._subtract_unit(ref, 1, "week")
-
-        # 上月
-        if self._ZH_REL_LAST_MONTH.search(text):
-            return self._subtract_unit(ref, 1, "month")
-
-        # 去年
-        if self._ZH_REL_LAST_YEAR.search(text):
-            return self._subtract_unit(ref, 1, "year")
+        def _zh_month_num(m, q, ref):
+            month = int(m.group(1))
+            return _month_range(ref.year, month, ref.tzinfo) if 1 <= month <= 12 else None
 
-        return None
+        def _zh_month_cn(m, q, ref):
+            month = cls._ZH_CN_MONTH_MAP.get(m.group(1))
+            return _month_range(ref.year, month, ref.tzinfo) if month else None
+
+        def _en_month(m, q, ref):
+            month = cls._EN_MONTH_MAP.get(m.group(1).rstrip('.').lower())
+            if not month:
+                return None
+            year = int(m.group(2)) if m.group(2) else ref.year
+            return _month_range(year, month, ref.tzinfo)
 
-    def _try_en_season(self, text: str, ref: datetime) -> datetime | None:
-        m = self._EN_SEASON_RE.search(text)
-        if m:
+        def _en_season(m, q, ref):
             season = m.group(1).lower()
-            year_str = m.group(2)
-            month, day = self._EN_SEASON_MAP.get(season, (None, None))
-            if month is None:
+            season_months = {
+                "spring": (3, 6), "summer": (6, 9),
+                "fall": (9, 12), "autumn": (9, 12), "winter": (12, 3),
+            }
+            start_m, end_m = season_months.get(season, (None, None))
+            if start_m is None:
                 return None
-            if year_str:
-                year = int(year_str)
-            elif "last" in text.lower():
-                year = ref.year - 1
-            else:
-                # Current or most recent occurrence
-                candidate = datetime(ref.year, month, day, tzinfo=ref.tzinfo)
-                year = ref.year if candidate <= ref else ref.year - 1
-            return datetime(year, month, day, tzinfo=ref.tzinfo)
+            year = int(m.group(2)) if m.group(2) else ref.year
+            if season == "winter":
+                return datetime(year, 12, 1, tzinfo=ref.tzinfo), datetime(year + 1, 3, 1, tzinfo=ref.tzinfo)
+            return datetime(year, start_m, 1, tzinfo=ref.tzinfo), datetime(year, end_m, 1, tzinfo=ref.tzinfo)
+
+        return [
+            # 后天/大后天 (checked before 前天 to avoid prefix clash)
+            _Rule(cls._ZH_RANGE_DAY_AFTER_TOMORROW, lambda self, m, q, ref: _day_range(ref + timedelta(days=2)),
+                  requires=("后天",)),
+            _Rule(cls._ZH_RANGE_TOMORROW, lambda self, m, q, ref: _day_range(ref + timedelta(days=1)),
+                  requires=("明天",)),
+            # 前天/大前天 (checked before 昨天)
+            _Rule(cls._ZH_RANGE_DAY_BEFORE_YESTERDAY, lambda self, m, q, ref: _day_range(ref - timedelta(days=2)),
+                  requires=("前天",)),
+            _Rule(cls._ZH_RANGE_YESTERDAY, lambda self, m, q, ref: _day_range(ref - timedelta(days=1)),
+                  requires=("昨天",)),
+            # 最近/近期 → last 30 days
+            _Rule(cls._ZH_RANGE_RECENT, lambda self, m, q, ref: (ref - timedelta(days=30), ref),
+                  requires=("近", "这段")),
+            _Rule(cls._ZH_RANGE_TODAY, lambda self, m, q, ref: (_midnight(ref), ref),
+                  requires=("今",)),
+            # 这周/本周 → Monday of this week to now
+            _Rule(cls._ZH_RANGE_THIS_WEEK, lambda self, m, q, ref: _this_week(m, q, ref),
+                  requires=("周", "星期")),
+            # 上周 → last full week (Mon–Sun)
+            _Rule(cls._ZH_RANGE_LAST_WEEK, lambda self, m, q, ref: _last_week(m, q, ref),
+                  requires=("上",)),
+            _Rule(cls._ZH_RANGE_THIS_MONTH, lambda self, m, q, ref: (_midnight(ref.replace(day=1)), ref),
+                  requires=("月",)),
+            _Rule(cls._ZH_RANGE_LAST_MONTH, lambda self, m, q, ref: _last_month(m, q, ref),
+                  requires=("上",)),
+            _Rule(cls._ZH_RANGE_THIS_YEAR, lambda self, m, q, ref: (_midnight(ref.replace(month=1, day=1)), ref),
+                  requires=("今年",)),
+            _Rule(cls._ZH_RANGE_LAST_YEAR, lambda self, m, q, ref: _last_year(m, q, ref),
+                  requires=("去年",)),
+            _Rule(cls._ZH_RANGE_YEAR_NUM, lambda self, m, q, ref: _year_range(m, q, ref),
+                  requires=("年",), digit=True),
+            # X月 (数字) → that month in current year, e.g. "5月发生了什么"
+            _Rule(cls._ZH_RANGE_MONTH_NUM, lambda self, m, q, ref: _zh_month_num(m, q, ref),
+                  requires=("月",), digit=True),
+            _Rule(cls._ZH_RANGE_MONTH_CN, lambda self, m, q, ref: _zh_month_cn(m, q, ref),
+                  requires=("月",)),
+            # English: "in/during Month [Year]", "[the] season [year]", "in Year"
+            _Rule(cls._MONTH_RANGE_RE, lambda self, m, q, ref: _en_month(m, q, ref),
+                  requires=_MONTH_PREFIXES),
+            _Rule(cls._SEASON_RANGE_RE, lambda self, m, q, ref: _en_season(m, q, ref),
+                  requires=_SEASON_WORDS),
+            _Rule(cls._YEAR_RANGE_RE, lambda self, m, q, ref: _year_range(m, q, ref),
+                  requires=("in", "around"), digit=True),
+        ]
+
+    @classmethod
+    def _build_extract_rules(cls) -> list[_Rule]:
+        """Timestamp rules in priority order.
+
+        Rules with ``lowered=True`` keep the original semantics of being
+        evaluated against ``text.lower().strip()``.
+        """
+        rules = [
+            _Rule(cls._ISO_FULL, cls._try_iso_full, requires=(":",), digit=True),
+            _Rule(cls._ISO_DATE, cls._try_iso_date, requires=("-",), digit=True),
+            _Rule(cls._EN_ABS_MDY, cls._try_en_mdy, requires=_MONTH_PREFIXES, digit=True),
+            _Rule(cls._EN_ABS_DMY, cls._try_en_dmy, requires=_MONTH_PREFIXES, digit=True),
+            _Rule(cls._ZH_FULL, cls._try_zh_full, requires=("年",), digit=True),
+            _Rule(cls._ZH_PARTIAL, cls._try_zh_partial, requires=("日",), digit=True),
+            _Rule(cls._EN_SEASON_RE, cls._try_en_season, requires=_SEASON_WORDS),
+            _Rule(cls._ZH_SEASON_RE, cls._try_zh_season, requires=("春", "夏", "秋", "冬")),
+            _Rule(cls._EN_QUARTER_RE, cls._try_en_quarter, requires=("q",), digit=True),
+            _Rule(cls._ZH_QUARTER_RE, cls._try_zh_quarter, requires=("季度",), digit=True),
+        ]
+        # Word-based relative: first word present wins, in dict order
+        for word, func in cls._EN_REL_WORDS.items():
+            rules.append(_Rule(re.compile(re.escape(word)), _relative_word(func), requires=(word,), lowered=True))
+        rules += [
+            _Rule(cls._EN_REL_AGO, cls._try_en_ago, requires=("ago",), digit=True, lowered=True),
+            _Rule(cls._EN_REL_LAST, cls._try_en_last, requires=("last",), lowered=True),
+        ]
+        for word, func in cls._ZH_REL_WORDS.items():
+            rules.append(_Rule(re.compile(re.escape(word)), _relative_word(func), requires=(word,)))
+        rules += [
+            _Rule(cls._ZH_REL_AGO, lambda self, m, t, ref: self._subtract_unit(ref, int(m.group(1)), "day"),
+                  requires=("前",), digit=True),
+            _Rule(cls._ZH_REL_WEEK_AGO, lambda self, m, t, ref: self._subtract_unit(ref, int(m.group(1)), "week"),
+                  requires=("前",), digit=True),
+            _Rule(cls._ZH_REL_MONTH_AGO, lambda self, m, t, ref: self._subtract_unit(ref, int(m.group(1)), "month"),
+                  requires=("月前",), digit=True),
+            _Rule(cls._ZH_REL_YEAR_AGO, lambda self, m, t, ref: self._subtract_unit(ref, int(m.group(1)), "year"),
+                  requires=("年前",), digit=True),
+            _Rule(cls._ZH_REL_LAST_WEEK, lambda self, m, t, ref: self._subtract_unit(ref, 1, "week"),
+                  requires=("上",)),
+            _Rule(cls._ZH_REL_LAST_MONTH, lambda self, m, t, ref: self._subtract_unit(ref, 1, "month"),
+                  requires=("上",)),
+            _Rule(cls._ZH_REL_LAST_YEAR, lambda self, m, t, ref: self._subtract_unit(ref, 1, "year"),
+                  requires=("去年",)),
+        ]
+        return rules
+
+    def _try_iso_full(self, m, text: str, ref: datetime) -> datetime | None:
+        try:
+            dt = datetime.fromisoformat(f"{m.group(1)}T{m.group(2)}")
+            return dt.replace(tzinfo=ref.tzinfo)
+        except ValueError:
+            return None
+
+    def _try_iso_date(self, m, text: str, ref: datetime) -> datetime | None:
+        try:
+            dt = datetime.fromisoformat(m.group(1))
+            return dt.replace(tzinfo=ref.tzinfo)
+        except ValueError:
+            return None
+
+    def _try_en_mdy(self, m, text: str, ref: datetime) -> datetime | None:
+        # "May 7, 2023"
+        month_str = m.group(0).split()[0].rstrip('.').lower()
+        month = self._EN_MONTH_MAP.get(month_str)
+        if month:
+            try:
+                return datetime(int(m.group(2)), month, int(m.group(1)), tzinfo=ref.tzinfo)
+            except ValueError:
+                pass
         return None
 
-    def _try_zh_season(self, text: str, ref: datetime) -> datetime | None:
-        m = self._ZH_SEASON_RE.search(text)
-        if m:
-            season = m.group(1)
-            month, day = self._ZH_SEASON_MAP.get(season, (None, None))
-            if month is None:
-                return None
-            if "去年" in text:
-                year = ref.year - 1
-            else:
-                candidate = datetime(ref.year, month, day, tzinfo=ref.tzinfo)
-                year = ref.year if candidate <= ref else ref.year - 1
-            return datetime(year, month, day, tzinfo=ref.tzinfo)
+    def _try_en_dmy(self, m, text: str, ref: datetime) -> datetime | None:
+        # "7 May 2023"
+        month = self._EN_MONTH_MAP.get(m.group(2).lower())
+        if month:
+            try:
+                return datetime(int(m.group(3)), month, int(m.group(1)), tzinfo=ref.tzinfo)
+            except ValueError:
+                pass
         return None
 
-    def _try_en_quarter(self, text: str, ref: datetime) -> datetime | None:
-        m = self._EN_QUARTER_RE.search(text)
-        if m:
-            quarter = int(m.group(1))
-            year = int(m.group(2))
-            month = (quarter - 1) * 3 + 1  # Q1→1, Q2→4, Q3→7, Q4→10
-            return datetime(year, month, 1, tzinfo=ref.tzinfo)
+    def _try_zh_full(self, m, text: str, ref: datetime) -> datetime | None:
+        try:
+            return datetime(
+                int(m.group(1)), int(m.group(2)), int(m.group(3)),
+                tzinfo=ref.tzinfo,
+            )
+        except ValueError:
+            return None
+
+    def _try_zh_partial(self, m, text: str, ref: datetime) -> datetime | None:
+        try:
+            return datetime(
+                ref.year, int(m.group(1)), int(m.group(2)),
+                tzinfo=ref.tzinfo,
+            )
+        except ValueError:
+            return None
+
+    def _try_en_ago(self, m, text: str, ref: datetime) -> datetime | None:
+        # X days/weeks/months/years ago
+        return self._subtract_unit(ref, int(m.group(1)), m.group(2).lower())
+
+    def _try_en_last(self, m, text: str, ref: datetime) -> datetime | None:
+        # last week/month/year/monday...
+        unit = m.group(1).lower()
+        if unit in ("week", "month", "year"):
+            return self._subtract_unit(ref, 1, unit)
+        if unit in self._WEEKDAY_MAP:
+            target_wd = self._WEEKDAY_MAP[unit]
+            current_wd = ref.weekday()
+            days_back = (current_wd - target_wd) % 7
+            if days_back == 0:
+                days_back = 7
+            # "last Monday" = the Monday in the previous week
+            days_back += 7
+            result = ref - timedelta(days=days_back)
+            return result.replace(hour=0, minute=0, second=0, microsecond=0)
         return None
 
-    def _try_zh_quarter(self, text: str, ref: datetime) -> datetime | None:
-        m = self._ZH_QUARTER_RE.search(text)
-        if m:
-            year = int(m.group(1))
-            q_str = m.group(2)
-            q_map = {"一": 1, "二": 2, "三": 3, "四": 4, "1": 1, "2": 2, "3": 3, "4": 4}
-            quarter = q_map.get(q_str)
-            if quarter:
-                month = (quarter - 1) * 3 + 1
-                return datetime(year, month, 1, tzinfo=ref.tzinfo)
+    def _try_en_season(self, m, text: str, ref: datetime) -> datetime | None:
+        season = m.group(1).lower()
+        year_str = m.group(2)
+        month, day = self._EN_SEASON_MAP.get(season, (None, None))
+        if month is None:
+            return None
+        if year_str:
+            year = int(year_str)
+        elif "last" in text.lower():
+            year = ref.year - 1
+        else:
+            # Current or most recent occurrence
+            candidate = datetime(ref.year, month, day, tzinfo=ref.tzinfo)
+            year = ref.year if candidate <= ref else ref.year - 1
+        return datetime(year, month, day, tzinfo=ref.tzinfo)
+
+    def _try_zh_season(self, m, text: str, ref: datetime) -> datetime | None:
+        season = m.group(1)
+        month, day = self._ZH_SEASON_MAP.get(season, (None, None))
+        if month is None:
+            return None
+        if "去年" in text:
+            year = ref.year - 1
+        else:
+            candidate = datetime(ref.year, month, day, tzinfo=ref.tzinfo)
+            year = ref.year if candidate <= ref else ref.year - 1
+        return datetime(year, month, day, tzinfo=ref.tzinfo)
+
+    def _try_en_quarter(self, m, text: str, ref: datetime) -> datetime | None:
+        quarter = int(m.group(1))
+        year = int(m.group(2))
+        month = (quarter - 1) * 3 + 1  # Q1→1, Q2→4, Q3→7, Q4→10
+        return datetime(year, month, 1, tzinfo=ref.tzinfo)
+
+    def _try_zh_quarter(self, m, text: str, ref: datetime) -> datetime | None:
+        year = int(m.group(1))
+        q_map = {"一": 1, "二": 2, "三": 3, "四": 4, "1": 1, "2": 2, "3": 3, "4": 4}
+        quarter = q_map.get(m.group(2))
+        if quarter:
+            month = (quarter - 1) * 3 + 1
+            return datetime(year, month, 1, tzinfo=ref.tzinfo)
         return None
 
     def _subtract_unit(
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
@@ -10,7 +11,7 @@ import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from sqlalchemy import select, text
+from sqlalchemy import func, literal_column, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from neuromem.models.memory import Memory
@@ -18,6 +19,8 @@ from neuromem.models.memory_history import MemoryHistory
 from neuromem.models.trait_evidence import TraitEvidence
 from neuromem.providers.embedding import EmbeddingProvider
 from neuromem.providers.llm import LLMProvider
+from neuromem.services.flush_buffer import PeriodicFlushBuffer
+from neuromem.services.profile_view import ProfileViewService
 from neuromem.services.sensitive_filter import is_sensitive_trait
 
 logger = logging.getLogger(__name__)
@@ -28,6 +31,107 @@ _QUALITY_FACTORS = {"A": 0.25, "B": 0.20, "C": 0.15, "D": 0.05}
 # Base decay lambda by subtype
 _BASE_LAMBDA = {"behavior": 0.005, "preference": 0.002, "core": 0.001}
 
+# Concurrent LLM calls when resolving several contradicted traits
+_RESOLVE_CONCURRENCY = 4
+
+# Confidence upper bounds (exclusive) per stage; anything above is "core"
+_STAGE_THRESHOLDS = [(0.1, "dissolved"), (0.3, "candidate"), (0.6, "emerging"), (0.85, "established")]
+_DISSOLVE_THRESHOLD = _STAGE_THRESHOLDS[0][0]
+_STAGE_ORDER = [stage for _, stage in _STAGE_THRESHOLDS] + ["core"]
+
+
+# -- Closed-form confidence decay --
+#
+# confidence(t) = trait_confidence * exp(-effective_lambda * days(t - anchor))
+# effective_lambda = base_lambda(subtype) / (1 + 0.1 * reinforcement_count)
+#
+# Writers re-anchor (store the current value at now) whenever confidence,
+# subtype or reinforcement count change, so the formula holds between writes
+# and nothing has to be rewritten just because time passed.
+
+def effective_lambda(subtype: str | None, reinforcement_count: int | None) -> float:
+    base = _BASE_LAMBDA.get(subtype or "behavior", _BASE_LAMBDA["behavior"])
+    return base / (1 + 0.1 * (reinforcement_count or 0))
+
+
+def _confidence_anchor(trait: Memory) -> datetime:
+    anchor = trait.trait_confidence_at or trait.trait_last_reinforced or trait.created_at
+    if anchor is None:
+        return datetime.now(timezone.utc)
+    return anchor if anchor.tzinfo else anchor.replace(tzinfo=timezone.utc)
+
+
+def current_confidence(trait: Memory, now: datetime | None = None) -> float | None:
+    """Decayed confidence of a trait at ``now`` (None for trends).
+
+    Rounded to 4 decimals so a value written moments ago still compares
+    equal to itself at threshold checks.
+    """
+    if trait.trait_confidence is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    days = max(0.0, (now - _confidence_anchor(trait)).total_seconds() / 86400)
+    lam = effective_lambda(trait.trait_subtype, trait.trait_reinforcement_count)
+    return round(max(0.0, min(1.0, trait.trait_confidence * math.exp(-lam * days))), 4)
+
+
+def _lambda_sql(prefix: str) -> str:
+    cases = " ".join(
+        f"WHEN '{subtype}' THEN {lam}" for subtype, lam in _BASE_LAMBDA.items()
+    )
+    return (
+        f"(CASE {prefix}trait_subtype {cases} ELSE {_BASE_LAMBDA['behavior']} END"
+        f" / (1 + 0.1 * COALESCE({prefix}trait_reinforcement_count, 0)))"
+    )
+
+
+def trait_confidence_sql(prefix: str = "") -> str:
+    """SQL expression for the current (decayed) confidence of a memories row.
+
+    ``prefix`` is a table alias with trailing dot, e.g. ``"m."``.
+    """
+    anchor = f"COALESCE({prefix}trait_confidence_at, {prefix}trait_last_reinforced, {prefix}created_at)"
+    return (
+        f"ROUND(LEAST(1.0, {prefix}trait_confidence * EXP(-{_lambda_sql(prefix)}"
+        f" * GREATEST(0, EXTRACT(EPOCH FROM (NOW() - {anchor})) / 86400.0)))::numeric, 4)::float"
+    )
+
+
+def trait_dissolve_at_sql(prefix: str = "") -> str:
+    """SQL expression for when a row's decayed confidence crosses the dissolve threshold."""
+    anchor = f"COALESCE({prefix}trait_confidence_at, {prefix}trait_last_reinforced, {prefix}created_at)"
+    return (
+        f"{anchor} + make_interval(secs => GREATEST(0, LN(GREATEST({prefix}trait_confidence, 1e-9)"
+        f" / {_DISSOLVE_THRESHOLD})) / {_lambda_sql(prefix)} * 86400)"
+    )
+
+
+def trait_stage_sql(prefix: str = "", confidence: str | None = None) -> str:
+    """SQL expression for the current stage of a memories row.
+
+    Decay only ever demotes: the stored stage is kept unless decay carried
+    the confidence across a stage's lower bound since it was stored. Trends
+    and dissolved traits are returned unchanged.
+
+    ``confidence`` names an already computed trait_confidence_sql() value
+    (e.g. an inner query's column); otherwise the decay is inlined into
+    every branch.
+    """
+    confidence = confidence or trait_confidence_sql(prefix)
+    branches = []
+    for i, (bound, stage) in enumerate(_STAGE_THRESHOLDS):
+        higher = ", ".join(f"'{s}'" for s in _STAGE_ORDER[i + 1:])
+        branches.append(
+            f"WHEN {confidence} < {bound} AND {prefix}trait_confidence >= {bound}"
+            f" AND {prefix}trait_stage IN ({higher}) THEN '{stage}'"
+        )
+    return (
+        f"(CASE WHEN {prefix}trait_confidence IS NULL"
+        f" OR {prefix}trait_stage IN ('trend', 'dissolved') THEN {prefix}trait_stage "
+        + " ".join(branches)
+        + f" ELSE {prefix}trait_stage END)"
+    )
+
 CONTRADICTION_PROMPT = """你是一个用户特质矛盾分析系统。请分析以下特质的矛盾情况并做出决策。
 
 ## 待分析特质
@@ -70,6 +174,23 @@ class TraitEngine:
         """Increment trait version for optimistic concurrency control."""
         trait.version = (trait.version or 1) + 1
 
+    @staticmethod
+    def _anchor_confidence(trait: Memory, confidence: float | None, now: datetime) -> None:
+        """Store ``confidence`` as the trait's value at ``now`` and reschedule dissolution.
+
+        Must be called after subtype / reinforcement count are updated, since
+        they determine the decay rate from here on.
+        """
+        trait.trait_confidence = confidence
+        trait.trait_confidence_at = now
+        if confidence is None:
+            trait.trait_dissolve_at = None
+        elif confidence <= _DISSOLVE_THRESHOLD:
+            trait.trait_dissolve_at = now
+        else:
+            lam = effective_lambda(trait.trait_subtype, trait.trait_reinforcement_count)
+            trait.trait_dissolve_at = now + timedelta(days=math.log(confidence / _DISSOLVE_THRESHOLD) / lam)
+
     async def create_trend(
         self,
         user_id: str,
@@ -78,8 +199,14 @@ class TraitEngine:
         window_days: int,
         context: str,
         cycle_id: str,
+        prefetched: tuple[Memory | None, list[float]] | None = None,
     ) -> Memory | None:
-        """Create a trend-stage trait. Returns None if content is sensitive."""
+        """Create a trend-stage trait. Returns None if content is sensitive.
+
+        Args:
+            prefetched: (similar trait, embedding) from find_similar_traits();
+                skips the per-call embedding + dedup lookup.
+        """
         context = context or "unspecified"
 
         if is_sensitive_trait(content):
@@ -89,14 +216,20 @@ class TraitEngine:
         content_hash = hashlib.md5(content.encode()).hexdigest()
 
         # Dedup check (also returns pre-computed embedding vector)
-        existing, cached_vector = await self._find_similar_trait(user_id, content, content_hash)
+        if prefetched is not None:
+            existing, cached_vector = prefetched
+        else:
+            existing, cached_vector = await self._find_similar_trait(user_id, content, content_hash)
         if existing:
             logger.info("Trait dedup hit for trend: reinforcing %s", existing.id)
             valid_ids = await self._validate_evidence_ids(evidence_ids)
             if valid_ids:
                 await self._write_evidence(existing.id, valid_ids, "supporting", "D", cycle_id)
+                now = datetime.now(timezone.utc)
+                confidence = current_confidence(existing, now)
                 existing.trait_reinforcement_count = (existing.trait_reinforcement_count or 0) + len(valid_ids)
-                existing.trait_last_reinforced = datetime.now(timezone.utc)
+                existing.trait_last_reinforced = now
+                self._anchor_confidence(existing, confidence, now)
                 self._bump_version(existing)
                 await self.db.flush()
             return existing
@@ -137,8 +270,14 @@ class TraitEngine:
         context: str,
         cycle_id: str,
         behavior_kind: str = "pattern",
+        prefetched: tuple[Memory | None, list[float]] | None = None,
     ) -> Memory | None:
-        """Create a candidate-stage behavior trait. Returns None if content is sensitive."""
+        """Create a candidate-stage behavior trait. Returns None if content is sensitive.
+
+        Args:
+            prefetched: (similar trait, embedding) from find_similar_traits();
+                skips the per-call embedding + dedup lookup.
+        """
         context = context or "unspecified"
 
         if is_sensitive_trait(content):
@@ -148,14 +287,20 @@ class TraitEngine:
         content_hash = hashlib.md5(content.encode()).hexdigest()
 
         # Dedup check (also returns pre-computed embedding vector)
-        existing, cached_vector = await self._find_similar_trait(user_id, content, content_hash)
+        if prefetched is not None:
+            existing, cached_vector = prefetched
+        else:
+            existing, cached_vector = await self._find_similar_trait(user_id, content, content_hash)
         if existing:
             logger.info("Trait dedup hit for behavior: reinforcing %s", existing.id)
             valid_ids = await self._validate_evidence_ids(evidence_ids)
             if valid_ids:
                 await self._write_evidence(existing.id, valid_ids, "supporting", "C", cycle_id)
+                now = datetime.now(timezone.utc)
+                confidence = current_confidence(existing, now)
                 existing.trait_reinforcement_count = (existing.trait_reinforcement_count or 0) + len(valid_ids)
-                existing.trait_last_reinforced = datetime.now(timezone.utc)
+                existing.trait_last_reinforced = now
+                self._anchor_confidence(existing, confidence, now)
                 self._bump_version(existing)
                 await self.db.flush()
             return existing
@@ -187,7 +332,6 @@ class TraitEngine:
             memory_type="trait",
             trait_stage="candidate",
             trait_subtype="behavior",
-            trait_confidence=clamped_confidence,
             trait_context=context,
             trait_first_observed=first_observed,
             trait_derived_from="reflection",
@@ -195,6 +339,7 @@ class TraitEngine:
             content_hash=content_hash,
             metadata_={"behavior_kind": behavior_kind},
         )
+        self._anchor_confidence(trait, clamped_confidence, now)
         self.db.add(trait)
         await self.db.flush()
 
@@ -224,16 +369,17 @@ class TraitEngine:
             logger.warning("reinforce_trait: trait %s not found", trait_id)
             return
 
+        now = datetime.now(timezone.utc)
         factor = _QUALITY_FACTORS.get(quality_grade, 0.15)
-        old_confidence = trait.trait_confidence or 0.3
+        old_confidence = current_confidence(trait, now) or 0.3
         new_confidence = old_confidence + (1 - old_confidence) * factor
         new_confidence = max(0.0, min(1.0, new_confidence))
 
         valid_ids = await self._validate_evidence_ids(evidence_ids)
 
-        trait.trait_confidence = new_confidence
         trait.trait_reinforcement_count = (trait.trait_reinforcement_count or 0) + len(valid_ids)
-        trait.trait_last_reinforced = datetime.now(timezone.utc)
+        trait.trait_last_reinforced = now
+        self._anchor_confidence(trait, new_confidence, now)
         trait.trait_stage = self._update_stage(new_confidence)
         self._bump_version(trait)
 
@@ -242,6 +388,52 @@ class TraitEngine:
 
         await self.db.flush()
 
+    async def reinforce_traits_bulk(
+        self,
+        hits: dict[str, int],
+        quality_grade: str = "D",
+    ) -> int:
+        """Apply ``n`` evidence-free reinforcements per trait in one UPDATE.
+
+        Equivalent to calling ``reinforce_trait(tid, [], quality_grade, ...)``
+        ``n`` times: confidence moves to ``1 - (1 - c) * (1 - factor) ** n``,
+        the stage follows the new confidence and the version is bumped once.
+
+        Returns:
+            Number of trait rows updated.
+        """
+        if not hits:
+            return 0
+        factor = _QUALITY_FACTORS.get(quality_grade, 0.15)
+        stage_cases = " ".join(f"WHEN s.conf < {bound} THEN '{stage}'" for bound, stage in _STAGE_THRESHOLDS)
+        ids = list(hits)
+        result = await self.db.execute(
+            text(
+                "UPDATE memories m SET "
+                "  trait_confidence = s.conf, "
+                "  trait_confidence_at = now(), "
+                "  trait_last_reinforced = now(), "
+                f"  trait_stage = CASE {stage_cases} ELSE 'core' END, "
+                f"  trait_dissolve_at = CASE WHEN s.conf <= {_DISSOLVE_THRESHOLD} THEN now() "
+                f"    ELSE now() + make_interval(secs => LN(s.conf / {_DISSOLVE_THRESHOLD})"
+                f"      / {_lambda_sql('m.')} * 86400) END, "
+                "  version = COALESCE(m.version, 1) + 1 "
+                "FROM ("
+                "  SELECT t.id, LEAST(1.0, GREATEST(0.0, "
+                f"    1 - (1 - COALESCE(NULLIF({trait_confidence_sql('t.')}, 0), 0.3))"
+                "      * POWER(:keep, h.n))) AS conf "
+                "  FROM unnest(CAST(:ids AS uuid[]), CAST(:counts AS int[])) AS h(id, n) "
+                "  JOIN memories t ON t.id = h.id AND t.memory_type = 'trait'"
+                ") s "
+                "WHERE m.id = s.id "
+                "RETURNING m.user_id"
+            ),
+            {"ids": ids, "counts": [hits[i] for i in ids], "keep": 1 - factor},
+        )
+        user_ids = [row.user_id for row in result.fetchall()]
+        await ProfileViewService(self.db).invalidate(user_ids, facts=False)
+        return len(user_ids)
+
     async def apply_contradiction(
         self,
         trait_id: str,
@@ -263,7 +455,8 @@ class TraitEngine:
 
         valid_ids = await self._validate_evidence_ids(evidence_ids)
 
-        old_confidence = trait.trait_confidence or 0.3
+        now = datetime.now(timezone.utc)
+        old_confidence = current_confidence(trait, now) or 0.3
         # Single vs multiple contradiction
         if len(valid_ids) > 1:
             new_confidence = old_confidence * (1 - 0.4)
@@ -272,7 +465,7 @@ class TraitEngine:
         new_confidence = max(0.0, min(1.0, new_confidence))
 
         trait.trait_contradiction_count = (trait.trait_contradiction_count or 0) + len(valid_ids)
-        trait.trait_confidence = new_confidence
+        self._anchor_confidence(trait, new_confidence, now)
         self._bump_version(trait)
 
         if valid_ids:
@@ -300,8 +493,13 @@ class TraitEngine:
         new_subtype: str,
         reasoning: str,
         cycle_id: str,
+        embedding_vector: list[float] | None = None,
     ) -> Memory | None:
-        """Try to upgrade traits to a higher subtype."""
+        """Try to upgrade traits to a higher subtype.
+
+        Args:
+            embedding_vector: Precomputed embedding of ``new_content``.
+        """
         # Load source traits (batch query)
         if not from_trait_ids:
             return None
@@ -318,22 +516,24 @@ class TraitEngine:
             return None
 
         # Validate confidence thresholds
+        now = datetime.now(timezone.utc)
+        confidences = {t.id: current_confidence(t, now) or 0 for t in source_traits}
         if new_subtype == "preference":
             # behavior -> preference: each source behavior confidence >= 0.5
             for t in source_traits:
-                if (t.trait_confidence or 0) < 0.5:
+                if confidences[t.id] < 0.5:
                     logger.info(
                         "try_upgrade: behavior %s confidence %.2f < 0.5, skipping",
-                        t.id, t.trait_confidence or 0,
+                        t.id, confidences[t.id],
                     )
                     return None
         elif new_subtype == "core":
             # preference -> core: each source preference confidence >= 0.6
             for t in source_traits:
-                if (t.trait_confidence or 0) < 0.6:
+                if confidences[t.id] < 0.6:
                     logger.info(
                         "try_upgrade: preference %s confidence %.2f < 0.6, skipping",
-                        t.id, t.trait_confidence or 0,
+                        t.id, confidences[t.id],
                     )
                     return None
 
@@ -344,10 +544,11 @@ class TraitEngine:
                 return None
 
         # Create new trait
-        max_confidence = max((t.trait_confidence or 0) for t in source_traits)
+        max_confidence = max(confidences.values())
         new_confidence = max(0.0, min(1.0, max_confidence + 0.1))
 
-        embedding_vector = await self._embedding.embed(new_content)
+        if embedding_vector is None:
+            embedding_vector = await self._embedding.embed(new_content)
         content_hash = hashlib.md5(new_content.encode()).hexdigest()
 
         new_trait = Memory(
@@ -357,12 +558,12 @@ class TraitEngine:
             memory_type="trait",
             trait_stage="emerging",
             trait_subtype=new_subtype,
-            trait_confidence=new_confidence,
             trait_context=source_traits[0].trait_context,
             trait_derived_from="reflection",
             importance=0.7,
             content_hash=content_hash,
         )
+        self._anchor_confidence(new_trait, new_confidence, now)
         self.db.add(new_trait)
         await self.db.flush()
 
@@ -393,112 +594,121 @@ class TraitEngine:
         )
         return new_trait
 
-    async def promote_trends(self, user_id: str) -> int:
-        """Promote eligible trends to candidate stage."""
-        now = datetime.now(timezone.utc)
-        result = await self.db.execute(
-            select(Memory).where(
-                Memory.user_id == user_id,
-                Memory.memory_type == "trait",
+    def _lifecycle_filters(self, user_id: str | None, *conditions) -> list:
+        """WHERE clause for set-based maintenance (user_id=None: all users)."""
+        filters = [Memory.memory_type == "trait", *conditions]
+        if user_id is not None:
+            filters.append(Memory.user_id == user_id)
+        return filters
+
+    async def _bulk_update(self, user_id: str | None, filters: list, values: dict) -> int:
+        """Run one UPDATE on memories and return the affected row count.
+
+        Per-user updates keep ORM objects already loaded in this session in
+        sync; the all-users pass skips that bookkeeping.
+        """
+        stmt = update(Memory).where(*filters).values(**values)
+        sync = "fetch" if user_id is not None else False
+        result = await self.db.execute(stmt.execution_options(synchronize_session=sync))
+        return result.rowcount or 0
+
+    async def promote_trends(self, user_id: str | None) -> int:
+        """Promote eligible trends to candidate stage (user_id=None: all users)."""
+        count = await self._bulk_update(
+            user_id,
+            self._lifecycle_filters(
+                user_id,
                 Memory.trait_stage == "trend",
                 Memory.trait_reinforcement_count >= 2,
-                Memory.trait_window_end >= now,
+                Memory.trait_window_end >= func.now(),
             ),
+            {
+                "trait_stage": "candidate",
+                "trait_confidence": 0.3,
+                "trait_confidence_at": func.now(),
+                "trait_dissolve_at": literal_column(
+                    f"NOW() + make_interval(secs => LN(0.3 / {_DISSOLVE_THRESHOLD}) / {_lambda_sql('')} * 86400)"
+                ),
+                "trait_window_start": None,
+                "trait_window_end": None,
+                "version": func.coalesce(Memory.version, 1) + 1,
+            },
         )
-        traits = result.scalars().all()
-
-        count = 0
-        for trait in traits:
-            trait.trait_stage = "candidate"
-            trait.trait_confidence = 0.3
-            trait.trait_window_start = None
-            trait.trait_window_end = None
-            self._bump_version(trait)
-            count += 1
-
         if count:
-            await self.db.flush()
-            logger.info("promote_trends[%s]: promoted %d trends to candidate", user_id, count)
-
+            logger.info("promote_trends[%s]: promoted %d trends to candidate", user_id or "*", count)
         return count
 
-    async def expire_trends(self, user_id: str) -> int:
-        """Expire trends that exceeded their observation window."""
-        now = datetime.now(timezone.utc)
-        result = await self.db.execute(
-            select(Memory).where(
-                Memory.user_id == user_id,
-                Memory.memory_type == "trait",
+    async def expire_trends(self, user_id: str | None) -> int:
+        """Expire trends that exceeded their observation window (user_id=None: all users)."""
+        count = await self._bulk_update(
+            user_id,
+            self._lifecycle_filters(
+                user_id,
                 Memory.trait_stage == "trend",
-                Memory.trait_window_end < now,
+                Memory.trait_window_end < func.now(),
                 Memory.trait_reinforcement_count < 2,
             ),
+            {
+                "trait_stage": "dissolved",
+                "expired_at": func.now(),
+                "version": func.coalesce(Memory.version, 1) + 1,
+            },
         )
-        traits = result.scalars().all()
-
-        count = 0
-        for trait in traits:
-            trait.trait_stage = "dissolved"
-            trait.expired_at = now
-            self._bump_version(trait)
-            count += 1
-
         if count:
-            await self.db.flush()
-            logger.info("expire_trends[%s]: expired %d trends", user_id, count)
-
+            logger.info("expire_trends[%s]: expired %d trends", user_id or "*", count)
         return count
 
-    async def apply_decay(self, user_id: str) -> int:
-        """Apply time-based decay to all active non-trend traits."""
-        result = await self.db.execute(
-            select(Memory).where(
-                Memory.user_id == user_id,
-                Memory.memory_type == "trait",
-                Memory.trait_stage.notin_(["trend", "dissolved"]),
-            ),
-        )
-        traits = result.scalars().all()
-
-        now = datetime.now(timezone.utc)
-        dissolved_count = 0
+    async def apply_decay(self, user_id: str | None) -> int:
+        """Dissolve traits whose decayed confidence fell below 0.1 (user_id=None: all users).
 
-        for trait in traits:
-            last_reinforced = trait.trait_last_reinforced or trait.created_at
-            if last_reinforced.tzinfo is None:
-                last_reinforced = last_reinforced.replace(tzinfo=timezone.utc)
+        Confidence is not rewritten here: readers evaluate the closed form
+        (see trait_confidence_sql), and each trait carries the precomputed
+        time it crosses the threshold, so this is an indexed range predicate
+        touching only the traits that actually dissolve.
 
-            days_since = (now - last_reinforced).total_seconds() / 86400
-            if days_since <= 0:
-                continue
-
-            subtype = trait.trait_subtype or "behavior"
-            base_lambda = _BASE_LAMBDA.get(subtype, 0.005)
-            reinforcement_count = trait.trait_reinforcement_count or 0
-            effective_lambda = base_lambda / (1 + 0.1 * reinforcement_count)
-
-            old_confidence = trait.trait_confidence or 0.3
-            new_confidence = old_confidence * math.exp(-effective_lambda * days_since)
-            new_confidence = max(0.0, min(1.0, new_confidence))
+        Returns:
+            Number of traits dissolved.
+        """
+        live = self._lifecycle_filters(
+            user_id,
+            Memory.trait_stage.notin_(["trend", "dissolved"]),
+            Memory.trait_confidence.isnot(None),
+        )
+        # Rows written without going through the engine (direct inserts,
+        # migrated data) get their dissolve time computed once
+        await self._bulk_update(
+            user_id,
+            [*live, Memory.trait_dissolve_at.is_(None)],
+            {"trait_dissolve_at": literal_column(trait_dissolve_at_sql())},
+        )
+        dissolved_count = await self._bulk_update(
+            user_id,
+            [*live, Memory.trait_dissolve_at <= func.now()],
+            {
+                "trait_stage": "dissolved",
+                "expired_at": func.now(),
+                "version": func.coalesce(Memory.version, 1) + 1,
+            },
+        )
 
-            trait.trait_confidence = new_confidence
+        if dissolved_count:
+            logger.info("apply_decay[%s]: dissolved %d traits", user_id or "*", dissolved_count)
 
-            if new_confidence < 0.1:
-                trait.trait_stage = "dissolved"
-                trait.expired_at = now
-                dissolved_count += 1
-            else:
-                trait.trait_stage = self._update_stage(new_confidence)
+        return dissolved_count
 
-            self._bump_version(trait)
+    async def maintain(self, user_id: str | None = None) -> dict:
+        """Run expiry, promotion and decay as set-based UPDATEs.
 
-        if traits:
-            await self.db.flush()
+        With user_id=None every user's traits are maintained in one pass.
 
-        if dissolved_count:
-            logger.info("apply_decay[%s]: dissolved %d traits", user_id, dissolved_count)
-
-        return dissolved_count
+        Returns:
+            {"expired": N, "promoted": N, "dissolved": N}
+        """
+        return {
+            "expired": await self.expire_trends(user_id),
+            "promoted": await self.promote_trends(user_id),
+            "dissolved": await self.apply_decay(user_id),
+        }
 
     async def resolve_contradiction(
         self,
@@ -507,12 +717,63 @@ class TraitEngine:
         cycle_id: str,
     ) -> dict:
         """Run special reflection for a contradicted trait."""
+        return (await self.resolve_contradictions([trait_id], llm, cycle_id))[0]
+
+    async def resolve_contradictions(
+        self,
+        trait_ids: list[str],
+        llm: LLMProvider,
+        cycle_id: str,
+        concurrency: int = _RESOLVE_CONCURRENCY,
+    ) -> list[dict]:
+        """Run special reflection for several contradicted traits.
+
+        Prompts are built and decisions applied sequentially on this
+        session; the LLM calls in between run concurrently, at most
+        ``concurrency`` at a time.
+
+        Returns:
+            One {"action", "trait_id"} dict per input id, in order.
+        """
+        prepared = [await self._build_contradiction_prompt(tid) for tid in trait_ids]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _decide(prompt: str | None) -> dict | None:
+            if prompt is None:
+                return None
+            async with semaphore:
+                try:
+                    result_text = await llm.chat(
+                        messages=[
+                            {"role": "system", "content": "你是一个用户特质矛盾分析系统。只返回 JSON。"},
+                            {"role": "user", "content": prompt},
+                        ],
+                        temperature=0.1,
+                        max_tokens=1024,
+                    )
+                    return self._parse_json(result_text)
+                except Exception as e:
+                    logger.error("resolve_contradiction LLM failed: %s", e, exc_info=True)
+                    return None
+
+        decisions = await asyncio.gather(*(_decide(prompt) for _, prompt in prepared))
+
+        results = []
+        for trait_id, (trait, _), parsed in zip(trait_ids, prepared, decisions):
+            if trait is None or parsed is None:
+                results.append({"action": "dissolve", "trait_id": str(trait_id)})
+            else:
+                results.append(await self._apply_resolution(trait, parsed))
+        return results
+
+    async def _build_contradiction_prompt(self, trait_id: str) -> tuple[Memory | None, str | None]:
+        """Load a trait with its evidence and render the contradiction prompt."""
         result = await self.db.execute(
             select(Memory).where(Memory.id == trait_id, Memory.memory_type == "trait"),
         )
         trait = result.scalar_one_or_none()
         if not trait:
-            return {"action": "dissolve", "trait_id": str(trait_id)}
+            return None, None
 
         # Load all evidence
         ev_result = await self.db.execute(
@@ -530,28 +791,17 @@ class TraitEngine:
         prompt = CONTRADICTION_PROMPT.format(
             content=trait.content,
             subtype=trait.trait_subtype or "behavior",
-            confidence=trait.trait_confidence or 0.0,
+            confidence=current_confidence(trait) or 0.0,
             context=trait.trait_context or "unspecified",
             supporting_count=len(supporting),
             supporting_list=supporting_list,
             contradicting_count=len(contradicting),
             contradicting_list=contradicting_list,
         )
+        return trait, prompt
 
-        try:
-            result_text = await llm.chat(
-                messages=[
-                    {"role": "system", "content": "你是一个用户特质矛盾分析系统。只返回 JSON。"},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-                max_tokens=1024,
-            )
-            parsed = self._parse_json(result_text)
-        except Exception as e:
-            logger.error("resolve_contradiction LLM failed: %s", e, exc_info=True)
-            return {"action": "dissolve", "trait_id": str(trait_id)}
-
+    async def _apply_resolution(self, trait: Memory, parsed: dict) -> dict:
+        """Apply an LLM modify/dissolve decision to a contradicted trait."""
         action = parsed.get("action", "dissolve")
         now = datetime.now(timezone.utc)
 
@@ -559,8 +809,9 @@ class TraitEngine:
             old_content = trait.content
             new_content = parsed.get("new_content", trait.content)
             trait.content = new_content
-            trait.trait_confidence = max(0.0, min(1.0, (trait.trait_confidence or 0.3) * 0.9))
-            trait.trait_stage = self._update_stage(trait.trait_confidence)
+            confidence = max(0.0, min(1.0, (current_confidence(trait, now) or 0.3) * 0.9))
+            self._anchor_confidence(trait, confidence, now)
+            trait.trait_stage = self._update_stage(confidence)
 
             # Record history
             history = MemoryHistory(
@@ -590,18 +841,13 @@ class TraitEngine:
         self._bump_version(trait)
         await self.db.flush()
 
-        return {"action": action, "trait_id": str(trait_id)}
+        return {"action": action, "trait_id": str(trait.id)}
 
     def _update_stage(self, confidence: float) -> str:
         """Determine trait stage based on confidence value."""
-        if confidence < 0.1:
-            return "dissolved"
-        if confidence < 0.3:
-            return "candidate"
-        if confidence < 0.6:
-            return "emerging"
-        if confidence < 0.85:
-            return "established"
+        for bound, stage in _STAGE_THRESHOLDS:
+            if confidence < bound:
+                return stage
         return "core"
 
     async def _find_similar_trait(
@@ -651,6 +897,50 @@ class TraitEngine:
 
         return None, embedding_vector
 
+    async def find_similar_traits(
+        self,
+        user_id: str,
+        contents: list[str],
+        vectors: list[list[float]],
+    ) -> list[Memory | None]:
+        """Batch form of _find_similar_trait: one query for many candidates.
+
+        For each content returns the active trait with the same content hash,
+        else the nearest one with cosine similarity > 0.95, else None.
+        """
+        if not contents:
+            return []
+        hashes = [hashlib.md5(c.encode()).hexdigest() for c in contents]
+        vector_strs = [f"[{','.join(str(float(v)) for v in vec)}]" for vec in vectors]
+        rows = (await self.db.execute(
+            text(
+                "SELECT q.idx, m.id FROM unnest("
+                "  CAST(:idxs AS int[]), CAST(:hashes AS text[]), CAST(:vecs AS text[])"
+                ") AS q(idx, hash, vec) "
+                "CROSS JOIN LATERAL ("
+                "  SELECT id FROM memories "
+                "  WHERE user_id = :uid AND memory_type = 'trait' "
+                "  AND trait_stage != 'dissolved' "
+                "  AND (content_hash = q.hash"
+                "       OR 1 - (embedding <=> CAST(q.vec AS vector)) > 0.95) "
+                "  ORDER BY content_hash = q.hash DESC, embedding <=> CAST(q.vec AS vector) "
+                "  LIMIT 1"
+                ") m"
+            ),
+            {"uid": user_id, "idxs": list(range(len(contents))), "hashes": hashes, "vecs": vector_strs},
+        )).fetchall()
+        if not rows:
+            return [None] * len(contents)
+
+        traits = (await self.db.execute(
+            select(Memory).where(Memory.id.in_({r.id for r in rows})),
+        )).scalars().all()
+        by_id = {t.id: t for t in traits}
+        matches: list[Memory | None] = [None] * len(contents)
+        for r in rows:
+            matches[r.idx] = by_id.get(r.id)
+        return matches
+
     async def _validate_evidence_ids(self, evidence_ids: list[str]) -> list:
         """Validate that evidence IDs exist in the memories table."""
         if not evidence_ids:
@@ -728,3 +1018,29 @@ class TraitEngine:
         except (json.JSONDecodeError, Exception) as e:
             logger.error("Failed to parse JSON: %s", e)
             return {}
+
+
+class ReinforcementBuffer(PeriodicFlushBuffer):
+    """Coalesce recall-as-reinforcement hits into periodic bulk updates.
+
+    ``add`` only counts trait ids in memory; a background flush applies the
+    accumulated counts with one ``reinforce_traits_bulk`` call per
+    ``flush_interval``, or sooner once ``max_pending`` distinct traits are
+    waiting. Reinforcement is best effort: a failed flush is logged and
+    its hits are dropped.
+    """
+
+    _label = "recall-as-reinforcement"
+
+    def __init__(self, db, flush_interval: float = 5.0, max_pending: int = 1000):
+        super().__init__(db, flush_interval, max_pending)
+        self._pending: dict[str, int] = {}
+
+    def add(self, trait_ids: list[str]) -> None:
+        for tid in trait_ids:
+            self._pending[str(tid)] = self._pending.get(str(tid), 0) + 1
+        self._schedule()
+
+    async def _write(self, hits: dict[str, int]) -> int:
+        async with self._db.session() as session:
+            return await TraitEngine(session, None).reinforce_traits_bulk(hits)
@@ -0,0 +1,64 @@
+"""Tenant sharding - route each user to one of several NeuroMemory instances."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections.abc import Mapping, Sequence
+
+from neuromem._core import NeuroMemory
+
+
+class ShardRouter:
+    """Map users to NeuroMemory instances, typically one per database.
+
+    All of a user's data (memories, conversations, graph, traits) lives in
+    one shard, so per-user calls go to that shard unchanged::
+
+        router = ShardRouter([NeuroMemory(database_url=url, ...) for url in urls])
+        await router.init()
+        await router.for_user(user_id).recall(user_id, query)
+
+    Placement uses rendezvous hashing of user_id, so adding a shard moves
+    only about 1/N of the users. ``pins`` fixes individual users to a shard
+    index, e.g. while a tenant's rows are being moved.
+    """
+
+    def __init__(self, shards: Sequence[NeuroMemory], pins: Mapping[str, int] | None = None):
+        if not shards:
+            raise ValueError("ShardRouter needs at least one shard")
+        self.shards = list(shards)
+        self.pins = dict(pins or {})
+        for user_id, index in self.pins.items():
+            if not 0 <= index < len(self.shards):
+                raise ValueError(f"pin for {user_id!r} is out of range: {index}")
+
+    def shard_index(self, user_id: str) -> int:
+        """Index of the shard holding ``user_id``."""
+        pinned = self.pins.get(user_id)
+        if pinned is not None:
+            return pinned
+        return max(range(len(self.shards)), key=lambda i: _weight(i, user_id))
+
+    def for_user(self, user_id: str) -> NeuroMemory:
+        """The NeuroMemory instance holding ``user_id``."""
+        return self.shards[self.shard_index(user_id)]
+
+    async def init(self, **kwargs) -> None:
+        """Initialize every shard (kwargs are passed to NeuroMemory.init)."""
+        await asyncio.gather(*(shard.init(**kwargs) for shard in self.shards))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+
+    async def __aenter__(self) -> "ShardRouter":
+        await self.init()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+
+def _weight(index: int, user_id: str) -> int:
+    digest = hashlib.blake2b(f"{index}:{user_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
@@ -0,0 +1,98 @@
+"""Benchmark recall() latency and SQL round trips per include= profile.
+
+Runs the same queries against an existing user with the full recall, a few
+partial include= sets and recall_fast(), and reports per-call latency and
+the number of SQL statements issued. Query embeddings are warmed up first
+(recall caches them), so the numbers cover the database work only.
+
+Usage:
+    uv run python scripts/bench_recall.py --database-url DATABASE_URL --user-id USER_ID --embedding-api-key API_KEY [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from sqlalchemy import event
+
+from neuromem import NeuroMemory
+from neuromem._core import RECALL_PARTS
+from neuromem.providers.callback_llm import CallbackLLM
+from neuromem.providers.siliconflow import SiliconFlowEmbedding
+
+logging.basicConfig(level=logging.WARNING)
+
+QUERIES = [
+    "我在哪里工作？",
+    "最近心情怎么样",
+    "What are my hobbies?",
+    "上个月发生了什么",
+    "Tell me about my family",
+]
+
+PROFILES: dict[str, set[str] | None] = {
+    "full": None,
+    "no profile": set(RECALL_PARTS) - {"profile"},
+    "no profile/graph": set(RECALL_PARTS) - {"profile", "graph"},
+    "search only": set(),
+}
+
+
+async def _measure(nm: NeuroMemory, user_id: str, include, repeat: int, counter: list[int]) -> tuple[float, float, float]:
+    latencies = []
+    counter[0] = 0
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            if include == "fast":
+                await nm.recall_fast(user_id, query)
+            else:
+                await nm.recall(user_id, query, include=include)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return statistics.median(latencies), p95, counter[0] / len(latencies)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="PostgreSQL async connection URL")
+    parser.add_argument("--user-id", required=True, help="User whose memories are recalled")
+    parser.add_argument("--embedding-api-key", required=True, help="SiliconFlow API key")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--graph", action="store_true", help="Enable graph memory")
+    args = parser.parse_args()
+
+    nm = NeuroMemory(
+        database_url=args.database_url,
+        embedding=SiliconFlowEmbedding(api_key=args.embedding_api_key),
+        llm=CallbackLLM(),  # recall never calls the LLM
+        auto_extract=False,
+        graph_enabled=args.graph,
+    )
+    await nm.init()
+    counter = [0]
+
+    @event.listens_for(nm._db.engine.sync_engine, "before_cursor_execute")
+    def _count(*_args):
+        counter[0] += 1
+
+    try:
+        for query in QUERIES:
+            await nm.recall(args.user_id, query)
+        await nm.flush_reinforcements()
+
+        print(f"{'profile':<18} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}")
+        for name, include in [*PROFILES.items(), ("recall_fast", "fast")]:
+            p50, p95, statements = await _measure(nm, args.user_id, include, args.repeat, counter)
+            print(f"{name:<18} {p50:>8.2f} {p95:>8.2f} {statements:>8.1f}")
+    finally:
+        await nm.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""Microbenchmark: TemporalExtractor with and without the literal prefilter.
+
+Usage:
+    uv run python scripts/bench_temporal.py [--repeat 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from neuromem.services.temporal import TemporalExtractor
+
+SAMPLES = [
+    "我上周和朋友去爬山了，感觉很累但很开心",
+    "Yesterday I finally finished the quarterly report for my manager",
+    "We moved to Shanghai in 2021 and I started a new job there",
+    "今天天气不错",
+    "I have been thinking about switching careers for a while now, maybe into design",
+    "The meeting was on 2023-05-07 at the office",
+    "我最喜欢的食物是火锅，尤其是冬天的时候",
+    "What did I do in June?",
+    "上个月发生了什么",
+    "Tell me about my family and my hobbies",
+]
+
+
+def _per_call_us(fn, texts: list[str], ref: datetime, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text, ref)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    extractor = TemporalExtractor()
+    ref = datetime.now(timezone.utc)
+    cases = {
+        "extract": extractor._extract_rules(),
+        "extract_time_range": extractor._range_rules(),
+    }
+    print(f"{'method':<20} {'all rules µs':>13} {'prefilter µs':>13} {'speedup':>8}")
+    for name, ruleset in cases.items():
+        legacy = _per_call_us(
+            lambda text, ref: extractor._evaluate(ruleset.rules, text, ref), SAMPLES, ref, args.repeat,
+        )
+        current = _per_call_us(
+            lambda text, ref: extractor._evaluate(ruleset.candidates(text), text, ref), SAMPLES, ref, args.repeat,
+        )
+        print(f"{name:<20} {legacy:>13.2f} {current:>13.2f} {legacy / current:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""数据迁移脚本：加密信封重新封装
+
+把旧格式（每条记录一个 RSA 包装的 DEK，JSON 信封）的 memories / conversations
+内容改写为 nmenc1 格式（每用户 DEK 包装一次，逐行只做 AES-GCM），
+并为缺少 blind_tokens 的加密记忆补建关键词盲索引。
+已是新格式或明文的记录不变；可重复执行。
+
+用法:
+    uv run python scripts/migrate_encryption_envelopes.py --database-url "postgresql+asyncpg://..." \
+        --public-key public.pem --private-key private.pem --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import getpass
+import logging
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from neuromem.db import ENCRYPTED_PREFIX
+from neuromem.services.encryption import EncryptionService
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("memories", "conversations")
+_LEGACY_FILTER = """content LIKE '{"encrypted_dek"%'"""
+# memories also get their blind keyword index filled in
+_MEMORY_FILTER = f"""({_LEGACY_FILTER} OR (blind_tokens IS NULL AND content LIKE 'nmenc1:%'))"""
+
+
+async def _rewrap_table(
+    session: AsyncSession,
+    enc: EncryptionService,
+    table: str,
+    batch_size: int = 500,
+    commit: bool = False,
+) -> dict:
+    """Rewrap a table's legacy envelopes and fill missing blind_tokens, batch by batch (keyset on id).
+
+    With ``commit`` each batch is committed as it completes, so an interrupted
+    run keeps its progress and a rerun resumes with the remaining rows.
+    """
+    stats = {"rewrapped": 0, "failed": 0}
+    index = table == "memories" and enc.blind_index_enabled
+    last_id = None
+    while True:
+        where = (_MEMORY_FILTER if index else _LEGACY_FILTER) + (" AND id > :last" if last_id is not None else "")
+        rows = (await session.execute(
+            sql_text(f"SELECT id, user_id, content FROM {table} WHERE {where} ORDER BY id LIMIT :lim"),
+            {"last": last_id, "lim": batch_size},
+        )).fetchall()
+        if not rows:
+            return stats
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            try:
+                plaintext = enc.decrypt_value(row.content)
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning("%s %s: 无法解密，跳过: %s", table, row.id, e)
+                continue
+            content = row.content
+            if not content.startswith(ENCRYPTED_PREFIX):
+                content = enc.encrypt_value(plaintext, row.user_id)
+            update = {"id": row.id, "content": content}
+            if index:
+                update["tokens"] = enc.blind_tokens(plaintext, row.user_id)
+            updates.append(update)
+        if updates:
+            assignments = "content = :content" + (", blind_tokens = :tokens" if index else "")
+            await session.execute(sql_text(f"UPDATE {table} SET {assignments} WHERE id = :id"), updates)
+            stats["rewrapped"] += len(updates)
+        if commit:
+            await session.commit()
+        logger.info("%s: 已处理 %d 条", table, stats["rewrapped"] + stats["failed"])
+
+
+async def migrate(database_url: str, enc: EncryptionService, dry_run: bool = False, batch_size: int = 500) -> dict:
+    """执行迁移。每批提交一次，中断后重跑即可续做；dry_run 时整表回滚。"""
+    engine = create_async_engine(database_url)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    result = {}
+    try:
+        for table in TABLES:
+            async with async_session() as session:
+                result[table] = await _rewrap_table(session, enc, table, batch_size, commit=not dry_run)
+                if dry_run:
+                    await session.rollback()
+    finally:
+        await engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="加密信封重新封装")
+    parser.add_argument("--database-url", required=True, help="PostgreSQL 连接字符串")
+    parser.add_argument("--public-key", required=True, help="RSA 公钥 PEM 路径")
+    parser.add_argument("--private-key", required=True, help="RSA 私钥 PEM 路径")
+    parser.add_argument("--passphrase", action="store_true", help="私钥有口令（交互输入）")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="预览变更，不提交")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    passphrase = getpass.getpass("私钥口令: ").encode() if args.passphrase else None
+    enc = EncryptionService(args.public_key, args.private_key, passphrase=passphrase)
+    result = asyncio.run(migrate(args.database_url, enc, dry_run=args.dry_run, batch_size=args.batch_size))
+    print(f"\n迁移结果: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -65,7 +65,11 @@ async def db_session(db_engine) -> AsyncGenerator[AsyncSession]:
     import neuromem.models.trait_evidence  # noqa: F401
     import neuromem.models.memory_history  # noqa: F401
     import neuromem.models.reflection_cycle  # noqa: F401
+    import neuromem.models.reflection_state  # noqa: F401
+    import neuromem.models.reflection_queue  # noqa: F401
     import neuromem.models.memory_source  # noqa: F401
+    import neuromem.models.context_prototype  # noqa: F401
+    import neuromem.models.profile_view  # noqa: F401
 
     async with db_engine.begin() as conn:
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
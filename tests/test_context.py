@@ -2,11 +2,22 @@
 
 from __future__ import annotations
 
+import hashlib
+import uuid
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
+from sqlalchemy import text
 
-from neuromem.services.context import ContextService, cosine_similarity
+from neuromem.providers.embedding import EmbeddingProvider
+from neuromem.services.context import (
+    CONTEXT_KEYWORDS,
+    ContextCentroids,
+    ContextService,
+    _UserCentroids,
+    cosine_similarity,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -34,13 +45,12 @@ class TestCosineFunction:
 @pytest.fixture
 def ctx_svc():
     svc = ContextService(MagicMock())
-    svc._prototypes = {
+    svc.set_prototypes({
         "work": [1.0, 0.0, 0.0, 0.0],
         "personal": [0.0, 1.0, 0.0, 0.0],
         "social": [0.0, 0.0, 1.0, 0.0],
         "learning": [0.0, 0.0, 0.0, 1.0],
-    }
-    svc._prototype_norms = {ctx: 1.0 for ctx in svc._prototypes}
+    })
     return svc
 
 
@@ -91,13 +101,79 @@ class TestKeywordFallback:
 @pytest.mark.requires_db
 async def test_ensure_prototypes_lazy_load(nm):
     svc = ContextService(nm._embedding)
-    assert svc._prototypes is None
+    assert svc._matrix is None
     await svc.ensure_prototypes()
-    assert svc._prototypes is not None
-    assert len(svc._prototypes) == 4
-    first_ref = svc._prototypes
+    assert svc._matrix is not None
+    assert svc._matrix.shape == (4, nm._embedding.dims)
+    first_ref = svc._matrix
     await svc.ensure_prototypes()
-    assert svc._prototypes is first_ref
+    assert svc._matrix is first_ref
+
+
+class _NamedEmbedding(EmbeddingProvider):
+    """Deterministic embedding with a model name, counting batch calls."""
+
+    def __init__(self, model: str, dims: int = 16):
+        self.model = model
+        self._dims = dims
+        self.batch_calls = 0
+
+    @property
+    def dims(self) -> int:
+        return self._dims
+
+    async def embed(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255.0 for b in digest[: self._dims]]
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batch_calls += 1
+        return [await self.embed(t) for t in texts]
+
+
+@pytest.mark.requires_db
+async def test_prototypes_persisted_per_model(nm):
+    model = f"proto-test-{uuid.uuid4().hex[:8]}"
+    first = _NamedEmbedding(model)
+    computed = ContextService(first, nm._db)
+    await computed.ensure_prototypes()
+    assert first.batch_calls == 1
+
+    # A new worker with the same model loads the stored matrix without embedding
+    second = _NamedEmbedding(model)
+    loaded = ContextService(second, nm._db)
+    await loaded.ensure_prototypes()
+    assert second.batch_calls == 0
+    assert loaded._labels == computed._labels
+    np.testing.assert_array_equal(loaded._matrix, computed._matrix)
+
+    query = await first.embed("帮我写一个 Python 函数")
+    assert loaded.infer_context(query) == computed.infer_context(query)
+
+    # Different dims for the same model is a separate entry
+    other_dims = _NamedEmbedding(model, dims=8)
+    await ContextService(other_dims, nm._db).ensure_prototypes()
+    assert other_dims.batch_calls == 1
+
+
+@pytest.mark.requires_db
+async def test_init_warmup_loads_prototypes(nm):
+    nm._context_service.clear_prototypes()
+    await nm.init(warmup=True)
+    assert nm._context_service._matrix is not None
+
+
+def test_matrix_inference_matches_pure_python(ctx_svc):
+    rng = np.random.default_rng(0)
+    prototypes = {ctx: rng.normal(size=32).tolist() for ctx in ("work", "personal", "social", "learning")}
+    ctx_svc.set_prototypes(prototypes)
+    for _ in range(20):
+        query = rng.normal(size=32).tolist()
+        expected = max(prototypes, key=lambda c: cosine_similarity(query, prototypes[c]))
+        ctx, conf = ctx_svc.infer_context(query)
+        assert ctx in (expected, "general")
+        if ctx == expected:
+            assert conf > 0
 
 
 # ---------------------------------------------------------------------------
@@ -131,3 +207,83 @@ async def test_recall_context_match_in_scores(nm):
     result = await nm.recall(user_id=user_id, query="help me write Python code")
     for r in result.get("vector_results", []):
         assert "context_match" in r
+
+
+# ---------------------------------------------------------------------------
+# Per-user context centroids
+# ---------------------------------------------------------------------------
+
+
+class TestUserCentroids:
+    def test_centroid_blend_shifts_inference(self, ctx_svc):
+        query = [0.5, 0.0, 0.0, 0.86]
+        assert ctx_svc.infer_context(query)[0] == "learning"
+
+        # This user's work memories look like the query
+        ctx_svc.centroids._entries["u1"] = _UserCentroids(
+            means={"work": np.array([0.0, 0.0, 0.0, 1.0])}, counts={"work": 90},
+        )
+        assert ctx_svc.infer_context(query, user_id="u1")[0] == "work"
+        # Other users still get the global prototypes
+        assert ctx_svc.infer_context(query, user_id="u2")[0] == "learning"
+
+    def test_small_centroids_are_ignored(self, ctx_svc):
+        ctx_svc.centroids._entries["u1"] = _UserCentroids(
+            means={"work": np.array([0.0, 0.0, 0.0, 1.0])}, counts={"work": 2},
+        )
+        assert ctx_svc.infer_context([0.5, 0.0, 0.0, 0.86], user_id="u1")[0] == "learning"
+
+    def test_update_keeps_running_mean(self):
+        centroids = ContextCentroids()
+        centroids.update("u1", [MagicMock(trait_context="work", embedding=[1.0, 0.0])])
+        assert centroids.get("u1") is None  # not cached -> seeded from DB later
+
+        centroids._entries["u1"] = _UserCentroids(means={"work": np.array([1.0, 1.0])}, counts={"work": 2})
+        centroids.update("u1", [
+            MagicMock(trait_context="work", embedding=[4.0, 1.0]),
+            MagicMock(trait_context="general", embedding=[9.0, 9.0]),
+        ])
+        entry = centroids.get("u1")
+        assert entry.counts == {"work": 3}
+        np.testing.assert_allclose(entry.means["work"], [2.0, 1.0])
+
+
+def test_keyword_matcher_matches_substring_scan(ctx_svc):
+    queries = [
+        "帮我调试这个 bug，代码有问题",
+        "Weekend travel with family and a birthday party",
+        "学习论文里的公式和理论",
+        "今天感觉还不错",
+        "CI pipeline broke after the merge",
+    ]
+    for query in queries:
+        lower = query.lower()
+        brute = {
+            ctx: sum(1 for kw in kws if kw.lower() in lower)
+            for ctx, kws in CONTEXT_KEYWORDS.items()
+        }
+        expected = {ctx: n for ctx, n in brute.items() if n}
+        result = ctx_svc._infer_context_keywords(query)
+        if not expected:
+            assert result is None
+        elif result is not None:
+            assert expected[result[0]] == max(expected.values())
+
+
+@pytest.mark.requires_db
+async def test_user_centroids_seeded_from_memories(nm):
+    user_id = f"centroid_{uuid.uuid4().hex[:8]}"
+    contents = ["部署到生产环境", "代码审查发现了一个 bug", "数据库查询太慢了"]
+    for content in contents:
+        await nm._add_memory(user_id=user_id, content=content, memory_type="fact")
+    async with nm._db.session() as session:
+        await session.execute(
+            text("UPDATE memories SET trait_context = 'work' WHERE user_id = :uid"), {"uid": user_id},
+        )
+
+    svc = nm._context_service
+    await svc.ensure_user_centroids(user_id)
+    entry = svc.centroids.get(user_id)
+    assert entry.counts == {"work": 3}
+    expected = np.mean([await nm._embedding.embed(c) for c in contents], axis=0)
+    np.testing.assert_allclose(entry.means["work"], expected, atol=1e-3)  # stored as halfvec
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import text
 
 from neuromem import NeuroMemory
 from neuromem.models.graph import EdgeType, NodeType
@@ -25,6 +26,13 @@ async def nm_graph(mock_embedding, mock_llm):
     await instance.close()
 
 
+async def _user_rows(nm: NeuroMemory, table: str, user_id: str) -> int:
+    async with nm._db.session() as session:
+        return (await session.execute(
+            text(f"SELECT COUNT(*) FROM {table} WHERE user_id = :uid"), {"uid": user_id},
+        )).scalar()
+
+
 class TestDeleteUserData:
     """Test delete_user_data() atomic deletion."""
 
@@ -38,6 +46,11 @@ class TestDeleteUserData:
         await nm_graph.conversations.ingest(user_id=user_id, role="user", content="hello")
         await nm_graph.kv.set(user_id, "profile", "name", "Test User")
         await nm_graph.graph.create_node(NodeType.PERSON, "test_person", user_id=user_id)
+        async with nm_graph._db.session() as session:
+            await session.execute(
+                text("INSERT INTO reflection_queue (user_id) VALUES (:uid) ON CONFLICT DO NOTHING"),
+                {"uid": user_id},
+            )
 
         # Delete all
         result = await nm_graph.delete_user_data(user_id)
@@ -47,6 +60,10 @@ class TestDeleteUserData:
         assert result["deleted"]["conversations"] >= 1
         assert result["deleted"]["key_values"] >= 1
         assert result["deleted"]["graph_nodes"] >= 1
+        assert result["deleted"]["reflection_state"] == 1
+        assert await _user_rows(nm_graph, "reflection_state", user_id) == 0
+        assert result["deleted"]["reflection_queue"] == 1
+        assert await _user_rows(nm_graph, "reflection_queue", user_id) == 0
 
         # Verify nothing remains
         recall_result = await nm_graph.recall(user_id=user_id, query="test")
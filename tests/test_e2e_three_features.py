@@ -1,6 +1,5 @@
 """E2E test: verify CRUD facade, optimistic locking, recall-as-reinforcement."""
 
-import asyncio
 import uuid
 
 import pytest
@@ -150,7 +149,7 @@ class TestOptimisticLocking:
 
     @pytest.mark.asyncio
     async def test_apply_decay_bumps_version(self, nm):
-        """apply_decay increments version for decayed traits."""
+        """apply_decay increments version for traits it dissolves."""
         user = _uid()
         async with nm._db.session() as s:
             engine = TraitEngine(s, nm._embedding)
@@ -164,22 +163,23 @@ class TestOptimisticLocking:
 
         async with nm._db.session() as s:
             await s.execute(text(
-                "UPDATE memories SET trait_last_reinforced = "
-                "NOW() - INTERVAL '30 days' WHERE id = :tid"
+                "UPDATE memories SET trait_confidence_at = NOW() - INTERVAL '400 days', "
+                "trait_dissolve_at = NULL WHERE id = :tid"
             ), {"tid": tid})
             await s.commit()
 
         async with nm._db.session() as s:
             engine = TraitEngine(s, nm._embedding)
-            await engine.apply_decay(user)
+            assert await engine.apply_decay(user) == 1
             await s.commit()
 
         async with nm._db.session() as s:
             row = await s.execute(
-                select(Memory.version).where(Memory.id == tid)
+                select(Memory.version, Memory.trait_stage).where(Memory.id == tid)
             )
-            v2 = row.scalar()
-            assert v2 > v1, f"version should increase after decay: {v1} -> {v2}"
+            r = row.one()
+            assert r.trait_stage == "dissolved"
+            assert r.version > v1, f"version should increase after decay: {v1} -> {r.version}"
 
     @pytest.mark.asyncio
     async def test_promote_trends_bumps_version(self, nm):
@@ -245,12 +245,8 @@ class TestRecallReinforcement:
         # Recall with a query that should match the trait
         result = await nm.recall(user, "Python data analysis")
 
-        # Wait for background reinforcement task
-        await asyncio.sleep(0.5)
-        all_tasks = [t for tasks in nm._user_tasks.values() for t in tasks if not t.done()]
-        if all_tasks:
-            await asyncio.gather(*all_tasks, return_exceptions=True)
-            nm._user_tasks.clear()
+        # Reinforcement is buffered until the next flush
+        await nm.flush_reinforcements()
 
         # Check if trait was in vector_results
         trait_in_results = any(
@@ -279,3 +275,29 @@ class TestRecallReinforcement:
                 "Trait not in vector_results (mock embedding); "
                 "reinforcement not triggered"
             )
+
+    @pytest.mark.asyncio
+    async def test_recall_hits_are_coalesced(self, nm):
+        """Buffered hits on one trait are written as a single reinforcement step."""
+        user = _uid()
+        async with nm._db.session() as s:
+            engine = TraitEngine(s, nm._embedding)
+            trait = await engine.create_behavior(
+                user, "drinks coffee every morning", [], 0.45, "personal", "cycle-1",
+            )
+            await s.commit()
+            tid = str(trait.id)
+            version = trait.version
+
+        nm._reinforcements.add([tid])
+        nm._reinforcements.add([tid, tid])
+        assert nm._reinforcements.pending == 1
+
+        assert await nm.flush_reinforcements() == 1
+        assert nm._reinforcements.pending == 0
+        async with nm._db.session() as s:
+            row = (await s.execute(
+                select(Memory.trait_confidence, Memory.version).where(Memory.id == tid)
+            )).one()
+        assert row.trait_confidence == pytest.approx(1 - 0.55 * 0.95 ** 3, abs=1e-3)
+        assert row.version == version + 1
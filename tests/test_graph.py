@@ -253,3 +253,24 @@ async def test_get_node(db_session):
     svc2 = GraphService(db_session, user_id="other-user")
     result2 = await svc2.get_node(node_type=NodeType.USER, node_id="get_user")
     assert result2 is None
+
+
+@pytest.mark.asyncio
+async def test_explain_hot_queries_uses_indexes(db_session):
+    """Every hot graph query must be servable by an index (no Seq Scan)."""
+    svc = GraphService(db_session, user_id=TEST_USER_ID)
+    report = await svc.explain_hot_queries(disable_seqscan=True)
+
+    names = {r["name"] for r in report}
+    assert {"entity_facts_outgoing", "entity_facts_incoming", "path_incoming"} <= names
+    flagged = [r["name"] for r in report if r["seq_scan"]]
+    assert flagged == []
+    by_name = {r["name"]: r for r in report}
+    assert any(" using " in s for s in by_name["entity_facts_incoming"]["scans"])
+    assert any(" using " in s for s in by_name["path_incoming"]["scans"])
+
+
+@pytest.mark.asyncio
+async def test_explain_hot_queries_facade(nm):
+    report = await nm.graph.explain_hot_queries("explain-user")
+    assert report and all("seq_scan" in r and r["plan"] for r in report)
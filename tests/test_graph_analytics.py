@@ -0,0 +1,150 @@
+"""Tests for graph analytics — degree, personalized PageRank, components."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from neuromem.models.graph import GraphNodeStats
+from neuromem.services.graph_analytics import (
+    GraphAnalyticsService,
+    connected_components,
+    personalized_pagerank,
+)
+from neuromem.services.graph_memory import GraphMemoryService
+
+
+def _triple(subject, relation, obj, subject_type="user", obj_type="entity", confidence=0.9):
+    return {
+        "subject": subject, "subject_type": subject_type,
+        "relation": relation, "object": obj, "object_type": obj_type,
+        "content": f"{subject} {relation} {obj}", "confidence": confidence,
+    }
+
+
+async def _stats(db_session, user_id):
+    rows = (await db_session.execute(
+        select(GraphNodeStats).where(GraphNodeStats.user_id == user_id)
+    )).scalars().all()
+    return {r.node_id: r for r in rows}
+
+
+def test_pagerank_centres_on_teleport_node():
+    """Personalized PageRank ranks the seed node first and sums to 1."""
+    # path 0 - 1 - 2 (undirected)
+    src = np.array([0, 1, 1, 2])
+    dst = np.array([1, 0, 2, 1])
+    teleport = np.array([1.0, 0.0, 0.0])
+    rank, iterations = personalized_pagerank(src, dst, 3, teleport)
+    assert rank.sum() == pytest.approx(1.0)
+    assert rank[0] > rank[2]
+    assert iterations > 1
+
+
+def test_pagerank_warm_start_converges_faster():
+    src = np.array([0, 1, 1, 2, 2, 3])
+    dst = np.array([1, 0, 2, 1, 3, 2])
+    teleport = np.array([1.0, 0.0, 0.0, 0.0])
+    rank, cold = personalized_pagerank(src, dst, 4, teleport)
+    again, warm = personalized_pagerank(src, dst, 4, teleport, start=rank)
+    assert warm < cold
+    np.testing.assert_allclose(again, rank, atol=1e-6)
+
+
+def test_connected_components_labels():
+    src = np.array([0, 1, 3, 4])
+    dst = np.array([1, 0, 4, 3])
+    labels = connected_components(src, dst, 5)
+    assert labels.tolist() == [0, 0, 2, 3, 3]
+
+
+@pytest.mark.asyncio
+async def test_refresh_computes_stats(db_session):
+    """refresh() stores degree, importance and component for every node."""
+    graph = GraphMemoryService(db_session)
+    await graph.store_triples("u1", [
+        _triple("user", "works_at", "Google", obj_type="organization"),
+        _triple("user", "lives_in", "Beijing", obj_type="location"),
+        _triple("Google", "located_in", "Mountain View", "organization", "location"),
+    ])
+    await db_session.commit()
+
+    result = await GraphAnalyticsService(db_session).refresh("u1")
+    await db_session.commit()
+
+    assert result["skipped"] is False
+    assert result["nodes"] == 4
+    stats = await _stats(db_session, "u1")
+    assert stats["u1"].degree == 2
+    assert stats["google"].degree == 2
+    assert stats["u1"].importance == pytest.approx(1.0)
+    assert stats["google"].importance > stats["mountain_view"].importance
+    assert len({s.component for s in stats.values()}) == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_when_fresh_and_updates_incrementally(db_session):
+    graph = GraphMemoryService(db_session)
+    svc = GraphAnalyticsService(db_session)
+    await graph.store_triples("u1", [_triple("user", "works_at", "Google", obj_type="organization")])
+    await db_session.commit()
+    await svc.refresh("u1")
+    await db_session.commit()
+
+    assert (await svc.refresh("u1"))["skipped"] is True
+
+    await graph.store_triples("u1", [_triple("user", "lives_in", "Beijing", obj_type="location")])
+    await db_session.commit()
+    assert await svc.is_stale("u1") is True
+
+    result = await svc.refresh("u1")
+    await db_session.commit()
+    assert result["skipped"] is False
+    stats = await _stats(db_session, "u1")
+    assert set(stats) == {"u1", "google", "beijing"}
+    assert stats["u1"].degree == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_removes_nodes_without_active_edges(db_session):
+    graph = GraphMemoryService(db_session)
+    svc = GraphAnalyticsService(db_session)
+    await graph.store_triples("u1", [_triple("user", "works_at", "Google", obj_type="organization")])
+    await db_session.commit()
+    await svc.refresh("u1")
+    await db_session.commit()
+
+    # Job change invalidates the old WORKS_AT edge
+    await graph.store_triples("u1", [_triple("user", "works_at", "Baidu", obj_type="organization")])
+    await db_session.commit()
+    result = await svc.refresh("u1")
+    await db_session.commit()
+
+    assert result["removed"] == 1
+    assert "google" not in await _stats(db_session, "u1")
+
+
+@pytest.mark.asyncio
+async def test_entity_facts_carry_importance(db_session):
+    graph = GraphMemoryService(db_session)
+    await graph.store_triples("u1", [
+        _triple("user", "works_at", "Google", obj_type="organization"),
+        _triple("Google", "located_in", "Mountain View", "organization", "location"),
+    ])
+    await db_session.commit()
+    await GraphAnalyticsService(db_session).refresh("u1")
+    await db_session.commit()
+
+    facts = await graph.find_entity_facts("u1", "Google")
+    by_rel = {f["relation"]: f["importance"] for f in facts}
+    assert 0 < by_rel["LOCATED_IN"] < by_rel["WORKS_AT"] < 1.0
+
+
+@pytest.mark.asyncio
+async def test_analyze_graph_facade(nm):
+    """NeuroMemory.analyze_graph skips empty/fresh graphs unless forced."""
+    assert (await nm.analyze_graph("ga"))["skipped"] is True
+    result = await nm.analyze_graph("ga", force=True)
+    assert result["skipped"] is False
+    assert result["nodes"] == 0
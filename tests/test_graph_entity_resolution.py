@@ -0,0 +1,200 @@
+"""Tests for graph entity resolution — alias matching and compaction."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+
+from neuromem.models.graph import GraphEdge, GraphNode
+from neuromem.providers.embedding import EmbeddingProvider
+from neuromem.services.graph_memory import EntityIndex, GraphMemoryService
+
+
+class AliasEmbeddingProvider(EmbeddingProvider):
+    """Maps names to fixed directions; names in the same group get one vector."""
+
+    GROUPS = {
+        "google": 0, "google inc.": 0, "google llc": 0,
+        "beijing": 1, "北京": 1,
+        "python": 2,
+        "apple": 3,
+    }
+
+    def __init__(self, dims: int = 1024):
+        self._dims = dims
+        self.batch_calls = 0
+
+    @property
+    def dims(self) -> int:
+        return self._dims
+
+    async def embed(self, text: str) -> list[float]:
+        vec = [0.0] * self._dims
+        slot = self.GROUPS.get(text.strip().lower(), 10 + hash(text) % 500)
+        vec[slot] = 1.0
+        return vec
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batch_calls += 1
+        return [await self.embed(t) for t in texts]
+
+
+def _triple(obj: str, obj_type: str = "organization", relation: str = "works_at") -> dict:
+    return {
+        "subject": "user",
+        "subject_type": "user",
+        "relation": relation,
+        "object": obj,
+        "object_type": obj_type,
+        "content": f"{relation} {obj}",
+        "confidence": 0.95,
+    }
+
+
+async def _nodes(db_session) -> dict[str, GraphNode]:
+    rows = (await db_session.execute(select(GraphNode))).scalars().all()
+    return {n.node_id: n for n in rows}
+
+
+@pytest.mark.asyncio
+async def test_similar_name_stored_as_alias(db_session):
+    """A name close to an existing entity becomes an alias, edge goes to canonical."""
+    emb = AliasEmbeddingProvider()
+    svc = GraphMemoryService(db_session, emb, EntityIndex())
+    await svc.store_triples("u1", [_triple("Google")])
+    await db_session.commit()
+
+    await svc.store_triples("u1", [_triple("Google Inc.", relation="knows")])
+    await db_session.commit()
+
+    nodes = await _nodes(db_session)
+    assert nodes["google_inc."].properties["canonical_id"] == "google"
+    assert nodes["google_inc."].embedding is None
+    assert nodes["google"].embedding is not None
+
+    edges = (await db_session.execute(select(GraphEdge))).scalars().all()
+    assert {e.target_id for e in edges} == {"google"}
+
+
+@pytest.mark.asyncio
+async def test_batch_embeds_once_and_dedups_within_batch(db_session):
+    """New names are embedded in one call; duplicates inside a batch collapse."""
+    emb = AliasEmbeddingProvider()
+    svc = GraphMemoryService(db_session, emb, EntityIndex())
+    await svc.store_triples("u1", [
+        _triple("Google"),
+        _triple("Google LLC", relation="knows"),
+        _triple("Beijing", "location", "lives_in"),
+    ])
+    await db_session.commit()
+
+    assert emb.batch_calls == 1
+    nodes = await _nodes(db_session)
+    canon = {nid for nid, n in nodes.items() if n.embedding is not None}
+    assert canon == {"beijing", "google"}
+    assert nodes["google_llc"].properties["canonical_id"] == "google"
+
+
+@pytest.mark.asyncio
+async def test_exact_alias_hit_resolves_without_embedding(db_session):
+    """Re-mentioning a known alias maps to its canonical node directly."""
+    emb = AliasEmbeddingProvider()
+    svc = GraphMemoryService(db_session, emb, EntityIndex())
+    await svc.store_triples("u1", [_triple("Google"), _triple("Google Inc.", relation="knows")])
+    await db_session.commit()
+    calls = emb.batch_calls
+
+    await svc.store_triples("u1", [_triple("Google Inc.", relation="uses")])
+    await db_session.commit()
+
+    assert emb.batch_calls == calls
+    edges = (await db_session.execute(
+        select(GraphEdge).where(GraphEdge.edge_type == "USES")
+    )).scalars().all()
+    assert [e.target_id for e in edges] == ["google"]
+
+
+@pytest.mark.asyncio
+async def test_resolution_is_type_scoped(db_session):
+    """Same embedding but different node type must not be merged."""
+    emb = AliasEmbeddingProvider()
+    svc = GraphMemoryService(db_session, emb, EntityIndex())
+    await svc.store_triples("u1", [
+        _triple("Google"),
+        _triple("Google LLC", "entity", "knows"),
+    ])
+    await db_session.commit()
+
+    nodes = await _nodes(db_session)
+    assert "canonical_id" not in nodes["google_llc"].properties
+
+
+@pytest.mark.asyncio
+async def test_find_entity_facts_follows_alias(db_session):
+    """Querying by alias name returns the canonical entity's facts."""
+    svc = GraphMemoryService(db_session, AliasEmbeddingProvider(), EntityIndex())
+    await svc.store_triples("u1", [_triple("北京", "location", "lives_in")])
+    await svc.store_triples("u1", [_triple("Beijing", "location", "visited")])
+    await db_session.commit()
+
+    facts = await svc.find_entity_facts("u1", "Beijing")
+    assert {f["relation"] for f in facts} == {"LIVES_IN", "VISITED"}
+
+
+@pytest.mark.asyncio
+async def test_without_embedding_no_resolution(db_session):
+    """Plain GraphMemoryService keeps exact-id get-or-create behaviour."""
+    svc = GraphMemoryService(db_session)
+    await svc.store_triples("u1", [_triple("Google"), _triple("Google Inc.", relation="knows")])
+    await db_session.commit()
+
+    nodes = await _nodes(db_session)
+    assert "canonical_id" not in nodes["google_inc."].properties
+    assert nodes["google"].embedding is None
+
+
+@pytest.mark.asyncio
+async def test_compact_entities_merges_and_rewires(db_session):
+    """Compaction backfills embeddings, merges duplicates and rewires edges."""
+    # Graph built without resolution → duplicates
+    plain = GraphMemoryService(db_session)
+    await plain.store_triples("u1", [
+        _triple("Google"),
+        _triple("Google Inc.", relation="knows"),
+        _triple("Google LLC", relation="uses"),
+        _triple("Python", "skill", "has_skill"),
+    ])
+    await plain.store_triples("u1", [{
+        "subject": "Google Inc.", "subject_type": "organization",
+        "relation": "located_in", "object": "Beijing", "object_type": "location",
+        "content": "Google Inc. in Beijing", "confidence": 0.9,
+    }])
+    await db_session.commit()
+
+    svc = GraphMemoryService(db_session, AliasEmbeddingProvider(), EntityIndex())
+    stats = await svc.compact_entities("u1")
+    await db_session.commit()
+    db_session.expire_all()
+
+    assert stats["embedded"] == 5
+    assert stats["merged"] == 2
+    nodes = await _nodes(db_session)
+    # google_inc. has two edges → chosen as canonical
+    assert nodes["google"].properties["canonical_id"] == "google_inc."
+    assert nodes["google_llc"].properties["canonical_id"] == "google_inc."
+    assert nodes["google"].embedding is None
+
+    edges = (await db_session.execute(select(GraphEdge))).scalars().all()
+    endpoints = {e.source_id for e in edges} | {e.target_id for e in edges}
+    assert "google" not in endpoints
+    assert "google_llc" not in endpoints
+
+    facts = await svc.find_entity_facts("u1", "Google")
+    assert {f["relation"] for f in facts} == {"WORKS_AT", "KNOWS", "USES", "LOCATED_IN"}
+
+
+@pytest.mark.asyncio
+async def test_compact_graph_facade(nm):
+    """NeuroMemory.compact_graph runs compaction in its own session."""
+    result = await nm.compact_graph("nobody")
+    assert result["merged"] == 0
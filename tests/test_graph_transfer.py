@@ -0,0 +1,148 @@
+"""Tests for columnar graph export/import."""
+
+from __future__ import annotations
+
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from neuromem.services.graph_memory import EntityIndex, GraphMemoryService
+from neuromem.services.graph_transfer import (
+    _NULL_MICROS, _from_micros, _to_micros, intern, pack_strings, read_batch, unpack_strings,
+)
+
+
+def _triple(subject, relation, obj, subject_type="user", obj_type="entity"):
+    return {
+        "subject": subject, "subject_type": subject_type,
+        "relation": relation, "object": obj, "object_type": obj_type,
+        "content": f"{subject} {relation} {obj}", "confidence": 0.9,
+    }
+
+
+async def _seed(nm, user_id):
+    async with nm._db.session() as session:
+        svc = GraphMemoryService(session, nm._embedding, EntityIndex())
+        await svc.store_triples(user_id, [
+            _triple("user", "works_at", "Google", obj_type="organization"),
+            _triple("user", "lives_in", "北京", obj_type="location"),
+            _triple("user", "has_skill", "Python", obj_type="skill"),
+            _triple("Google", "located_in", "Mountain View", "organization", "location"),
+        ])
+
+
+async def _dump(nm, user_id):
+    async with nm._db.session() as session:
+        nodes = (await session.execute(text(
+            "SELECT node_type, node_id, properties, embedding IS NOT NULL AS has_emb "
+            "FROM graph_nodes WHERE user_id = :u ORDER BY node_type, node_id"
+        ), {"u": user_id})).fetchall()
+        edges = (await session.execute(text(
+            "SELECT source_type, source_id, edge_type, target_type, target_id, properties "
+            "FROM graph_edges WHERE user_id = :u ORDER BY edge_type, target_id"
+        ), {"u": user_id})).fetchall()
+    return [tuple(r) for r in nodes], [tuple(r) for r in edges]
+
+
+def test_string_helpers_roundtrip():
+    values = ["google", "", "北京", "google", "a b"]
+    assert unpack_strings(*pack_strings(values)) == values
+    assert unpack_strings(*pack_strings([])) == []
+    codes, dictionary = intern(values)
+    assert dictionary == ["google", "", "北京", "a b"]
+    assert [dictionary[c] for c in codes] == values
+
+
+
+def test_timestamp_encoding_is_lossless():
+    rng = random.Random(0)
+    base = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    stamps = [
+        base + timedelta(microseconds=rng.randint(-2 * 10**15, 4 * 10**15))
+        for _ in range(20000)
+    ] + [base, base - timedelta(microseconds=1), datetime(1900, 1, 1, tzinfo=timezone.utc)]
+    assert [_from_micros(_to_micros(ts)) for ts in stamps] == stamps
+    assert _to_micros(None) == _NULL_MICROS and _from_micros(_NULL_MICROS) is None
+    # Version 1 exports stored None as -1
+    assert _from_micros(-1, version=1) is None
+    assert _from_micros(-1) == base - timedelta(microseconds=1)
+
+@pytest.mark.asyncio
+async def test_export_import_roundtrip_to_other_user(nm, tmp_path):
+    src_user = f"gx_{uuid.uuid4().hex[:8]}"
+    dst_user = f"gx_{uuid.uuid4().hex[:8]}"
+    await _seed(nm, src_user)
+
+    manifest = await nm.graph.export_graph(src_user, str(tmp_path), batch_size=2)
+    assert manifest["nodes"]["rows"] == 5
+    assert manifest["edges"]["rows"] == 4
+    assert manifest["edges"]["batches"] == 2
+
+    batch = read_batch(tmp_path, "edges", 0)
+    assert batch["source_id"].dtype == np.int32
+    assert "node_dict_data" in batch
+
+    result = await nm.graph.import_graph(str(tmp_path), user_id=dst_user)
+    assert result["nodes"] == 5
+    assert result["edges"] == 4
+
+    src_nodes, src_edges = await _dump(nm, src_user)
+    dst_nodes, dst_edges = await _dump(nm, dst_user)
+    # The User node id is the user_id itself and follows the target user
+    rename = {src_user: dst_user}
+    assert dst_nodes == [(t, rename.get(n, n), p, e) for t, n, p, e in src_nodes]
+    assert dst_edges == [
+        (st, rename.get(s, s), et, tt, rename.get(t, t), p) for st, s, et, tt, t, p in src_edges
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_is_resumable_and_idempotent(nm, tmp_path):
+    src_user = f"gx_{uuid.uuid4().hex[:8]}"
+    dst_user = f"gx_{uuid.uuid4().hex[:8]}"
+    await _seed(nm, src_user)
+    await nm.graph.export_graph(src_user, str(tmp_path), batch_size=2)
+
+    first = await nm.graph.import_graph(str(tmp_path), user_id=dst_user)
+    # Simulate a crash before progress was recorded for the last edge batch
+    state_path = tmp_path / f"import-{dst_user}.json"
+    state = json.loads(state_path.read_text())
+    state["edges"] -= 1
+    state_path.write_text(json.dumps(state))
+
+    again = await nm.graph.import_graph(str(tmp_path), user_id=dst_user)
+    assert first["edges"] == 4
+    assert again["edges"] == 0
+    _, dst_edges = await _dump(nm, dst_user)
+    assert len(dst_edges) == 4
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_from_manifest(nm, tmp_path):
+    user = f"gx_{uuid.uuid4().hex[:8]}"
+    await _seed(nm, user)
+    full = await nm.graph.export_graph(user, str(tmp_path / "full"), batch_size=2)
+
+    part = tmp_path / "part"
+    await nm.graph.export_graph(user, str(part), batch_size=2)
+    manifest = json.loads((part / "manifest.json").read_text())
+    # Rewind: pretend the export stopped after the first edge batch
+    manifest["edges"].update(batches=1, rows=2, done=False)
+    manifest["edges"]["after"] = str(uuid.UUID(bytes=bytes(read_batch(part, "edges", 0)["id"][-1])))
+    (part / "edges-000001.npz").unlink()
+    (part / "manifest.json").write_text(json.dumps(manifest))
+
+    resumed = await nm.graph.export_graph(user, str(part), batch_size=2)
+    assert resumed["edges"]["rows"] == full["edges"]["rows"]
+    assert resumed["edges"]["batches"] == full["edges"]["batches"]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_incomplete_export(nm, tmp_path):
+    with pytest.raises(ValueError):
+        await nm.graph.import_graph(str(tmp_path))
@@ -99,6 +99,25 @@ class TestColdMemories:
         assert len(result) >= 1
         assert result[0]["content"] == "old memory"
 
+    @pytest.mark.asyncio
+    async def test_cold_memories_sees_buffered_access(self, nm):
+        """Accesses buffered by the tracker warm a memory up before cold_memories() reads."""
+        user_id = "cold_access_u1"
+        await nm._add_memory(user_id=user_id, content="old but recalled memory")
+        async with nm._db.session() as session:
+            await session.execute(
+                text(
+                    "UPDATE memories SET created_at = NOW() - INTERVAL '100 days', "
+                    "last_accessed_at = NULL WHERE user_id = :uid"
+                ),
+                {"uid": user_id},
+            )
+
+        await nm.recall(user_id, "old but recalled memory")
+        assert nm._access_tracker.pending >= 1
+
+        assert await nm.cold_memories(user_id, threshold_days=90) == []
+
     @pytest.mark.asyncio
     async def test_cold_memories_excludes_recent(self, nm):
         """cold_memories() should not return recently accessed memories."""
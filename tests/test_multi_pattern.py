@@ -0,0 +1,33 @@
+"""Tests for the Aho-Corasick multi-pattern matcher."""
+
+from __future__ import annotations
+
+import random
+
+from neuromem.services.multi_pattern import MultiPatternMatcher
+
+
+def test_finds_overlapping_and_nested_patterns():
+    m = MultiPatternMatcher(["he", "she", "his", "hers", "张三", "张"])
+    assert m.find("ushers") == {0, 1, 3}
+    assert m.find("我和张三") == {4, 5}
+    assert m.find("nothing") == set()
+
+
+def test_empty_patterns_never_match():
+    assert MultiPatternMatcher([]).find("abc") == set()
+    assert MultiPatternMatcher(["", "b"]).find("abc") == {1}
+
+
+def test_matches_naive_substring_semantics():
+    """Differential check against `pattern in text` on random inputs."""
+    rng = random.Random(42)
+    alphabet = "ab张三 "
+    for _ in range(2000):
+        patterns = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+            for _ in range(rng.randint(0, 8))
+        ]
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        expected = {i for i, p in enumerate(patterns) if p and p in text}
+        assert MultiPatternMatcher(patterns).find(text) == expected
@@ -0,0 +1,117 @@
+"""Tests for the materialized profile_views row behind profile_view()."""
+
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from neuromem.services.trait_engine import TraitEngine
+
+
+def _user() -> str:
+    return f"pv_{uuid.uuid4().hex[:8]}"
+
+
+async def _row(nm, user_id: str):
+    async with nm._db.session() as session:
+        return (await session.execute(
+            text("SELECT version, facts_stale, traits_stale FROM profile_views WHERE user_id = :u"),
+            {"u": user_id},
+        )).first()
+
+
+@pytest.mark.asyncio
+async def test_new_facts_are_merged_into_the_row(nm):
+    user_id = _user()
+    await nm._add_memory(user_id, "住在北京", metadata={"category": "location"}, check_conflict=False)
+    await nm._add_memory(user_id, "喜欢爬山", metadata={"category": "hobby"}, check_conflict=False)
+    first = await nm.profile_view(user_id)
+    assert first["facts"] == {"location": "住在北京", "hobby": ["喜欢爬山"]}
+    version = (await _row(nm, user_id)).version
+
+    await nm._add_memory(user_id, "搬到了上海", metadata={"category": "location"}, check_conflict=False)
+    await nm._add_memory(user_id, "喜欢游泳", metadata={"category": "hobby"}, check_conflict=False)
+    row = await _row(nm, user_id)
+    assert row.version == version + 2 and not row.facts_stale
+
+    view = await nm.profile_view(user_id)
+    assert view["facts"] == {"location": "搬到了上海", "hobby": ["喜欢游泳", "喜欢爬山"]}
+    assert view == await nm.profile_view(user_id, refresh=True)
+
+
+@pytest.mark.asyncio
+async def test_mood_sums_follow_new_episodes(nm):
+    user_id = _user()
+    await nm._add_memory(user_id, "考试通过了", memory_type="episodic",
+                         metadata={"emotion": {"valence": 0.8, "arousal": 0.6}})
+    assert (await nm.profile_view(user_id))["recent_mood"]["sample_count"] == 1
+
+    await nm._add_memory(user_id, "丢了钱包", memory_type="episodic",
+                         metadata={"emotion": {"valence": -0.4}})
+    mood = (await nm.profile_view(user_id))["recent_mood"]
+    assert mood["sample_count"] == 2
+    assert mood["valence_avg"] == pytest.approx(0.2)
+    assert mood["arousal_avg"] == pytest.approx(0.6)
+    assert mood == (await nm.profile_view(user_id, refresh=True))["recent_mood"]
+
+
+@pytest.mark.asyncio
+async def test_delete_marks_facts_stale(nm):
+    user_id = _user()
+    record = await nm._add_memory(user_id, "是一名教师", metadata={"category": "occupation"}, check_conflict=False)
+    assert (await nm.profile_view(user_id))["facts"] == {"occupation": "是一名教师"}
+
+    assert await nm.delete_memory(str(record.id), user_id)
+    assert (await _row(nm, user_id)).facts_stale
+    assert (await nm.profile_view(user_id))["facts"] == {}
+    assert not (await _row(nm, user_id)).facts_stale
+
+
+@pytest.mark.asyncio
+async def test_trait_reinforcement_marks_traits_stale(nm):
+    user_id = _user()
+    trait = await nm._add_memory(user_id, "喜欢早起", memory_type="trait")
+    async with nm._db.session() as session:
+        await session.execute(
+            text("UPDATE memories SET trait_stage = 'emerging', trait_confidence = 0.5 WHERE id = :id"),
+            {"id": trait.id},
+        )
+    await nm.profile_view(user_id, refresh=True)
+    assert not (await _row(nm, user_id)).traits_stale
+
+    async with nm._db.session() as session:
+        assert await TraitEngine(session, None).reinforce_traits_bulk({str(trait.id): 2}) == 1
+    assert (await _row(nm, user_id)).traits_stale
+    (view_trait,) = (await nm.profile_view(user_id))["traits"]
+    assert view_trait["confidence"] > 0.5
+
+
+@pytest.mark.asyncio
+async def test_cache_is_checked_against_version(nm):
+    user_id = _user()
+    await nm._add_memory(user_id, "会说日语", metadata={"category": "skill"}, check_conflict=False)
+    view = await nm.profile_view(user_id)
+    version, cached = nm._profile_cache.get(user_id)
+    assert cached == view
+
+    # Callers can't mutate the cached copy
+    view["facts"]["skill"].append("x")
+    assert (await nm.profile_view(user_id))["facts"] == {"skill": ["会说日语"]}
+
+    await nm._add_memory(user_id, "会弹钢琴", metadata={"category": "skill"}, check_conflict=False)
+    assert (await nm.profile_view(user_id))["facts"] == {"skill": ["会弹钢琴", "会说日语"]}
+    assert nm._profile_cache.get(user_id)[0] == version + 1
+
+
+@pytest.mark.asyncio
+async def test_recall_can_skip_profile(nm):
+    user_id = _user()
+    await nm._add_memory(user_id, "在杭州工作", metadata={"category": "work"}, check_conflict=False)
+    result = await nm.recall(user_id, "工作", include={"graph", "context"})
+    assert result["user_profile"] == {"facts": {}, "traits": [], "recent_mood": None}
+    assert await _row(nm, user_id) is None
+
+    result = await nm.recall(user_id, "工作")
+    assert result["user_profile"]["facts"] == {"work": ["在杭州工作"]}
@@ -621,6 +621,40 @@ class TestRecallFacade:
         # Fresh memory → recency bonus near 0.15 regardless of decay_rate
         assert result["vector_results"][0]["recency"] > 0.148
 
+    @pytest.mark.asyncio
+    async def test_recall_include_skips_optional_parts(self, nm):
+        """include=() runs only the memory search; the result keeps its keys."""
+        await nm._add_memory(user_id="facade_u7", content="likes hiking", memory_type="trait")
+        async with nm._db.session() as session:
+            await session.execute(text(
+                "UPDATE memories SET trait_stage = 'established', trait_confidence = 0.7 "
+                "WHERE user_id = 'facade_u7'"
+            ))
+        pending = nm._reinforcements.pending
+
+        result = await nm.recall(user_id="facade_u7", query="likes hiking", include=())
+        assert [m["content"] for m in result["merged"]] == ["likes hiking"]
+        assert result["user_profile"] == {"facts": {}, "traits": [], "recent_mood": None}
+        assert result["graph_results"] == [] and result["graph_context"] == []
+        assert result["inferred_context"] is None
+        assert nm._reinforcements.pending == pending
+
+        result = await nm.recall(user_id="facade_u7", query="likes hiking", include={"reinforce"})
+        assert nm._reinforcements.pending == pending + 1
+
+    @pytest.mark.asyncio
+    async def test_recall_fast_returns_merged(self, nm):
+        """recall_fast() is recall(include=()) returning the merged list."""
+        await nm._add_memory(user_id="facade_u8", content="fast path test")
+        full = await nm.recall(user_id="facade_u8", query="fast path test", limit=5)
+        fast = await nm.recall_fast(user_id="facade_u8", query="fast path test", limit=5)
+        assert [m["content"] for m in fast] == [m["content"] for m in full["merged"]]
+
+    @pytest.mark.asyncio
+    async def test_recall_rejects_unknown_part(self, nm):
+        with pytest.raises(ValueError, match="profiles"):
+            await nm.recall(user_id="facade_u9", query="anything", include={"profiles"})
+
 
 # ===========================================================================
 # F. Edge cases
@@ -142,6 +142,27 @@ class TestStageExclusion:
         ]
         assert len(trait_ids_in_results) == 0, "dissolved traits should be excluded from search"
 
+    @pytest.mark.asyncio
+    async def test_search_excludes_trait_decayed_to_candidate(self, db_session, mock_embedding):
+        """A stored 'emerging' trait whose decayed confidence fell below 0.3 is excluded."""
+        uid = f"excl_decay_{uuid.uuid4().hex[:6]}"
+        ids = {}
+        for days, word in ((200, "stale"), (10, "fresh")):
+            ids[word] = await _insert_trait(
+                db_session, mock_embedding,
+                user_id=uid, content=f"user enjoys {word} tea", trait_stage="emerging",
+            )
+            # behavior decay: 0.5 * exp(-0.005 * 200) ~ 0.18, still above the dissolve threshold
+            await db_session.execute(text(
+                "UPDATE memories SET trait_confidence_at = NOW() - make_interval(days => :d) WHERE id = :mid"
+            ), {"d": days, "mid": ids[word]})
+        await db_session.commit()
+
+        svc = SearchService(db_session, mock_embedding)
+        results = await svc.scored_search(user_id=uid, query="user enjoys tea", limit=10)
+        trait_ids_in_results = {r["id"] for r in results if r.get("memory_type") == "trait"}
+        assert trait_ids_in_results == {ids["fresh"]}
+
     @pytest.mark.asyncio
     async def test_search_includes_emerging(self, db_session, mock_embedding):
         """Traits in 'emerging' stage should appear in search results."""
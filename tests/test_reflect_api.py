@@ -255,6 +255,29 @@ class TestGetUserTraits:
         stages = {t["trait_stage"] for t in traits}
         assert "dissolved" not in stages
 
+    @pytest.mark.asyncio
+    async def test_get_user_traits_decays_on_read(self, db_session, mock_embedding, nm):
+        """Confidence and stage reflect decay since the anchor without a write."""
+        uid = f"gtr_decay_{uuid.uuid4().hex[:6]}"
+        tid = await _insert_trait_row(
+            db_session, mock_embedding,
+            user_id=uid, content="decaying trait",
+            trait_stage="established", trait_confidence=0.7,
+        )
+        await db_session.execute(
+            text("UPDATE memories SET trait_confidence_at = NOW() - INTERVAL '100 days' WHERE id = :mid"),
+            {"mid": tid},
+        )
+        await db_session.commit()
+
+        traits = await nm.get_user_traits(user_id=uid, min_stage="candidate")
+        assert len(traits) == 1
+        # 0.7 * exp(-0.005 * 100) ≈ 0.42 → emerging
+        assert traits[0]["trait_confidence"] == pytest.approx(0.7 * 0.6065, abs=0.01)
+        assert traits[0]["trait_stage"] == "emerging"
+
+        assert await nm.get_user_traits(user_id=uid, min_stage="established") == []
+
 
 # ---------------------------------------------------------------------------
 # should_reflect() tests
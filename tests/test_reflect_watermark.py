@@ -198,3 +198,128 @@ async def test_reflect_background(mock_embedding, mock_llm):
             assert row.completed_at is not None
     finally:
         await nm.close()
+
+
+# ---------------------------------------------------------------------------
+# Keyset cursor / pipeline tests
+# ---------------------------------------------------------------------------
+
+
+class SlowLLMProvider(LLMProvider):
+    """Returns the same trait for every call and tracks calls in flight."""
+
+    def __init__(self):
+        self.call_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def chat(self, messages, temperature=0.1, max_tokens=2048) -> str:
+        self.call_count += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight -= 1
+        return '{"traits": [{"content": "same trait", "category": "pattern", "source_ids": []}]}'
+
+
+@pytest.mark.asyncio
+async def test_digest_drains_more_than_ten_batches(mock_embedding, mock_llm):
+    """No batch cap: a backlog larger than 10 batches is drained in one call."""
+    nm = NeuroMemory(
+        database_url=TEST_DATABASE_URL,
+        embedding=mock_embedding,
+        llm=mock_llm,
+        auto_extract=False,
+    )
+    await nm.init()
+
+    try:
+        user = "watermark_test_keyset_1"
+        for i in range(25):
+            await nm._add_memory(user, f"Backlog memory {i}", memory_type="fact")
+
+        result = await nm.digest(user, batch_size=2)
+        assert result["memories_analyzed"] == 25
+        assert mock_llm.call_count == 13
+
+        again = await nm.digest(user, batch_size=2)
+        assert again["memories_analyzed"] == 0
+    finally:
+        await nm.close()
+
+
+@pytest.mark.asyncio
+async def test_digest_cursor_resumes_within_same_timestamp(mock_embedding, mock_llm):
+    """max_batches stops early; the (created_at, id) cursor resumes exactly."""
+    nm = NeuroMemory(
+        database_url=TEST_DATABASE_URL,
+        embedding=mock_embedding,
+        llm=mock_llm,
+        auto_extract=False,
+    )
+    await nm.init()
+
+    try:
+        user = "watermark_test_keyset_2"
+        for i in range(6):
+            await nm._add_memory(user, f"Tied memory {i}", memory_type="fact")
+        # All memories share one created_at: a timestamp-only watermark
+        # would skip the rest after the first batch
+        async with nm._db.session() as session:
+            await session.execute(
+                text("UPDATE memories SET created_at = now() - interval '1 hour' WHERE user_id = :uid"),
+                {"uid": user},
+            )
+
+        first = await nm.digest(user, batch_size=2, max_batches=1)
+        assert first["memories_analyzed"] == 2
+
+        async with nm._db.session() as session:
+            row = (await session.execute(
+                text("SELECT cursor_id, memories_scanned FROM reflection_cycles "
+                     "WHERE user_id = :uid AND trigger_type = 'digest'"),
+                {"uid": user},
+            )).one()
+            assert row.cursor_id is not None
+            assert row.memories_scanned == 2
+
+        rest = await nm.digest(user, batch_size=2)
+        assert rest["memories_analyzed"] == 4
+        assert (await nm.digest(user, batch_size=2))["memories_analyzed"] == 0
+    finally:
+        await nm.close()
+
+
+@pytest.mark.asyncio
+async def test_digest_pipeline_runs_concurrently_and_dedups(mock_embedding):
+    """Concurrent batches can't see each other's traits; duplicates are dropped on commit."""
+    llm = SlowLLMProvider()
+    nm = NeuroMemory(
+        database_url=TEST_DATABASE_URL,
+        embedding=mock_embedding,
+        llm=llm,
+        auto_extract=False,
+    )
+    await nm.init()
+
+    try:
+        user = "watermark_test_keyset_3"
+        for i in range(6):
+            await nm._add_memory(user, f"Concurrent memory {i}", memory_type="fact")
+
+        result = await nm.digest(user, batch_size=2, concurrency=3)
+        assert result["memories_analyzed"] == 6
+        assert llm.call_count == 3
+        assert llm.max_in_flight > 1
+        assert result["traits_generated"] == 1
+
+        async with nm._db.session() as session:
+            count = (await session.execute(
+                text("SELECT count(*) FROM memories WHERE user_id = :uid AND memory_type = 'trait'"),
+                {"uid": user},
+            )).scalar()
+            assert count == 1
+    finally:
+        await nm.close()
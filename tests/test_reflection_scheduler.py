@@ -0,0 +1,205 @@
+"""Tests for the cross-user reflection scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from neuromem.services.reflection_scheduler import ReflectionScheduler, TokenBucket
+
+
+def _users(n: int) -> list[str]:
+    return [f"sched_{uuid.uuid4().hex[:8]}" for _ in range(n)]
+
+
+async def _clear_queue(nm) -> None:
+    async with nm._db.session() as session:
+        await session.execute(text("DELETE FROM reflection_queue"))
+
+
+async def _queue(nm) -> dict[str, tuple]:
+    async with nm._db.session() as session:
+        rows = (await session.execute(text(
+            "SELECT user_id, status, attempts, run_digest, available_at > now() AS delayed "
+            "FROM reflection_queue"
+        ))).fetchall()
+    return {r.user_id: (r.status, r.attempts, r.run_digest, r.delayed) for r in rows}
+
+
+class _Recorder:
+    """Fake reflect() that records calls and the peak number running at once."""
+
+    def __init__(self, delay: float = 0.0, fail: set[str] | None = None):
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self._delay = delay
+        self._fail = fail or set()
+
+    async def __call__(self, user_id: str) -> dict:
+        self.calls.append(user_id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self._delay)
+            if user_id in self._fail:
+                raise RuntimeError("LLM unavailable")
+            return {"triggered": True}
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_enqueue_due_picks_users_from_state(nm):
+    await _clear_queue(nm)
+    (user_id,) = _users(1)
+    await nm._add_memory(user_id, "我在北京工作", metadata={"importance": 6})
+
+    scheduler = ReflectionScheduler(nm._db, reflect=_Recorder())
+    await scheduler.enqueue_due(limit=100000)
+    assert (await _queue(nm))[user_id][0] == "pending"
+    # Already queued users are not added twice
+    await scheduler.enqueue_due(limit=100000)
+
+    metrics = await scheduler.metrics()
+    assert metrics["pending"] >= 1
+    assert metrics["backlog_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_run_once_serves_oldest_first_under_concurrency(nm):
+    await _clear_queue(nm)
+    users = _users(3)
+    reflect = _Recorder(delay=0.05)
+    scheduler = ReflectionScheduler(nm._db, reflect=reflect, concurrency=2)
+    for user_id in users:
+        await scheduler.enqueue(user_id, trigger_type="force")
+    # Enqueuing again keeps the user's single entry and its place
+    await scheduler.enqueue(users[0])
+
+    entries = await scheduler._claim(2)
+    assert [e["user_id"] for e in entries] == users[:2]
+    await asyncio.gather(*(scheduler._execute(e) for e in entries))
+
+    assert reflect.peak == 2
+    assert set(await _queue(nm)) == {users[2]}
+    assert await scheduler.run_once() >= 1
+    assert users[2] in reflect.calls
+    assert (await scheduler.metrics())["completed"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_background_loop_respects_global_concurrency(nm):
+    await _clear_queue(nm)
+    users = _users(5)
+    reflect = _Recorder(delay=0.05)
+    scheduler = ReflectionScheduler(nm._db, reflect=reflect, concurrency=2, poll_interval=3600)
+    scheduler._last_scan = time.monotonic()  # skip the due-user scan
+    for user_id in users:
+        await scheduler.enqueue(user_id)
+
+    await scheduler.start()
+    for _ in range(100):
+        if set(users) <= set(reflect.calls) and not await _queue(nm):
+            break
+        await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+    assert sorted(reflect.calls) == sorted(users)
+    assert reflect.peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff(nm):
+    await _clear_queue(nm)
+    (user_id,) = _users(1)
+    scheduler = ReflectionScheduler(nm._db, reflect=_Recorder(fail={user_id}), max_attempts=2)
+    await scheduler.enqueue(user_id)
+
+    (entry,) = await scheduler._claim(5)
+    await scheduler._execute(entry)
+    status, attempts, _, delayed = (await _queue(nm))[user_id]
+    assert (status, attempts, delayed) == ("pending", 1, True)
+    assert await scheduler._claim(5) == []
+
+    # Last attempt drops the entry
+    await scheduler._execute({**entry, "attempts": 2})
+    assert user_id not in await _queue(nm)
+    assert (await scheduler.metrics())["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_llm_failure_is_retried(nm, monkeypatch):
+    await _clear_queue(nm)
+    (user_id,) = _users(1)
+    await nm._add_memory(user_id, "我在北京工作", metadata={"importance": 6})
+
+    async def unavailable(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(nm._llm, "chat", unavailable)
+    scheduler = nm.reflection_scheduler(max_attempts=2)
+    await scheduler.enqueue(user_id)
+    (entry,) = await scheduler._claim(5)
+    await scheduler._execute(entry)
+
+    # reflect() reported the error instead of raising; the job still failed
+    status, attempts, _, delayed = (await _queue(nm))[user_id]
+    assert (status, attempts, delayed) == ("pending", 1, True)
+    metrics = await scheduler.metrics()
+    assert (metrics["completed"], metrics["failed"]) == (0, 1)
+    async with nm._db.session() as session:
+        cycles = (await session.execute(text(
+            "SELECT status FROM reflection_cycles WHERE user_id = :u"
+        ), {"u": user_id})).scalars().all()
+    assert cycles == ["failed"]  # watermark did not move past the memory
+
+
+@pytest.mark.asyncio
+async def test_queue_survives_restart_and_expired_leases(nm):
+    await _clear_queue(nm)
+    (user_id,) = _users(1)
+    first = ReflectionScheduler(nm._db, reflect=_Recorder())
+    await first.enqueue(user_id, run_digest=True)
+    (entry,) = await first._claim(1)
+    assert entry["run_digest"] is True
+
+    # The worker "crashed" holding the lease; a new instance waits for expiry
+    digest, reflect = _Recorder(), _Recorder()
+    second = ReflectionScheduler(nm._db, reflect=reflect, digest=digest)
+    assert await second._claim(1) == []
+    async with nm._db.session() as session:
+        await session.execute(text(
+            "UPDATE reflection_queue SET leased_until = now() - interval '1 second' WHERE user_id = :u"
+        ), {"u": user_id})
+    (reclaimed,) = await second._claim(1)
+    assert reclaimed["attempts"] == 2
+
+    # Enqueued again while running -> back in the queue after the job
+    await second.enqueue(user_id)
+    await second._execute(reclaimed)
+    assert digest.calls == [user_id] and reflect.calls == [user_id]
+    assert (await _queue(nm))[user_id][:2] == ("pending", 0)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_delays_over_budget():
+    bucket = TokenBucket(tokens_per_minute=6000)  # 100 tokens/s
+    await bucket.acquire(6000)
+    started = time.monotonic()
+    await bucket.acquire(20)
+    assert time.monotonic() - started >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_interval_trigger_enqueues_on_scheduler(nm):
+    await _clear_queue(nm)
+    (user_id,) = _users(1)
+    nm.reflection_interval = 1
+    nm.reflection_scheduler(concurrency=1)
+    await nm._maybe_trigger_digest(user_id)
+    assert (await _queue(nm))[user_id][2] is True
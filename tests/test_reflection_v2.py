@@ -15,6 +15,7 @@ from sqlalchemy import text
 from neuromem.providers.embedding import EmbeddingProvider
 from neuromem.providers.llm import LLMProvider
 from neuromem.services.reflection import ReflectionService
+from neuromem.services.reflection_state import ReflectionStateService
 
 
 # ---------------------------------------------------------------------------
@@ -185,6 +186,57 @@ class TestShouldReflect:
         assert should is False
 
 
+class TestReflectionState:
+    """Trigger checks read per-user counters maintained on write."""
+
+    @pytest.mark.asyncio
+    async def test_counters_track_new_memories(self, db_session, mock_embedding, mock_llm):
+        user_id = f"ref_state_{uuid.uuid4().hex[:8]}"
+        await _ensure_session(db_session, user_id=user_id, last_reflected_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        state_svc = ReflectionStateService(db_session)
+        seeded = await state_svc.get_or_refresh(user_id)
+        assert seeded.new_memory_count == 0
+
+        await _insert_memories(db_session, mock_embedding, count=4, user_id=user_id, importance=8)
+        state = await state_svc.get(user_id)
+        assert state.new_memory_count == 4
+        assert state.accumulated_importance == 32
+
+        svc = ReflectionService(db_session, mock_embedding, mock_llm)
+        assert await svc.should_reflect(user_id) == (True, "importance_accumulated", 32.0)
+        assert [u["user_id"] for u in await state_svc.due_users(limit=1000) if u["user_id"] == user_id] == [user_id]
+
+    @pytest.mark.asyncio
+    async def test_completed_reflection_resets_counters(self, db_session, mock_embedding):
+        user_id = f"ref_state_{uuid.uuid4().hex[:8]}"
+        await _insert_memories(db_session, mock_embedding, count=3, user_id=user_id)
+        svc = ReflectionService(db_session, mock_embedding, MockReflectionLLM(main_response=EMPTY_LLM_RESPONSE))
+
+        assert (await svc.should_reflect(user_id))[1] == "first_time"
+        await svc.reflect(user_id, force=True)
+
+        state = await ReflectionStateService(db_session).get(user_id)
+        assert state.watermark is not None
+        assert state.new_memory_count == 0
+        assert state.accumulated_importance == 0
+        assert await svc.should_reflect(user_id) == (False, None, None)
+        due = await ReflectionStateService(db_session).due_users(limit=1000)
+        assert user_id not in {u["user_id"] for u in due}
+
+    @pytest.mark.asyncio
+    async def test_scheduled_trigger_skips_idle_users(self, db_session, mock_embedding):
+        idle, active = (f"ref_state_{uuid.uuid4().hex[:8]}" for _ in range(2))
+        day_ago = datetime.now(timezone.utc) - timedelta(hours=25)
+        for user_id in (idle, active):
+            await _ensure_session(db_session, user_id=user_id, last_reflected_at=day_ago)
+            await ReflectionStateService(db_session).refresh(user_id)
+        await _insert_memories(db_session, mock_embedding, count=1, user_id=active)
+
+        due = {u["user_id"]: u for u in await ReflectionStateService(db_session).due_users(limit=100000)}
+        assert idle not in due
+        assert due[active]["trigger_type"] == "scheduled"
+
+
 # ====================================================================
 # S2: Reflection Execution Engine
 # ====================================================================
@@ -459,3 +511,154 @@ class TestConversationSessionORM:
         """ORM 模型包含 last_reflected_at 字段。"""
         from neuromem.models.conversation import ConversationSession
         assert hasattr(ConversationSession, "last_reflected_at")
+
+
+class _CountingEmbedding(EmbeddingProvider):
+    """Wraps an embedding provider and counts calls per method."""
+
+    def __init__(self, inner: EmbeddingProvider):
+        self._inner = inner
+        self.embed_calls = 0
+        self.batch_sizes: list[int] = []
+
+    @property
+    def dims(self) -> int:
+        return self._inner.dims
+
+    async def embed(self, text: str) -> list[float]:
+        self.embed_calls += 1
+        return await self._inner.embed(text)
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.batch_sizes.append(len(texts))
+        return await self._inner.embed_batch(texts)
+
+
+class TestBatchedReflectionSteps:
+    """New traits are embedded in one batch and deduplicated within the cycle."""
+
+    @pytest.mark.asyncio
+    async def test_new_traits_embedded_once(self, db_session, mock_embedding):
+        user_id = f"ref_batch_{uuid.uuid4().hex[:8]}"
+        await _insert_memories(db_session, mock_embedding, count=3, user_id=user_id)
+        response = json.dumps({
+            "new_trends": [
+                {"content": "最近频繁加班", "evidence_ids": [], "window_days": 30, "context": "work"},
+                {"content": "最近频繁加班", "evidence_ids": [], "window_days": 30, "context": "work"},
+            ],
+            "new_behaviors": [
+                {"content": "喜欢晨跑", "evidence_ids": [], "confidence": 0.4, "context": "personal"},
+            ],
+            "reinforcements": [],
+            "contradictions": [],
+            "upgrades": [],
+        })
+        embedding = _CountingEmbedding(mock_embedding)
+
+        svc = ReflectionService(db_session, embedding, MockReflectionLLM(main_response=response))
+        await svc.reflect(user_id, force=True)
+
+        assert embedding.batch_sizes == [3]
+        assert embedding.embed_calls == 0
+        rows = await db_session.execute(
+            text("SELECT content FROM memories WHERE user_id = :uid AND memory_type = 'trait' ORDER BY content"),
+            {"uid": user_id},
+        )
+        assert sorted(r.content for r in rows) == sorted(["最近频繁加班", "喜欢晨跑"])
+
+
+class TestReflectionPromptBudget:
+    """The main prompt carries only relevant traits, within a token budget."""
+
+    @pytest.mark.asyncio
+    async def test_relevant_traits_selected_and_rest_summarized(self, db_session, mock_embedding, monkeypatch):
+        from neuromem.services import reflection as reflection_module
+        from neuromem.services.search import SearchService
+
+        user_id = f"ref_budget_{uuid.uuid4().hex[:8]}"
+        memories = await _insert_memories(db_session, mock_embedding, count=2, user_id=user_id)
+        svc = SearchService(db_session, mock_embedding)
+        # Same text as a new memory -> identical embedding, most relevant
+        contents = [memories[0].content] + [f"无关特质 {i} {uuid.uuid4().hex[:6]}" for i in range(5)]
+        for content in contents:
+            await svc.add_memory(user_id=user_id, content=content, memory_type="trait")
+        await db_session.execute(
+            text("UPDATE memories SET trait_stage = 'emerging', trait_subtype = 'behavior', "
+                 "trait_confidence = 0.5, trait_context = 'work' "
+                 "WHERE user_id = :uid AND memory_type = 'trait'"),
+            {"uid": user_id},
+        )
+        await db_session.commit()
+
+        one_trait = reflection_module.count_prompt_tokens(reflection_module._compact_json({
+            "id": str(uuid.uuid4()), "content": contents[0], "stage": "emerging",
+            "subtype": "behavior", "confidence": 0.5, "context": "work",
+        }))
+        monkeypatch.setattr(reflection_module, "_TRAIT_TOKEN_BUDGET", one_trait + 5)
+
+        llm = MockReflectionLLM(main_response=EMPTY_LLM_RESPONSE)
+        result = await ReflectionService(db_session, mock_embedding, llm).reflect(user_id, force=True)
+
+        prompt = llm.call_history[0][-1]["content"]
+        assert contents[0] in prompt.split("## 新增记忆")[0]
+        assert not any(c in prompt for c in contents[1:])
+        assert "另有 5 条" in prompt
+
+        row = (await db_session.execute(
+            text("SELECT prompt_tokens, completion_tokens FROM reflection_cycles WHERE id = :cid"),
+            {"cid": result["cycle_id"]},
+        )).fetchone()
+        assert row.prompt_tokens == sum(
+            reflection_module.count_prompt_tokens(m["content"]) for m in llm.call_history[0]
+        )
+        assert row.completion_tokens > 0
+
+    def test_prompt_keeps_new_memories_and_fills_budget_with_evidence(self, db_session, mock_embedding, monkeypatch):
+        from neuromem.services import reflection as reflection_module
+
+        svc = ReflectionService(db_session, mock_embedding, MockReflectionLLM())
+        memories = [
+            {"id": str(i), "content": f"记忆{i}" * 200, "memory_type": mtype}
+            for i, mtype in enumerate(["fact", "episodic", "evidence"])
+        ]
+        monkeypatch.setattr(reflection_module, "_MEMORY_TOKEN_BUDGET", 600)
+
+        prompt = svc._build_reflection_prompt(memories, [])
+        assert '"id":"0"' in prompt and '"id":"1"' in prompt
+        assert '"id":"2"' not in prompt
+        # Contents are truncated per memory
+        assert "记忆1" * 200 not in prompt
+
+    @pytest.mark.asyncio
+    async def test_memories_over_budget_wait_for_next_cycle(self, db_session, mock_embedding, monkeypatch):
+        from neuromem.services import reflection as reflection_module
+
+        user_id = f"ref_budget_{uuid.uuid4().hex[:8]}"
+        memories = await _insert_memories(db_session, mock_embedding, count=3, user_id=user_id)
+        base = datetime.now(timezone.utc) - timedelta(hours=3)
+        for i, m in enumerate(memories):
+            await db_session.execute(
+                text("UPDATE memories SET created_at = :ts WHERE id = :id"),
+                {"ts": base + timedelta(minutes=i), "id": m.id},
+            )
+        await db_session.commit()
+        one = reflection_module.count_prompt_tokens(reflection_module._memory_line({
+            "id": str(memories[0].id), "content": memories[0].content, "memory_type": "fact",
+        }))
+        monkeypatch.setattr(reflection_module, "_MEMORY_TOKEN_BUDGET", 2 * one + 1)
+
+        first = await ReflectionService(
+            db_session, mock_embedding, MockReflectionLLM(main_response=EMPTY_LLM_RESPONSE),
+        ).reflect(user_id, force=True)
+        assert first["memories_scanned"] == 2
+        watermark = (await db_session.execute(
+            text("SELECT completed_at FROM reflection_cycles WHERE id = :cid"), {"cid": first["cycle_id"]},
+        )).scalar_one()
+        assert watermark == base + timedelta(minutes=1)
+        state = await ReflectionStateService(db_session).get(user_id)
+        assert state.new_memory_count == 1
+
+        llm = MockReflectionLLM(main_response=EMPTY_LLM_RESPONSE)
+        second = await ReflectionService(db_session, mock_embedding, llm).reflect(user_id, force=True)
+        assert second["memories_scanned"] == 1
+        assert memories[2].content in llm.call_history[0][-1]["content"]
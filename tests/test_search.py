@@ -2,7 +2,7 @@
 
 import pytest
 
-from neuromem.services.search import SearchService
+from neuromem.services.search import AccessTracker, SearchService
 
 
 @pytest.mark.asyncio
@@ -160,6 +160,66 @@ async def test_access_tracking_on_search(db_session, mock_embedding):
     assert row.last_accessed_at is not None
 
 
+@pytest.mark.asyncio
+async def test_access_tracker_batches_increments(nm):
+    """With a tracker, searches only count hits; one flush writes the totals."""
+    from sqlalchemy import text
+
+    tracker = AccessTracker(nm._db, flush_interval=3600)
+    async with nm._db.session() as session:
+        svc = SearchService(session, nm._embedding, access_tracker=tracker)
+        record = await svc.add_memory(user_id="track_batch_user", content="Track batched access")
+    async with nm._db.session() as session:
+        svc = SearchService(session, nm._embedding, access_tracker=tracker)
+        for _ in range(3):
+            await svc.scored_search(user_id="track_batch_user", query="Track batched access")
+        row = (await session.execute(
+            text("SELECT access_count FROM memories WHERE id = :id"), {"id": str(record.id)},
+        )).fetchone()
+        assert row.access_count == 0
+
+    assert tracker.pending == 1
+    assert await tracker.flush() == 1
+    await tracker.close()
+    async with nm._db.session() as session:
+        row = (await session.execute(
+            text("SELECT access_count, last_accessed_at FROM memories WHERE id = :id"),
+            {"id": str(record.id)},
+        )).fetchone()
+    assert row.access_count == 3
+    assert row.last_accessed_at is not None
+
+
+@pytest.mark.asyncio
+async def test_access_tracker_sampling_weights_counts(monkeypatch):
+    """Sampled accesses are counted with weight 1 / sample_rate."""
+    from neuromem.services import search as search_module
+
+    draws = iter([0.1, 0.9, 0.9, 0.9])
+    monkeypatch.setattr(search_module.random, "random", lambda: next(draws))
+    tracker = AccessTracker(None, flush_interval=3600, sample_rate=0.25)
+    for _ in range(4):
+        tracker.record("u", ["m1"])
+    assert tracker._pending["m1"][1] == 4
+    tracker._timer.cancel()
+
+    with pytest.raises(ValueError):
+        AccessTracker(None, sample_rate=0)
+
+
+def test_stochastic_round_is_unbiased(monkeypatch):
+    """Fractional weights (e.g. 1 / 0.3) round up with probability equal to the fraction."""
+    from neuromem.services import search as search_module
+
+    assert search_module._stochastic_round(4.0) == 4
+    rng = search_module.random.Random(7)
+    monkeypatch.setattr(search_module.random, "random", rng.random)
+    weight = 1 / 0.3
+    draws = [search_module._stochastic_round(weight) for _ in range(20000)]
+    assert set(draws) == {3, 4}
+    assert sum(draws) / len(draws) == pytest.approx(weight, rel=0.01)
+
+
 @pytest.mark.asyncio
 async def test_access_tracking_on_scored_search(db_session, mock_embedding):
     """Test that scored_search also updates access tracking."""
@@ -203,3 +263,47 @@ async def test_scored_search_with_emotion_arousal(db_session, mock_embedding):
     # Both should have valid scores
     for r in results:
         assert r["score"] > 0
+
+
+@pytest.mark.asyncio
+async def test_scored_search_many_matches_single_queries(db_session, mock_embedding):
+    """scored_search_many returns the same per-query hits as scored_search."""
+    svc = SearchService(db_session, mock_embedding)
+    for content in ["我喜欢 Python", "我住在北京", "我在 Google 工作", "周末去爬山", "养了一只猫"]:
+        await svc.add_memory(user_id="multi_user", content=content, metadata={"importance": 5})
+    await db_session.commit()
+
+    queries = ["Python", "北京", "爬山"]
+    batched = await svc.scored_search_many(user_id="multi_user", queries=queries, limit=3)
+    assert len(batched) == len(queries)
+    for query, hits in zip(queries, batched):
+        single = await svc.scored_search(user_id="multi_user", query=query, limit=3)
+        assert [(h["id"], h["score"]) for h in hits] == [(h["id"], h["score"]) for h in single]
+
+    assert await svc.scored_search_many(user_id="multi_user", queries=[]) == []
+
+
+@pytest.mark.parametrize("backend", ["tsvector", "pg_search", "blind_index"])
+def test_scored_sql_reads_query_from_given_expressions(db_session, mock_embedding, backend):
+    """Every BM25 backend reads the query through the expressions passed in."""
+    svc = SearchService(db_session, mock_embedding)
+    svc._pg_search = backend == "pg_search"
+    svc._encryption = object() if backend == "blind_index" else None
+
+    bound, _ = svc._build_scored_sql(user_id="u", limit=3)
+    assert ":query_vec" in bound
+    assert (":query_tokens" if backend == "blind_index" else ":query_text") in bound
+
+    lateral, params = svc._build_scored_sql(
+        user_id="u", limit=3,
+        query_vec="q.query_vec", query_text="q.query_text", query_tokens="q.query_tokens",
+    )
+    assert ":query_" not in lateral
+    assert "CAST(q.query_vec AS vector)" in lateral
+    expected = {
+        "tsvector": "neuromem_tsquery(q.query_text)",
+        "pg_search": "paradedb.parse(q.query_text)",
+        "blind_index": "CAST(q.query_tokens AS bigint[])",
+    }[backend]
+    assert expected in lateral
+    assert not {"query_vec", "query_text", "query_tokens"} & params.keys()
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import datetime, timezone
 
 import pytest
 
-from neuromem.services.temporal import TemporalExtractor
+from neuromem.services.temporal import TemporalExtractor, _RuleSet
+from tests._temporal_reference import TemporalExtractor as ReferenceExtractor
 
 
 @pytest.fixture
@@ -358,3 +360,73 @@ class TestExtractTimeRange:
         after, before = extractor.extract_time_range("你叫什么名字", ref_time)
         assert after is None
         assert before is None
+
+
+# ---------------------------------------------------------------------------
+# Literal prefilter vs. searching every rule
+# ---------------------------------------------------------------------------
+
+_TOKENS = [
+    "2023-05-07", "2023-13-45", "2023-05-07T14:30", "2023-05-07 25:99", "٢٠٢٣-٠٥-٠٧",
+    "May 7, 2023", "February 30, 2023", "Sept. 3 2022", "7 May 2023", "31 June 2023",
+    "2023年5月7日", "2023年2月30日", "5月7日", "13月40日", "5月", "13月", "十二月", "2023年",
+    "1800年", "summer", "last summer", "Winter 2022", "夏天", "去年冬天", "Q3 2023", "q5 2023",
+    "2023年第三季度", "yesterday", "TODAY", "the day before yesterday", "3 days ago",
+    "2 Weeks Ago", "last week", "last Monday", "LAST FRIDAY", "3天前", "2周前", "1个月前",
+    "5年前", "昨天", "前天", "大前天", "今天", "后天", "大后天", "明天", "最近", "这周",
+    "上周", "上个月", "本月", "今年", "去年", "in June", "during Dec. 2022", "in Foo",
+    "in the summer", "during autumn 2021", "in 2020", "in 1800", "around 2024", "laſt week",
+]
+_FILLER = ["", " ", "I went hiking", "我们", "then", ",", "会议", "and", "\n", "x"]
+
+
+def _corpus(n: int = 600, seed: int = 7) -> list[str]:
+    import random
+
+    rng = random.Random(seed)
+    texts = list(_TOKENS)
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            parts.append(rng.choice(_FILLER))
+            parts.append(rng.choice(_TOKENS))
+        texts.append(rng.choice(["", " "]).join(parts))
+    return texts
+
+
+class TestRulePrefilter:
+    @staticmethod
+    def _outcome(fn, *args):
+        try:
+            return fn(*args)
+        except Exception as e:  # errors must match too
+            return type(e)
+
+    def test_requirements_hold_for_every_match(self, extractor, ref_time):
+        rules = extractor._extract_rules().rules + extractor._range_rules().rules
+        for rule in rules:
+            probe = replace(rule, handler=lambda *args: True)
+            for text in _corpus(200):
+                matched = extractor._evaluate([probe], text, ref_time)
+                assert bool(_RuleSet([probe]).candidates(text)) or not matched, (rule.pattern, text)
+
+    def test_extract_matches_reference_cascade(self, extractor, ref_time):
+        reference = ReferenceExtractor()
+        for text in _corpus():
+            expected = self._outcome(reference.extract, text, ref_time)
+            assert self._outcome(extractor.extract, text, ref_time) == expected, text
+
+    def test_time_range_matches_reference_cascade(self, extractor, ref_time):
+        reference = ReferenceExtractor()
+        for text in _corpus():
+            expected = self._outcome(reference.extract_time_range, text, ref_time)
+            assert self._outcome(extractor.extract_time_range, text, ref_time) == expected, text
+
+    def test_rejected_match_falls_through(self, extractor, ref_time):
+        # Invalid ISO date is skipped in favour of a later rule
+        assert extractor.extract("2023-13-45 then 5月7日", ref_time) == datetime(2023, 5, 7, tzinfo=timezone.utc)
+        assert extractor.extract_time_range("13月 in June", ref_time)[0] == datetime(2023, 6, 1, tzinfo=timezone.utc)
+
+    def test_case_fold_trap_tries_every_rule(self, extractor, ref_time):
+        # "ſ" matches "s" case-insensitively but lowercases to itself
+        assert extractor.extract("laſt week", ref_time) == datetime(2023, 6, 8, tzinfo=timezone.utc)
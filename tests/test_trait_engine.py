@@ -16,7 +16,7 @@ from sqlalchemy import text
 from neuromem.models.memory import Memory
 from neuromem.providers.embedding import EmbeddingProvider
 from neuromem.providers.llm import LLMProvider
-from neuromem.services.trait_engine import TraitEngine
+from neuromem.services.trait_engine import TraitEngine, current_confidence, trait_stage_sql
 
 
 # ---------------------------------------------------------------------------
@@ -368,6 +368,27 @@ class TestReinforcement:
         await db_session.refresh(trait)
         assert 0 <= trait.trait_confidence <= 1.0
 
+    @pytest.mark.asyncio
+    async def test_bulk_reinforce_matches_repeated_reinforce(self, db_session, mock_embedding):
+        """n 次无证据强化合并为一次 UPDATE，结果与逐次强化一致。"""
+        engine = TraitEngine(db_session, mock_embedding)
+        one_by_one = await _insert_trait(db_session, mock_embedding, trait_confidence=0.55, trait_stage="emerging")
+        bulk = await _insert_trait(db_session, mock_embedding, trait_confidence=0.55, trait_stage="emerging")
+        await db_session.commit()
+
+        for _ in range(4):
+            await engine.reinforce_trait(str(one_by_one.id), [], "D", "recall_reinforcement")
+        assert await engine.reinforce_traits_bulk({str(bulk.id): 4}) == 1
+        await db_session.commit()
+
+        await db_session.refresh(one_by_one)
+        await db_session.refresh(bulk)
+        assert bulk.trait_confidence == pytest.approx(one_by_one.trait_confidence, abs=1e-3)
+        assert bulk.trait_stage == one_by_one.trait_stage == "established"
+        assert bulk.trait_reinforcement_count == 0
+        assert bulk.version == 2
+        assert abs((bulk.trait_dissolve_at - one_by_one.trait_dissolve_at).total_seconds()) < 3600
+
 
 class TestContradiction:
     """Tests for TraitEngine.apply_contradiction()."""
@@ -495,7 +516,7 @@ class TestContradiction:
 # ====================================================================
 
 class TestDecay:
-    """Tests for TraitEngine.apply_decay()."""
+    """Tests for lazy confidence decay and TraitEngine.apply_decay()."""
 
     @pytest.mark.asyncio
     async def test_decay_behavior(self, db_session, mock_embedding):
@@ -517,7 +538,9 @@ class TestDecay:
 
         effective_lambda = 0.005 / (1 + 0.1 * 1)
         expected = 0.5 * math.exp(-effective_lambda * 30)
-        assert abs(trait.trait_confidence - expected) < 0.01
+        assert abs(current_confidence(trait) - expected) < 0.01
+        # Decay is evaluated on read; the stored value is not rewritten
+        assert trait.trait_confidence == 0.5
 
     @pytest.mark.asyncio
     async def test_decay_core_slow(self, db_session, mock_embedding):
@@ -538,9 +561,9 @@ class TestDecay:
 
         effective_lambda = 0.001 / (1 + 0.1 * 10)
         expected = 0.9 * math.exp(-effective_lambda * 30)
-        assert abs(trait.trait_confidence - expected) < 0.01
+        assert abs(current_confidence(trait) - expected) < 0.01
         # core 衰减很慢，30 天后仍然很高
-        assert trait.trait_confidence > 0.85
+        assert current_confidence(trait) > 0.85
 
     @pytest.mark.asyncio
     async def test_decay_dissolved_threshold(self, db_session, mock_embedding):
@@ -594,7 +617,92 @@ class TestDecay:
         await db_session.refresh(trait_a)
         await db_session.refresh(trait_b)
         # 多强化的 trait 衰减更慢
-        assert trait_b.trait_confidence > trait_a.trait_confidence
+        assert current_confidence(trait_b) > current_confidence(trait_a)
+
+    @pytest.mark.asyncio
+    async def test_decay_stage_computed_on_read(self, db_session, mock_embedding):
+        """读取时按衰减后的 confidence 降级 stage，行本身不被改写。"""
+        engine = TraitEngine(db_session, mock_embedding)
+        last_reinforced = datetime.now(timezone.utc) - timedelta(days=100)
+        trait = await _insert_trait(
+            db_session, mock_embedding,
+            trait_confidence=0.9,
+            trait_subtype="behavior",
+            trait_stage="core",
+            trait_reinforcement_count=0,
+            trait_last_reinforced=last_reinforced,
+        )
+        version = trait.version
+
+        dissolved = await engine.apply_decay("te_user")
+        await db_session.refresh(trait)
+        assert dissolved == 0
+        assert trait.version == version
+        assert trait.trait_stage == "core"
+        assert trait.trait_dissolve_at is not None
+
+        row = (await db_session.execute(
+            text(f"SELECT {trait_stage_sql()} AS stage FROM memories WHERE id = :id"),
+            {"id": trait.id},
+        )).one()
+        expected = 0.9 * math.exp(-0.005 * 100)
+        assert engine._update_stage(expected) == "emerging"
+        assert row.stage == "emerging"
+
+    @pytest.mark.asyncio
+    async def test_reinforce_reanchors_decayed_confidence(self, db_session, mock_embedding):
+        """强化从衰减后的 confidence 出发，并重置锚点。"""
+        engine = TraitEngine(db_session, mock_embedding)
+        trait = await _insert_trait(
+            db_session, mock_embedding,
+            trait_confidence=0.6,
+            trait_subtype="behavior",
+            trait_stage="established",
+            trait_last_reinforced=datetime.now(timezone.utc) - timedelta(days=60),
+        )
+        decayed = 0.6 * math.exp(-0.005 * 60)
+
+        await engine.reinforce_trait(str(trait.id), [], "B", str(uuid.uuid4()))
+        await db_session.refresh(trait)
+
+        expected = decayed + (1 - decayed) * 0.20
+        assert abs(trait.trait_confidence - expected) < 0.01
+        assert abs(current_confidence(trait) - expected) < 0.01
+        assert trait.trait_confidence_at is not None
+        assert trait.trait_dissolve_at > trait.trait_confidence_at
+
+    @pytest.mark.asyncio
+    async def test_maintain_all_users(self, db_session, mock_embedding):
+        """maintain(None) 一次处理所有用户。"""
+        engine = TraitEngine(db_session, mock_embedding)
+        now = datetime.now(timezone.utc)
+        decaying = [
+            await _insert_trait(
+                db_session, mock_embedding,
+                user_id=user,
+                trait_confidence=0.15,
+                trait_subtype="behavior",
+                trait_stage="candidate",
+                trait_last_reinforced=now - timedelta(days=365),
+            )
+            for user in ("te_user_a", "te_user_b")
+        ]
+        trend = await _insert_trait(
+            db_session, mock_embedding,
+            user_id="te_user_c",
+            trait_stage="trend",
+            trait_confidence=None,
+            trait_window_start=now - timedelta(days=5),
+            trait_window_end=now + timedelta(days=25),
+            trait_reinforcement_count=2,
+        )
+
+        result = await engine.maintain()
+        assert result == {"expired": 0, "promoted": 1, "dissolved": 2}
+        for trait in [*decaying, trend]:
+            await db_session.refresh(trait)
+        assert all(t.trait_stage == "dissolved" and t.expired_at for t in decaying)
+        assert trend.trait_stage == "candidate"
 
 
 # ====================================================================
@@ -955,3 +1063,62 @@ class TestResolveContradiction:
         assert trait.content == "不应改变的 trait"
         assert trait.trait_stage == "emerging"
         assert trait.trait_confidence == 0.5
+
+    @pytest.mark.asyncio
+    async def test_resolve_contradictions_runs_llm_concurrently(self, db_session, mock_embedding):
+        """多个专项反思的 LLM 调用并发执行，且不超过并发上限。"""
+        import asyncio
+
+        class SlowLLM(LLMProvider):
+            def __init__(self):
+                self.active = 0
+                self.peak = 0
+
+            async def chat(self, messages, temperature=0.1, max_tokens=2048) -> str:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                await asyncio.sleep(0.05)
+                self.active -= 1
+                return '{"action": "dissolve", "reasoning": "矛盾太强"}'
+
+        engine = TraitEngine(db_session, mock_embedding)
+        traits = [
+            await _insert_trait(db_session, mock_embedding, trait_confidence=0.3, trait_contradiction_count=3)
+            for _ in range(3)
+        ]
+        llm = SlowLLM()
+        missing = str(uuid.uuid4())
+
+        results = await engine.resolve_contradictions(
+            [str(t.id) for t in traits] + [missing], llm=llm, cycle_id=str(uuid.uuid4()), concurrency=2,
+        )
+        assert [r["trait_id"] for r in results] == [str(t.id) for t in traits] + [missing]
+        assert all(r["action"] == "dissolve" for r in results)
+        assert llm.peak == 2
+        for trait in traits:
+            await db_session.refresh(trait)
+            assert trait.trait_stage == "dissolved"
+
+
+class TestFindSimilarTraits:
+    """Tests for TraitEngine.find_similar_traits()."""
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_by_hash_and_vector(self, db_session, mock_embedding):
+        user_id = f"te_sim_{uuid.uuid4().hex[:8]}"
+        engine = TraitEngine(db_session, mock_embedding)
+        by_hash = await _insert_trait(db_session, mock_embedding, user_id=user_id, content="喜欢喝咖啡")
+        dissolved = await _insert_trait(
+            db_session, mock_embedding, user_id=user_id, content="已废弃的特质", trait_stage="dissolved",
+        )
+        by_vector = await _insert_trait(db_session, mock_embedding, user_id=user_id, content="喜欢爬山")
+
+        contents = ["喜欢喝咖啡", "已废弃的特质", "完全不同的内容", "喜欢爬山 "]
+        vectors = [await mock_embedding.embed(c) for c in contents]
+        # Same direction as the stored vector -> cosine similarity 1.0
+        vectors[3] = [v * 2 for v in await mock_embedding.embed("喜欢爬山")]
+
+        matches = await engine.find_similar_traits(user_id, contents, vectors)
+        assert [m.id if m else None for m in matches] == [by_hash.id, None, None, by_vector.id]
+        assert dissolved.id not in {m.id for m in matches if m}
+        assert await engine.find_similar_traits(user_id, [], []) == []